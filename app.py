@@ -5,81 +5,117 @@ from flask_migrate import Migrate
 from common.cache import cached
 import os
 import cloudinary
-import cloudinary.uploader
-import cloudinary.api
 from config import get_config
 from common.database import db
+from common import connections, query_profiler
 from common.cache import cache
-from auth.routes import auth_bp
-from auth.document_route import document_bp
-from auth.country_route import country_bp
-from api.users.routes import users_bp
-from api.merchants.routes import merchants_bp
 from auth import email_init
 from models import *  # Import all models
 from models.system_monitoring import SystemMonitoring
 
-from routes.superadmin_routes import superadmin_bp
-from routes.merchant_routes import merchant_dashboard_bp
-from routes.product_routes import product_bp
-from routes.category_routes import category_bp
-from routes.brand_routes import brand_bp
-from routes.homepage_routes import homepage_bp
-from routes.cart_routes import cart_bp
-from routes.wishlist_routes import wishlist_bp
-from routes.order_routes import order_bp
-from routes.user_address_routes import user_address_bp
-from routes.currency_routes import currency_bp
-from routes.feature_product_routes import feature_product_bp
-
-from routes.promo_product_routes import promo_product_bp
-from auth.admin_routes import admin_bp
-from routes.payment_card_routes import payment_card_bp
-from routes.review_routes import review_bp
-from routes.analytics_routes import analytics_bp
-
-from routes.merchant_support_routes import merchant_support_bp
-from routes.admin_support_routes import admin_support_bp
-from routes.user_support_routes import user_support_bp
-from routes.promotion_routes import superadmin_promotion_bp
-from routes.promo_code_routes import promo_code_bp
-from routes.merchant_transaction_routes import merchant_transaction_bp
-
-from routes.games_routes import games_bp
-from routes.shiprocket_routes import shiprocket_bp
-from routes.live_stream_public_routes import live_stream_public_bp
-from routes.shop.shop_product_routes import shop_product_bp
-from routes.shop.shop_routes import shop_bp
-from routes.shop.shop_category_routes import shop_category_bp
-from routes.shop.shop_brand_routes import shop_brand_bp
-from routes.shop.shop_attribute_routes import shop_attribute_bp
-from routes.shop.shop_stock_routes import shop_stock_bp
-from routes.shop.variant_routes import variant_bp
-from routes.shop.shop_review_routes import shop_review_bp
-
-# Public shop routes
-from routes.shop.public.public_shop_routes import public_shop_bp
-from routes.shop.public.public_shop_product_routes import public_shop_product_bp
-from routes.shop.public.public_shop_category_routes import public_shop_category_bp
-from routes.shop.public.public_shop_brand_routes import public_shop_brand_bp
-from routes.shop.public.public_shop_cart_routes import public_shop_cart_bp
-from routes.shop.public.public_shop_wishlsit_routes import public_shop_wishlist_bp
-from routes.shop.public.public_shop_order_routes import public_shop_order_bp
-
-from routes.upload_routes import upload_bp
-from routes.translate_routes import translate_bp
-
-
 from flasgger import Swagger
-from cryptography.fernet import Fernet
+import importlib
 import time
 import psutil
 import traceback
 from datetime import datetime, timezone, timedelta
-from apscheduler.schedulers.background import BackgroundScheduler
-import threading
-from controllers.newsletter_public_controller import newsletter_public_bp
 
+# Blueprint registry in registration order: (module, blueprint attribute, url_prefix, group).
+# Modules are imported inside create_app, and only for the groups enabled by BLUEPRINT_GROUPS,
+# so a worker that serves one surface (e.g. the storefront) never imports the controllers of
+# the others. 'core' blueprints are always registered.
+BLUEPRINTS = [
+    ('auth.routes', 'auth_bp', '/api/auth', 'core'),
+    ('api.users.routes', 'users_bp', '/api/users', 'core'),
+    ('api.merchants.routes', 'merchants_bp', '/api/merchants', 'merchant'),
+    ('auth.document_route', 'document_bp', '/api/merchant/documents', 'merchant'),
+    ('routes.superadmin_routes', 'superadmin_bp', '/api/superadmin', 'admin'),
+    ('routes.merchant_routes', 'merchant_dashboard_bp', '/api/merchant-dashboard', 'merchant'),
+    ('auth.country_route', 'country_bp', None, 'core'),
+    ('auth.admin_routes', 'admin_bp', '/api/admin', 'admin'),
+    ('routes.product_routes', 'product_bp', None, 'storefront'),
+    ('routes.category_routes', 'category_bp', '/api/categories', 'storefront'),
+    ('routes.brand_routes', 'brand_bp', '/api/brands', 'storefront'),
+    ('routes.homepage_routes', 'homepage_bp', '/api/homepage', 'storefront'),
+    ('routes.cart_routes', 'cart_bp', '/api/cart', 'storefront'),
+    ('routes.wishlist_routes', 'wishlist_bp', '/api/wishlist', 'storefront'),
+    ('routes.order_routes', 'order_bp', '/api/orders', 'storefront'),
+    ('routes.user_address_routes', 'user_address_bp', '/api/user-address', 'storefront'),
+    ('routes.currency_routes', 'currency_bp', None, 'core'),
+    ('routes.feature_product_routes', 'feature_product_bp', '/api/featured-products', 'storefront'),
+    ('routes.promo_product_routes', 'promo_product_bp', '/api/promo-products', 'storefront'),
+    ('routes.payment_card_routes', 'payment_card_bp', None, 'storefront'),
+    ('routes.review_routes', 'review_bp', '/api/reviews', 'storefront'),
+    ('routes.merchant_support_routes', 'merchant_support_bp', None, 'support'),
+    ('routes.admin_support_routes', 'admin_support_bp', None, 'support'),
+    ('routes.user_support_routes', 'user_support_bp', None, 'support'),
+    ('routes.analytics_routes', 'analytics_bp', '/api/analytics', 'admin'),
+    ('routes.promotion_routes', 'superadmin_promotion_bp', None, 'admin'),
+    ('routes.promo_code_routes', 'promo_code_bp', None, 'storefront'),
+    ('routes.merchant_transaction_routes', 'merchant_transaction_bp', '/api', 'merchant'),
+    ('routes.games_routes', 'games_bp', None, 'storefront'),
+    ('routes.shiprocket_routes', 'shiprocket_bp', None, 'integrations'),
+    ('routes.live_stream_public_routes', 'live_stream_public_bp', None, 'storefront'),
+    ('routes.shop.shop_product_routes', 'shop_product_bp', None, 'admin'),
+    ('routes.shop.shop_routes', 'shop_bp', None, 'admin'),
+    ('routes.shop.shop_category_routes', 'shop_category_bp', None, 'admin'),
+    ('routes.shop.shop_brand_routes', 'shop_brand_bp', None, 'admin'),
+    ('routes.shop.shop_attribute_routes', 'shop_attribute_bp', None, 'admin'),
+    ('routes.shop.shop_stock_routes', 'shop_stock_bp', None, 'admin'),
+    ('routes.shop.variant_routes', 'variant_bp', '/api/shop', 'admin'),
+    ('routes.shop.shop_review_routes', 'shop_review_bp', None, 'admin'),
+    # Public shop routes
+    ('routes.shop.public.public_shop_routes', 'public_shop_bp', None, 'storefront'),
+    ('routes.shop.public.public_shop_product_routes', 'public_shop_product_bp', None, 'storefront'),
+    ('routes.shop.public.public_shop_category_routes', 'public_shop_category_bp', None, 'storefront'),
+    ('routes.shop.public.public_shop_brand_routes', 'public_shop_brand_bp', None, 'storefront'),
+    ('routes.shop.public.public_shop_cart_routes', 'public_shop_cart_bp', '/api/shop-cart', 'storefront'),
+    ('routes.shop.public.public_shop_wishlsit_routes', 'public_shop_wishlist_bp', None, 'storefront'),
+    ('routes.shop.public.public_shop_order_routes', 'public_shop_order_bp', '/api', 'storefront'),
+    ('controllers.newsletter_public_controller', 'newsletter_public_bp', '/api/public', 'storefront'),
+    ('routes.upload_routes', 'upload_bp', '/api/upload', 'core'),
+]
+
+
+def register_blueprints(app):
+    """Import and register the blueprints of the groups enabled by BLUEPRINT_GROUPS (all when unset)."""
+    groups = app.config.get('BLUEPRINT_GROUPS')
+    for module_name, attribute, url_prefix, group in BLUEPRINTS:
+        if groups and group != 'core' and group not in groups:
+            continue
+        blueprint = getattr(importlib.import_module(module_name), attribute)
+        if url_prefix:
+            app.register_blueprint(blueprint, url_prefix=url_prefix)
+        else:
+            app.register_blueprint(blueprint)
+
+    # Optional: Translation endpoints behind feature flag
+    if app.config.get('FEATURE_TRANSLATION'):
+        from routes.translate_routes import translate_bp
+        app.register_blueprint(translate_bp)
+
+def start_background_jobs(app):
+    """Start the in-process schedulers; imported here so importing app.py does not pull in the service layer."""
+    from services.recently_viewed_service import start_recently_viewed_flusher
+    from services.effective_price_service import start_effective_price_scheduler
+    from services.placement_cache_service import start_placement_expiry_scheduler
+    from services.translate_service import start_translation_warmer
+    from services.wishlist_alert_service import start_wishlist_alert_scheduler
+
+    # Write-behind flush of recently viewed products
+    start_recently_viewed_flusher(app)
+
+    # Keep materialized effective prices current as special windows open and close
+    start_effective_price_scheduler(app)
+
+    # Deactivate expired featured/promoted placements
+    start_placement_expiry_scheduler(app)
+
+    # Pre-translate newly approved products (FEATURE_TRANSLATION + TRANSLATE_PREWARM_LANGUAGES)
+    start_translation_warmer(app)
+
+    # Price drop / back-in-stock alerts for wishlisted products and their email digests
+    start_wishlist_alert_scheduler(app)
 
 ALLOWED_ORIGINS = [
     "http://localhost:5173",
@@ -158,6 +194,16 @@ def create_app(config_name='default'):
 
     Swagger(app, config=swagger_config, template=swagger_template)
 
+    # Serve the spec written at build time, if any, instead of introspecting every route.
+    # The file replaces flasgger's view outright: flasgger rebuilds its cached spec on every
+    # request while app.debug is on, so seeding its cache would not survive development config.
+    spec_file = app.config.get('SWAGGER_SPEC_FILE')
+    if spec_file and os.path.exists(spec_file):
+        def prebuilt_apispec():
+            return send_from_directory(os.path.dirname(spec_file), os.path.basename(spec_file),
+                                       mimetype='application/json')
+        app.view_functions['flasgger.apispec'] = prebuilt_apispec
+
     # Configure CORS with more specific settings
     CORS(app, 
          resources={
@@ -173,78 +219,25 @@ def create_app(config_name='default'):
          max_age=3600)  # Cache preflight requests for 1 hour
 
     # Initialize extensions
+    connections.configure_engine_options(app)
     db.init_app(app)
+    connections.init_app(app)
+    query_profiler.init_app(app)
     cache.init_app(app)
     jwt = JWTManager(app)
     email_init.init_app(app)
     migrate = Migrate(app, db)
 
     # Register blueprints
-    app.register_blueprint(auth_bp, url_prefix='/api/auth')
-    app.register_blueprint(users_bp, url_prefix='/api/users')
-    app.register_blueprint(merchants_bp, url_prefix='/api/merchants')
-    app.register_blueprint(document_bp, url_prefix='/api/merchant/documents')
-    app.register_blueprint(superadmin_bp, url_prefix='/api/superadmin')
-    app.register_blueprint(merchant_dashboard_bp, url_prefix='/api/merchant-dashboard')
-    app.register_blueprint(country_bp)
-    app.register_blueprint(admin_bp, url_prefix='/api/admin')
-    app.register_blueprint(product_bp)
-    app.register_blueprint(category_bp, url_prefix='/api/categories')
-    app.register_blueprint(brand_bp, url_prefix='/api/brands')
-    app.register_blueprint(homepage_bp, url_prefix='/api/homepage')
-    app.register_blueprint(cart_bp, url_prefix='/api/cart')
-    app.register_blueprint(wishlist_bp, url_prefix='/api/wishlist')
-    app.register_blueprint(order_bp, url_prefix='/api/orders')
-    app.register_blueprint(user_address_bp, url_prefix='/api/user-address')
-    app.register_blueprint(currency_bp)
-    app.register_blueprint(feature_product_bp, url_prefix='/api/featured-products')
-    app.register_blueprint(promo_product_bp, url_prefix='/api/promo-products')
-    app.register_blueprint(payment_card_bp)
-    app.register_blueprint(review_bp, url_prefix='/api/reviews')
-
-    app.register_blueprint(merchant_support_bp)
-    app.register_blueprint(admin_support_bp)
-    app.register_blueprint(user_support_bp)
-
-    app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
-    
-    app.register_blueprint(superadmin_promotion_bp)
-    app.register_blueprint(promo_code_bp)
-    app.register_blueprint(merchant_transaction_bp, url_prefix='/api')
-
-    app.register_blueprint(games_bp)
-    app.register_blueprint(shiprocket_bp)
-    app.register_blueprint(live_stream_public_bp)
-    app.register_blueprint(shop_product_bp)
-    app.register_blueprint(shop_bp)
-    app.register_blueprint(shop_category_bp)
-    app.register_blueprint(shop_brand_bp)
-    app.register_blueprint(shop_attribute_bp)
-    app.register_blueprint(shop_stock_bp)
-    app.register_blueprint(variant_bp, url_prefix='/api/shop')
-    app.register_blueprint(shop_review_bp)
-
-    
-    # Register public shop routes
-    app.register_blueprint(public_shop_bp)
-    app.register_blueprint(public_shop_product_bp)
-    app.register_blueprint(public_shop_category_bp)
-    app.register_blueprint(public_shop_brand_bp)
-    app.register_blueprint(public_shop_cart_bp, url_prefix='/api/shop-cart')
-    app.register_blueprint(public_shop_wishlist_bp)
-    app.register_blueprint(public_shop_order_bp, url_prefix='/api')
-
-    app.register_blueprint(newsletter_public_bp, url_prefix='/api/public')
-
-    app.register_blueprint(upload_bp, url_prefix='/api/upload')
-
-    # Optional: Translation endpoints behind feature flag
-    if app.config.get('FEATURE_TRANSLATION'):
-        app.register_blueprint(translate_bp)
+    register_blueprints(app)
 
     # Add custom headers to every response
     app.after_request(add_headers)
 
+    # Background schedulers (START_BACKGROUND_JOBS=false leaves them to another process)
+    if app.config.get('START_BACKGROUND_JOBS', True):
+        start_background_jobs(app)
+
     # Add monitoring middleware
     @app.before_request
     def before_request():
@@ -11,6 +11,7 @@ from common.database import db
 from auth.models.merchant_document import MerchantDocument, DocumentType, DocumentStatus
 from auth.models.models import User, UserRole
 from auth.models.models import MerchantProfile, VerificationStatus
+from services.signed_upload_service import SignedUploadService, SignedUploadError
 
 document_bp = Blueprint('document', __name__, url_prefix='/api/merchant/documents')
 
@@ -85,8 +86,13 @@ def upload_document():
       - in: formData
         name: file
         type: file
-        required: true
-        description: Document file (PDF, JPEG, PNG, Excel, or CSV)
+        required: false
+        description: Document file (PDF, JPEG, PNG, Excel, or CSV); required unless asset_token is given
+      - in: formData
+        name: asset_token
+        type: string
+        required: false
+        description: asset_token of a merchant_document uploaded through /api/upload/signed
       - in: formData
         name: document_type
         type: string
@@ -113,11 +119,12 @@ def upload_document():
         if not merchant:
             return jsonify({'message': 'Merchant profile not found'}), HTTPStatus.NOT_FOUND
         
-        # Validate form data
-        if 'file' not in request.files or 'document_type' not in request.form:
+        # Validate form data: either the file itself or the asset_token of a signed direct upload
+        asset_token = request.form.get('asset_token')
+        if ('file' not in request.files and not asset_token) or 'document_type' not in request.form:
             return jsonify({'message': 'File and document type are required'}), HTTPStatus.BAD_REQUEST
         
-        file = request.files['file']
+        file = request.files.get('file')
         document_type_str = request.form['document_type']
         
         # Validate document type
@@ -126,18 +133,30 @@ def upload_document():
         except ValueError:
             return jsonify({'message': f"Invalid document type. Allowed types: {[t.value for t in DocumentType]}"}), HTTPStatus.BAD_REQUEST
         
-        # Validate file
-        is_valid, error_message = validate_file(file)
-        if not is_valid:
-            return jsonify({'message': error_message}), HTTPStatus.BAD_REQUEST
+        if asset_token:
+            # Already uploaded and verified by /api/upload/signed/complete
+            try:
+                upload_result = SignedUploadService.redeem(asset_token, 'merchant_document', current_user.id)
+            except SignedUploadError as e:
+                return jsonify({'message': str(e)}), HTTPStatus.BAD_REQUEST
+            file_name = upload_result['file_name'] or upload_result['public_id'].rsplit('/', 1)[-1]
+            mime_type = upload_result['content_type']
+        else:
+            # Validate file
+            is_valid, error_message = validate_file(file)
+            if not is_valid:
+                return jsonify({'message': error_message}), HTTPStatus.BAD_REQUEST
+            upload_result = None
+            file_name = file.filename
+            mime_type = file.mimetype
         
         # Check if document type already exists for merchant
         existing_doc = MerchantDocument.get_by_merchant_and_type(merchant.id, document_type)
         
         try:
             # Determine resource type and format based on file type
-            resource_type = get_cloudinary_resource_type(file.mimetype)
-            format = get_cloudinary_format(file.mimetype)
+            resource_type = get_cloudinary_resource_type(mime_type)
+            format = get_cloudinary_format(mime_type)
             
             # Prepare upload options
             upload_options = {
@@ -152,7 +171,7 @@ def upload_document():
                 upload_options['format'] = format
             
             # Add specific options for PDFs
-            if file.mimetype == 'application/pdf':
+            if mime_type == 'application/pdf':
                 upload_options.update({
                     'resource_type': 'raw',
                     'format': 'pdf',
@@ -161,25 +180,23 @@ def upload_document():
                 current_app.logger.debug(f"PDF upload options: {upload_options}")
             
             # Upload to Cloudinary with appropriate options
-            upload_result = cloudinary.uploader.upload(
-                file,
-                **upload_options
-            )
+            if upload_result is None:
+                upload_result = cloudinary.uploader.upload(
+                    file,
+                    **upload_options
+                )
             current_app.logger.debug(f"Cloudinary upload result: {upload_result}")
             
             if existing_doc:
-                # Delete old file from Cloudinary
-                try:
-                    cloudinary.uploader.destroy(existing_doc.public_id)
-                except cloudinary.exceptions.Error as e:
-                    current_app.logger.warning(f"Failed to delete old file from Cloudinary: {str(e)}")
+                # Delete old file from Cloudinary (or the local upload stub)
+                SignedUploadService.discard(get_cloudinary_resource_type(existing_doc.mime_type), existing_doc.public_id)
                 
                 # Update existing document
                 existing_doc.public_id = upload_result['public_id']
                 existing_doc.file_url = upload_result['secure_url']
-                existing_doc.file_name = file.filename
+                existing_doc.file_name = file_name
                 existing_doc.file_size = upload_result['bytes']
-                existing_doc.mime_type = file.mimetype
+                existing_doc.mime_type = mime_type
                 existing_doc.status = DocumentStatus.PENDING
                 existing_doc.admin_notes = None
                 existing_doc.verified_at = None
@@ -203,9 +220,9 @@ def upload_document():
                     document_type=document_type,
                     public_id=upload_result['public_id'],
                     file_url=upload_result['secure_url'],
-                    file_name=file.filename,
+                    file_name=file_name,
                     file_size=upload_result['bytes'],
-                    mime_type=file.mimetype,
+                    mime_type=mime_type,
                     status=DocumentStatus.PENDING
                 )
                 db.session.add(document)
@@ -126,6 +126,40 @@ BASE_TEMPLATE = """
 </html>
 """
 
+def _base_context(subject):
+    """Variables every email can use: logo, frontend URL, year and subject"""
+    return {
+        'logo_url': 'https://res.cloudinary.com/dyj7ebc7z/image/upload/v1751606177/logo_nifepq.png', 
+        'frontend_url': current_app.config.get('FRONTEND_URL', '#'),
+        'year': datetime.now().year,
+        'subject': subject
+    }
+
+
+def wrap_email_html(subject, content_html, heading=None):
+    """Wrap already rendered body HTML in the branded base template and return the full HTML."""
+    return render_template_string(BASE_TEMPLATE, **_base_context(subject),
+                                  heading=heading or subject, content_html=content_html)
+
+
+def render_email_html(subject, template_str, context):
+    """
+    Render template_str as the body of the branded base template and return the full HTML.
+    Adds the base context variables (logo, frontend URL, year, subject) to context.
+    template_str must be trusted: it renders with full Flask template access.
+    """
+    # Add base context variables to every email
+    context.update(_base_context(subject))
+
+    # The 'template_str' will now be the main body content,
+    # which we wrap inside the base template.
+    base_context = context.copy()
+    base_context['heading'] = context.get('heading', subject)
+    base_context['content_html'] = render_template_string(template_str, **context)
+    
+    return render_template_string(BASE_TEMPLATE, **base_context)
+
+
 def send_email(to_email, subject, template_str, context):
     """
     Refactored send_email to inject content into a branded base template.
@@ -135,21 +169,7 @@ def send_email(to_email, subject, template_str, context):
     try:
         current_app.logger.info(f"Attempting to send email to {to_email}")
 
-        # Add base context variables to every email
-        context.update({
-            'logo_url': 'https://res.cloudinary.com/dyj7ebc7z/image/upload/v1751606177/logo_nifepq.png', 
-            'frontend_url': current_app.config.get('FRONTEND_URL', '#'),
-            'year': datetime.now().year,
-            'subject': subject
-        })
-
-        # The 'template_str' will now be the main body content,
-        # which we wrap inside the base template.
-        base_context = context.copy()
-        base_context['heading'] = context.get('heading', subject)
-        base_context['content_html'] = render_template_string(template_str, **context)
-        
-        full_html_content = render_template_string(BASE_TEMPLATE, **base_context)
+        full_html_content = render_email_html(subject, template_str, context)
         
         message = MIMEMultipart('alternative')
         message['Subject'] = subject
@@ -24,6 +24,10 @@ class AuthProvider(Enum):
 class User(BaseModel):
     """User model for all types of users (customers, merchants, admins)."""
     __tablename__ = 'users'
+    __table_args__ = (
+        # Admin analytics count active users per role over signup dates
+        db.Index('idx_users_role_active_created', 'role', 'is_active', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(255), unique=True, nullable=False, index=True)
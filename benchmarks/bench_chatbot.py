@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: chatbot cold start and /api/chat latency with a stubbed LLM.
+
+Compares the old startup path (embed Aoin.txt into a new FAISS index) with loading the
+prebuilt, memory-mapped index, then measures p50/p95 latency for distinct questions and
+for repeated/near-duplicate ones served from the embedding and response caches. The LLM
+is a canned stub so only retrieval and caching are measured:
+
+    python benchmarks/bench_chatbot.py --queries 200
+    python benchmarks/bench_chatbot.py --fake-embeddings   # no model download
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import FakeListLLM
+
+QUESTIONS = [
+    "What is AOIN?",
+    "What is AOIN Live?",
+    "How do I become a partner?",
+    "What are the themed in-house shops?",
+    "How do returns work?",
+    "Which payment methods do you accept?",
+    "How long does shipping take?",
+    "How do I track my order?",
+]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def timed_chat(client, query):
+    started = time.perf_counter()
+    response = client.post('/api/chat', json={'query': query})
+    elapsed = (time.perf_counter() - started) * 1000
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return elapsed, response.get_json()['cached']
+
+
+def report(label, samples):
+    print(f"{label:<28} p50 {percentile(samples, 50):8.2f} ms   p95 {percentile(samples, 95):8.2f} ms   (n={len(samples)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--fake-embeddings', action='store_true', help='hash-based embeddings instead of the model')
+    parser.add_argument('--index-dir', default=None, help='defaults to a temporary directory')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    import chatbot
+
+    def make_embeddings():
+        return DeterministicFakeEmbedding(size=384) if args.fake_embeddings else chatbot.load_embeddings()
+
+    llm = FakeListLLM(responses=["AOIN is a marketplace with live shopping and themed in-house shops."])
+    index_dir = args.index_dir or tempfile.mkdtemp(prefix='chatbot_index_')
+
+    # Old startup: load the model and embed the whole knowledge base in-process
+    started = time.perf_counter()
+    chatbot.build_index(index_dir, embeddings=make_embeddings())
+    rebuild_seconds = time.perf_counter() - started
+
+    # New startup: load the model and the prebuilt index only
+    started = time.perf_counter()
+    app = chatbot.create_chatbot_app(llm=llm, embeddings=make_embeddings(), index_dir=index_dir)
+    load_seconds = time.perf_counter() - started
+
+    print(f"embeddings:                  {'fake' if args.fake_embeddings else chatbot.EMBEDDING_MODEL}")
+    print(f"cold start, rebuild index:   {rebuild_seconds:.2f}s")
+    print(f"cold start, prebuilt index:  {load_seconds:.2f}s")
+
+    client = app.test_client()
+    distinct = [f"{QUESTIONS[i % len(QUESTIONS)]} ({i})" for i in range(args.queries)]
+    uncached = [timed_chat(client, query)[0] for query in distinct]
+
+    # Same questions with different case/punctuation/spacing
+    near_duplicates = [f"  {query.upper().rstrip('?')} " for query in distinct]
+    results = [timed_chat(client, query) for query in near_duplicates]
+    cached = [elapsed for elapsed, hit in results]
+    hits = sum(1 for _, hit in results if hit)
+
+    print()
+    report("distinct queries", uncached)
+    report("near-duplicate queries", cached)
+    print(f"response cache hit rate:     {hits / len(results):.0%}")
+
+
+if __name__ == '__main__':
+    main()
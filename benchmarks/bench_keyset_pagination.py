@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: OFFSET pagination vs. keyset (cursor) pagination on deep pages.
+
+Seeds an in-memory SQLite orders table and times fetching one page at increasing
+depths with both strategies:
+
+    python benchmarks/bench_keyset_pagination.py --rows 200000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from common.database import db
+from bench_stock_import import create_bench_app
+
+
+def seed(rows):
+    from models.order import Order
+
+    db.session.execute(text("PRAGMA foreign_keys=OFF"))
+    start = datetime(2024, 1, 1)
+    batch = []
+    for i in range(rows):
+        batch.append({
+            'order_id': f"ORD-{i:09d}",
+            'user_id': 1,
+            # Several orders share each timestamp so the primary key tie-breaker matters
+            'order_date': start + timedelta(minutes=i // 3),
+            'subtotal_amount': Decimal('10.00'),
+            'total_amount': Decimal('10.00')
+        })
+        if len(batch) == 10000:
+            db.session.bulk_insert_mappings(Order, batch)
+            batch = []
+    if batch:
+        db.session.bulk_insert_mappings(Order, batch)
+    db.session.commit()
+
+
+def timed(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--per-page', type=int, default=20)
+    args = parser.parse_args()
+
+    from models.order import Order
+    from common.pagination import encode_cursor, keyset_paginate
+
+    app = create_bench_app()
+    with app.app_context():
+        db.create_all()
+        seed(args.rows)
+        query = Order.query.with_entities(Order.order_id, Order.order_date)
+
+        print(f"rows: {args.rows}, per_page: {args.per_page}")
+        print(f"{'depth':>10}  {'offset':>10}  {'keyset':>10}")
+        for fraction in (0, 0.01, 0.1, 0.5, 0.99):
+            depth = int((args.rows - args.per_page) * fraction)
+
+            def offset_page():
+                query.order_by(Order.order_date.desc(), Order.order_id.desc()) \
+                    .offset(depth).limit(args.per_page).all()
+
+            # The cursor a client would hold after reading `depth` rows
+            cursor = None
+            if depth:
+                last = query.order_by(Order.order_date.desc(), Order.order_id.desc()) \
+                    .offset(depth - 1).limit(1).one()
+                cursor = encode_cursor(last.order_date, last.order_id)
+
+            def keyset_page():
+                keyset_paginate(query, Order.order_date, Order.order_id, args.per_page, cursor=cursor)
+
+            print(f"{depth:>10}  {timed(offset_page) * 1000:>8.2f}ms  {timed(keyset_page) * 1000:>8.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Load test: weighted user journeys against the full app, with a JSON report per run.
+
+Virtual users run concurrently, each picking journeys by weight - catalog browse, search,
+product detail, cart, checkout, merchant dashboard and superadmin analytics - until the
+duration is up. Every request is timed and its query count and DB time are read from the
+Server-Timing header (see common.query_profiler), so a report shows per-endpoint
+p50/p95/p99 latency, throughput, errors and queries per request. Runs are comparable:
+
+    # generate a dataset once (benchmarks/datagen.py), then load it in-process
+    python benchmarks/bench_marketplace.py --database-uri sqlite:////tmp/bench.db --generate small
+    python benchmarks/bench_marketplace.py --database-uri sqlite:////tmp/bench.db --users 16 --duration 60 \\
+        --output reports/after.json --compare reports/before.json
+
+    # or drive a running server (tokens are minted with this checkout's JWT_SECRET_KEY)
+    python benchmarks/bench_marketplace.py --database-uri mysql+pymysql://... --base-url http://localhost:5110
+
+Checkout and cart journeys write to the database; point this at a disposable copy. SQLite
+serializes writers, so concurrent checkouts there report "database is locked" errors.
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WEIGHTS = {
+    'browse': 30,
+    'search': 20,
+    'product_detail': 25,
+    'cart': 10,
+    'checkout': 5,
+    'merchant_dashboard': 7,
+    'superadmin_analytics': 3,
+}
+
+_SERVER_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+SEARCH_TERMS = ['smart', 'watch', 'cotton shirt', 'lamp', 'pro', 'wireless head', 'eco bottle', 'vintage']
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class Recorder:
+    """Thread-safe per-endpoint samples"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)   # name -> [(ms, status, queries, db_ms)]
+
+    def record(self, name, ms, status, queries, db_ms):
+        with self._lock:
+            self.samples[name].append((ms, status, queries, db_ms))
+
+    def report(self, seconds):
+        endpoints = {}
+        for name, samples in sorted(self.samples.items()):
+            latencies = [ms for ms, _, _, _ in samples]
+            profiled = [(queries, db_ms) for _, _, queries, db_ms in samples if queries is not None]
+            endpoints[name] = {
+                'requests': len(samples),
+                'errors': sum(1 for _, status, _, _ in samples if status >= 400),
+                'rps': round(len(samples) / seconds, 2),
+                'mean_ms': round(sum(latencies) / len(latencies), 2),
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'max_ms': round(max(latencies), 2),
+                'status_codes': dict(Counter(str(status) for _, status, _, _ in samples)),
+                'avg_queries': round(sum(q for q, _ in profiled) / len(profiled), 2) if profiled else None,
+                'avg_db_ms': round(sum(d for _, d in profiled) / len(profiled), 2) if profiled else None,
+            }
+        all_latencies = [ms for samples in self.samples.values() for ms, _, _, _ in samples]
+        total = len(all_latencies)
+        return endpoints, {
+            'requests': total,
+            'errors': sum(e['errors'] for e in endpoints.values()),
+            'rps': round(total / seconds, 2),
+            'p50_ms': round(percentile(all_latencies, 50), 2) if total else None,
+            'p95_ms': round(percentile(all_latencies, 95), 2) if total else None,
+            'p99_ms': round(percentile(all_latencies, 99), 2) if total else None,
+        }
+
+
+class VirtualUser:
+    """One simulated visitor with its own client and RNG"""
+
+    def __init__(self, send, recorder, dataset, rng, token=None):
+        self.send = send
+        self.recorder = recorder
+        self.dataset = dataset
+        self.rng = rng
+        self.headers = {'Authorization': f'Bearer {token}'} if token else {}
+
+    def request(self, name, method, path, json_body=None, headers=None):
+        started = time.perf_counter()
+        status, response_headers = self.send(method, path, json_body, headers or {})
+        elapsed = (time.perf_counter() - started) * 1000
+        match = _SERVER_TIMING.search(response_headers.get('Server-Timing', ''))
+        queries, db_ms = (int(match.group(2)), float(match.group(1))) if match else (None, None)
+        self.recorder.record(name, elapsed, status, queries, db_ms)
+        return status
+
+    # -- journeys --------------------------------------------------------------------
+
+    def browse(self):
+        self.request('browse.products', 'GET', f"/api/products?page={self.rng.randint(1, 20)}&per_page=20")
+        category_id = self.rng.choice(self.dataset['category_ids'])
+        self.request('browse.category', 'GET', f"/api/products/category/{category_id}?per_page=20")
+
+    def search(self):
+        term = self.rng.choice(SEARCH_TERMS)
+        self.request('search.suggestions', 'GET', f"/api/products/search-suggestions?q={term[:4]}")
+        self.request('search.results', 'GET', f"/api/products?search={term}&per_page=20")
+
+    def product_detail(self):
+        product_id = self.rng.choice(self.dataset['product_ids'])
+        self.request('detail.product', 'GET', f"/api/products/{product_id}/details")
+        self.request('detail.reviews', 'GET', f"/api/products/{product_id}/reviews")
+
+    def cart(self):
+        product_id = self.rng.choice(self.dataset['product_ids'])
+        self.request('cart.add', 'POST', '/api/cart/add',
+                     {'product_id': product_id, 'quantity': 1}, self.headers)
+        self.request('cart.view', 'GET', '/api/cart/', headers=self.headers)
+
+    def checkout(self):
+        self.request('checkout.place_order', 'POST', '/api/orders', {
+            'items': [{'product_id': product_id, 'quantity': 1}
+                      for product_id in self.rng.sample(self.dataset['product_ids'], 2)],
+            'payment_method': 'cash_on_delivery',
+            'shipping_address_id': self.dataset['address_id'],
+            'billing_address_id': self.dataset['address_id'],
+        }, self.headers)
+
+    def merchant_dashboard(self):
+        headers = {'Authorization': f"Bearer {self.rng.choice(self.dataset['merchant_tokens'])}"}
+        self.request('merchant.order_stats', 'GET', '/api/merchant-dashboard/orders/stats', headers=headers)
+        self.request('merchant.products', 'GET', '/api/merchant-dashboard/products', headers=headers)
+        self.request('merchant.inventory_stats', 'GET', '/api/merchant-dashboard/inventory/stats', headers=headers)
+
+    def superadmin_analytics(self):
+        headers = {'Authorization': f"Bearer {self.dataset['superadmin_token']}"}
+        self.request('superadmin.dashboard', 'GET', '/api/superadmin/analytics/dashboard', headers=headers)
+        self.request('superadmin.revenue', 'GET', '/api/superadmin/analytics/revenue', headers=headers)
+
+    def run(self, deadline, weights):
+        journeys = list(weights)
+        journey_weights = [weights[name] for name in journeys]
+        while time.perf_counter() < deadline:
+            getattr(self, self.rng.choices(journeys, weights=journey_weights)[0])()
+
+
+def load_dataset(app, customers):
+    """Pick ids and mint tokens from whatever data the database holds"""
+    from flask_jwt_extended import create_access_token
+    from auth.models.models import User, UserRole
+    from models.product import Product
+    from models.category import Category
+    from models.user_address import UserAddress
+
+    with app.app_context():
+        product_ids = [row.product_id for row in Product.query.with_entities(Product.product_id).filter(
+            Product.approval_status == 'approved', Product.deleted_at.is_(None)
+        ).limit(5000).all()]
+        category_ids = [row.category_id for row in Category.query.with_entities(Category.category_id).all()]
+        customer_ids = [row.id for row in User.query.with_entities(User.id).filter(
+            User.role == UserRole.USER).limit(customers).all()]
+        merchant_ids = [row.id for row in User.query.with_entities(User.id).filter(
+            User.role == UserRole.MERCHANT).limit(20).all()]
+        superadmin = User.query.filter(User.role == UserRole.SUPER_ADMIN).first()
+        if not (product_ids and category_ids and customer_ids and merchant_ids and superadmin):
+            raise SystemExit("Database has no usable data; run benchmarks/datagen.py or pass --generate")
+
+        addresses = {row.user_id: row.address_id for row in UserAddress.query.filter(
+            UserAddress.user_id.in_(customer_ids)).all()}
+        return {
+            'product_ids': product_ids,
+            'category_ids': category_ids,
+            'customers': [(create_access_token(identity=str(user_id)), addresses.get(user_id))
+                          for user_id in customer_ids],
+            'merchant_tokens': [create_access_token(identity=str(user_id)) for user_id in merchant_ids],
+            'superadmin_token': create_access_token(identity=str(superadmin.id)),
+        }
+
+
+def create_load_test_app(database_uri):
+    """
+    The full app bound to database_uri, with background schedulers off and Server-Timing
+    on so every response carries its query count. Must run before anything imports app.
+    """
+    os.environ['DATABASE_URI'] = database_uri
+    for name in ('RECENTLY_VIEWED_FLUSH_INTERVAL', 'EFFECTIVE_PRICE_REFRESH_MINUTES',
+                 'PLACEMENT_EXPIRY_CHECK_MINUTES', 'TRANSLATE_PREWARM_MINUTES'):
+        os.environ.setdefault(name, '0')
+
+    import logging
+    from app import create_app
+
+    app = create_app()
+    app.config['SQL_PROFILER_SERVER_TIMING'] = True
+    logging.disable(logging.WARNING)
+    return app
+
+
+def make_sender(app, base_url):
+    """A send(method, path, json, headers) -> (status, headers) callable for one virtual user"""
+    if base_url:
+        import requests
+
+        session = requests.Session()
+
+        def send(method, path, json_body, headers):
+            response = session.request(method, base_url.rstrip('/') + path, json=json_body, headers=headers)
+            return response.status_code, response.headers
+    else:
+        client = app.test_client()
+
+        def send(method, path, json_body, headers):
+            response = client.open(path, method=method, json=json_body, headers=headers)
+            return response.status_code, response.headers
+    return send
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report, baseline=None):
+    baseline_endpoints = (baseline or {}).get('endpoints', {})
+    print(f"\n{'endpoint':<28}{'reqs':>7}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}"
+          + (f"{'p95 vs base':>13}" if baseline else ''))
+    for name, stats in report['endpoints'].items():
+        line = (f"{name:<28}{stats['requests']:>7}{stats['errors']:>5}{stats['p50_ms']:>9.1f}"
+                f"{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}"
+                f"{stats['avg_queries'] if stats['avg_queries'] is not None else '-':>9}")
+        before = baseline_endpoints.get(name)
+        if before:
+            line += f"{(stats['p95_ms'] - before['p95_ms']) / before['p95_ms']:>+13.0%}" if before['p95_ms'] else ''
+        print(line)
+    totals = report['totals']
+    print(f"\n{totals['requests']} requests, {totals['errors']} errors, {totals['rps']} req/s, "
+          f"p50 {totals['p50_ms']} ms, p95 {totals['p95_ms']} ms, p99 {totals['p99_ms']} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-uri', default='sqlite:////tmp/bench_marketplace.db')
+    parser.add_argument('--generate', choices=['tiny', 'small', 'medium', 'large'],
+                        help='create the schema and load a synthetic dataset first (empty database only)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--users', type=int, default=8, help='concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=30, help='seconds')
+    parser.add_argument('--journeys', default=None,
+                        help=f"comma-separated subset of {','.join(WEIGHTS)} (default: all, weighted)")
+    parser.add_argument('--base-url', default=None, help='drive a running server instead of the in-process app')
+    parser.add_argument('--output', default=None, help='write the JSON report here')
+    parser.add_argument('--compare', default=None, help='previous JSON report to compare p95 against')
+    args = parser.parse_args()
+
+    app = create_load_test_app(args.database_uri)
+
+    if args.generate:
+        from common.database import db
+        from datagen import MarketplaceGenerator, prepare_database
+
+        with app.app_context():
+            prepare_database()
+            print(f"Generating '{args.generate}' dataset...")
+            MarketplaceGenerator(args.generate, args.seed).generate()
+            db.session.remove()
+
+    weights = WEIGHTS if not args.journeys else {name: WEIGHTS[name] for name in args.journeys.split(',')}
+    dataset = load_dataset(app, args.users)
+    recorder = Recorder()
+    users = []
+    for index in range(args.users):
+        token, address_id = dataset['customers'][index % len(dataset['customers'])]
+        users.append(VirtualUser(make_sender(app, args.base_url), recorder, dict(dataset, address_id=address_id),
+                                 random.Random(args.seed + index), token))
+
+    print(f"{args.users} virtual users for {args.duration:.0f}s against "
+          f"{args.base_url or args.database_uri.split('@')[-1]}")
+    started = time.perf_counter()
+    deadline = started + args.duration
+    threads = [threading.Thread(target=user.run, args=(deadline, weights), daemon=True) for user in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    endpoints, totals = recorder.report(elapsed)
+    report = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'git_revision': git_revision(),
+            'target': args.base_url or 'in-process',
+            'database': args.database_uri.split('://')[0],
+            'users': args.users,
+            'duration_seconds': round(elapsed, 2),
+            'seed': args.seed,
+            'weights': weights,
+        },
+        'totals': totals,
+        'endpoints': endpoints,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sending a newsletter one send_email() call per subscriber vs. the campaign
+broadcaster (services/newsletter_broadcast_service.py).
+
+Starts a local SMTP sink that accepts every message after --latency seconds (a stand-in
+for relay round trips), seeds an in-memory SQLite database with subscribers spread over a
+few domains, then sends the same campaign both ways and reports time and messages per
+second:
+
+    python benchmarks/bench_newsletter_broadcast.py --subscribers 2000 --workers 8
+
+The sink can also be run on its own to point a development server at it
+(NEWSLETTER_SMTP_HOST=127.0.0.1 NEWSLETTER_SMTP_PORT=2525):
+
+    python benchmarks/bench_newsletter_broadcast.py --sink-only --port 2525
+"""
+
+import argparse
+import os
+import socketserver
+import sys
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.database import db
+from bench_stock_import import create_bench_app
+
+TEMPLATE = """
+<p>Hello,</p>
+<p>This week's picks are live: <a href="{{ frontend_url }}/deals">see the deals</a>.</p>
+<p>Best regards,<br>The Team</p>
+"""
+
+
+class SmtpSink(socketserver.ThreadingTCPServer):
+    """Minimal SMTP server that accepts and counts every message"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, latency=0.0, reject_domains=()):
+        super().__init__(address, SmtpSinkHandler)
+        self.latency = latency
+        self.reject_domains = set(reject_domains)
+        self.lock = threading.Lock()
+        self.messages = 0
+        self.connections = 0
+        self.recipients = []
+
+
+class SmtpSinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply('220 sink ESMTP')
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command[:4].upper()
+            if verb in ('HELO', 'EHLO'):
+                self.reply('250 sink')
+            elif verb == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                address = command.partition(':')[2].strip().strip('<>')
+                if address.rpartition('@')[2] in server.reject_domains:
+                    self.reply('550 No such user')
+                else:
+                    recipients.append(address)
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b'.\n', b''):
+                    pass
+                if server.latency:
+                    time.sleep(server.latency)
+                with server.lock:
+                    server.messages += 1
+                    server.recipients.extend(recipients)
+                self.reply('250 OK queued')
+            elif verb == 'RSET' or verb == 'NOOP':
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+def start_sink(port=0, latency=0.0, reject_domains=()):
+    sink = SmtpSink(('127.0.0.1', port), latency=latency, reject_domains=reject_domains)
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+    return sink
+
+
+def seed(count):
+    from models.newsletter_subscription import NewsletterSubscription
+
+    domains = ['gmail.com', 'yahoo.com', 'outlook.com', 'example.org', 'example.net']
+    now = datetime.utcnow()
+    db.session.bulk_insert_mappings(NewsletterSubscription, [
+        {'email': f"subscriber{i}@{domains[i % len(domains)]}", 'created_at': now}
+        for i in range(1, count + 1)
+    ])
+    db.session.commit()
+
+
+def one_by_one(app):
+    """The naive loop: render and open an SMTP session for every subscriber via send_email()"""
+    from auth.email_utils import send_email
+    from models.newsletter_subscription import NewsletterSubscription
+
+    sent = 0
+    for subscriber in NewsletterSubscription.query.order_by(NewsletterSubscription.id).all():
+        sent += send_email(subscriber.email, 'Weekly picks', TEMPLATE, {})
+    return sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--subscribers', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--domain-rate', type=float, default=0, help='messages per second per domain (0: unthrottled)')
+    parser.add_argument('--latency', type=float, default=0.005, help='seconds the sink takes per message')
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--sink-only', action='store_true')
+    args = parser.parse_args()
+
+    sink = start_sink(args.port, latency=args.latency)
+    port = sink.server_address[1]
+    if args.sink_only:
+        print(f"SMTP sink listening on 127.0.0.1:{port}; Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(5)
+                print(f"{sink.messages} messages over {sink.connections} connections")
+        except KeyboardInterrupt:
+            return
+
+    from services.newsletter_broadcast_service import NewsletterBroadcastService
+
+    app = create_bench_app()
+    app.config.update(
+        MAIL_SERVER='127.0.0.1', MAIL_PORT=port, MAIL_USE_TLS=False, MAIL_USERNAME=None, MAIL_PASSWORD=None,
+        MAIL_DEFAULT_SENDER=('Bench', 'news@bench.local'),
+        NEWSLETTER_SMTP_HOST='127.0.0.1', NEWSLETTER_SMTP_PORT=port,
+        NEWSLETTER_CAMPAIGN_WORKERS=0, NEWSLETTER_SEND_WORKERS=args.workers,
+        NEWSLETTER_DOMAIN_RATE=args.domain_rate
+    )
+    with app.app_context():
+        db.create_all()
+        seed(args.subscribers)
+
+        started = time.perf_counter()
+        naive_sent = one_by_one(app)
+        naive_seconds = time.perf_counter() - started
+        naive_connections = sink.connections
+
+        campaign = NewsletterBroadcastService.create_campaign('Weekly picks', TEMPLATE)
+        started = time.perf_counter()
+        campaign = NewsletterBroadcastService.send_campaign(campaign.campaign_id)
+        broadcast_seconds = time.perf_counter() - started
+        broadcast_connections = sink.connections - naive_connections
+
+    print(f"subscribers: {args.subscribers}")
+    print(f"one-by-one:  {naive_seconds:.2f}s, {naive_sent / naive_seconds:.0f} msg/s, {naive_connections} SMTP sessions")
+    print(f"broadcast:   {broadcast_seconds:.2f}s, {campaign.sent_count / broadcast_seconds:.0f} msg/s, "
+          f"{broadcast_connections} SMTP sessions ({campaign.status}, {campaign.failed_count} failed)")
+    print(f"speedup:     {naive_seconds / broadcast_seconds:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
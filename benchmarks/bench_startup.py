@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: application startup (import + create_app) time and memory.
+
+Runs create_app() in a fresh interpreter under `python -X importtime` and reports the
+total, the slowest imported packages and the resident memory afterwards. Exits non-zero
+if startup exceeds --budget-ms or if a heavy optional dependency (pandas, reportlab,
+boto3) was imported eagerly, so it can gate CI:
+
+    python benchmarks/bench_startup.py --budget-ms 4000
+    BLUEPRINT_GROUPS=storefront python benchmarks/bench_startup.py
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed by exports/translation; loading them at startup is a regression
+DEFERRED_MODULES = ('pandas', 'reportlab', 'boto3')
+
+STARTUP_SCRIPT = """
+import time, psutil
+started = time.perf_counter()
+from app import create_app
+create_app()
+print(f"{(time.perf_counter() - started) * 1000:.1f} {psutil.Process().memory_info().rss / 1024 / 1024:.1f}")
+"""
+
+
+def parse_importtime(stderr):
+    """{top-level package: cumulative microseconds} from -X importtime output"""
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|', 2)
+        # Only top-level entries: nested imports are indented and already counted
+        if name[1:2].isspace() or not cumulative.strip().isdigit():
+            continue
+        package = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0) + int(cumulative.strip())
+    return packages
+
+
+def imported_modules(stderr):
+    return {line.rsplit('|', 1)[-1].strip() for line in stderr.splitlines() if line.startswith('import time:')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-ms', type=float, default=None, help='fail if startup takes longer')
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    # Keep the background schedulers out of the measurement
+    env.setdefault('START_BACKGROUND_JOBS', 'false')
+
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr[-4000:], file=sys.stderr)
+        sys.exit(f"create_app() failed with exit code {result.returncode}")
+
+    startup_ms, rss_mb = (float(value) for value in result.stdout.strip().splitlines()[-1].split())
+    packages = parse_importtime(result.stderr)
+    modules = imported_modules(result.stderr)
+
+    print(f"groups:   {env.get('BLUEPRINT_GROUPS') or 'all'}")
+    print(f"startup:  {startup_ms:.0f} ms")
+    print(f"rss:      {rss_mb:.1f} MB")
+    print(f"modules:  {len(modules)}")
+    print(f"\nslowest top-level imports (cumulative):")
+    for package, micros in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {package:<32} {micros / 1000:8.1f} ms")
+
+    failures = []
+    eager = sorted(name for name in DEFERRED_MODULES if name in modules)
+    if eager:
+        failures.append(f"imported at startup: {', '.join(eager)}")
+    if args.budget_ms is not None and startup_ms > args.budget_ms:
+        failures.append(f"startup {startup_ms:.0f} ms exceeds budget of {args.budget_ms:.0f} ms")
+    if failures:
+        sys.exit('\n'.join(f"FAIL: {failure}" for failure in failures))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bulk stock import vs. row-by-row ORM updates.
+
+Runs against an in-memory SQLite database so it needs no running MySQL/Redis:
+
+    python benchmarks/bench_stock_import.py --rows 10000
+"""
+
+import argparse
+import importlib
+import os
+import pkgutil
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import text
+from common.database import db
+
+
+def create_bench_app(database_uri='sqlite://'):
+    """Minimal app with every model registered, bound to in-memory SQLite."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    import auth.models.models  # noqa: F401
+    import auth.models.merchant_document  # noqa: F401
+    import auth.models.country_config  # noqa: F401
+    for package_name in ('models', 'models.shop'):
+        package = importlib.import_module(package_name)
+        for module in pkgutil.iter_modules(package.__path__):
+            importlib.import_module(f"{package_name}.{module.name}")
+    return app
+
+
+def seed(rows):
+    from models.shop.shop import Shop
+    from models.shop.shop_category import ShopCategory
+    from models.shop.shop_product import ShopProduct
+
+    db.session.execute(text("PRAGMA foreign_keys=OFF"))
+    shop = Shop(name='Bench Shop', slug='bench-shop')
+    db.session.add(shop)
+    db.session.flush()
+    category = ShopCategory(shop_id=shop.shop_id, name='Bench', slug='bench')
+    db.session.add(category)
+    db.session.flush()
+    db.session.bulk_insert_mappings(ShopProduct, [
+        {
+            'product_id': pid,
+            'shop_id': shop.shop_id,
+            'category_id': category.category_id,
+            'sku': f"BENCH-{pid}",
+            'product_name': f"Bench product {pid}",
+            'product_description': 'Benchmark product',
+            'cost_price': 1,
+            'selling_price': 2
+        }
+        for pid in range(1, rows + 1)
+    ])
+    db.session.commit()
+    return shop.shop_id
+
+
+def row_by_row(shop_id, updates):
+    """The previous update_stock_batch strategy: two SELECTs and an ORM mutation per row."""
+    from models.shop.shop_product import ShopProduct
+    from models.shop.shop_product_stock import ShopProductStock
+
+    for update in updates:
+        product = ShopProduct.query.filter_by(
+            product_id=update['product_id'], shop_id=shop_id, deleted_at=None
+        ).first()
+        if not product:
+            continue
+        stock = ShopProductStock.query.filter_by(product_id=update['product_id']).first()
+        if not stock:
+            stock = ShopProductStock(product_id=update['product_id'])
+            db.session.add(stock)
+        stock.stock_qty = update['stock_qty']
+        stock.low_stock_threshold = update.get('low_stock_threshold', 5)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    args = parser.parse_args()
+
+    from controllers.shop.shop_stock_controller import ShopStockController
+    from models.shop.shop_product_stock import ShopProductStock
+
+    app = create_bench_app()
+    with app.app_context():
+        db.create_all()
+        shop_id = seed(args.rows)
+        updates = [{'product_id': pid, 'stock_qty': pid % 97} for pid in range(1, args.rows + 1)]
+
+        started = time.perf_counter()
+        row_by_row(shop_id, updates)
+        legacy_seconds = time.perf_counter() - started
+
+        ShopProductStock.query.delete()
+        db.session.commit()
+
+        started = time.perf_counter()
+        results = ShopStockController.update_stock_batch(shop_id, updates)
+        bulk_seconds = time.perf_counter() - started
+
+    failed = sum(1 for result in results if result['status'] != 'success')
+    print(f"rows:        {args.rows}")
+    print(f"row-by-row:  {legacy_seconds:.2f}s")
+    print(f"bulk upsert: {bulk_seconds:.2f}s ({failed} failed rows)")
+    print(f"speedup:     {legacy_seconds / bulk_seconds:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark: generating a shop product's variant matrix row by row vs. with bulk inserts.
+
+Seeds an in-memory SQLite shop with one parent product and colour/size/material
+attributes, then creates the full matrix (10 x 10 x 5 = 500 variants by default) with
+the previous per-variant ORM loop and with VariantGeneratorService, reporting time and
+SQL statements for each:
+
+    python benchmarks/bench_variant_generation.py --colors 10 --sizes 10 --materials 5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, text
+from common.database import db
+from bench_stock_import import create_bench_app
+
+
+def seed(matrix):
+    from models.enums import AttributeInputType
+    from models.shop.shop import Shop
+    from models.shop.shop_attribute import ShopAttribute, ShopAttributeValue
+    from models.shop.shop_category import ShopCategory
+    from models.shop.shop_product import ShopProduct
+
+    db.session.execute(text("PRAGMA foreign_keys=OFF"))
+    shop = Shop(name='Bench Shop', slug='bench-shop')
+    db.session.add(shop)
+    db.session.flush()
+    category = ShopCategory(shop_id=shop.shop_id, name='Bench', slug='bench')
+    db.session.add(category)
+    db.session.flush()
+    for name, values in matrix.items():
+        attribute = ShopAttribute(shop_id=shop.shop_id, category_id=category.category_id, name=name,
+                                  slug=name.lower(), attribute_type=AttributeInputType.SELECT)
+        db.session.add(attribute)
+        db.session.flush()
+        db.session.add_all(ShopAttributeValue(attribute_id=attribute.attribute_id, value=value) for value in values)
+
+    parents = []
+    for sku in ('BENCH-LEGACY', 'BENCH-BULK'):
+        parent = ShopProduct(shop_id=shop.shop_id, category_id=category.category_id, sku=sku,
+                             product_name='Bench tee', product_description='Benchmark product',
+                             cost_price=5, selling_price=10)
+        db.session.add(parent)
+        parents.append(parent)
+    db.session.commit()
+    return parents
+
+
+def row_by_row(parent, combinations):
+    """The previous bulk_create_variants strategy: SKU probing, flushes and ORM adds per variant."""
+    from models.shop.shop_attribute import ShopAttribute, ShopAttributeValue
+    from models.shop.shop_product import ShopProduct
+    from models.shop.shop_product_stock import ShopProductStock
+    from models.shop.shop_product_variant import ShopProductVariant, ShopVariantAttributeValue
+    from services.variant_generator_service import VariantGeneratorService
+
+    for i, combination in enumerate(combinations):
+        variant_sku = VariantGeneratorService.variant_sku(parent.sku, combination['attributes'])
+        counter = 1
+        original_sku = variant_sku
+        while ShopProduct.query.filter_by(sku=variant_sku, deleted_at=None).first():
+            variant_sku = f"{original_sku}-{counter:02d}"
+            counter += 1
+
+        variant_product = ShopProduct(
+            shop_id=parent.shop_id, category_id=parent.category_id, brand_id=parent.brand_id,
+            parent_product_id=parent.product_id, sku=variant_sku, product_name=parent.product_name,
+            product_description=parent.product_description, cost_price=parent.cost_price,
+            selling_price=combination['selling_price'], discount_pct=parent.discount_pct,
+            active_flag=True, is_published=parent.is_published
+        )
+        db.session.add(variant_product)
+        db.session.flush()
+
+        variant_relation = ShopProductVariant(
+            parent_product_id=parent.product_id, variant_product_id=variant_product.product_id,
+            variant_sku=variant_sku, attribute_combination=combination['attributes'],
+            combination_hash=ShopProductVariant.compute_combination_hash(combination['attributes']),
+            sort_order=i
+        )
+        db.session.add(variant_relation)
+        db.session.flush()
+
+        # Attribute values as create_variant records them: two lookups per attribute
+        for attr_name, attr_value in combination['attributes'].items():
+            attribute = ShopAttribute.query.filter_by(
+                shop_id=parent.shop_id, category_id=parent.category_id, name=attr_name, deleted_at=None
+            ).first()
+            if attribute:
+                attr_value_obj = ShopAttributeValue.query.filter_by(
+                    attribute_id=attribute.attribute_id, value=attr_value, deleted_at=None
+                ).first()
+                db.session.add(ShopVariantAttributeValue(
+                    variant_id=variant_relation.variant_id, attribute_id=attribute.attribute_id,
+                    value_id=attr_value_obj.value_id if attr_value_obj else None,
+                    value_text=attr_value if not attr_value_obj else None
+                ))
+
+        db.session.add(ShopProductStock(product_id=variant_product.product_id, stock_qty=combination['stock_qty']))
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--colors', type=int, default=10)
+    parser.add_argument('--sizes', type=int, default=10)
+    parser.add_argument('--materials', type=int, default=5)
+    args = parser.parse_args()
+
+    from services.variant_generator_service import VariantGeneratorService
+
+    matrix = {
+        'Color': [f"Color {i}" for i in range(args.colors)],
+        'Size': [f"S{i}" for i in range(args.sizes)],
+        'Material': [f"Material {i}" for i in range(args.materials)]
+    }
+    app = create_bench_app()
+    with app.app_context():
+        db.create_all()
+        legacy_parent, bulk_parent = seed(matrix)
+        combinations = VariantGeneratorService.expand({
+            'attribute_values': matrix, 'selling_price': 12, 'stock_qty': 3
+        })
+
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(1))
+
+        started = time.perf_counter()
+        row_by_row(legacy_parent, combinations)
+        legacy_seconds = time.perf_counter() - started
+        legacy_statements = len(statements)
+
+        statements.clear()
+        started = time.perf_counter()
+        variant_ids, errors = VariantGeneratorService.create_shop_variants(bulk_parent, combinations)
+        db.session.commit()
+        bulk_seconds = time.perf_counter() - started
+        bulk_statements = len(statements)
+
+    print(f"variants:    {len(combinations)} ({len(variant_ids)} created in bulk, {len(errors)} errors)")
+    print(f"row-by-row:  {legacy_seconds:.2f}s, {legacy_statements} statements")
+    print(f"bulk:        {bulk_seconds:.2f}s, {bulk_statements} statements")
+    print(f"speedup:     {legacy_seconds / bulk_seconds:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
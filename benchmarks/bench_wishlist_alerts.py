@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark: fanning out wishlist price-drop alerts from every price update request vs. the
+batched sweep (services/wishlist_alert_service.py).
+
+Seeds an in-memory SQLite database with shop products, users' shop wishlists and one
+product everybody wishlists, drops the price of --changed products (the popular one
+included) and creates the alerts both ways:
+
+  - per update: load the product's wishlist rows without the product -> user index (the
+    table as it was) and add one notification per row through the ORM, committing per update;
+  - sweep: diff the watches in batches and INSERT ... SELECT the alerts through the index.
+
+    python benchmarks/bench_wishlist_alerts.py --products 5000 --users 20000 --changed 500
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from common.database import db
+from bench_stock_import import create_bench_app, seed as seed_products
+
+INDEX_NAME = 'idx_shop_wishlist_items_product_user'
+
+
+def seed(products, users, per_user):
+    from models.shop.shop_product_stock import ShopProductStock
+    from models.shop.shop_wishlist import ShopWishlistItem
+    from services.wishlist_alert_service import WishlistAlertService
+
+    shop_id = seed_products(products)
+    db.session.execute(text("UPDATE shop_products SET selling_price = 100, effective_price = 100"))
+    db.session.bulk_insert_mappings(ShopProductStock, [
+        {'product_id': pid, 'stock_qty': 10} for pid in range(1, products + 1)
+    ])
+
+    rng = random.Random(7)
+    rows = []
+    for user_id in range(1, users + 1):
+        # Product 1 is on everybody's wishlist
+        for pid in {1, *rng.sample(range(2, products + 1), per_user)}:
+            rows.append({
+                'user_id': user_id, 'shop_id': shop_id, 'shop_product_id': pid,
+                'product_name': f"Bench product {pid}", 'product_sku': f"BENCH-{pid}",
+                'product_price': 100, 'product_stock_qty': 10
+            })
+    db.session.bulk_insert_mappings(ShopWishlistItem, rows)
+    WishlistAlertService.seed_watches()
+    db.session.commit()
+    return len(rows)
+
+
+def per_update(changed):
+    """The per-request approach: each price update looks up its wishlisters and notifies them."""
+    from models.shop.shop_wishlist import ShopWishlistItem
+    from models.wishlist_alert import WishlistNotification
+
+    created = 0
+    for pid in changed:
+        for item in ShopWishlistItem.query.filter_by(shop_product_id=pid, is_deleted=False).all():
+            db.session.add(WishlistNotification(
+                user_id=item.user_id, catalog='shop_product', product_id=pid, shop_id=item.shop_id,
+                kind=WishlistNotification.KIND_PRICE_DROP, product_name=item.product_name,
+                old_price=Decimal('100'), new_price=Decimal('80'), stock_qty=10
+            ))
+            created += 1
+        db.session.commit()
+    return created
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--per-user', type=int, default=5, help='wishlisted products per user besides the popular one')
+    parser.add_argument('--changed', type=int, default=500)
+    args = parser.parse_args()
+
+    from services.wishlist_alert_service import WishlistAlertService
+
+    app = create_bench_app()
+    app.config['WISHLIST_PRICE_DROP_MIN_PCT'] = 1
+    with app.app_context():
+        db.create_all()
+        wishlisted = seed(args.products, args.users, args.per_user)
+        changed = [1, *random.Random(11).sample(range(2, args.products + 1), args.changed - 1)]
+        db.session.execute(
+            text(f"UPDATE shop_products SET selling_price = 80, effective_price = 80 "
+                 f"WHERE product_id IN ({', '.join(map(str, changed))})")
+        )
+        db.session.commit()
+
+        db.session.execute(text(f"DROP INDEX {INDEX_NAME}"))
+        started = time.perf_counter()
+        naive_created = per_update(changed)
+        naive_seconds = time.perf_counter() - started
+
+        db.session.execute(text("DELETE FROM wishlist_notifications"))
+        db.session.execute(text(f"CREATE INDEX {INDEX_NAME} ON shop_wishlist_items (shop_product_id, is_deleted, user_id)"))
+        db.session.commit()
+        started = time.perf_counter()
+        result = WishlistAlertService.detect_changes()
+        sweep_seconds = time.perf_counter() - started
+
+    print(f"wishlist rows: {wishlisted} ({args.users} users), price drops: {args.changed}")
+    print(f"per update:    {naive_seconds:.2f}s, {naive_created} notifications")
+    print(f"sweep:         {sweep_seconds:.2f}s, {result['notifications']} notifications from {result['changed']} changed products")
+    print(f"speedup:       {naive_seconds / sweep_seconds:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Regression check: special price windows assigned as ISO strings, the way the merchant and
+shop product controllers pass them through from request JSON.
+
+Creates and updates a Product (date windows) and a ShopProduct (datetime windows) in
+in-memory SQLite with string special_start/special_end values and checks that the
+before_insert/before_update hooks store parsed dates and the right effective_price. Exits
+non-zero on the first mismatch.
+
+    python benchmarks/check_special_price_windows.py
+"""
+
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.database import db
+from bench_stock_import import create_bench_app
+
+
+def expect(label, actual, expected):
+    if actual != expected:
+        raise SystemExit(f"FAIL {label}: expected {expected!r}, got {actual!r}")
+    print(f"ok   {label}")
+
+
+def check_product():
+    from models.product import Product
+
+    today = datetime.now(timezone.utc).date()
+    product = Product(
+        merchant_id=1, category_id=1, brand_id=1, sku='CHECK-1', product_name='Check',
+        product_description='Check', cost_price=Decimal('50'), selling_price=Decimal('100'),
+        special_price=Decimal('80'),
+        special_start=(today - timedelta(days=1)).isoformat(),
+        special_end=f"{(today + timedelta(days=1)).isoformat()}T00:00:00Z"
+    )
+    db.session.add(product)
+    db.session.commit()
+    expect('product insert stores dates', type(product.special_start), date)
+    expect('product insert inside window', product.effective_price, Decimal('80'))
+
+    # The update loop in the merchant product controller setattr()s the raw strings
+    setattr(product, 'special_end', (today - timedelta(days=1)).isoformat())
+    db.session.commit()
+    expect('product update after window', product.effective_price, Decimal('100'))
+
+    product.special_start = ''
+    product.special_end = ''
+    db.session.commit()
+    expect('product empty strings clear the window', (product.special_start, product.special_end), (None, None))
+    expect('product open window', product.effective_price, Decimal('80'))
+
+
+def check_shop_product():
+    from models.shop.shop_product import ShopProduct
+
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    product = ShopProduct(
+        shop_id=1, category_id=1, sku='CHECK-SHOP-1', product_name='Check',
+        product_description='Check', cost_price=Decimal('50'), selling_price=Decimal('100'),
+        special_price=Decimal('80'),
+        special_start=(now - timedelta(hours=1)).isoformat(),
+        special_end=(now + timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M:%SZ')
+    )
+    db.session.add(product)
+    db.session.commit()
+    expect('shop product insert stores naive UTC', product.special_end, (now + timedelta(hours=1)).replace(tzinfo=None))
+    expect('shop product insert inside window', product.effective_price, Decimal('80'))
+
+    product.special_start = (now + timedelta(days=1)).date().isoformat()
+    db.session.commit()
+    expect('shop product update before window', product.effective_price, Decimal('100'))
+
+
+def main():
+    app = create_bench_app()
+    with app.app_context():
+        db.create_all()
+        check_product()
+        check_shop_product()
+    print("All special price window checks passed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+"""
+Swagger spec build script.
+Run this script at build/deploy time to write the API spec to SWAGGER_SPEC_FILE, so
+workers serve /apispec.json from the file instead of introspecting every route.
+"""
+
+import json
+import os
+from app import create_app
+
+
+def build_swagger_spec():
+    app = create_app()
+    spec_file = app.config['SWAGGER_SPEC_FILE']
+
+    # create_app() only swaps the /apispec.json view for an existing file; flasgger's own
+    # builder still introspects the routes afresh
+    with app.test_request_context():
+        spec = app.swag.get_apispecs('apispec')
+
+    os.makedirs(os.path.dirname(spec_file), exist_ok=True)
+    with open(spec_file, 'w') as f:
+        json.dump(spec, f, indent=2, default=str)
+    print(f"✓ Wrote {len(spec.get('paths', {}))} paths to {spec_file}")
+
+
+if __name__ == "__main__":
+    build_swagger_spec()
@@ -1,13 +1,23 @@
 import os
+import re
+import json
 import time
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import lru_cache
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
-from langchain_groq import ChatGroq
-from langchain_huggingface import HuggingFaceEmbeddings
+from typing import Optional, Dict, Any, List
+import faiss
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.chains.combine_documents import create_stuff_documents_chain
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_core.prompts import ChatPromptTemplate
 from langchain.chains import create_retrieval_chain
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
 from langchain_community.document_loaders import TextLoader
 from dotenv import load_dotenv
@@ -26,8 +36,21 @@ load_dotenv()
 
 # Load API keys
 groq_api_key = os.getenv("GROQ_API_KEY")
-if not groq_api_key:
-    raise ValueError("GROQ_API_KEY not found in environment variables")
+
+# Knowledge base and prebuilt index (see build_index / `python chatbot.py build-index`)
+SOURCE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Aoin.txt")
+INDEX_DIR = os.getenv("CHATBOT_INDEX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "chatbot_index"))
+INDEX_FILE = "index.faiss"
+CHUNKS_FILE = "chunks.json"
+MANIFEST_FILE = "manifest.json"
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+# Caches
+EMBEDDING_CACHE_SIZE = int(os.getenv("CHATBOT_EMBEDDING_CACHE_SIZE", 4096))
+RESPONSE_CACHE_SIZE = int(os.getenv("CHATBOT_RESPONSE_CACHE_SIZE", 1024))
+RESPONSE_CACHE_TTL = int(os.getenv("CHATBOT_RESPONSE_CACHE_TTL", 60 * 60))  # 0 disables
 
 ALLOWED_ORIGINS = [
     "http://localhost:5173",
@@ -49,8 +72,190 @@ def add_headers(response):
     response.headers['Access-Control-Max-Age'] = '3600'
     return response
 
-def create_chatbot_app():
-    """Application factory for chatbot."""
+def normalize_query(query):
+    """Case, punctuation and whitespace-insensitive form of a query, used as the cache key"""
+    return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def embedding_model_name(embeddings):
+    """Name recorded in the index manifest for an embeddings model (unwrapping the query cache)"""
+    if isinstance(embeddings, CachedQueryEmbeddings):
+        embeddings = embeddings.embeddings
+    return getattr(embeddings, "model_name", type(embeddings).__name__)
+
+
+def load_embeddings():
+    """The sentence-transformers model used both to build the index and to embed queries"""
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Wraps an embeddings model with an LRU cache of query vectors keyed by the normalized
+    query, so repeated and near-duplicate questions ("What is AOIN Live?" / "what is aoin live")
+    skip the model entirely. Document embedding is passed through uncached.
+    """
+
+    def __init__(self, embeddings, maxsize=EMBEDDING_CACHE_SIZE):
+        self.embeddings = embeddings
+        self._embed_query = lru_cache(maxsize=maxsize)(
+            lambda text: tuple(embeddings.embed_query(text))
+        )
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return list(self._embed_query(normalize_query(text) or text))
+
+    def cache_info(self):
+        return self._embed_query.cache_info()
+
+
+class ResponseCache:
+    """Thread-safe LRU of answers keyed by normalized query, each kept for ttl seconds"""
+
+    def __init__(self, maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, query):
+        if not self.ttl:
+            return None
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            answer, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return answer
+
+    def set(self, query, answer):
+        if not self.ttl:
+            return
+        key = normalize_query(query)
+        with self._lock:
+            self._entries[key] = (answer, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+def build_index(index_dir=INDEX_DIR, source_file=SOURCE_FILE, embeddings=None):
+    """
+    Split and embed the knowledge base and persist it to index_dir: the raw FAISS index,
+    the chunks (text + metadata, in index order) as JSON, and a manifest describing how
+    it was built. Run offline (`python chatbot.py build-index`) whenever Aoin.txt changes.
+    """
+    if not os.path.exists(source_file):
+        logger.error(f"Aoin.txt not found at {source_file}")
+        raise FileNotFoundError(f"Aoin.txt not found at {source_file}")
+
+    embeddings = embeddings or load_embeddings()
+
+    logger.info(f"Loading documents from {source_file}")
+    documents = TextLoader(source_file).load()
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP
+    )
+    texts = text_splitter.split_documents(documents)
+    logger.info(f"Split documents into {len(texts)} chunks")
+
+    start_time = time.time()
+    vectorstore = FAISS.from_documents(texts, embeddings)
+    logger.info(f"Vector store created in {time.time() - start_time:.2f} seconds")
+
+    os.makedirs(index_dir, exist_ok=True)
+    faiss.write_index(vectorstore.index, os.path.join(index_dir, INDEX_FILE))
+    chunks = []
+    for position in range(vectorstore.index.ntotal):
+        document = vectorstore.docstore.search(vectorstore.index_to_docstore_id[position])
+        chunks.append({"page_content": document.page_content, "metadata": document.metadata})
+    with open(os.path.join(index_dir, CHUNKS_FILE), "w") as f:
+        json.dump(chunks, f)
+    with open(os.path.join(index_dir, MANIFEST_FILE), "w") as f:
+        json.dump({
+            "embedding_model": embedding_model_name(embeddings),
+            "dimension": vectorstore.index.d,
+            "chunks": len(chunks),
+            "chunk_size": CHUNK_SIZE,
+            "chunk_overlap": CHUNK_OVERLAP,
+            "source_sha256": file_sha256(source_file),
+            "built_at": datetime.now(timezone.utc).isoformat()
+        }, f, indent=2)
+    logger.info(f"Wrote index with {len(chunks)} chunks to {index_dir}")
+    return vectorstore
+
+
+def load_index(embeddings, index_dir=INDEX_DIR, source_file=SOURCE_FILE):
+    """
+    Load the prebuilt index written by build_index. The FAISS index is memory-mapped, so
+    worker processes share its pages instead of each holding a copy.
+    """
+    index_path = os.path.join(index_dir, INDEX_FILE)
+    if not os.path.exists(index_path):
+        raise FileNotFoundError(
+            f"Chatbot index not found at {index_dir}. Build it with: python chatbot.py build-index"
+        )
+
+    with open(os.path.join(index_dir, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if os.path.exists(source_file) and manifest.get("source_sha256") != file_sha256(source_file):
+        logger.warning(f"{source_file} changed since the index was built; rebuild with: python chatbot.py build-index")
+
+    # An index built with other embeddings loads fine but fails or returns junk on the first
+    # query, so treat it as missing
+    in_use = {
+        "embedding_model": embedding_model_name(embeddings),
+        "dimension": len(embeddings.embed_query("dimension check"))
+    }
+    mismatched = [f"{key} {manifest.get(key)!r} != {value!r}" for key, value in in_use.items() if manifest.get(key) != value]
+    if mismatched:
+        logger.warning(f"Chatbot index at {index_dir} was built with other embeddings ({', '.join(mismatched)}); "
+                       f"rebuild with: python chatbot.py build-index")
+        raise FileNotFoundError(
+            f"Chatbot index at {index_dir} does not match the embeddings in use. Build it with: python chatbot.py build-index"
+        )
+
+    try:
+        index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP)
+    except RuntimeError:
+        # Index types without mmap support are read into memory
+        index = faiss.read_index(index_path)
+
+    with open(os.path.join(index_dir, CHUNKS_FILE)) as f:
+        chunks = json.load(f)
+    docstore = InMemoryDocstore({
+        str(position): Document(page_content=chunk["page_content"], metadata=chunk["metadata"])
+        for position, chunk in enumerate(chunks)
+    })
+    index_to_docstore_id = {position: str(position) for position in range(len(chunks))}
+    logger.info(f"Loaded index with {index.ntotal} vectors from {index_dir}")
+    return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+
+def create_chatbot_app(llm=None, embeddings=None, index_dir=INDEX_DIR):
+    """
+    Application factory for chatbot. Only loads the prebuilt index from index_dir; llm and
+    embeddings default to Groq and the sentence-transformers model and can be injected
+    (e.g. stubs for benchmarks).
+    """
     app = Flask(__name__)
 
     # Configure CORS
@@ -70,8 +275,12 @@ def create_chatbot_app():
     try:
         logger.info("Initializing embeddings and LLM...")
         # Initialize embeddings and LLM
-        embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-        llm = ChatGroq(groq_api_key=groq_api_key, model_name="llama-3.1-8b-instant")
+        embeddings = CachedQueryEmbeddings(embeddings or load_embeddings())
+        if llm is None:
+            if not groq_api_key:
+                raise ValueError("GROQ_API_KEY not found in environment variables")
+            from langchain_groq import ChatGroq
+            llm = ChatGroq(groq_api_key=groq_api_key, model_name="llama-3.1-8b-instant")
         logger.info("Embeddings and LLM initialized successfully")
 
         # Create prompt template
@@ -97,41 +306,10 @@ def create_chatbot_app():
             """
         )
 
-        # Initialize vector store
-        def create_vector_embedding():
-            try:
-                aoin_file = os.path.join(os.path.dirname(__file__), "Aoin.txt")
-                if not os.path.exists(aoin_file):
-                    logger.error(f"Aoin.txt not found at {aoin_file}")
-                    raise FileNotFoundError(f"Aoin.txt not found at {aoin_file}")
-                
-                logger.info(f"Loading documents from {aoin_file}")
-                loader = TextLoader(aoin_file)
-                documents = loader.load()
-                
-                text_splitter = RecursiveCharacterTextSplitter(
-                    chunk_size=1000,
-                    chunk_overlap=200
-                )
-                texts = text_splitter.split_documents(documents)
-                logger.info(f"Split documents into {len(texts)} chunks")
-                
-                start_time = time.time()
-                vectorstore = FAISS.from_documents(texts, embeddings)
-                logger.info(f"Vector store created in {time.time() - start_time:.2f} seconds")
-                
-                return vectorstore
-            except Exception as e:
-                logger.error(f"Error creating vector store: {str(e)}")
-                logger.error(traceback.format_exc())
-                return None
-
-        # Initialize vector store at startup
-        logger.info("Initializing vector store...")
-        vectorstore = create_vector_embedding()
-        if not vectorstore:
-            raise RuntimeError("Failed to initialize the knowledge base.")
-        logger.info("Vector store initialized successfully")
+        # Load the prebuilt vector store
+        logger.info("Loading vector store...")
+        vectorstore = load_index(embeddings, index_dir)
+        logger.info("Vector store loaded successfully")
 
         # Create document chain
         document_chain = create_stuff_documents_chain(llm, prompt)
@@ -144,6 +322,8 @@ def create_chatbot_app():
         logger.error(traceback.format_exc())
         raise
 
+    response_cache = ResponseCache()
+
     # Add monitoring middleware
     @app.before_request
     def before_request():
@@ -185,7 +365,18 @@ def create_chatbot_app():
 
             start_time = time.time()
             logger.info(f"Processing query: {data['query']}")
-            
+
+            llm_response = response_cache.get(data['query'])
+            if llm_response:
+                processing_time = time.time() - start_time
+                logger.info(f"Query answered from cache in {processing_time:.4f} seconds")
+                return jsonify({
+                    "answer": llm_response,
+                    "processing_time": f"{processing_time:.2f} seconds",
+                    "user_id": data.get('user_id'),
+                    "cached": True
+                })
+
             # Get response from LLM
             response = retrieval_chain.invoke({"input": data['query']})
             processing_time = time.time() - start_time
@@ -195,7 +386,9 @@ def create_chatbot_app():
 
             # Extract the actual response from the LLM
             llm_response = response.get("answer", "")
-            if not llm_response:
+            if llm_response:
+                response_cache.set(data['query'], llm_response)
+            else:
                 # If no direct answer, try to generate a greeting response
                 if data['query'].lower() in ['hi', 'hello', 'hey']:
                     llm_response = "Hello! Welcome to AOIN. How can I assist you today?"
@@ -205,7 +398,8 @@ def create_chatbot_app():
             return jsonify({
                 "answer": llm_response,
                 "processing_time": f"{processing_time:.2f} seconds",
-                "user_id": data.get('user_id')
+                "user_id": data.get('user_id'),
+                "cached": False
             })
         except Exception as e:
             logger.error(f"Error processing chat request: {str(e)}")
@@ -236,5 +430,13 @@ def create_chatbot_app():
     return app
 
 if __name__ == "__main__":
-    app = create_chatbot_app()
-    app.run(host='0.0.0.0', port=5901)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="AOIN chatbot service")
+    parser.add_argument("command", nargs="?", default="serve", choices=["serve", "build-index"])
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    args = parser.parse_args()
+
+    if args.command == "build-index":
+        build_index(args.index_dir)
+    else:
+        app = create_chatbot_app(index_dir=args.index_dir)
+        app.run(host='0.0.0.0', port=5901)
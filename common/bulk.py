@@ -0,0 +1,52 @@
+from common.database import db
+
+
+def _chunks(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def bulk_upsert(model, rows, update_columns, chunk_size=1000, increment_columns=()):
+    """
+    Insert rows into model's table, updating update_columns when the primary key already exists.
+    increment_columns are added to the existing values instead of replacing them.
+
+    Each chunk is written with a single multi-row statement: INSERT ... ON DUPLICATE KEY UPDATE
+    on MySQL and INSERT ... ON CONFLICT DO UPDATE on PostgreSQL/SQLite. All rows must share the
+    same keys. Runs inside the caller's transaction; commit is left to the caller.
+    """
+    if not rows:
+        return 0
+
+    table = model.__table__
+    dialect = db.session.get_bind().dialect.name
+    written = 0
+
+    for chunk in _chunks(rows, chunk_size):
+        if dialect == 'mysql':
+            from sqlalchemy.dialects.mysql import insert
+            stmt = insert(table).values(chunk)
+            stmt = stmt.on_duplicate_key_update({
+                **{column: stmt.inserted[column] for column in update_columns},
+                **{column: table.c[column] + stmt.inserted[column] for column in increment_columns}
+            })
+        elif dialect in ('postgresql', 'sqlite'):
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            stmt = insert(table).values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[column.name for column in table.primary_key.columns],
+                set_={
+                    **{column: stmt.excluded[column] for column in update_columns},
+                    **{column: table.c[column] + stmt.excluded[column] for column in increment_columns}
+                }
+            )
+        else:
+            raise NotImplementedError(f"bulk_upsert is not supported for the '{dialect}' dialect")
+
+        db.session.execute(stmt)
+        written += len(chunk)
+
+    return written
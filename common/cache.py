@@ -2,19 +2,22 @@ import json
 import functools
 from flask_caching import Cache
 import redis
+from common.connections import get_redis_pool
 
 # Initialize Flask-Caching extension
 cache = Cache()
 
 def get_redis_client(app=None):
-    """Get Redis client based on app config or environment variables."""
+    """Get a Redis client on the process-wide connection pool for the configured URL."""
     if app and app.config.get('REDIS_URL'):
         redis_url = app.config.get('REDIS_URL')
     else:
         # Fallback to default local Redis
         redis_url = 'redis://localhost:6379/0'
-    
-    return redis.from_url(redis_url)
+
+    max_connections = app.config.get('REDIS_MAX_CONNECTIONS', 50) if app else 50
+    timeout = app.config.get('REDIS_POOL_TIMEOUT', 5) if app else 5
+    return redis.Redis(connection_pool=get_redis_pool(redis_url, max_connections, timeout))
 
 def cache_key_prefix(key_prefix):
     """Create a cache key prefix for differentiating cached data types."""
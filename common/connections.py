@@ -0,0 +1,193 @@
+"""
+Connection management: pooled SQLAlchemy engines, one shared Redis connection pool per
+process, and pool metrics for sizing them.
+
+Pool sizes are per process. With gunicorn every worker has its own pools, so the database
+sees up to workers x (pool_size + max_overflow) connections and Redis up to
+workers x REDIS_MAX_CONNECTIONS; the metrics below are for the worker that serves the request.
+"""
+import os
+import threading
+import time
+import redis
+from flask import g
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+from common.database import db
+
+# Options only QueuePool understands; dropped for SQLite URIs, which use other pool classes
+QUEUE_POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout')
+
+
+class PoolStats:
+    """Thread-safe counters for one process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self.connects = 0
+            self.checkouts = 0
+            self.invalidations = 0
+            self.waits = 0
+            self.wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+            self.timeouts = 0
+            self.requests = 0
+            self.request_queries = 0
+            self.max_request_queries = 0
+
+    def increment(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def record_request(self, queries):
+        with self._lock:
+            self.requests += 1
+            self.request_queries += queries
+            self.max_request_queries = max(self.max_request_queries, queries)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'since': self.started_at,
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'invalidations': self.invalidations,
+                'checkout_wait': {
+                    'count': self.waits,
+                    'avg_ms': round(self.wait_seconds / self.waits * 1000, 3) if self.waits else 0,
+                    'max_ms': round(self.max_wait_seconds * 1000, 3),
+                    'timeouts': self.timeouts
+                },
+                'queries_per_request': {
+                    'requests': self.requests,
+                    'avg': round(self.request_queries / self.requests, 2) if self.requests else 0,
+                    'max': self.max_request_queries
+                }
+            }
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a free connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            pool_stats.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_stats.record_wait(time.perf_counter() - started)
+        return connection
+
+
+def configure_engine_options(app):
+    """
+    Finalize SQLALCHEMY_ENGINE_OPTIONS before db.init_app: use the instrumented pool for
+    server databases and drop the QueuePool-only options for SQLite.
+    """
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if app.config.get('SQLALCHEMY_DATABASE_URI', '').startswith('sqlite'):
+        for name in QUEUE_POOL_OPTIONS:
+            options.pop(name, None)
+    else:
+        options.setdefault('poolclass', InstrumentedQueuePool)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def init_app(app):
+    """
+    Register pool event listeners and per-request query counting (from the request's
+    query profile, see common.query_profiler). Call after db.init_app.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'connect', lambda *args: pool_stats.increment('connects'))
+            event.listen(engine, 'checkout', lambda *args: pool_stats.increment('checkouts'))
+            event.listen(engine, 'invalidate', lambda *args: pool_stats.increment('invalidations'))
+
+    @app.after_request
+    def record_query_count(response):
+        profile = g.get('sql_profile')
+        if profile is not None:
+            pool_stats.record_request(profile.query_count)
+        return response
+
+
+# One Redis connection pool per URL for the whole process
+_redis_pools = {}
+_redis_pools_lock = threading.Lock()
+
+
+def get_redis_pool(redis_url, max_connections=50, timeout=5):
+    """
+    The shared pool for redis_url. Blocks up to timeout seconds for a free connection
+    once max_connections are in use instead of opening more.
+    """
+    pool = _redis_pools.get(redis_url)
+    if pool is None:
+        with _redis_pools_lock:
+            pool = _redis_pools.get(redis_url)
+            if pool is None:
+                pool = redis.BlockingConnectionPool.from_url(
+                    redis_url, max_connections=max_connections, timeout=timeout
+                )
+                _redis_pools[redis_url] = pool
+    return pool
+
+
+def _engine_metrics(engine):
+    pool = engine.pool
+    metrics = {'pool_class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        metrics.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            # Negative until the pool has opened pool_size connections
+            'overflow': pool.overflow(),
+            'max_overflow': pool._max_overflow,
+            'timeout_seconds': pool.timeout()
+        })
+    return metrics
+
+
+def _redis_pool_metrics(pool):
+    # BlockingConnectionPool keeps every connection it created in _connections and
+    # parks idle ones (or None placeholders) in its queue
+    created = len(pool._connections)
+    idle = sum(1 for connection in list(pool.pool.queue) if connection is not None)
+    return {
+        'max_connections': pool.max_connections,
+        'created': created,
+        'in_use': created - idle,
+        'idle': idle
+    }
+
+
+def pool_metrics():
+    """Current pool state and counters for this process (needs an app context)"""
+    engines = {str(bind or 'default'): _engine_metrics(engine) for bind, engine in db.engines.items()}
+    return {
+        'pid': os.getpid(),
+        'database': {
+            'engines': engines,
+            **pool_stats.snapshot()
+        },
+        'redis': {url.split('@')[-1]: _redis_pool_metrics(pool) for url, pool in list(_redis_pools.items())}
+    }
@@ -0,0 +1,184 @@
+import base64
+import hashlib
+import json
+import logging
+from datetime import datetime, date
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import and_, or_
+from common.cache import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+APPROX_TOTAL_TIMEOUT = 300
+TOTAL_MODES = ('none', 'approx', 'exact')
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'dec': str(value)}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+        if 'dec' in value:
+            return Decimal(value['dec'])
+    return value
+
+
+def encode_cursor(sort_value, pk_value):
+    """Encode the (sort_key, pk) of the last row on a page as an opaque URL-safe token"""
+    payload = json.dumps([_encode_value(sort_value), _encode_value(pk_value)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a token produced by encode_cursor back into (sort_value, pk_value)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, pk_value = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return _decode_value(sort_value), _decode_value(pk_value)
+    except Exception:
+        raise InvalidCursorError("Invalid pagination cursor")
+
+
+def get_keyset_args(args, default_per_page=DEFAULT_PER_PAGE, max_per_page=MAX_PER_PAGE):
+    """
+    Read keyset pagination parameters from request args.
+
+    Returns None when the client did not ask for cursor pagination (no `cursor` argument),
+    so endpoints can keep serving page/per_page requests unchanged. An empty cursor
+    requests the first page.
+    """
+    if 'cursor' not in args:
+        return None
+
+    per_page = args.get('per_page', default_per_page, type=int) or default_per_page
+    total = (args.get('total') or 'none').lower()
+    if total not in TOTAL_MODES:
+        raise ValueError(f"total must be one of: {', '.join(TOTAL_MODES)}")
+
+    cursor = args.get('cursor') or None
+    if cursor:
+        # Reject malformed cursors up front so callers can answer 400
+        decode_cursor(cursor)
+
+    return {
+        'cursor': cursor,
+        'per_page': max(1, min(per_page, max_per_page)),
+        'total': total
+    }
+
+
+def _cached_count(query):
+    """COUNT(*) for a query, cached in Redis for a few minutes and keyed by its SQL and parameters"""
+    statement = query.statement.compile()
+    fingerprint = hashlib.sha1(
+        (str(statement) + repr(sorted(statement.params.items(), key=lambda item: item[0]))).encode('utf-8')
+    ).hexdigest()
+    cache_key = f"approx_total:{fingerprint}"
+
+    redis_client = None
+    try:
+        redis_client = get_redis_client(current_app)
+        cached_total = redis_client.get(cache_key)
+        if cached_total is not None:
+            return int(cached_total)
+    except Exception as e:
+        logger.warning(f"Approximate total cache unavailable: {str(e)}")
+        redis_client = None
+
+    total = query.order_by(None).count()
+
+    if redis_client:
+        try:
+            redis_client.setex(cache_key, APPROX_TOTAL_TIMEOUT, total)
+        except Exception as e:
+            logger.warning(f"Failed to cache approximate total: {str(e)}")
+    return total
+
+
+def keyset_paginate(query, sort_column, pk_column, per_page, cursor=None, descending=True, total='none'):
+    """
+    Fetch one page of query ordered by (sort_column, pk_column) using a seek predicate.
+
+    Unlike OFFSET, the database jumps straight to the cursor position through the
+    (sort_column, pk_column) index, so page 10,000 costs the same as page 1. sort_column
+    must be non-nullable; pass sort_column=None to page by the primary key alone.
+
+    total: 'none' skips counting, 'exact' runs COUNT(*), 'approx' serves a Redis-cached
+    COUNT(*) that may be a few minutes stale.
+
+    Returns {'items', 'next_cursor', 'has_next', 'per_page', 'total'}.
+    """
+    sort_column = sort_column if sort_column is not None else pk_column
+    total_count = None
+    if total == 'exact':
+        total_count = query.order_by(None).count()
+    elif total == 'approx':
+        total_count = _cached_count(query)
+
+    if cursor:
+        sort_value, pk_value = decode_cursor(cursor)
+        if sort_column is pk_column:
+            query = query.filter(pk_column < pk_value if descending else pk_column > pk_value)
+        elif descending:
+            # The redundant leading range bound lets every optimizer turn this into an index range scan
+            query = query.filter(sort_column <= sort_value, or_(
+                sort_column < sort_value,
+                and_(sort_column == sort_value, pk_column < pk_value)
+            ))
+        else:
+            query = query.filter(sort_column >= sort_value, or_(
+                sort_column > sort_value,
+                and_(sort_column == sort_value, pk_column > pk_value)
+            ))
+
+    if sort_column is pk_column:
+        ordering = [pk_column.desc() if descending else pk_column.asc()]
+    elif descending:
+        ordering = [sort_column.desc(), pk_column.desc()]
+    else:
+        ordering = [sort_column.asc(), pk_column.asc()]
+
+    rows = query.order_by(None).order_by(*ordering).limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    items = rows[:per_page]
+
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, pk_column.key))
+
+    return {
+        'items': items,
+        'next_cursor': next_cursor,
+        'has_next': has_next,
+        'per_page': per_page,
+        'total': total_count
+    }
+
+
+def keyset_meta(page):
+    """The `pagination` block returned by cursor-paginated endpoints"""
+    return {
+        'per_page': page['per_page'],
+        'next_cursor': page['next_cursor'],
+        'has_next': page['has_next'],
+        'total': page['total']
+    }
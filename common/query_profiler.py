@@ -0,0 +1,211 @@
+"""
+Per-request SQL profiling.
+
+Every statement executed while a profile is active (each request, or a
+`profile_queries()` block) is timed from before_cursor_execute to after_cursor_execute
+and recorded under its normalized form, so an endpoint's query count, total DB time,
+slowest statements and repeated (N+1) statements can be read back:
+
+    with assert_max_queries(5):
+        client.get('/api/products')
+
+Config:
+    SQL_PROFILER_SERVER_TIMING   emit a Server-Timing header (defaults to DEBUG)
+    SLOW_QUERY_MS                statements slower than this go to the slow-query log
+    SLOW_QUERY_LOG_SAMPLE_RATE   fraction of slow statements logged (0-1)
+    SQL_QUERY_BUDGET             default max queries per request (None = no budget)
+    SQL_QUERY_BUDGET_STRICT      raise QueryBudgetExceeded instead of logging (tests)
+"""
+import functools
+import logging
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from flask import current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger('sql.slow')
+
+_active = threading.local()
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:\?|%s|:\w+)\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a request or block runs more queries than its budget allows"""
+
+
+def normalize_statement(statement):
+    """Collapse literals, IN lists and whitespace so one query shape maps to one key"""
+    statement = _STRING_LITERAL.sub('?', statement)
+    statement = _NUMBER_LITERAL.sub('?', statement)
+    statement = _IN_LIST.sub('IN (...)', statement)
+    return _WHITESPACE.sub(' ', statement).strip()
+
+
+class QueryProfile:
+    """Queries recorded while a profile is active"""
+    SLOWEST_LIMIT = 5
+
+    def __init__(self, label=None, slow_ms=None, slow_sample_rate=1.0):
+        self.label = label
+        self.slow_ms = slow_ms
+        self.slow_sample_rate = slow_sample_rate
+        self.query_count = 0
+        self.total_seconds = 0.0
+        self.statements = {}  # normalized statement -> [count, total seconds, max seconds]
+
+    def record(self, statement, seconds):
+        self.query_count += 1
+        self.total_seconds += seconds
+        stats = self.statements.get(statement)
+        if stats is None:
+            self.statements[statement] = [1, seconds, seconds]
+        else:
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+    def slowest(self, limit=SLOWEST_LIMIT):
+        ranked = sorted(self.statements.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+        return [{'statement': statement, 'count': count, 'max_ms': round(max_seconds * 1000, 2)}
+                for statement, (count, _, max_seconds) in ranked]
+
+    def repeated(self, min_count=2, limit=SLOWEST_LIMIT):
+        """Statements run min_count or more times, most frequent first - usually N+1 loops"""
+        ranked = sorted(
+            ((statement, stats) for statement, stats in self.statements.items() if stats[0] >= min_count),
+            key=lambda item: item[1][0], reverse=True
+        )[:limit]
+        return [{'statement': statement, 'count': count, 'total_ms': round(total_seconds * 1000, 2)}
+                for statement, (count, total_seconds, _) in ranked]
+
+    def summary(self):
+        return {
+            'label': self.label,
+            'query_count': self.query_count,
+            'total_ms': round(self.total_seconds * 1000, 2),
+            'slowest': self.slowest(),
+            'repeated': self.repeated()
+        }
+
+
+def _profiles():
+    profiles = getattr(_active, 'profiles', None)
+    if profiles is None:
+        profiles = _active.profiles = []
+    return profiles
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the statement's execution context, which is discarded with it: a statement
+    # that raises (no after_cursor_execute) leaves nothing behind on the pooled connection
+    if context is not None:
+        context._query_start_time = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_query_start_time', None)
+    profiles = _profiles()
+    if not profiles or started is None:
+        return
+    elapsed = time.perf_counter() - started
+    normalized = normalize_statement(statement)
+    for profile in profiles:
+        profile.record(normalized, elapsed)
+
+    # Only request profiles carry a slow-query threshold
+    profile = next((profile for profile in profiles if profile.slow_ms is not None), None)
+    if profile and elapsed * 1000 >= profile.slow_ms and random.random() < profile.slow_sample_rate:
+        slow_query_logger.warning(f"Slow query ({elapsed * 1000:.1f} ms) in {profile.label}: {normalized}")
+
+
+@contextmanager
+def profile_queries(label=None):
+    """Record every query run inside the block; yields the QueryProfile"""
+    profile = QueryProfile(label)
+    profiles = _profiles()
+    profiles.append(profile)
+    try:
+        yield profile
+    finally:
+        profiles.remove(profile)
+
+
+@contextmanager
+def assert_max_queries(budget, label=None):
+    """Fail with QueryBudgetExceeded if the block runs more than budget queries"""
+    with profile_queries(label) as profile:
+        yield profile
+    if profile.query_count > budget:
+        raise QueryBudgetExceeded(_budget_message(profile, budget))
+
+
+def query_budget(budget):
+    """Set the maximum number of queries a view may run, overriding SQL_QUERY_BUDGET"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(*args, **kwargs):
+            g.sql_query_budget = budget
+            return view(*args, **kwargs)
+        return wrapped
+    return decorator
+
+
+def _budget_message(profile, budget):
+    repeated = '; '.join(f"{item['count']}x {item['statement'][:120]}" for item in profile.repeated(limit=3))
+    return (f"{profile.label or 'block'} ran {profile.query_count} queries (budget {budget})"
+            + (f". Repeated: {repeated}" if repeated else ''))
+
+
+def init_app(app):
+    """Profile every request: Server-Timing header, slow-query log and query budgets"""
+    app.config.setdefault('SQL_PROFILER_SERVER_TIMING', app.config.get('DEBUG', False))
+    app.config.setdefault('SLOW_QUERY_MS', 200)
+    app.config.setdefault('SLOW_QUERY_LOG_SAMPLE_RATE', 1.0)
+    app.config.setdefault('SQL_QUERY_BUDGET', None)
+    app.config.setdefault('SQL_QUERY_BUDGET_STRICT', False)
+
+    @app.before_request
+    def start_query_profile():
+        profile = QueryProfile(
+            f"{request.method} {request.path}",
+            slow_ms=current_app.config['SLOW_QUERY_MS'],
+            slow_sample_rate=current_app.config['SLOW_QUERY_LOG_SAMPLE_RATE']
+        )
+        _profiles().append(profile)
+        g.sql_profile = profile
+
+    @app.after_request
+    def finish_query_profile(response):
+        profile = g.get('sql_profile')
+        if profile is None:
+            return response
+
+        if current_app.config['SQL_PROFILER_SERVER_TIMING']:
+            response.headers.add(
+                'Server-Timing', f'db;dur={profile.total_seconds * 1000:.2f};desc="{profile.query_count} queries"'
+            )
+
+        budget = g.get('sql_query_budget', current_app.config['SQL_QUERY_BUDGET'])
+        if budget is not None and profile.query_count > budget:
+            message = _budget_message(profile, budget)
+            if current_app.config['SQL_QUERY_BUDGET_STRICT']:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    @app.teardown_request
+    def discard_query_profile(exc=None):
+        profile = g.pop('sql_profile', None)
+        if profile is not None and profile in _profiles():
+            _profiles().remove(profile)
@@ -4,13 +4,67 @@ from models.product import Product
 from models.product_stock import ProductStock
 from models.product_media import ProductMedia
 from common.database import db
+from common.cache import get_redis_client
 from sqlalchemy import and_
 from datetime import datetime
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Serialized carts are cached per user and dropped on every cart write; the short TTL
+# bounds how stale the live price/stock snapshot embedded in the payload can get.
+CART_CACHE_TIMEOUT = 120
+
 class CartController:
+    @staticmethod
+    def _cart_cache_key(user_id):
+        return f"cart:{user_id}"
+
+    @staticmethod
+    def invalidate_cart_cache(user_id):
+        """
+        Drop the cached cart payload for a user
+        """
+        try:
+            get_redis_client(current_app).delete(CartController._cart_cache_key(user_id))
+        except Exception as e:
+            logger.warning(f"Failed to invalidate cart cache for user {user_id}: {str(e)}")
+
+    @staticmethod
+    def get_cart_data(user_id: int):
+        """
+        Get the serialized cart for a user, served from Redis when available
+        """
+        cache_key = CartController._cart_cache_key(user_id)
+        redis_client = None
+        try:
+            redis_client = get_redis_client(current_app)
+            cached_cart = redis_client.get(cache_key)
+            if cached_cart:
+                return json.loads(cached_cart)
+        except Exception as e:
+            logger.warning(f"Cart cache unavailable for user {user_id}: {str(e)}")
+            redis_client = None
+
+        cart_data = CartController.get_cart(user_id).serialize()
+
+        if redis_client:
+            try:
+                redis_client.setex(cache_key, CART_CACHE_TIMEOUT, json.dumps(cart_data))
+            except Exception as e:
+                logger.warning(f"Failed to cache cart for user {user_id}: {str(e)}")
+        return cart_data
+
+    @staticmethod
+    def get_cart_items_with_snapshots(user_id: int):
+        """
+        Get all cart items for a user together with their product price/stock snapshots
+        """
+        cart_items = CartController.get_cart_items(user_id)
+        snapshots = CartItem.get_product_snapshots([item.product_id for item in cart_items])
+        return cart_items, snapshots
+
     @staticmethod
     def get_cart_items(user_id: int):
         """
@@ -71,12 +125,6 @@ class CartController:
             if not product_stock or product_stock.stock_qty < quantity:
                 raise ValueError("Insufficient stock")
             
-            # Get product image URL
-            product_image = ProductMedia.query.filter_by(
-                product_id=product_id,
-                type='image'
-            ).first()
-
             # Check if product already exists in cart with the same attributes
             existing_cart_item = None
             if selected_attributes:
@@ -112,6 +160,7 @@ class CartController:
                 db.session.add(cart_item)
             
             db.session.commit()
+            CartController.invalidate_cart_cache(user_id)
             return cart
         except Exception as e:
             db.session.rollback()
@@ -133,7 +182,9 @@ class CartController:
             else:
                 cart_item.quantity = quantity
             
+            user_id = cart_item.cart.user_id
             db.session.commit()
+            CartController.invalidate_cart_cache(user_id)
             return cart_item
         except Exception as e:
             db.session.rollback()
@@ -150,8 +201,10 @@ class CartController:
             if not cart_item:
                 raise ValueError("Cart item not found")
             
+            user_id = cart_item.cart.user_id
             db.session.delete(cart_item)
             db.session.commit()
+            CartController.invalidate_cart_cache(user_id)
         except Exception as e:
             db.session.rollback()
             raise e
@@ -169,6 +222,7 @@ class CartController:
             
             CartItem.query.filter_by(cart_id=cart.cart_id).delete()
             db.session.commit()
+            CartController.invalidate_cart_cache(user_id)
         except Exception as e:
             db.session.rollback()
             raise e
@@ -177,8 +231,7 @@ class CartController:
     def get_cart_details(user_id):
         """Get detailed cart information"""
         try:
-            cart = CartController.get_cart(user_id)
-            return True, cart.serialize()
+            return True, CartController.get_cart_data(user_id)
 
         except Exception as e:
             logger.error(f"Error getting cart details: {str(e)}")
@@ -106,7 +106,7 @@ class MerchantLiveStreamController:
             return broadcast_id, broadcast_data['snippet'].get('liveBroadcastContent', ''), broadcast_data['snippet'].get('thumbnails', {}), rtmp_info
 
     @staticmethod
-    def schedule_live_stream(merchant_id, title, description, product_id, scheduled_time, thumbnail_file=None, thumbnail_url=None):
+    def schedule_live_stream(merchant_id, title, description, product_id, scheduled_time, thumbnail_file=None, thumbnail_url=None, thumbnail_asset=None):
         logging.debug(f"schedule_live_stream called: merchant_id={merchant_id}, title={title}, product_id={product_id}, scheduled_time={scheduled_time}")
         # Validate product
         product = Product.query.filter_by(product_id=product_id, merchant_id=merchant_id, deleted_at=None).first()
@@ -114,7 +114,10 @@ class MerchantLiveStreamController:
             raise Exception("Product not found or not owned by merchant.")
         # Handle thumbnail
         thumbnail_public_id = None
-        if thumbnail_file:
+        if thumbnail_asset:
+            # Uploaded directly through /api/upload/signed and already redeemed by the route
+            thumbnail_url, thumbnail_public_id = thumbnail_asset['secure_url'], thumbnail_asset['public_id']
+        elif thumbnail_file:
             thumbnail_url, thumbnail_public_id = MerchantLiveStreamController.upload_thumbnail_to_cloudinary(thumbnail_file)
         # Get YouTube token from DB (youtube_token.py)
         yt_token = YouTubeToken.query.filter_by(is_active=True).order_by(YouTubeToken.created_at.desc()).first()
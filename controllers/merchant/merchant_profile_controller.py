@@ -2,6 +2,7 @@ from flask import current_app
 from common.database import db
 from auth.models import MerchantProfile
 from models.product_placement import ProductPlacement
+from services.placement_cache_service import PlacementCacheService
 from models.subscription import SubscriptionPlan, SubscriptionHistory
 from datetime import datetime, timedelta
 
@@ -64,6 +65,7 @@ class MerchantProfileController:
                 subscription_duration_days=plan.duration_days,
                 placement_limit_per_type=plan.promo_limit
             )
+            PlacementCacheService.invalidate()
             return profile
         except Exception as e:
             db.session.rollback()
@@ -98,6 +100,7 @@ class MerchantProfileController:
             # All placements have been deleted; no soft-deactivation needed
             
             db.session.commit()
+            PlacementCacheService.invalidate()
             return profile
         except Exception as e:
             db.session.rollback()
@@ -4,12 +4,14 @@ from common.database import db
 from models.review import Review
 from models.product import Product
 from auth.models.models import MerchantProfile
+from common.pagination import keyset_paginate, keyset_meta
 
 class MerchantReviewController:
     @staticmethod
-    def get_merchant_product_reviews(merchant_id, page=1, per_page=10, filters=None):
+    def get_merchant_product_reviews(merchant_id, page=1, per_page=10, filters=None, keyset=None):
         """
-        Get all reviews for products owned by a merchant with filtering options
+        Get all reviews for products owned by a merchant with filtering options.
+        Pass keyset (from common.pagination.get_keyset_args) for cursor pagination.
         """
         try:
             # Base query to get reviews for merchant's products
@@ -38,14 +40,29 @@ class MerchantReviewController:
                     else:
                         query = query.filter(~Review.images.any())
 
-            # Get total count before pagination
-            total_reviews = query.count()
-
-            # Apply pagination
-            reviews = query.order_by(Review.created_at.desc())\
-                .offset((page - 1) * per_page)\
-                .limit(per_page)\
-                .all()
+            if keyset:
+                result_page = keyset_paginate(
+                    query, Review.created_at, Review.review_id, keyset['per_page'],
+                    cursor=keyset['cursor'], total=keyset['total']
+                )
+                reviews = result_page['items']
+                pagination = keyset_meta(result_page)
+            else:
+                # Get total count before pagination
+                total_reviews = query.count()
+
+                # Apply pagination
+                reviews = query.order_by(Review.created_at.desc())\
+                    .offset((page - 1) * per_page)\
+                    .limit(per_page)\
+                    .all()
+
+                pagination = {
+                    'total': total_reviews,
+                    'page': page,
+                    'per_page': per_page,
+                    'pages': (total_reviews + per_page - 1) // per_page
+                }
 
             # Calculate average rating
             avg_rating = db.session.query(func.avg(Review.rating))\
@@ -69,15 +86,11 @@ class MerchantReviewController:
 
             return {
                 'reviews': [review.serialize() for review in reviews],
-                'pagination': {
-                    'total': total_reviews,
-                    'page': page,
-                    'per_page': per_page,
-                    'pages': (total_reviews + per_page - 1) // per_page
-                },
+                'pagination': pagination,
                 'stats': {
                     'average_rating': round(float(avg_rating), 1),
-                    'total_reviews': total_reviews,
+                    # Cursor pages skip COUNT(*) unless asked; fall back to the merchant-wide distribution
+                    'total_reviews': pagination['total'] if pagination['total'] is not None else sum(rating_dist.values()),
                     'rating_distribution': rating_dist
                 }
             }
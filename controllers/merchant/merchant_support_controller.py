@@ -7,6 +7,8 @@ from werkzeug.exceptions import NotFound, Forbidden, BadRequest
 from sqlalchemy import desc, asc
 import cloudinary
 import cloudinary.uploader
+from services.signed_upload_service import SignedUploadService, SignedUploadError
+from services.support_inbox_service import SupportInboxService
 import datetime 
 
 
@@ -53,8 +55,15 @@ class MerchantSupportTicketController:
         except ValueError:
             raise BadRequest(f"Invalid priority value. Choose from: {[p.value for p in TicketPriority]}")
         
+        image_asset_token = data.get('image_asset_token')
         image_url = None
-        if image_file:
+        if image_asset_token:
+            # Uploaded directly through /api/upload/signed
+            try:
+                image_url = SignedUploadService.redeem(image_asset_token, 'support_attachment', creator_user_id)['secure_url']
+            except SignedUploadError as e:
+                raise BadRequest(str(e))
+        elif image_file:
             try:
                 image_url = _upload_to_cloudinary(image_file, "support_tickets")
             except Exception as e:
@@ -110,9 +119,9 @@ class MerchantSupportTicketController:
                 sort_field = getattr(SupportTicket, sort_field_name)
                 query = query.order_by(sort_order_func(sort_field))
             else: 
-                query = query.order_by(desc(SupportTicket.updated_at))
+                query = query.order_by(desc(SupportTicket.last_activity_at))
         else: 
-            query = query.order_by(desc(SupportTicket.updated_at))
+            query = query.order_by(desc(SupportTicket.last_activity_at))
 
         paginated_tickets = query.paginate(page=page, per_page=per_page, error_out=False)
         return paginated_tickets
@@ -123,10 +132,18 @@ class MerchantSupportTicketController:
         ticket = SupportTicket.query.filter_by(ticket_uid=ticket_uid, merchant_id=merchant_id).first()
         if not ticket:
             raise NotFound("Support ticket not found or access denied.")
+        SupportInboxService.mark_read(ticket, 'requester')
         return ticket
 
     @staticmethod
-    def add_message_to_ticket(ticket_uid, merchant_id, sender_user_id, message_text, attachment_file=None):
+    def get_merchant_ticket_messages(ticket_uid, merchant_id, before_id=None, limit=None):
+        ticket = SupportTicket.query.filter_by(ticket_uid=ticket_uid, merchant_id=merchant_id).first()
+        if not ticket:
+            raise NotFound("Support ticket not found or access denied.")
+        return SupportInboxService.paginate_messages(ticket, before_id=before_id, limit=limit)
+
+    @staticmethod
+    def add_message_to_ticket(ticket_uid, merchant_id, sender_user_id, message_text, attachment_file=None, attachment_asset_token=None):
         # Ensure the ticket belongs to the merchant adding the message
         ticket = SupportTicket.query.filter_by(ticket_uid=ticket_uid, merchant_id=merchant_id).first()
         if not ticket:
@@ -135,11 +152,17 @@ class MerchantSupportTicketController:
         if ticket.status == TicketStatus.CLOSED.value:
             raise BadRequest("Cannot add messages to a closed ticket.")
         
-        if not message_text and not attachment_file: 
+        if not message_text and not attachment_file and not attachment_asset_token: 
             raise BadRequest("Message text or an attachment is required.")
 
         attachment_url = None
-        if attachment_file:
+        if attachment_asset_token:
+            # Uploaded directly through /api/upload/signed
+            try:
+                attachment_url = SignedUploadService.redeem(attachment_asset_token, 'support_attachment', sender_user_id)['secure_url']
+            except SignedUploadError as e:
+                raise BadRequest(str(e))
+        elif attachment_file:
             try:
                 attachment_url = _upload_to_cloudinary(attachment_file, "support_attachments")
             except Exception as e:
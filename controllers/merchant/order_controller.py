@@ -4,6 +4,7 @@ from models.enums import OrderStatusEnum, PaymentStatusEnum
 from sqlalchemy import and_, or_, distinct
 from datetime import datetime, timedelta
 from auth.models.models import MerchantProfile, User
+from common.pagination import keyset_paginate, keyset_meta
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,9 +12,11 @@ logger = logging.getLogger(__name__)
 class MerchantOrderController:
     @staticmethod
     def get_merchant_orders(user_id: int, page: int = 1, per_page: int = 50, status: str = None, 
-                          payment_status: str = None, start_date: str = None, end_date: str = None):
+                          payment_status: str = None, start_date: str = None, end_date: str = None,
+                          keyset: dict = None):
         """
-        Get all orders for a merchant's products with pagination and filtering
+        Get all orders for a merchant's products with pagination and filtering.
+        Pass keyset (from common.pagination.get_keyset_args) for cursor pagination.
         """
         try:
             # First get the merchant profile from user_id
@@ -26,6 +29,8 @@ class MerchantOrderController:
             
             # Base query to get orders with merchant's products
             query = Order.query.join(OrderItem).filter(OrderItem.merchant_id == merchant_id).distinct()
+            # Items and addresses are batch-loaded per page rather than per order
+            query = query.options(*Order.list_load_options())
             
             
             # Apply order status filter if provided
@@ -67,6 +72,27 @@ class MerchantOrderController:
                     logger.error(f"Invalid end date format: {end_date}")
                     raise ValueError(f"Invalid end date format: {end_date}")
 
+            def serialize_orders(orders):
+                # Serialize orders with only the items belonging to this merchant
+                serialized_orders = []
+                for order in orders:
+                    order_data = order.serialize(include_items=False, include_history=True)
+                    # Filter items to only include those from this merchant
+                    merchant_items = [item.serialize() for item in order.items if item.merchant_id == merchant_id]
+                    order_data['items'] = merchant_items
+                    serialized_orders.append(order_data)
+                return serialized_orders
+
+            if keyset:
+                result_page = keyset_paginate(
+                    query, Order.order_date, Order.order_id, keyset['per_page'],
+                    cursor=keyset['cursor'], total=keyset['total']
+                )
+                return {
+                    'orders': serialize_orders(result_page['items']),
+                    'pagination': keyset_meta(result_page)
+                }
+
             # Get total count for pagination
             total = query.count()
             logger.info(f"Total orders found: {total}")
@@ -84,14 +110,7 @@ class MerchantOrderController:
             has_next = page < total_pages
             has_prev = page > 1
 
-            # Serialize orders with only the items belonging to this merchant
-            serialized_orders = []
-            for order in orders:
-                order_data = order.serialize(include_items=False, include_history=True)
-                # Filter items to only include those from this merchant
-                merchant_items = [item.serialize() for item in order.items if item.merchant_id == merchant_id]
-                order_data['items'] = merchant_items
-                serialized_orders.append(order_data)
+            serialized_orders = serialize_orders(orders)
 
             return {
                 'orders': serialized_orders,
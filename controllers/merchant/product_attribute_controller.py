@@ -3,6 +3,7 @@ from models.attribute import Attribute
 from models.attribute_value import AttributeValue
 from common.database import db
 from sqlalchemy.exc import IntegrityError
+from services.product_detail_service import ProductDetailService
 
 class MerchantProductAttributeController:
     @staticmethod
@@ -63,6 +64,7 @@ class MerchantProductAttributeController:
         try:
             db.session.add_all(vals)
             db.session.commit()
+            ProductDetailService.invalidate_products(pid)
             return vals if len(vals) > 1 else vals[0]
         except IntegrityError as e:
             db.session.rollback()
@@ -108,6 +110,7 @@ class MerchantProductAttributeController:
                 created.append(pa)
             try:
                 db.session.commit()
+                ProductDetailService.invalidate_products(pid)
                 return created
             except IntegrityError as e:
                 db.session.rollback()
@@ -175,6 +178,7 @@ class MerchantProductAttributeController:
 
         try:
             db.session.commit()
+            ProductDetailService.invalidate_products(pid)
             return existing
         except IntegrityError as e:
             db.session.rollback()
@@ -211,6 +215,7 @@ class MerchantProductAttributeController:
             pa.value_number = None
 
         db.session.commit()
+        ProductDetailService.invalidate_products(pid)
         return pa
 
     @staticmethod
@@ -225,4 +230,5 @@ class MerchantProductAttributeController:
         ).first_or_404()
         db.session.delete(pa)
         db.session.commit()
+        ProductDetailService.invalidate_products(pid)
         return True
@@ -7,6 +7,9 @@ from models.product import Product
 from auth.models.models import MerchantProfile
 from decimal import Decimal, ROUND_HALF_UP
 from datetime import datetime, timezone
+from services.product_detail_service import ProductDetailService
+from services.product_import_service import ProductImportService
+from services.variant_generator_service import VariantGeneratorService
 
 class MerchantProductController:
     @staticmethod
@@ -96,6 +99,7 @@ class MerchantProductController:
                 setattr(p, field, value_to_set)
         
         db.session.commit()
+        ProductDetailService.invalidate_products(p.product_id)
         return p
 
     @staticmethod
@@ -112,6 +116,7 @@ class MerchantProductController:
 
         p.deleted_at = db.func.current_timestamp()
         db.session.commit()
+        ProductDetailService.invalidate_products(p.product_id)
         return p
 
     @staticmethod
@@ -123,6 +128,7 @@ class MerchantProductController:
         p.approved_by = admin_id
         p.rejection_reason = None
         db.session.commit()
+        ProductDetailService.invalidate_products(p.product_id, p.parent_product_id)
         return p
 
     @staticmethod
@@ -134,6 +140,7 @@ class MerchantProductController:
         p.approved_by = None
         p.rejection_reason = reason
         db.session.commit()
+        ProductDetailService.invalidate_products(p.product_id, p.parent_product_id)
         return p
 
     @staticmethod
@@ -283,8 +290,69 @@ class MerchantProductController:
 
             # Commit the transaction
             db.session.commit()
+            ProductDetailService.invalidate_products(parent_id)
             return variant
 
         except Exception as e:
             db.session.rollback()
             abort(500, f"Failed to create variant: {str(e)}")
+
+    @staticmethod
+    def generate_variants(parent_id, data):
+        """
+        Create variants of a parent product in one transaction, from `combinations`
+        ([{attributes, sku?, selling_price?, cost_price?, stock_qty?}]) or from the cartesian
+        product of `attribute_values` ({attribute_id: [values]}). Attribute keys are attribute
+        ids as in create_variant. Returns (variants, errors); raises ValueError for bad input.
+        """
+        user_id = get_jwt_identity()
+        merchant = MerchantProfile.get_by_user_id(user_id)
+        if not merchant:
+            abort(404, "Merchant profile not found")
+
+        parent_product = Product.query.filter_by(
+            product_id=parent_id,
+            merchant_id=merchant.id,
+            parent_product_id=None,
+            deleted_at=None
+        ).first_or_404()
+
+        combinations = VariantGeneratorService.expand(data)
+        try:
+            product_ids, errors = VariantGeneratorService.create_merchant_variants(parent_product, combinations)
+            if not product_ids:
+                db.session.rollback()
+                raise ValueError(f"No variants created due to errors: {'; '.join(errors[:5])}")
+            db.session.commit()
+        except ValueError:
+            raise
+        except Exception as e:
+            db.session.rollback()
+            abort(500, f"Failed to create variants: {str(e)}")
+
+        ProductDetailService.invalidate_products(parent_id)
+        variants = Product.query.options(
+            db.selectinload(Product.category),
+            db.selectinload(Product.brand)
+        ).filter(Product.product_id.in_(product_ids)).order_by(Product.product_id).all()
+        return variants, errors
+
+    @staticmethod
+    def import_products(stream, file_name, fmt):
+        """Queue a bulk catalog import (CSV/XLSX/JSONL/JSON) for the current merchant"""
+        user_id = get_jwt_identity()
+        merchant = MerchantProfile.get_by_user_id(user_id)
+        if not merchant:
+            abort(404, "Merchant profile not found")
+        return ProductImportService.create_job('merchant', merchant.id, user_id, stream, file_name, fmt)
+
+    @staticmethod
+    def get_import_job(job_id):
+        user_id = get_jwt_identity()
+        merchant = MerchantProfile.get_by_user_id(user_id)
+        if not merchant:
+            abort(404, "Merchant profile not found")
+        job = ProductImportService.get_job(job_id, merchant_id=merchant.id)
+        if not job:
+            abort(404, "Import job not found")
+        return job
@@ -7,6 +7,8 @@ from auth.models.models import MerchantProfile
 from common.database import db
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timezone
+from services.product_detail_service import ProductDetailService
+from services.media_manifest_service import MediaManifestService
 import cloudinary 
 
 class MerchantProductMediaController:
@@ -31,6 +33,19 @@ class MerchantProductMediaController:
         )
         return ProductMedia.query.filter_by(product_id=product.product_id, deleted_at=None).order_by(ProductMedia.sort_order).all()
 
+    @staticmethod
+    def manifest(pid):
+        """The product's precomputed media manifest (primary image, gallery, resized renditions)"""
+        merchant_id = MerchantProductMediaController._get_merchant_id_from_jwt()
+        product = Product.query.options(db.undefer(Product.media_manifest)).filter_by(
+            product_id=pid,
+            merchant_id=merchant_id,
+            deleted_at=None
+        ).first_or_404(
+            description=f"Product with ID {pid} not found or you do not have permission to access its media."
+        )
+        return MediaManifestService.get(Product, product)
+
     @staticmethod
     def create(product_id_param, data):
         merchant_id = MerchantProductMediaController._get_merchant_id_from_jwt() 
@@ -72,6 +87,7 @@ class MerchantProductMediaController:
             )
             db.session.add(pm)
             db.session.commit()
+            ProductDetailService.invalidate_products(pm.product_id)
             return pm
         except IntegrityError as e:
             db.session.rollback()
@@ -108,4 +124,5 @@ class MerchantProductMediaController:
 
         pm.deleted_at = datetime.now(timezone.utc)
         db.session.commit()
+        ProductDetailService.invalidate_products(pm.product_id)
         return pm
\ No newline at end of file
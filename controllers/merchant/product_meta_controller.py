@@ -4,6 +4,7 @@ from models.product_meta import ProductMeta
 from models.product import Product
 from auth.models.models import MerchantProfile
 from flask_jwt_extended import get_jwt_identity
+from services.product_detail_service import ProductDetailService
 
 class MerchantProductMetaController:
     @staticmethod
@@ -59,4 +60,5 @@ class MerchantProductMetaController:
         meta.meta_keywords = data.get('meta_keywords', meta.meta_keywords)
 
         db.session.commit()
+        ProductDetailService.invalidate_products(pid)
         return meta
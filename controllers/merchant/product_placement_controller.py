@@ -5,6 +5,7 @@ from models.product_placement import ProductPlacement, PlacementTypeEnum
 from models.product import Product 
 from auth.models.models import MerchantProfile 
 from common.database import db
+from services.placement_cache_service import PlacementCacheService
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timezone, timedelta
 
@@ -153,6 +154,7 @@ class MerchantProductPlacementController:
                     existing.expires_at = special_end_date if placement_type_enum == PlacementTypeEnum.PROMOTED else None
                     db.session.add(existing)
                     db.session.commit()
+                    PlacementCacheService.invalidate(existing.product_id)
                     return existing
                 # Already active => duplicate
                 raise ValueError(f"This product is already in '{placement_type_str}' placements.")
@@ -170,6 +172,7 @@ class MerchantProductPlacementController:
                     existing.expires_at = special_end_date if placement_type_enum == PlacementTypeEnum.PROMOTED else None
                     db.session.add(existing)
                     db.session.commit()
+                    PlacementCacheService.invalidate(existing.product_id)
                     return existing
                 # Already active => duplicate
                 raise ValueError(f"This product is already in '{placement_type_str}' placements.")
@@ -186,6 +189,7 @@ class MerchantProductPlacementController:
             )
             db.session.add(new_placement)
             db.session.commit()
+            PlacementCacheService.invalidate(new_placement.product_id)
             return new_placement
         except IntegrityError as e:
             db.session.rollback()
@@ -211,6 +215,7 @@ class MerchantProductPlacementController:
         try:
             placement.sort_order = int(new_sort_order)
             db.session.commit()
+            PlacementCacheService.invalidate(placement.product_id)
             return placement
         except ValueError:
             raise ValueError("Sort order must be an integer.")
@@ -252,6 +257,7 @@ class MerchantProductPlacementController:
             placement.expires_at = datetime.now(timezone.utc)
             db.session.add(placement)
             db.session.commit()
+            PlacementCacheService.invalidate(placement.product_id)
         except Exception as e:
             db.session.rollback()
             current_app.logger.error(f"Error hard deleting placement {placement_id}: {e}")
@@ -321,6 +327,7 @@ class MerchantProductPlacementController:
             placement.expires_at = datetime.combine(special_end_date, datetime.min.time()).replace(tzinfo=timezone.utc)
             db.session.add(placement)
             db.session.commit()
+            PlacementCacheService.invalidate(placement.product_id)
             return placement
         except Exception as e:
             db.session.rollback()
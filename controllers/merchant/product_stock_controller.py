@@ -1,4 +1,5 @@
-from flask import current_app
+from flask import current_app, abort
+from flask_jwt_extended import get_jwt_identity
 from common.database import db
 from models.product import Product
 from models.product_stock import ProductStock
@@ -7,6 +8,8 @@ import logging
 from auth.models.models import MerchantProfile
 from models.category import Category
 from models.brand import Brand
+from services.inventory_import_service import InventoryImportService
+from common.pagination import keyset_paginate, keyset_meta
 
 logger = logging.getLogger(__name__)
 
@@ -75,40 +78,78 @@ class MerchantProductStockController:
             if not isinstance(data, list):
                 raise ValueError("Data must be a list of stock updates")
             
-            product = Product.query.get_or_404(pid)
-            results = []
+            merchant = MerchantProfile.get_by_user_id(get_jwt_identity())
+            if not merchant:
+                abort(404, "Merchant profile not found")
             
+            # Only the caller's own (non-deleted) product family can be updated
+            Product.query.filter_by(
+                product_id=pid,
+                merchant_id=merchant.id,
+                deleted_at=None
+            ).first_or_404()
+            
+            # variant_id 0 (or missing) addresses the main product; variants are child products
+            rows = []
             for item in data:
                 if not isinstance(item, dict) or 'variant_id' not in item:
                     raise ValueError("Each item must be a dictionary with 'variant_id'")
-                
-                variant_id = item['variant_id']
-                stock_qty = item.get('stock_qty', 0)
-                low_stock_threshold = item.get('low_stock_threshold', 0)
-                
-                # Update variant stock
-                variant_stock = ProductStock.query.filter_by(product_id=pid, variant_id=variant_id).first()
-                if not variant_stock:
-                    variant_stock = ProductStock(product_id=pid, variant_id=variant_id)
-                    db.session.add(variant_stock)
-                
-                variant_stock.stock_qty = stock_qty
-                variant_stock.low_stock_threshold = low_stock_threshold
-                
+                rows.append(dict(item, product_id=item['variant_id'] or pid))
+            
+            def family_ids(product_ids):
+                return db.session.query(Product.product_id).filter(
+                    Product.product_id.in_(product_ids),
+                    Product.merchant_id == merchant.id,
+                    Product.deleted_at.is_(None),
+                    or_(Product.product_id == pid, Product.parent_product_id == pid)
+                ).all()
+            
+            report = InventoryImportService.import_rows(ProductStock, family_ids, rows, default_threshold=0)
+            
+            results = []
+            for item, result in zip(rows, report['results']):
+                if result['status'] != 'success':
+                    results.append(dict(result, variant_id=item['variant_id']))
+                    continue
                 results.append({
-                    'variant_id': variant_id,
-                    'stock': variant_stock.serialize(),
-                    'available': stock_qty > 0,
-                    'low_stock': stock_qty <= low_stock_threshold
+                    'variant_id': item['variant_id'],
+                    'stock': {
+                        'product_id': result['product_id'],
+                        'stock_qty': result['stock_qty'],
+                        'low_stock_threshold': result['low_stock_threshold']
+                    },
+                    'available': result['available'],
+                    'low_stock': result['low_stock']
                 })
-            
-            db.session.commit()
             return results
         except Exception as e:
             logger.error(f"Error bulk updating product stock: {e}")
             db.session.rollback()
             raise
 
+    @staticmethod
+    def import_stock(user_id, stream, fmt):
+        """Stream a CSV/JSONL/JSON stock upload into the merchant's inventory"""
+        try:
+            merchant = MerchantProfile.query.filter_by(user_id=user_id).first()
+            if not merchant:
+                raise ValueError(f"No merchant profile found for user ID {user_id}")
+            
+            def merchant_ids(product_ids):
+                return db.session.query(Product.product_id).filter(
+                    Product.merchant_id == merchant.id,
+                    Product.deleted_at.is_(None),
+                    Product.product_id.in_(product_ids)
+                ).all()
+            
+            return InventoryImportService.import_rows(
+                ProductStock, merchant_ids, InventoryImportService.iter_rows(stream, fmt)
+            )
+        except Exception as e:
+            logger.error(f"Error importing stock for merchant user {user_id}: {e}")
+            db.session.rollback()
+            raise
+
     @staticmethod
     def get_low_stock():
         try:
@@ -169,7 +210,40 @@ class MerchantProductStockController:
             raise
 
     @staticmethod
-    def get_products(user_id, page=1, per_page=10, search=None, category=None, brand=None, stock_status=None):
+    def _format_inventory_products(products):
+        # Format products for frontend
+        formatted_products = []
+        for product in products:
+            stock = product.stock
+            if not stock:
+                stock = ProductStock(product_id=product.product_id)
+                db.session.add(stock)
+                db.session.commit()
+            
+            formatted_products.append({
+                'id': product.product_id,
+                'name': product.product_name,
+                'sku': product.sku,
+                'category': {
+                    'id': product.category.category_id if product.category else None,
+                    'name': product.category.name if product.category else None,
+                    'slug': product.category.slug if product.category else None
+                },
+                'brand': {
+                    'id': product.brand.brand_id if product.brand else None,
+                    'name': product.brand.name if product.brand else None,
+                    'slug': product.brand.slug if product.brand else None
+                },
+                'stock_qty': stock.stock_qty if stock else 0,
+                'low_stock_threshold': stock.low_stock_threshold if stock else 0,
+                'available': stock.stock_qty if stock else 0,
+                'image_url': product.media[0].url if product.media else None
+            })
+        return formatted_products
+
+    @staticmethod
+    def get_products(user_id, page=1, per_page=10, search=None, category=None, brand=None, stock_status=None,
+                     keyset=None):
         try:
             # First get the merchant profile from user_id
             merchant = MerchantProfile.query.filter_by(user_id=user_id).first()
@@ -220,6 +294,16 @@ class MerchantProductStockController:
                 elif stock_status == 'out_of_stock':
                     query = query.filter(ProductStock.stock_qty == 0)
             
+            if keyset:
+                result_page = keyset_paginate(
+                    query, Product.created_at, Product.product_id, keyset['per_page'],
+                    cursor=keyset['cursor'], total=keyset['total']
+                )
+                return {
+                    'products': MerchantProductStockController._format_inventory_products(result_page['items']),
+                    'pagination': keyset_meta(result_page)
+                }
+
             # Get total count before pagination
             total = query.count()
             
@@ -229,37 +313,8 @@ class MerchantProductStockController:
                 limit(per_page).\
                 all()
             
-            # Format products for frontend
-            formatted_products = []
-            for product in products:
-                stock = product.stock
-                if not stock:
-                    stock = ProductStock(product_id=product.product_id)
-                    db.session.add(stock)
-                    db.session.commit()
-                
-                formatted_products.append({
-                    'id': product.product_id,
-                    'name': product.product_name,
-                    'sku': product.sku,
-                    'category': {
-                        'id': product.category.category_id if product.category else None,
-                        'name': product.category.name if product.category else None,
-                        'slug': product.category.slug if product.category else None
-                    },
-                    'brand': {
-                        'id': product.brand.brand_id if product.brand else None,
-                        'name': product.brand.name if product.brand else None,
-                        'slug': product.brand.slug if product.brand else None
-                    },
-                    'stock_qty': stock.stock_qty if stock else 0,
-                    'low_stock_threshold': stock.low_stock_threshold if stock else 0,
-                    'available': stock.stock_qty if stock else 0,
-                    'image_url': product.media[0].url if product.media else None
-                })
-            
             return {
-                'products': formatted_products,
+                'products': MerchantProductStockController._format_inventory_products(products),
                 'pagination': {
                     'total': total,
                     'current_page': page,
@@ -1,14 +1,7 @@
-import pandas as pd
 import json
 import io
 from datetime import datetime, date
 from decimal import Decimal
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from flask import make_response
 import logging
 from auth.models.models import MerchantProfile
@@ -86,6 +79,14 @@ class MerchantReportExportController:
     def _generate_pdf_report(report_data, merchant):
         """Generate PDF report"""
         try:
+            # Imported here so the export libraries only load when a report is generated
+            from reportlab.lib.pagesizes import A4
+            from reportlab.lib import colors
+            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+            from reportlab.lib.units import inch
+            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+            from reportlab.lib.enums import TA_CENTER
+
             # Create PDF buffer
             buffer = io.BytesIO()
             doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72,
@@ -232,6 +233,8 @@ class MerchantReportExportController:
     def _generate_excel_report(report_data, merchant):
         """Generate Excel report"""
         try:
+            import pandas as pd
+
             # Create Excel buffer
             buffer = io.BytesIO()
             
@@ -278,6 +281,8 @@ class MerchantReportExportController:
     def _generate_csv_report(report_data, merchant):
         """Generate CSV report (combined data)"""
         try:
+            import pandas as pd
+
             # Create CSV buffer
             buffer = io.StringIO()
             
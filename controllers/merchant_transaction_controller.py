@@ -1,8 +1,41 @@
-from models.merchant_transaction import MerchantTransaction
+import logging
+from models.merchant_transaction import MerchantTransaction, MerchantPayableBalance
 from models.order import Order, OrderItem
+from models.enums import OrderStatusEnum, PaymentStatusEnum
 from common.database import db
-from datetime import datetime, date
-from decimal import Decimal
+from datetime import datetime, date, time, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+logger = logging.getLogger(__name__)
+
+# Orders in these states never produce a merchant settlement: unpaid, cancelled, or
+# refunded / being refunded
+NON_SETTLEABLE_ORDER_STATUSES = (
+    OrderStatusEnum.PENDING_PAYMENT,
+    OrderStatusEnum.CANCELLED_BY_CUSTOMER,
+    OrderStatusEnum.CANCELLED_BY_MERCHANT,
+    OrderStatusEnum.CANCELLED_BY_ADMIN,
+    OrderStatusEnum.REFUND_PROCESSING,
+    OrderStatusEnum.REFUNDED,
+    OrderStatusEnum.PARTIALLY_REFUNDED,
+    OrderStatusEnum.RETURN_COMPLETED,
+)
+
+def _settleable_criteria():
+    """SQL filters for orders that may be settled: paid and not cancelled, refunded or returned"""
+    return (
+        Order.payment_status == PaymentStatusEnum.SUCCESSFUL,
+        Order.order_status.notin_(NON_SETTLEABLE_ORDER_STATUSES)
+    )
+
+def is_settleable(order):
+    return order.payment_status == PaymentStatusEnum.SUCCESSFUL and order.order_status not in NON_SETTLEABLE_ORDER_STATUSES
+
+SETTLEMENT_CHUNK_SIZE = 500
+
+def _to_money(amount):
+    """Round to the 2dp stored in Numeric(10, 2) columns so balances match the rows exactly"""
+    return Decimal(amount).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
 
 def calculate_platform_fee_percentage(order_amount):
     """
@@ -43,11 +76,106 @@ def calculate_transaction_fees(order_amount):
         'final_payable_amount': final_payable_amount
     }
 
+def _apply_balance_deltas(deltas):
+    """
+    Add per-merchant deltas to the materialized payable balances.
+
+    deltas maps merchant_id -> {'pending_amount', 'paid_amount', 'pending_count', 'paid_count'}.
+    One upsert adds them to existing balances in SQL and creates missing rows, so concurrent
+    writers don't overwrite each other and two first settlements for the same merchant
+    can't both try to insert its row. Runs inside the caller's transaction.
+    """
+    from common.bulk import bulk_upsert
+
+    if not deltas:
+        return
+
+    now = datetime.utcnow()
+    # Fixed merchant order, so concurrent upserts lock balance rows in the same order
+    rows = [{'merchant_id': merchant_id, **delta, 'updated_at': now} for merchant_id, delta in sorted(deltas.items())]
+    bulk_upsert(
+        MerchantPayableBalance, rows, ['updated_at'],
+        increment_columns=['pending_amount', 'paid_amount', 'pending_count', 'paid_count']
+    )
+
+def _empty_delta():
+    return {'pending_amount': Decimal('0'), 'paid_amount': Decimal('0'), 'pending_count': 0, 'paid_count': 0}
+
+def _pending_deltas(rows):
+    """Balance deltas for newly created pending transactions; rows are (merchant_id, final_payable_amount)"""
+    deltas = {}
+    for merchant_id, amount in rows:
+        delta = deltas.setdefault(merchant_id, _empty_delta())
+        delta['pending_amount'] += _to_money(amount)
+        delta['pending_count'] += 1
+    return deltas
+
+def _paid_deltas(rows):
+    """Balance deltas for transactions moving from pending to paid; rows are (merchant_id, final_payable_amount)"""
+    deltas = {}
+    for merchant_id, amount in rows:
+        delta = deltas.setdefault(merchant_id, _empty_delta())
+        delta['pending_amount'] -= _to_money(amount)
+        delta['paid_amount'] += _to_money(amount)
+        delta['pending_count'] -= 1
+        delta['paid_count'] += 1
+    return deltas
+
+def rebuild_merchant_balances(merchant_ids=None):
+    """
+    Recompute materialized payable balances from merchant_transactions with one GROUP BY.
+
+    Used to backfill the table and to repair drift; pass merchant_ids to limit the rebuild.
+    """
+    from common.bulk import bulk_upsert
+
+    query = db.session.query(
+        MerchantTransaction.merchant_id,
+        MerchantTransaction.payment_status,
+        db.func.count(MerchantTransaction.id),
+        db.func.coalesce(db.func.sum(MerchantTransaction.final_payable_amount), 0)
+    )
+    if merchant_ids:
+        query = query.filter(MerchantTransaction.merchant_id.in_(merchant_ids))
+
+    balances = {merchant_id: _empty_delta() for merchant_id in (merchant_ids or [])}
+    for merchant_id, status, count, amount in query.group_by(
+        MerchantTransaction.merchant_id, MerchantTransaction.payment_status
+    ):
+        balance = balances.setdefault(merchant_id, _empty_delta())
+        balance[f'{status}_amount'] = Decimal(amount)
+        balance[f'{status}_count'] = count
+
+    now = datetime.utcnow()
+    rows = [{'merchant_id': merchant_id, **balance, 'updated_at': now} for merchant_id, balance in balances.items()]
+    bulk_upsert(
+        MerchantPayableBalance, rows,
+        ['pending_amount', 'paid_amount', 'pending_count', 'paid_count', 'updated_at']
+    )
+    db.session.commit()
+    return len(rows)
+
+def get_merchant_payable_balance(merchant_id):
+    """
+    Get the materialized payable balance for a merchant
+    """
+    balance = MerchantPayableBalance.query.get(merchant_id)
+    if balance is None:
+        return MerchantPayableBalance(
+            merchant_id=merchant_id, pending_amount=0, paid_amount=0, pending_count=0, paid_count=0
+        ).serialize()
+    return balance.serialize()
+
 def create_merchant_transaction_from_order(order_id, settlement_date=None):
     """
     Create merchant transaction record from an order
     """
     order = Order.query.get_or_404(order_id)
+    if not is_settleable(order):
+        raise ValueError(
+            f"Order {order.order_id} is not settleable "
+            f"(status {order.order_status.value}, payment {order.payment_status.value})"
+        )
     
     # Get order items grouped by merchant
     merchant_items = {}
@@ -86,29 +214,147 @@ def create_merchant_transaction_from_order(order_id, settlement_date=None):
         db.session.add(transaction)
         transactions.append(transaction)
     
+    _apply_balance_deltas(_pending_deltas((t.merchant_id, t.final_payable_amount) for t in transactions))
     db.session.commit()
     return transactions
 
-def bulk_create_transactions_for_orders(order_ids, settlement_date=None):
+def _create_transactions_for_chunk(order_ids, settlement_date):
+    """
+    Create merchant transactions for one chunk of orders.
+
+    Merchant totals come from a single GROUP BY over order_items of the settleable orders,
+    (order, merchant) pairs that already have a transaction are skipped, and the new rows are
+    written with one INSERT.
+    """
+    totals = db.session.query(
+        OrderItem.order_id,
+        OrderItem.merchant_id,
+        db.func.sum(OrderItem.line_item_total_inclusive_gst)
+    ).join(
+        Order, Order.order_id == OrderItem.order_id
+    ).filter(
+        OrderItem.order_id.in_(order_ids),
+        *_settleable_criteria()
+    ).group_by(OrderItem.order_id, OrderItem.merchant_id).all()
+
+    existing = set(db.session.query(MerchantTransaction.order_id, MerchantTransaction.merchant_id).filter(
+        MerchantTransaction.order_id.in_(order_ids)
+    ))
+
+    now = datetime.utcnow()
+    rows = []
+    for order_id, merchant_id, merchant_order_amount in totals:
+        if (order_id, merchant_id) in existing:
+            continue
+        merchant_order_amount = Decimal(merchant_order_amount or 0)
+        fees = calculate_transaction_fees(merchant_order_amount)
+        rows.append({
+            'order_id': order_id,
+            'merchant_id': merchant_id,
+            'order_amount': merchant_order_amount,
+            'platform_fee_percent': fees['platform_fee_percent'],
+            'platform_fee_amount': _to_money(fees['platform_fee_amount']),
+            'gst_on_fee_amount': _to_money(fees['gst_on_fee_amount']),
+            'payment_gateway_fee': _to_money(fees['payment_gateway_fee']),
+            'final_payable_amount': _to_money(fees['final_payable_amount']),
+            'payment_status': 'pending',
+            'settlement_date': settlement_date,
+            'created_at': now,
+            'updated_at': now
+        })
+
+    if not rows:
+        return []
+
+    db.session.execute(MerchantTransaction.__table__.insert().values(rows))
+    _apply_balance_deltas(_pending_deltas((row['merchant_id'], row['final_payable_amount']) for row in rows))
+    db.session.commit()
+
+    created = {(row['order_id'], row['merchant_id']) for row in rows}
+    return [
+        txn for txn in MerchantTransaction.query.filter(
+            MerchantTransaction.order_id.in_({order_id for order_id, _ in created})
+        ).order_by(MerchantTransaction.id)
+        if (txn.order_id, txn.merchant_id) in created
+    ]
+
+def bulk_create_transactions_for_orders(order_ids, settlement_date=None, chunk_size=SETTLEMENT_CHUNK_SIZE):
     """
-    Create merchant transactions for multiple orders
+    Create merchant transactions for multiple orders, one chunk of orders per transaction
     """
+    if settlement_date is None:
+        settlement_date = date.today()
+
+    order_ids = list(dict.fromkeys(order_ids))
     transactions = []
-    for order_id in order_ids:
+    for start in range(0, len(order_ids), chunk_size):
+        chunk = order_ids[start:start + chunk_size]
         try:
-            order_transactions = create_merchant_transaction_from_order(order_id, settlement_date)
-            transactions.extend(order_transactions)
+            transactions.extend(_create_transactions_for_chunk(chunk, settlement_date))
         except Exception as e:
-            # Log error and continue with other orders
-            print(f"Error creating transaction for order {order_id}: {str(e)}")
+            # Log error and continue with other chunks
+            db.session.rollback()
+            logger.error(f"Error creating transactions for orders {chunk[0]}..{chunk[-1]}: {str(e)}")
             continue
     
     return transactions
 
-def get_merchant_transaction_summary(merchant_id=None, from_date=None, to_date=None):
+def generate_settlements_for_day(order_day=None, settlement_date=None, chunk_size=SETTLEMENT_CHUNK_SIZE):
     """
-    Get summary of merchant transactions
+    Create merchant transactions for every settleable order placed on order_day (default: yesterday)
+    """
+    if order_day is None:
+        order_day = date.today() - timedelta(days=1)
+    day_start = datetime.combine(order_day, time.min)
+    day_end = day_start + timedelta(days=1)
+
+    order_ids = [
+        order_id for (order_id,) in db.session.query(Order.order_id).filter(
+            Order.order_date >= day_start,
+            Order.order_date < day_end,
+            *_settleable_criteria()
+        ).order_by(Order.order_date)
+    ]
+
+    transactions = bulk_create_transactions_for_orders(order_ids, settlement_date, chunk_size)
+    return {
+        'order_day': order_day.isoformat(),
+        'orders_considered': len(order_ids),
+        'transactions_created': len(transactions),
+        'total_payable': float(sum(t.final_payable_amount for t in transactions))
+    }
+
+def _status_totals(query):
+    """
+    Aggregate a MerchantTransaction query grouped by payment status in SQL.
+    Returns {status: {count, order_amount, platform_fees, payment_gateway_fees, gst, payable}}.
     """
+    rows = query.with_entities(
+        MerchantTransaction.payment_status,
+        db.func.count(MerchantTransaction.id),
+        db.func.coalesce(db.func.sum(MerchantTransaction.order_amount), 0),
+        db.func.coalesce(db.func.sum(MerchantTransaction.platform_fee_amount), 0),
+        db.func.coalesce(db.func.sum(MerchantTransaction.payment_gateway_fee), 0),
+        db.func.coalesce(db.func.sum(MerchantTransaction.gst_on_fee_amount), 0),
+        db.func.coalesce(db.func.sum(MerchantTransaction.final_payable_amount), 0)
+    ).group_by(MerchantTransaction.payment_status).all()
+
+    totals = {}
+    for status, count, order_amount, platform_fees, gateway_fees, gst, payable in rows:
+        totals[status] = {
+            'count': count,
+            'order_amount': Decimal(order_amount),
+            'platform_fees': Decimal(platform_fees),
+            'payment_gateway_fees': Decimal(gateway_fees),
+            'gst': Decimal(gst),
+            'payable': Decimal(payable)
+        }
+    return totals
+
+def _sum_totals(totals, field):
+    return sum((status_totals[field] for status_totals in totals.values()), Decimal('0'))
+
+def _filtered_transactions(merchant_id=None, from_date=None, to_date=None):
     query = MerchantTransaction.query
     
     if merchant_id:
@@ -117,32 +363,30 @@ def get_merchant_transaction_summary(merchant_id=None, from_date=None, to_date=N
         query = query.filter(MerchantTransaction.settlement_date >= from_date)
     if to_date:
         query = query.filter(MerchantTransaction.settlement_date <= to_date)
-    
-    transactions = query.all()
-    
-    total_order_amount = sum(t.order_amount for t in transactions)
-    total_platform_fees = sum(t.platform_fee_amount for t in transactions)
-    total_payment_gateway_fees = sum(t.payment_gateway_fee for t in transactions)
-    total_gst = sum(t.gst_on_fee_amount for t in transactions)
-    total_payable = sum(t.final_payable_amount for t in transactions)
-    
-    pending_transactions = [t for t in transactions if t.payment_status == 'pending']
-    paid_transactions = [t for t in transactions if t.payment_status == 'paid']
+    return query
+
+def get_merchant_transaction_summary(merchant_id=None, from_date=None, to_date=None):
+    """
+    Get summary of merchant transactions
+    """
+    totals = _status_totals(_filtered_transactions(merchant_id, from_date, to_date))
+    pending = totals.get('pending', {})
+    paid = totals.get('paid', {})
     
     return {
-        'total_transactions': len(transactions),
-        'pending_transactions': len(pending_transactions),
-        'paid_transactions': len(paid_transactions),
-        'total_order_amount': float(total_order_amount),
-        'total_platform_fees': float(total_platform_fees),
-        'total_payment_gateway_fees': float(total_payment_gateway_fees),
-        'total_gst': float(total_gst),
-        'total_payable_to_merchants': float(total_payable),
-        'pending_amount': float(sum(t.final_payable_amount for t in pending_transactions)),
-        'paid_amount': float(sum(t.final_payable_amount for t in paid_transactions))
+        'total_transactions': int(_sum_totals(totals, 'count')),
+        'pending_transactions': pending.get('count', 0),
+        'paid_transactions': paid.get('count', 0),
+        'total_order_amount': float(_sum_totals(totals, 'order_amount')),
+        'total_platform_fees': float(_sum_totals(totals, 'platform_fees')),
+        'total_payment_gateway_fees': float(_sum_totals(totals, 'payment_gateway_fees')),
+        'total_gst': float(_sum_totals(totals, 'gst')),
+        'total_payable_to_merchants': float(_sum_totals(totals, 'payable')),
+        'pending_amount': float(pending.get('payable', 0)),
+        'paid_amount': float(paid.get('payable', 0))
     }
 
-def list_all_transactions(filters):
+def _transaction_list_query(filters):
     query = MerchantTransaction.query
 
     if filters.get("status"):
@@ -153,8 +397,26 @@ def list_all_transactions(filters):
         query = query.filter(MerchantTransaction.settlement_date >= filters["from_date"])
     if filters.get("to_date"):
         query = query.filter(MerchantTransaction.settlement_date <= filters["to_date"])
+    return query
+
+def list_all_transactions(filters):
+    return _transaction_list_query(filters).order_by(MerchantTransaction.settlement_date.desc()).all()
+
+def list_transactions_page(filters, keyset):
+    """
+    Cursor-paginated transaction listing ordered by (settlement_date, id) descending.
+    keyset comes from common.pagination.get_keyset_args.
+    """
+    from common.pagination import keyset_paginate, keyset_meta
 
-    return query.order_by(MerchantTransaction.settlement_date.desc()).all()
+    page = keyset_paginate(
+        _transaction_list_query(filters), MerchantTransaction.settlement_date, MerchantTransaction.id,
+        keyset['per_page'], cursor=keyset['cursor'], total=keyset['total']
+    )
+    return {
+        'transactions': [txn.serialize() for txn in page['items']],
+        'pagination': keyset_meta(page)
+    }
 
 def get_transaction_by_id(txn_id):
     return MerchantTransaction.query.get_or_404(txn_id)
@@ -165,6 +427,7 @@ def mark_as_paid(txn_id):
         return None  # Already paid
     txn.payment_status = 'paid'
     txn.updated_at = datetime.utcnow()
+    _apply_balance_deltas(_paid_deltas([(txn.merchant_id, txn.final_payable_amount)]))
     db.session.commit()
     return txn
 
@@ -224,38 +487,44 @@ def bulk_mark_as_paid(transaction_ids):
     """
     Mark multiple transactions as paid
     """
-    transactions = MerchantTransaction.query.filter(
+    rows = db.session.query(
+        MerchantTransaction.id,
+        MerchantTransaction.merchant_id,
+        MerchantTransaction.final_payable_amount,
+        MerchantTransaction.payment_status
+    ).filter(
         MerchantTransaction.id.in_(transaction_ids)
     ).all()
     
-    updated_count = 0
-    for transaction in transactions:
-        if transaction.payment_status != 'paid':
-            transaction.payment_status = 'paid'
-            transaction.updated_at = datetime.utcnow()
-            updated_count += 1
+    pending_rows = [row for row in rows if row.payment_status != 'paid']
+    if pending_rows:
+        MerchantTransaction.query.filter(
+            MerchantTransaction.id.in_([row.id for row in pending_rows]),
+            MerchantTransaction.payment_status != 'paid'
+        ).update({
+            MerchantTransaction.payment_status: 'paid',
+            MerchantTransaction.updated_at: datetime.utcnow()
+        }, synchronize_session=False)
+        _apply_balance_deltas(_paid_deltas((row.merchant_id, row.final_payable_amount) for row in pending_rows))
     
     db.session.commit()
     return {
-        'total_transactions': len(transactions),
-        'updated_count': updated_count,
-        'already_paid_count': len(transactions) - updated_count
+        'total_transactions': len(rows),
+        'updated_count': len(pending_rows),
+        'already_paid_count': len(rows) - len(pending_rows)
     }
 
+def _fee_tier_label(platform_fee_percent):
+    return f"{Decimal(platform_fee_percent).normalize():f}%"
+
 def get_transaction_statistics(from_date=None, to_date=None):
     """
     Get comprehensive transaction statistics
     """
-    query = MerchantTransaction.query
+    query = _filtered_transactions(from_date=from_date, to_date=to_date)
+    totals = _status_totals(query)
     
-    if from_date:
-        query = query.filter(MerchantTransaction.settlement_date >= from_date)
-    if to_date:
-        query = query.filter(MerchantTransaction.settlement_date <= to_date)
-    
-    transactions = query.all()
-    
-    if not transactions:
+    if not totals:
         return {
             'total_transactions': 0,
             'total_order_amount': 0,
@@ -269,17 +538,6 @@ def get_transaction_statistics(from_date=None, to_date=None):
             'status_distribution': {}
         }
     
-    # Calculate totals
-    total_order_amount = sum(t.order_amount for t in transactions)
-    total_platform_fees = sum(t.platform_fee_amount for t in transactions)
-    total_payment_gateway_fees = sum(t.payment_gateway_fee for t in transactions)
-    total_gst = sum(t.gst_on_fee_amount for t in transactions)
-    total_payable = sum(t.final_payable_amount for t in transactions)
-    
-    # Status distribution
-    pending_transactions = [t for t in transactions if t.payment_status == 'pending']
-    paid_transactions = [t for t in transactions if t.payment_status == 'paid']
-    
     # Fee distribution by tier
     fee_distribution = {
         '5%': {'count': 0, 'amount': Decimal('0')},
@@ -288,21 +546,30 @@ def get_transaction_statistics(from_date=None, to_date=None):
         '2%': {'count': 0, 'amount': Decimal('0')}
     }
     
-    for transaction in transactions:
-        fee_percent = str(transaction.platform_fee_percent) + '%'
+    tier_rows = query.with_entities(
+        MerchantTransaction.platform_fee_percent,
+        db.func.count(MerchantTransaction.id),
+        db.func.coalesce(db.func.sum(MerchantTransaction.platform_fee_amount), 0)
+    ).group_by(MerchantTransaction.platform_fee_percent).all()
+    
+    for platform_fee_percent, count, amount in tier_rows:
+        fee_percent = _fee_tier_label(platform_fee_percent)
         if fee_percent in fee_distribution:
-            fee_distribution[fee_percent]['count'] += 1
-            fee_distribution[fee_percent]['amount'] += transaction.platform_fee_amount
+            fee_distribution[fee_percent]['count'] += count
+            fee_distribution[fee_percent]['amount'] += Decimal(amount)
+    
+    pending = totals.get('pending', {})
+    paid = totals.get('paid', {})
     
     return {
-        'total_transactions': len(transactions),
-        'total_order_amount': float(total_order_amount),
-        'total_platform_fees': float(total_platform_fees),
-        'total_payment_gateway_fees': float(total_payment_gateway_fees),
-        'total_gst': float(total_gst),
-        'total_payable': float(total_payable),
-        'pending_amount': float(sum(t.final_payable_amount for t in pending_transactions)),
-        'paid_amount': float(sum(t.final_payable_amount for t in paid_transactions)),
+        'total_transactions': int(_sum_totals(totals, 'count')),
+        'total_order_amount': float(_sum_totals(totals, 'order_amount')),
+        'total_platform_fees': float(_sum_totals(totals, 'platform_fees')),
+        'total_payment_gateway_fees': float(_sum_totals(totals, 'payment_gateway_fees')),
+        'total_gst': float(_sum_totals(totals, 'gst')),
+        'total_payable': float(_sum_totals(totals, 'payable')),
+        'pending_amount': float(pending.get('payable', 0)),
+        'paid_amount': float(paid.get('payable', 0)),
         'fee_distribution': {
             tier: {
                 'count': data['count'],
@@ -310,7 +577,7 @@ def get_transaction_statistics(from_date=None, to_date=None):
             } for tier, data in fee_distribution.items()
         },
         'status_distribution': {
-            'pending': len(pending_transactions),
-            'paid': len(paid_transactions)
+            'pending': pending.get('count', 0),
+            'paid': paid.get('count', 0)
         }
     }
@@ -5,6 +5,8 @@ from models.enums import OrderStatusEnum, PaymentStatusEnum, PaymentMethodEnum,C
 from models.product_stock import ProductStock
 from models.payment_card import PaymentCard
 from common.database import db
+from common.cache import get_redis_client
+from common.pagination import keyset_paginate, keyset_meta
 from datetime import datetime, timezone
 from decimal import Decimal, ROUND_HALF_UP
 from sqlalchemy import desc, func 
@@ -14,9 +16,32 @@ from models.gst_rule import GSTRule
 from models.shipment import Shipment, ShipmentItem
 
 import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A user's first page of orders is cached and dropped whenever one of their orders is
+# created or changes status; the TTL is only a backstop.
+USER_ORDERS_CACHE_TIMEOUT = 300
 
 
 class OrderController:
+    @staticmethod
+    def _user_orders_cache_key(user_id):
+        return f"orders:user:{user_id}:first_page"
+
+    @staticmethod
+    def invalidate_user_orders_cache(user_id):
+        """
+        Drop the cached first page of orders for a user
+        """
+        if user_id is None:
+            return
+        try:
+            get_redis_client(current_app).delete(OrderController._user_orders_cache_key(user_id))
+        except Exception as e:
+            logger.warning(f"Failed to invalidate order history cache for user {user_id}: {str(e)}")
+
     @staticmethod
     def create_order(user_id, order_data):
         """
@@ -65,6 +90,9 @@ class OrderController:
             # For item-specific discounts, we don't need to prorate order-level discounts
             # because each item already has its specific discount applied
             
+            thumbnails = ProductMedia.get_thumbnail_urls(
+                [cart_item_data['product_id'] for cart_item_data in order_data.get('items', [])]
+            )
             for cart_item_data in order_data.get('items', []):
                 product = Product.query.get(cart_item_data['product_id'])
                 if not product: 
@@ -128,7 +156,8 @@ class OrderController:
                     line_item_total_inclusive_gst=(final_customer_pays_for_item_inclusive_per_unit * quantity).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
                     original_listed_inclusive_price_per_unit=current_listed_inclusive_price_per_unit,
                     discount_amount_per_unit_applied=item_specific_discount_inclusive_per_unit, # Only item-specific discount
-                    selected_attributes=json.dumps(cart_item_data.get('selected_attributes', {}))
+                    selected_attributes=json.dumps(cart_item_data.get('selected_attributes', {})),
+                    product_image_url=thumbnails.get(product.product_id)
                 )
                 new_order_items.append(order_item)
 
@@ -214,6 +243,7 @@ class OrderController:
                     current_app.logger.info(f"Stock reverted for failed payment on order attempt by user {user_id}.")
             
             db.session.commit()
+            OrderController.invalidate_user_orders_cache(user_id)
             return new_order.serialize(include_items=True, include_history=True)
 
         except ValueError as ve:
@@ -228,9 +258,7 @@ class OrderController:
     @staticmethod
     def get_order(order_id):
         order = Order.query.options(
-            db.joinedload(Order.items).joinedload(OrderItem.product).joinedload(Product.media), # Eager load product media
-            db.joinedload(Order.shipping_address_obj),
-            db.joinedload(Order.billing_address_obj)
+            *Order.list_load_options()
             # Do NOT eager load status_history or shipments if they are dynamic
         ).get(order_id) # Use .get() for primary key lookup
         
@@ -253,7 +281,21 @@ class OrderController:
         return serialize_with_patch(order, include_items=True, include_history=True, include_shipments=True)
 
     @staticmethod
-    def get_user_orders(user_id, page=1, per_page=10, status_filter_str=None): # Renamed status to status_filter_str
+    def get_user_orders(user_id, page=1, per_page=10, status_filter_str=None, keyset=None): # Renamed status to status_filter_str
+        # Only the unfiltered first page is cached; it is what the order history screen opens on
+        cacheable = page == 1 and not status_filter_str and not keyset
+        cache_key = OrderController._user_orders_cache_key(user_id)
+        redis_client = None
+        if cacheable:
+            try:
+                redis_client = get_redis_client(current_app)
+                cached_page = redis_client.hget(cache_key, str(per_page))
+                if cached_page:
+                    return json.loads(cached_page)
+            except Exception as e:
+                logger.warning(f"Order history cache unavailable for user {user_id}: {str(e)}")
+                redis_client = None
+
         query = Order.query.filter_by(user_id=user_id)
         
         if status_filter_str:
@@ -266,12 +308,21 @@ class OrderController:
                 # For now, it ignores invalid status
                 pass 
         
-        # Eager load items and product media for efficiency in serialization loop
-        paginated_orders = query.options(
-            db.joinedload(Order.items).joinedload(OrderItem.product).joinedload(Product.media)
-        ).order_by(Order.order_date.desc()).paginate(page=page, per_page=per_page, error_out=False)
+        # Items and addresses are batch-loaded for the whole page; thumbnails are stored on the items
+        query = query.options(*Order.list_load_options())
         
-        return {
+        if keyset:
+            # Seek on (order_date, order_id) instead of OFFSET so deep pages stay cheap
+            page_result = keyset_paginate(query, Order.order_date, Order.order_id, keyset['per_page'],
+                                          cursor=keyset['cursor'], total=keyset['total'])
+            return {
+                'orders': [order.serialize(include_items=True) for order in page_result['items']],
+                'pagination': keyset_meta(page_result)
+            }
+        
+        paginated_orders = query.order_by(Order.order_date.desc()).paginate(page=page, per_page=per_page, error_out=False)
+        
+        result = {
             'orders': [order.serialize(include_items=True) for order in paginated_orders.items], # include_items=True
             'total': paginated_orders.total,
             'pages': paginated_orders.pages,
@@ -281,6 +332,16 @@ class OrderController:
             'has_prev': paginated_orders.has_prev,
         }
 
+        if redis_client:
+            try:
+                pipe = redis_client.pipeline(transaction=False)
+                pipe.hset(cache_key, str(per_page), json.dumps(result))
+                pipe.expire(cache_key, USER_ORDERS_CACHE_TIMEOUT)
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"Failed to cache order history for user {user_id}: {str(e)}")
+        return result
+
     @staticmethod
     def update_order_status(order_id, new_status_enum: OrderStatusEnum, user_id_performing_action, notes=None):
         order = Order.query.get(order_id)
@@ -313,6 +374,7 @@ class OrderController:
 
         try:
             db.session.commit()
+            OrderController.invalidate_user_orders_cache(order.user_id)
             return order.serialize(include_items=True, include_history=True)
         except Exception as e:
             db.session.rollback()
@@ -366,6 +428,7 @@ class OrderController:
         
         try:
             db.session.commit()
+            OrderController.invalidate_user_orders_cache(order.user_id)
             return order.serialize(include_items=True, include_history=True)
         except Exception as e:
             db.session.rollback()
@@ -416,6 +479,7 @@ class OrderController:
         
         try:
             db.session.commit()
+            OrderController.invalidate_user_orders_cache(order.user_id)
             return order.serialize(include_items=True, include_history=True)
         except Exception as e:
             db.session.rollback()
@@ -423,7 +487,7 @@ class OrderController:
             raise
 
     @staticmethod
-    def get_all_orders(page=1, per_page=10, status_filter_str=None, merchant_id_filter=None): # Renamed params
+    def get_all_orders(page=1, per_page=10, status_filter_str=None, merchant_id_filter=None, keyset=None): # Renamed params
         query = Order.query
         
         if status_filter_str:
@@ -438,9 +502,18 @@ class OrderController:
             # Ensure distinct orders if a merchant has multiple items in one order
             query = query.join(OrderItem).filter(OrderItem.merchant_id == merchant_id_filter).distinct(Order.order_id)
         
-        paginated_orders = query.options(
-            db.joinedload(Order.items).joinedload(OrderItem.product).joinedload(Product.media)
-        ).order_by(Order.order_date.desc()).paginate(page=page, per_page=per_page, error_out=False)
+        query = query.options(*Order.list_load_options())
+        
+        if keyset:
+            # Seek on (order_date, order_id) instead of OFFSET so deep pages stay cheap
+            page_result = keyset_paginate(query, Order.order_date, Order.order_id, keyset['per_page'],
+                                          cursor=keyset['cursor'], total=keyset['total'])
+            return {
+                'orders': [order.serialize(include_items=True) for order in page_result['items']],
+                'pagination': keyset_meta(page_result)
+            }
+        
+        paginated_orders = query.order_by(Order.order_date.desc()).paginate(page=page, per_page=per_page, error_out=False)
         
         return {
             'orders': [order.serialize(include_items=True) for order in paginated_orders.items],
@@ -455,9 +528,9 @@ class OrderController:
     @staticmethod
     def track_order(order_id):
         order = Order.query.options(
-            db.joinedload(Order.items).joinedload(OrderItem.product).joinedload(Product.media),
-            db.joinedload(Order.shipping_address_obj),
-            db.joinedload(Order.status_history).joinedload(OrderStatusHistory.changed_by_user) 
+            db.selectinload(Order.items),
+            db.joinedload(Order.shipping_address_obj)
+            # status_history is dynamic and is queried below; it cannot be eager loaded
         ).get(order_id)
         
         if not order:
@@ -465,13 +538,6 @@ class OrderController:
 
         tracking_items = []
         for item in order.items:
-            product_image = None
-            if item.product and item.product.media:
-                # Find the first image media, ordered by sort_order
-                image_media = sorted([m for m in item.product.media if m.type == MediaType.IMAGE], key=lambda m: m.sort_order)
-                if image_media:
-                    product_image = image_media[0].url
-            
             # Use prices from OrderItem as they reflect values at time of purchase
             tracking_item = {
                 "order_item_id": item.order_item_id,
@@ -479,7 +545,7 @@ class OrderController:
                 "quantity": item.quantity,
                 "unit_price_inclusive_gst": str(item.unit_price_inclusive_gst), # What customer paid per unit
                 "line_total_inclusive_gst": str(item.line_item_total_inclusive_gst), # Total for this line
-                "product_image": product_image,
+                "product_image": item.product_image_url,
                 "item_status": item.item_status.value
             }
             tracking_items.append(tracking_item)
@@ -38,7 +38,8 @@ class ProductController:
             per_page = min(request.args.get('per_page', 10, type=int), 50)
             
             # Get sorting parameters
-            sort_by = request.args.get('sort_by', 'created_at')
+            # Price sorts order by the current (special-aware) price
+            sort_by = Product.sort_attribute(request.args.get('sort_by', 'created_at'))
             order = request.args.get('order', 'desc')
             
             # Get filter parameters
@@ -109,13 +110,13 @@ class ProductController:
 
             # Apply price range filter
             if min_price is not None:
-                query = query.filter(Product.selling_price >= min_price)
+                query = query.filter(Product.effective_price >= min_price)
             if max_price is not None:
-                query = query.filter(Product.selling_price <= max_price)
+                query = query.filter(Product.effective_price <= max_price)
 
             # Apply discount filter
             if min_discount is not None:
-                query = query.filter(Product.discount_pct >= min_discount)
+                query = query.filter(Product.effective_discount_pct >= min_discount)
 
             # Apply rating filter
             if min_rating is not None:
@@ -329,34 +330,11 @@ class ProductController:
     @staticmethod
     def get_recently_viewed():
         """Get recently viewed products for the current user"""
-        try:
-            from models.recently_viewed import RecentlyViewed
-            user_id = get_jwt_identity()
-            if not user_id:
-                return jsonify([])
-                
-            recently_viewed = RecentlyViewed.query.filter_by(
-                user_id=user_id
-            ).order_by(
-                desc(RecentlyViewed.viewed_at)
-            ).limit(6).all()
-            
-            products = []
-            for rv in recently_viewed:
-                if (rv.product and 
-                    rv.product.active_flag and 
-                    not rv.product.deleted_at and 
-                    rv.product.approval_status == 'approved'):  # Only show approved products
-                    product_dict = rv.product.serialize()
-                    media = ProductController.get_product_media(rv.product.product_id)
-                    if media:
-                        product_dict['primary_image'] = media['url']
-                    products.append(product_dict)
-            
-            return jsonify(products)
-        except ImportError:
-            # If RecentlyViewed model is not available yet, return empty list
+        from services.recently_viewed_service import RecentlyViewedService
+        user_id = get_jwt_identity()
+        if not user_id:
             return jsonify([])
+        return jsonify(RecentlyViewedService.get_recent_products(user_id, limit=6))
 
     @staticmethod
     def get_categories():
@@ -383,280 +361,17 @@ class ProductController:
             return jsonify([]), 500
 
     @staticmethod
-    def get_product_details(product_id):
+    def get_product_details(product_id, user_id=None):
         """Get detailed product information including media, meta data, and attributes"""
         try:
-            # Get base product information - only show approved products
-            product = Product.query.filter_by(
-                product_id=product_id,
-                deleted_at=None,
-                active_flag=True,
-                approval_status='approved'  # Only show approved products
-            ).first_or_404()
-
-            # Get product media
-            product_media = ProductMedia.query.filter_by(
-                product_id=product_id,
-                deleted_at=None
-            ).order_by(ProductMedia.sort_order).all()
-
-            # Get product meta information
-            product_meta = ProductMeta.query.filter_by(
-                product_id=product_id
-            ).first()
-
-            # Get product attributes with their values
-            product_attributes = ProductAttribute.query.filter_by(
-                product_id=product_id
-            ).all()
-
-            # Process attributes to handle array format from variants
-            def process_attributes(attributes):
-                processed_attributes = []
-                
-                for attr in attributes:
-                    # Check if the value is in array format (from variants)
-                    if attr.value_text and (
-                        (attr.value_text.startswith('[') and attr.value_text.endswith(']')) or
-                        (attr.value_text.startswith("['") and attr.value_text.endswith("']"))
-                    ):
-                        try:
-                            # First try to parse as JSON
-                            values = json.loads(attr.value_text)
-                            if isinstance(values, list):
-                                # Create individual attributes for each value
-                                for index, value in enumerate(values):
-                                    processed_attributes.append({
-                                        "attribute_id": attr.attribute_id + index,  # Create unique IDs
-                                        "attribute_name": attr.attribute.name,
-                                        "value_code": attr.value_code,
-                                        "value_text": str(value),
-                                        "value_label": str(value),
-                                        "is_text_based": attr.value_code is None or attr.value_code.startswith('text_'),
-                                        "input_type": attr.attribute.input_type.value if attr.attribute.input_type else 'text'
-                                    })
-                            else:
-                                # If not a list, treat as regular attribute
-                                processed_attributes.append({
-                                    "attribute_id": attr.attribute_id,
-                                    "attribute_name": attr.attribute.name,
-                                    "value_code": attr.value_code,
-                                    "value_text": attr.value_text,
-                                    "value_label": attr.attribute_value.value_label if attr.attribute_value else None,
-                                    "is_text_based": attr.value_code is None or attr.value_code.startswith('text_'),
-                                    "input_type": attr.attribute.input_type.value if attr.attribute.input_type else 'text'
-                                })
-                        except (json.JSONDecodeError, ValueError):
-                            # If JSON parsing fails, try to parse as Python list string
-                            try:
-                                # Remove outer quotes and brackets, then split by comma
-                                clean_text = attr.value_text.strip()
-                                if clean_text.startswith("['") and clean_text.endswith("']"):
-                                    # Handle Python list with single quotes
-                                    clean_text = clean_text[2:-2]  # Remove [' and ']
-                                    values = [v.strip().strip("'\"") for v in clean_text.split("', '")]
-                                elif clean_text.startswith('[') and clean_text.endswith(']'):
-                                    # Handle JSON-like array
-                                    clean_text = clean_text[1:-1]  # Remove [ and ]
-                                    values = [v.strip().strip("'\"") for v in clean_text.split(',')]
-                                else:
-                                    # Not an array, treat as regular attribute
-                                    processed_attributes.append({
-                                        "attribute_id": attr.attribute_id,
-                                        "attribute_name": attr.attribute.name,
-                                        "value_code": attr.value_code,
-                                        "value_text": attr.value_text,
-                                        "value_label": attr.attribute_value.value_label if attr.attribute_value else None,
-                                        "is_text_based": attr.value_code is None or attr.value_code.startswith('text_'),
-                                        "input_type": attr.attribute.input_type.value if attr.attribute.input_type else 'text'
-                                    })
-                                    continue
-                                
-                                # Create individual attributes for each value
-                                for index, value in enumerate(values):
-                                    if value:  # Only add non-empty values
-                                        processed_attributes.append({
-                                            "attribute_id": attr.attribute_id + index,  # Create unique IDs
-                                            "attribute_name": attr.attribute.name,
-                                            "value_code": attr.value_code,
-                                            "value_text": str(value),
-                                            "value_label": str(value),
-                                            "is_text_based": attr.value_code is None or attr.value_code.startswith('text_'),
-                                            "input_type": attr.attribute.input_type.value if attr.attribute.input_type else 'text'
-                                        })
-                            except Exception:
-                                # If all parsing fails, treat as regular attribute
-                                processed_attributes.append({
-                                    "attribute_id": attr.attribute_id,
-                                    "attribute_name": attr.attribute.name,
-                                    "value_code": attr.value_code,
-                                    "value_text": attr.value_text,
-                                    "value_label": attr.attribute_value.value_label if attr.attribute_value else None,
-                                    "is_text_based": attr.value_code is None or attr.value_code.startswith('text_'),
-                                    "input_type": attr.attribute.input_type.value if attr.attribute.input_type else 'text'
-                                })
-                    else:
-                        # Regular attribute, no processing needed
-                        processed_attributes.append({
-                            "attribute_id": attr.attribute_id,
-                            "attribute_name": attr.attribute.name,
-                            "value_code": attr.value_code,
-                            "value_text": attr.value_text,
-                            "value_label": attr.attribute_value.value_label if attr.attribute_value else None,
-                            "is_text_based": attr.value_code is None or attr.value_code.startswith('text_'),
-                            "input_type": attr.attribute.input_type.value if attr.attribute.input_type else 'text'
-                        })
-                
-                return processed_attributes
+            from services.product_detail_service import ProductDetailService
 
-            # Process the attributes
-            processed_attributes = process_attributes(product_attributes)
-
-            # Track recently viewed
-            try:
-                from flask_jwt_extended import get_jwt_identity
-                from models.recently_viewed import RecentlyViewed
-                from datetime import datetime
-                
-                user_id = get_jwt_identity()
-                if user_id:
-                    # Check if there's an existing view record
-                    existing_view = RecentlyViewed.query.filter_by(
-                        user_id=user_id,
-                        product_id=product_id
-                    ).first()
-                    
-                    if existing_view:
-                        # Update the viewed_at timestamp
-                        existing_view.viewed_at = datetime.utcnow()
-                    else:
-                        # Create a new view record
-                        new_view = RecentlyViewed(
-                            user_id=user_id,
-                            product_id=product_id,
-                            viewed_at=datetime.utcnow()
-                        )
-                        db.session.add(new_view)
-                    
-                    # Commit the changes
-                    db.session.commit()
-            except Exception as e:
-                print(f"Error tracking recently viewed: {str(e)}")
-                # Continue with the response even if tracking fails
-
-            # Get variants and parent product information
-            variants = []
-            parent_product = None
-
-            if product.parent_product_id is None:
-                # If this is a parent product, get its variants
-                variants = Product.query.filter_by(
-                    parent_product_id=product_id,
-                    deleted_at=None,
-                    active_flag=True,
-                    approval_status='approved'
-                ).all()
-            else:
-                # If this is a variant product, get its parent and siblings
-                parent_product = Product.query.filter_by(
-                    product_id=product.parent_product_id,
-                    deleted_at=None,
-                    active_flag=True,
-                    approval_status='approved'
-                ).first()
-
-                # Get all variants (siblings) including the parent
-                all_variants = Product.query.filter_by(
-                    parent_product_id=product.parent_product_id,
-                    deleted_at=None,
-                    active_flag=True,
-                    approval_status='approved'
-                ).all()
-                
-                # Add parent product to variants list if it exists
-                if parent_product:
-                    variants.append(parent_product)
-                
-                # Add sibling variants (excluding current product)
-                variants.extend([v for v in all_variants if v.product_id != product_id])
-
-            # Get product reviews
-            reviews = Review.query.filter_by(
-                product_id=product_id,
-                deleted_at=None
-            ).order_by(Review.created_at.desc()).all()
-            
-            # Calculate average rating
-            avg_rating = db.session.query(func.avg(Review.rating))\
-                .filter(Review.product_id == product_id)\
-                .scalar() or 0
-
-            # Prepare response data - start with serialized product data
-            response_data = product.serialize()
-            
-            # Add additional detailed information
-            response_data.update({
-                "media": [media.serialize() for media in product_media] if product_media else [],
-                "meta": {
-                    "short_desc": product_meta.short_desc if product_meta else None,
-                    "full_desc": product_meta.full_desc if product_meta else None,
-                    "meta_title": product_meta.meta_title if product_meta else None,
-                    "meta_desc": product_meta.meta_desc if product_meta else None,
-                    "meta_keywords": product_meta.meta_keywords if product_meta else None
-                },
-                "attributes": processed_attributes,
-                "category": product.category.serialize() if product.category else None,
-                "brand": product.brand.serialize() if product.brand else None,
-                # Add frontend-specific fields
-                "id": str(product.product_id),
-                "name": product.product_name,
-                "currency": "INR",
-                "stock": 100,
-                "isNew": True,
-                "isBuiltIn": False,
-                "rating": round(float(avg_rating), 1),
-                "reviews": [{
-                    "id": review.review_id,
-                    "user": {
-                        "id": review.user.id,
-                        "first_name": review.user.first_name if hasattr(review.user, 'first_name') else 'Anonymous',
-                        "last_name": review.user.last_name if hasattr(review.user, 'last_name') else '',
-                        "email": review.user.email if hasattr(review.user, 'email') else None,
-                        "avatar": review.user.avatar_url if hasattr(review.user, 'avatar_url') else None
-                    },
-                    "rating": review.rating,
-                    "title": review.title,
-                    "body": review.body,
-                    "created_at": review.created_at.isoformat(),
-                    "images": [img.serialize() for img in review.images] if review.images else []
-                } for review in reviews],
-                "sku": product.sku if hasattr(product, 'sku') else None,
-                "parent_product_id": product.parent_product_id,
-                "is_variant": product.parent_product_id is not None,
-                "variants": []  # Will be populated below
-            })
-            
-            # Add variants with proper price handling
-            for v in variants:
-                variant_data = v.serialize()  # Use serialize() to get correct price logic
-                variant_dict = {
-                    "id": str(v.product_id),
-                    "name": v.product_name,
-                    "price": variant_data.get('price', v.selling_price),  # Use serialized price
-                    "originalPrice": variant_data.get('originalPrice', v.cost_price),  # Use serialized originalPrice
-                    "sku": v.sku if hasattr(v, 'sku') else None,
-                    "isVariant": v.product_id != product.parent_product_id,
-                    "isParent": v.product_id == product.parent_product_id,
-                    "parentProductId": str(v.parent_product_id) if v.parent_product_id else None,
-                    "media": [media.serialize() for media in ProductMedia.query.filter_by(
-                        product_id=v.product_id,
-                        deleted_at=None
-                    ).order_by(ProductMedia.sort_order).all()] if ProductMedia.query.filter_by(
-                        product_id=v.product_id,
-                        deleted_at=None
-                    ).first() else []
-                }
-                response_data["variants"].append(variant_dict)
+            response_data = ProductDetailService.get_product_detail(product_id, user_id)
+            if response_data is None:
+                return jsonify({
+                    "error": "Product not found",
+                    "message": f"Product {product_id} not found"
+                }), 404
 
             return jsonify(response_data)
 
@@ -676,7 +391,8 @@ class ProductController:
             per_page = min(request.args.get('per_page', 10, type=int), 50)
             
             # Get sorting parameters
-            sort_by = request.args.get('sort_by', 'created_at')
+            # Price sorts order by the current (special-aware) price
+            sort_by = Product.sort_attribute(request.args.get('sort_by', 'created_at'))
             order = request.args.get('order', 'desc')
             
             # Get filter parameters
@@ -712,9 +428,9 @@ class ProductController:
             
             # Apply other filters
             if min_price is not None:
-                query = query.filter(Product.selling_price >= min_price)
+                query = query.filter(Product.effective_price >= min_price)
             if max_price is not None:
-                query = query.filter(Product.selling_price <= max_price)
+                query = query.filter(Product.effective_price <= max_price)
             if search:
                 search_term = f"%{search}%"
                 query = query.filter(
@@ -732,7 +448,7 @@ class ProductController:
 
             # Apply discount filter
             if min_discount is not None:
-                query = query.filter(Product.discount_pct >= min_discount)
+                query = query.filter(Product.effective_discount_pct >= min_discount)
                 
             # Apply sorting
             if order == 'asc':
@@ -815,7 +531,8 @@ class ProductController:
             per_page = min(request.args.get('per_page', 10, type=int), 50)
             
             # Get sorting parameters
-            sort_by = request.args.get('sort_by', 'created_at')
+            # Price sorts order by the current (special-aware) price
+            sort_by = Product.sort_attribute(request.args.get('sort_by', 'created_at'))
             order = request.args.get('order', 'desc')
             
             # Get filter parameters
@@ -857,9 +574,9 @@ class ProductController:
             
             # Apply other filters
             if min_price is not None:
-                query = query.filter(Product.selling_price >= min_price)
+                query = query.filter(Product.effective_price >= min_price)
             if max_price is not None:
-                query = query.filter(Product.selling_price <= max_price)
+                query = query.filter(Product.effective_price <= max_price)
             if search:
                 search_term = f"%{search}%"
                 query = query.filter(
@@ -877,7 +594,7 @@ class ProductController:
 
             # Apply discount filter
             if min_discount is not None:
-                query = query.filter(Product.discount_pct >= min_discount)
+                query = query.filter(Product.effective_discount_pct >= min_discount)
                 
             # Apply sorting
             if order == 'asc':
@@ -1093,7 +810,8 @@ class ProductController:
             per_page = min(request.args.get('per_page', 10, type=int), 50)
             
             # Get sorting parameters
-            sort_by = request.args.get('sort_by', 'created_at')
+            # Price sorts order by the current (special-aware) price
+            sort_by = Product.sort_attribute(request.args.get('sort_by', 'created_at'))
             order = request.args.get('order', 'desc')
             
             # Get filter parameters
@@ -1194,9 +912,9 @@ class ProductController:
 
             # Apply price range filter
             if min_price is not None:
-                query = query.filter(Product.selling_price >= min_price)
+                query = query.filter(Product.effective_price >= min_price)
             if max_price is not None:
-                query = query.filter(Product.selling_price <= max_price)
+                query = query.filter(Product.effective_price <= max_price)
 
             # Apply search filter
             if search:
@@ -1227,7 +945,7 @@ class ProductController:
 
             # Apply discount filter
             if min_discount is not None:
-                query = query.filter(Product.discount_pct >= min_discount)
+                query = query.filter(Product.effective_discount_pct >= min_discount)
 
             # Filter by trendy products
             if product_ids:
@@ -8,6 +8,7 @@ import cloudinary
 import cloudinary.uploader
 from datetime import datetime, timezone
 import logging
+from services.product_detail_service import ProductDetailService
 
 logger = logging.getLogger(__name__)
 
@@ -127,6 +128,7 @@ class ReviewController:
             
             # Commit all changes
             db.session.commit()
+            ProductDetailService.invalidate_products(review.product_id)
             
             review_data = review.serialize(include_images=True)
             
@@ -244,8 +246,10 @@ class ReviewController:
                         current_app.logger.error(f"Failed to delete image {image.public_id} from Cloudinary: {e}")
                     
             # Delete review
+            product_id = review.product_id
             db.session.delete(review)
             db.session.commit()
+            ProductDetailService.invalidate_products(product_id)
             
             return True
             
@@ -2,6 +2,7 @@ from flask import request, jsonify
 from common.database import db
 from models.shop.shop_brand import ShopBrand
 from models.shop.shop import Shop
+from services.storefront_cache_service import StorefrontCacheService
 from sqlalchemy import desc, or_
 
 class PublicShopBrandController:
@@ -10,11 +11,7 @@ class PublicShopBrandController:
         """Get all active brands for a specific shop"""
         try:
             # Verify shop exists and is active
-            shop = Shop.query.filter(
-                Shop.shop_id == shop_id,
-                Shop.deleted_at.is_(None),
-                Shop.is_active.is_(True)
-            ).first()
+            shop = StorefrontCacheService.get_shop(shop_id)
 
             if not shop:
                 return jsonify({
@@ -22,33 +19,12 @@ class PublicShopBrandController:
                     'message': 'Shop not found or not active'
                 }), 404
 
-            # Get active brands for this shop
-            brands = ShopBrand.query.filter(
-                ShopBrand.shop_id == shop_id,
-                ShopBrand.deleted_at.is_(None),
-                ShopBrand.is_active.is_(True)
-            ).order_by(ShopBrand.name).all()
-
-            brand_data = []
-            for brand in brands:
-                brand_dict = brand.serialize()
-                
-                # Count products for this brand
-                from models.shop.shop_product import ShopProduct
-                product_count = ShopProduct.query.filter(
-                    ShopProduct.shop_id == shop_id,
-                    ShopProduct.brand_id == brand.brand_id,
-                    ShopProduct.deleted_at.is_(None),
-                    ShopProduct.active_flag.is_(True),
-                    ShopProduct.is_published.is_(True)
-                ).count()
-                
-                brand_dict['product_count'] = product_count
-                brand_data.append(brand_dict)
+            # Active brands with their product counts, from the storefront cache
+            brand_data = StorefrontCacheService.get_brands(shop_id)
 
             return jsonify({
                 'success': True,
-                'shop': shop.serialize(),
+                'shop': shop,
                 'brands': brand_data,
                 'total': len(brand_data)
             }), 200
@@ -64,11 +40,7 @@ class PublicShopBrandController:
         """Get a specific brand from a shop"""
         try:
             # Verify shop exists and is active
-            shop = Shop.query.filter(
-                Shop.shop_id == shop_id,
-                Shop.deleted_at.is_(None),
-                Shop.is_active.is_(True)
-            ).first()
+            shop = StorefrontCacheService.get_shop(shop_id)
 
             if not shop:
                 return jsonify({
@@ -77,36 +49,20 @@ class PublicShopBrandController:
                 }), 404
 
             # Get the brand
-            brand = ShopBrand.query.filter(
-                ShopBrand.brand_id == brand_id,
-                ShopBrand.shop_id == shop_id,
-                ShopBrand.deleted_at.is_(None),
-                ShopBrand.is_active.is_(True)
-            ).first()
+            brand_dict = next(
+                (brand for brand in StorefrontCacheService.get_brands(shop_id) if brand['brand_id'] == brand_id),
+                None
+            )
 
-            if not brand:
+            if not brand_dict:
                 return jsonify({
                     'success': False,
                     'message': 'Brand not found in this shop'
                 }), 404
 
-            brand_dict = brand.serialize()
-            
-            # Count products for this brand
-            from models.shop.shop_product import ShopProduct
-            product_count = ShopProduct.query.filter(
-                ShopProduct.shop_id == shop_id,
-                ShopProduct.brand_id == brand.brand_id,
-                ShopProduct.deleted_at.is_(None),
-                ShopProduct.active_flag.is_(True),
-                ShopProduct.is_published.is_(True)
-            ).count()
-            
-            brand_dict['product_count'] = product_count
-
             return jsonify({
                 'success': True,
-                'shop': shop.serialize(),
+                'shop': shop,
                 'brand': brand_dict
             }), 200
 
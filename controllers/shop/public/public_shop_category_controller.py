@@ -2,6 +2,7 @@ from flask import request, jsonify
 from common.database import db
 from models.shop.shop_category import ShopCategory
 from models.shop.shop import Shop
+from services.storefront_cache_service import StorefrontCacheService
 from sqlalchemy import desc, or_
 
 class PublicShopCategoryController:
@@ -10,11 +11,7 @@ class PublicShopCategoryController:
         """Get all active categories for a specific shop"""
         try:
             # Verify shop exists and is active
-            shop = Shop.query.filter(
-                Shop.shop_id == shop_id,
-                Shop.deleted_at.is_(None),
-                Shop.is_active.is_(True)
-            ).first()
+            shop = StorefrontCacheService.get_shop(shop_id)
 
             if not shop:
                 return jsonify({
@@ -22,33 +19,12 @@ class PublicShopCategoryController:
                     'message': 'Shop not found or not active'
                 }), 404
 
-            # Get active categories for this shop
-            categories = ShopCategory.query.filter(
-                ShopCategory.shop_id == shop_id,
-                ShopCategory.deleted_at.is_(None),
-                ShopCategory.is_active.is_(True)
-            ).order_by(ShopCategory.name).all()
-
-            category_data = []
-            for category in categories:
-                category_dict = category.serialize()
-                
-                # Count products in this category
-                from models.shop.shop_product import ShopProduct
-                product_count = ShopProduct.query.filter(
-                    ShopProduct.shop_id == shop_id,
-                    ShopProduct.category_id == category.category_id,
-                    ShopProduct.deleted_at.is_(None),
-                    ShopProduct.active_flag.is_(True),
-                    ShopProduct.is_published.is_(True)
-                ).count()
-                
-                category_dict['product_count'] = product_count
-                category_data.append(category_dict)
+            # Active categories with their product counts, from the storefront cache
+            category_data = StorefrontCacheService.get_categories(shop_id)
 
             return jsonify({
                 'success': True,
-                'shop': shop.serialize(),
+                'shop': shop,
                 'categories': category_data,
                 'total': len(category_data)
             }), 200
@@ -64,11 +40,7 @@ class PublicShopCategoryController:
         """Get a specific category from a shop"""
         try:
             # Verify shop exists and is active
-            shop = Shop.query.filter(
-                Shop.shop_id == shop_id,
-                Shop.deleted_at.is_(None),
-                Shop.is_active.is_(True)
-            ).first()
+            shop = StorefrontCacheService.get_shop(shop_id)
 
             if not shop:
                 return jsonify({
@@ -77,36 +49,20 @@ class PublicShopCategoryController:
                 }), 404
 
             # Get the category
-            category = ShopCategory.query.filter(
-                ShopCategory.category_id == category_id,
-                ShopCategory.shop_id == shop_id,
-                ShopCategory.deleted_at.is_(None),
-                ShopCategory.is_active.is_(True)
-            ).first()
+            category_dict = next(
+                (category for category in StorefrontCacheService.get_categories(shop_id) if category['category_id'] == category_id),
+                None
+            )
 
-            if not category:
+            if not category_dict:
                 return jsonify({
                     'success': False,
                     'message': 'Category not found in this shop'
                 }), 404
 
-            category_dict = category.serialize()
-            
-            # Count products in this category
-            from models.shop.shop_product import ShopProduct
-            product_count = ShopProduct.query.filter(
-                ShopProduct.shop_id == shop_id,
-                ShopProduct.category_id == category.category_id,
-                ShopProduct.deleted_at.is_(None),
-                ShopProduct.active_flag.is_(True),
-                ShopProduct.is_published.is_(True)
-            ).count()
-            
-            category_dict['product_count'] = product_count
-
             return jsonify({
                 'success': True,
-                'shop': shop.serialize(),
+                'shop': shop,
                 'category': category_dict
             }), 200
 
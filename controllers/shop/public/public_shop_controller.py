@@ -1,6 +1,7 @@
 from flask import request, jsonify
 from common.database import db
 from models.shop.shop import Shop
+from services.storefront_cache_service import StorefrontCacheService
 from sqlalchemy import desc, or_
 from datetime import datetime, timezone
 
@@ -9,15 +10,7 @@ class PublicShopController:
     def get_all_shops():
         """Get all active shops for public display"""
         try:
-            shops = Shop.query.filter(
-                Shop.deleted_at.is_(None),
-                Shop.is_active.is_(True)
-            ).order_by(Shop.name).all()
-
-            shop_data = []
-            for shop in shops:
-                shop_dict = shop.serialize()
-                shop_data.append(shop_dict)
+            shop_data = StorefrontCacheService.get_shops()
 
             return jsonify({
                 'success': True,
@@ -35,11 +28,7 @@ class PublicShopController:
     def get_shop_by_id(shop_id):
         """Get shop details by ID for public display"""
         try:
-            shop = Shop.query.filter(
-                Shop.shop_id == shop_id,
-                Shop.deleted_at.is_(None),
-                Shop.is_active.is_(True)
-            ).first()
+            shop = StorefrontCacheService.get_shop(shop_id)
 
             if not shop:
                 return jsonify({
@@ -49,7 +38,7 @@ class PublicShopController:
 
             return jsonify({
                 'success': True,
-                'shop': shop.serialize()
+                'shop': shop
             }), 200
 
         except Exception as e:
@@ -62,11 +51,7 @@ class PublicShopController:
     def get_shop_by_slug(slug):
         """Get shop details by slug for public display"""
         try:
-            shop = Shop.query.filter(
-                Shop.slug == slug,
-                Shop.deleted_at.is_(None),
-                Shop.is_active.is_(True)
-            ).first()
+            shop = StorefrontCacheService.get_shop_by_slug(slug)
 
             if not shop:
                 return jsonify({
@@ -76,7 +61,7 @@ class PublicShopController:
 
             return jsonify({
                 'success': True,
-                'shop': shop.serialize()
+                'shop': shop
             }), 200
 
         except Exception as e:
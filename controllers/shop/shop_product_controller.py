@@ -14,6 +14,9 @@ from models.shop.shop_attribute import ShopAttribute, ShopAttributeValue
 from models.enums import MediaType
 from sqlalchemy import desc, or_, func
 from common.decorators import superadmin_required
+from services.variant_matrix_service import VariantMatrixService
+from services.media_manifest_service import MediaManifestService
+from services.product_import_service import ProductImportService
 from datetime import datetime, timezone
 import random
 import string
@@ -416,6 +419,7 @@ class ShopProductController:
             product.updated_at = datetime.now(timezone.utc)
             
             db.session.commit()
+            VariantMatrixService.invalidate(product.shop_id, product.parent_product_id or product.product_id)
             
             return jsonify({
                 'status': 'success',
@@ -450,6 +454,7 @@ class ShopProductController:
             product.active_flag = False
             
             db.session.commit()
+            VariantMatrixService.invalidate(product.shop_id, product.parent_product_id or product.product_id)
             
             return jsonify({
                 'status': 'success',
@@ -481,14 +486,8 @@ class ShopProductController:
         
         base_sku = f"{shop_code}-{category_code}-{timestamp}-{random_suffix}"
         
-        # Ensure uniqueness
-        counter = 1
-        sku = base_sku
-        while ShopProduct.query.filter_by(sku=sku, deleted_at=None).first():
-            sku = f"{base_sku}-{counter:02d}"
-            counter += 1
-            
-        return sku
+        # Ensure uniqueness: the base and its -01.. suffixes are checked in one query
+        return ProductImportService.allocate_skus(ShopProduct, [base_sku])[0]
 
     # PRODUCTION-READY MULTI-STEP PRODUCT CREATION SYSTEM
     # ====================================================
@@ -805,6 +804,8 @@ class ShopProductController:
             else:
                 # If no existing media IDs provided, clear all existing media
                 ShopProductMedia.query.filter_by(product_id=product_id).delete()
+            # Bulk deletes bypass the session, so ask for the manifest rebuild explicitly
+            MediaManifestService.schedule(ShopProduct, product_id)
             
             # Update existing media (sort order, primary status)
             saved_media = []
@@ -1121,6 +1122,7 @@ class ShopProductController:
                 
             product.updated_at = datetime.now(timezone.utc)
             db.session.commit()
+            VariantMatrixService.invalidate(product.shop_id, product.parent_product_id or product.product_id)
             
             return jsonify({
                 'status': 'success',
@@ -1190,3 +1192,40 @@ class ShopProductController:
         except Exception as e:
             db.session.rollback()
             return jsonify({'status': 'error', 'message': f'Error updating product: {str(e)}'}), 500
+
+    @staticmethod
+    @superadmin_required
+    def import_products(shop_id):
+        """Queue a bulk catalog import (CSV/XLSX/JSONL/JSON upload or raw body) for a shop"""
+        try:
+            shop = Shop.query.filter_by(shop_id=shop_id, deleted_at=None).first()
+            if not shop:
+                return jsonify({'status': 'error', 'message': 'Shop not found'}), 404
+
+            upload = request.files.get('file')
+            if upload:
+                fmt = ProductImportService.detect_format(upload.filename, upload.mimetype)
+                stream, file_name = upload.stream, upload.filename
+            else:
+                fmt = ProductImportService.detect_format(content_type=request.content_type)
+                stream, file_name = request.stream, None
+            if not fmt:
+                return jsonify({'status': 'error', 'message': 'Upload must be CSV, XLSX, JSONL or JSON'}), 400
+
+            job = ProductImportService.create_job('shop', shop_id, request.current_user.id, stream, file_name, fmt)
+            return jsonify({'status': 'success', 'data': job.serialize()}), 202
+
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'status': 'error', 'message': f'Error importing products: {str(e)}'}), 500
+
+    @staticmethod
+    @superadmin_required
+    def get_import_job(shop_id, job_id):
+        """Progress and row errors of a shop catalog import"""
+        job = ProductImportService.get_job(job_id, shop_id=shop_id)
+        if not job:
+            return jsonify({'status': 'error', 'message': 'Import job not found'}), 404
+        return jsonify({'status': 'success', 'data': job.serialize(include_errors=True)}), 200
@@ -5,6 +5,8 @@ from models.shop.shop_product_stock import ShopProductStock
 from models.shop.shop_category import ShopCategory
 from models.shop.shop_brand import ShopBrand
 from models.shop.shop import Shop
+from services.inventory_import_service import InventoryImportService
+from services.storefront_cache_service import StorefrontCacheService
 from sqlalchemy import or_, desc
 import logging
 
@@ -350,6 +352,15 @@ class ShopStockController:
             logger.error(f"Error getting shop stock summary: {e}")
             raise
 
+    @staticmethod
+    def _owned_product_ids(shop_id, product_ids):
+        """Return (product_id,) rows for the given ids that belong to the shop and are not deleted"""
+        return db.session.query(ShopProduct.product_id).filter(
+            ShopProduct.shop_id == shop_id,
+            ShopProduct.deleted_at.is_(None),
+            ShopProduct.product_id.in_(product_ids)
+        ).all()
+
     @staticmethod
     def update_stock_batch(shop_id, stock_updates):
         """Update stock for multiple products in a shop"""
@@ -357,51 +368,37 @@ class ShopStockController:
             if not isinstance(stock_updates, list):
                 raise ValueError("stock_updates must be a list")
             
-            results = []
-            for update in stock_updates:
-                if not isinstance(update, dict) or 'product_id' not in update:
-                    raise ValueError("Each update must be a dictionary with 'product_id'")
-                
-                product_id = update['product_id']
-                stock_qty = update.get('stock_qty', 0)
-                low_stock_threshold = update.get('low_stock_threshold', 5)
-                
-                # Verify product belongs to shop and is not deleted
-                product = ShopProduct.query.filter_by(
-                    product_id=product_id, 
-                    shop_id=shop_id,
-                    deleted_at=None
-                ).first()
-                
-                if not product:
-                    results.append({
-                        'product_id': product_id,
-                        'status': 'error',
-                        'message': 'Product not found in this shop or has been deleted'
-                    })
-                    continue
-                
-                # Update stock
-                stock = ShopProductStock.query.filter_by(product_id=product_id).first()
-                if not stock:
-                    stock = ShopProductStock(product_id=product_id)
-                    db.session.add(stock)
-                
-                stock.stock_qty = stock_qty
-                stock.low_stock_threshold = low_stock_threshold
-                
-                results.append({
-                    'product_id': product_id,
-                    'status': 'success',
-                    'stock_qty': stock_qty,
-                    'low_stock_threshold': low_stock_threshold,
-                    'available': stock_qty > 0,
-                    'low_stock': stock_qty <= low_stock_threshold
-                })
-            
-            db.session.commit()
-            return results
+            report = InventoryImportService.import_rows(
+                ShopProductStock,
+                lambda product_ids: ShopStockController._owned_product_ids(shop_id, product_ids),
+                stock_updates,
+                default_threshold=5,
+                timestamped=True
+            )
+            StorefrontCacheService.invalidate(shop_id)
+            return report['results']
         except Exception as e:
             logger.error(f"Error updating stock batch: {e}")
             db.session.rollback()
             raise
+
+    @staticmethod
+    def import_stock(shop_id, stream, fmt):
+        """Stream a CSV/JSONL/JSON stock upload into the shop's inventory"""
+        try:
+            shop = Shop.query.filter_by(shop_id=shop_id, deleted_at=None).first()
+            if not shop:
+                raise ValueError("Shop not found")
+            
+            report = InventoryImportService.import_rows(
+                ShopProductStock,
+                lambda product_ids: ShopStockController._owned_product_ids(shop_id, product_ids),
+                InventoryImportService.iter_rows(stream, fmt),
+                timestamped=True
+            )
+            StorefrontCacheService.invalidate(shop_id)
+            return report
+        except Exception as e:
+            logger.error(f"Error importing stock for shop {shop_id}: {e}")
+            db.session.rollback()
+            raise
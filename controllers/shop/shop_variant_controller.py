@@ -9,6 +9,9 @@ from models.shop.shop_attribute import ShopAttribute, ShopAttributeValue
 from models.enums import MediaType
 from common.database import db
 from common.response import success_response, error_response
+from services.storefront_cache_service import StorefrontCacheService
+from services.variant_generator_service import VariantGeneratorService
+from services.variant_matrix_service import VariantMatrixService
 import json
 from datetime import datetime, timezone
 
@@ -76,6 +79,7 @@ class ShopVariantController:
                     variant_sku=data['sku'],
                     variant_name=data.get('variant_name'),
                     attribute_combination=attributes,
+                    combination_hash=ShopProductVariant.compute_combination_hash(attributes),
                     price_override=data.get('price_override'),
                     cost_override=data.get('cost_override'),
                     is_default=data.get('is_default', False),
@@ -129,6 +133,7 @@ class ShopVariantController:
                     variant_relation.is_default = True
                 
                 db.session.commit()
+                VariantMatrixService.invalidate(parent_product.shop_id, parent_id)
                 
                 # Return created variant data
                 variant_product.stock = stock
@@ -261,8 +266,8 @@ class ShopVariantController:
                         variant_id=variant_id
                     ).delete()
                     
-                    # Update the JSON field
-                    variant_relation.attribute_combination = data['attributes']
+                    # Update the JSON field and its lookup hash
+                    variant_relation.set_attribute_combination(data['attributes'])
                     
                     # Recreate variant attribute values
                     for attr_name, attr_value in data['attributes'].items():
@@ -293,6 +298,7 @@ class ShopVariantController:
                 variant_product.updated_at = datetime.now(timezone.utc)
                 
                 db.session.commit()
+                VariantMatrixService.invalidate(variant_product.shop_id, variant_relation.parent_product_id)
                 
                 return success_response({
                     "variant": variant_relation.serialize(),
@@ -316,6 +322,7 @@ class ShopVariantController:
                 return error_response("Variant not found", 404)
             
             variant_product = variant_relation.variant_product
+            parent_id = variant_relation.parent_product_id
             
             try:
                 # Soft delete the variant product
@@ -331,6 +338,7 @@ class ShopVariantController:
                 ).delete()
                 
                 db.session.commit()
+                VariantMatrixService.invalidate(variant_product.shop_id, parent_id)
                 
                 return success_response({"message": "Variant deleted successfully"})
                 
@@ -347,43 +355,17 @@ class ShopVariantController:
         Generate variant SKU following industry standards
         Format: PARENT-SKU-ATTR1-ATTR2-ATTR3
         """
-        attr_codes = []
-        
-        # Common attribute abbreviations
-        attr_abbreviations = {
-            'color': 'CLR',
-            'size': 'SZ',
-            'storage': 'STG',
-            'memory': 'MEM',
-            'material': 'MAT',
-            'style': 'STY',
-            'weight': 'WGT',
-            'capacity': 'CAP'
-        }
-        
-        for key, value in attributes.items():
-            if isinstance(value, str):
-                # Use predefined abbreviation or create one
-                attr_key = attr_abbreviations.get(key.lower(), key.upper()[:3])
-                value_code = value.upper().replace(' ', '').replace('-', '')[:3]
-                attr_codes.append(f"{attr_key}{value_code}")
-        
-        variant_suffix = '-'.join(attr_codes)
-        
-        # Ensure total SKU length doesn't exceed 50 characters
-        max_suffix_length = 50 - len(parent_sku) - 1  # -1 for the dash
-        if len(variant_suffix) > max_suffix_length:
-            variant_suffix = variant_suffix[:max_suffix_length]
-        
-        return f"{parent_sku}-{variant_suffix}"
+        return VariantGeneratorService.variant_sku(parent_sku, attributes)
     
     @staticmethod
     @jwt_required()  
     def bulk_create_variants(parent_id):
-        """Create multiple variants from attribute combinations"""
+        """
+        Create multiple variants from attribute combinations, or from the cartesian product
+        of `attribute_values` ({attribute: [values]}), in one transaction
+        """
         try:
-            data = request.get_json()
-            print(f"Received data for bulk variant creation: {data}")
+            data = request.get_json() or {}
             
             # Validate parent product
             parent_product = ShopProduct.query.filter_by(
@@ -394,134 +376,90 @@ class ShopVariantController:
             if not parent_product:
                 return error_response("Parent product not found", 404)
             
-            attribute_combinations = data.get('combinations', [])
-            print(f"Found {len(attribute_combinations)} combinations to process")
-            if not attribute_combinations:
+            if not data.get('combinations') and not data.get('attribute_values'):
                 return error_response("No attribute combinations provided", 400)
-            
-            created_variants = []
-            errors = []
+            try:
+                attribute_combinations = VariantGeneratorService.expand(data)
+            except ValueError as e:
+                return error_response(str(e), 400)
             
             try:
-                for i, combination in enumerate(attribute_combinations):
-                    try:
-                        # Use provided SKU or generate one
-                        if 'sku' in combination and combination['sku']:
-                            variant_sku = combination['sku']
-                        else:
-                            # Generate SKU for this combination
-                            variant_sku = ShopVariantController.generate_variant_sku(
-                                parent_product.sku, 
-                                combination.get('attributes', {})
-                            )
-                        
-                        # Ensure uniqueness
-                        counter = 1
-                        original_sku = variant_sku
-                        while ShopProduct.query.filter_by(sku=variant_sku, deleted_at=None).first():
-                            variant_sku = f"{original_sku}-{counter:02d}"
-                            counter += 1
-                        
-                        # Create variant product
-                        variant_product = ShopProduct(
-                            shop_id=parent_product.shop_id,
-                            category_id=parent_product.category_id,
-                            brand_id=parent_product.brand_id,
-                            parent_product_id=parent_id,
-                            sku=variant_sku,
-                            product_name=parent_product.product_name,
-                            product_description=parent_product.product_description,
-                            cost_price=combination.get('cost_price', parent_product.cost_price),
-                            selling_price=combination.get('selling_price', parent_product.selling_price),
-                            discount_pct=parent_product.discount_pct,
-                            active_flag=True,
-                            is_published=parent_product.is_published
-                        )
-                        
-                        db.session.add(variant_product)
-                        db.session.flush()
-                        
-                        # Create variant relation
-                        variant_relation = ShopProductVariant(
-                            parent_product_id=parent_id,
-                            variant_product_id=variant_product.product_id,
-                            variant_sku=variant_sku,
-                            variant_name=combination.get('name'),
-                            attribute_combination=combination.get('attributes', {}),
-                            sort_order=i
-                        )
-                        
-                        db.session.add(variant_relation)
-                        db.session.flush()
-                        
-                        # Create stock
-                        stock = ShopProductStock(
-                            product_id=variant_product.product_id,
-                            stock_qty=combination.get('stock_qty', 0),
-                            low_stock_threshold=combination.get('low_stock_threshold', 0)
-                        )
-                        
-                        db.session.add(stock)
-                        
-                        # Handle media if provided
-                        if 'media' in combination and combination['media']:
-                            for media_item in combination['media']:
-                                if media_item.get('url'):  # Only process if URL exists
-                                    # Convert media type string to MediaType enum
-                                    media_type_str = media_item.get('type', 'IMAGE').lower()
-                                    if media_type_str == 'image':
-                                        media_type = MediaType.IMAGE
-                                    elif media_type_str == 'video':
-                                        media_type = MediaType.VIDEO
-                                    else:
-                                        media_type = MediaType.IMAGE  # Default fallback
-                                    
-                                    variant_media = ShopProductMedia(
-                                        product_id=variant_product.product_id,
-
-                                        type=media_type,
-
-                                        url=media_item['url'],
-                                        public_id=media_item.get('public_id'),
-                                        sort_order=media_item.get('sort_order', 0),
-                                        is_primary=media_item.get('is_primary', False),
-                                        file_name=media_item.get('file_name'),
-                                        file_size=media_item.get('file_size')
-                                    )
-                                    db.session.add(variant_media)
-                        
-                        created_variants.append(variant_relation.serialize())
-                        
-                    except Exception as e:
-                        print(f"Error creating variant {i+1}: {str(e)}")
-                        errors.append(f"Combination {i+1}: {str(e)}")
-                        continue
-                
-                if created_variants:
-                    db.session.commit()
-                else:
+                variant_ids, errors = VariantGeneratorService.create_shop_variants(
+                    parent_product, attribute_combinations
+                )
+                if not variant_ids:
                     db.session.rollback()
-                    return error_response("No variants created due to errors", 400)
-                
-                response_data = {
-                    "created_variants": created_variants,
-                    "created_count": len(created_variants),
-                    "total_combinations": len(attribute_combinations),
-                    "message": f"Successfully created {len(created_variants)} variants"
-                }
-                
-                if errors:
-                    response_data["errors"] = errors
-                
-                return success_response(response_data)
+                    return error_response(f"No variants created due to errors: {'; '.join(errors[:5])}", 400)
                 
+                db.session.commit()
+                VariantMatrixService.invalidate(parent_product.shop_id, parent_id)
+                StorefrontCacheService.invalidate(parent_product.shop_id)
             except Exception as e:
                 db.session.rollback()
                 raise e
+            
+            # Serialize with one IN query per relationship instead of per variant
+            created = ShopProductVariant.query.options(
+                db.selectinload(ShopProductVariant.variant_product).selectinload(ShopProduct.media),
+                db.selectinload(ShopProductVariant.variant_product).selectinload(ShopProduct.stock),
+                db.selectinload(ShopProductVariant.parent_product).selectinload(ShopProduct.media)
+            ).filter(
+                ShopProductVariant.variant_id.in_(variant_ids)
+            ).order_by(ShopProductVariant.sort_order, ShopProductVariant.variant_id).all()
+            created_variants = [variant.serialize() for variant in created]
+            
+            response_data = {
+                "created_variants": created_variants,
+                "created_count": len(created_variants),
+                "total_combinations": len(attribute_combinations),
+                "message": f"Successfully created {len(created_variants)} variants"
+            }
+            
+            if errors:
+                response_data["errors"] = errors
+            
+            return success_response(response_data)
                 
         except Exception as e:
             return error_response(f"Failed to create variants: {str(e)}", 500)
     
+    @staticmethod
+    @jwt_required()
+    def generate_variant_combinations(parent_id):
+        """Preview the combinations and SKUs bulk creation would produce for `attribute_values`"""
+        try:
+            data = request.get_json() or {}
+            
+            parent_product = ShopProduct.query.filter_by(
+                product_id=parent_id,
+                deleted_at=None
+            ).first()
+            
+            if not parent_product:
+                return error_response("Parent product not found", 404)
+            
+            try:
+                combinations = VariantGeneratorService.cartesian(data.get('attribute_values'))
+            except ValueError as e:
+                return error_response(str(e), 400)
+            
+            existing = {
+                row.combination_hash for row in db.session.query(ShopProductVariant.combination_hash).filter(
+                    ShopProductVariant.parent_product_id == parent_id
+                )
+            }
+            return success_response({
+                "combinations": [{
+                    "attributes": attributes,
+                    "sku": VariantGeneratorService.variant_sku(parent_product.sku, attributes),
+                    "exists": ShopProductVariant.compute_combination_hash(attributes) in existing
+                } for attributes in combinations],
+                "total_combinations": len(combinations)
+            })
+            
+        except Exception as e:
+            return error_response(f"Failed to generate combinations: {str(e)}", 500)
+    
     @staticmethod
     @jwt_required()
     def update_variant_attributes(variant_id):
@@ -549,8 +487,8 @@ class ShopVariantController:
                     variant_id=variant_id
                 ).delete()
                 
-                # Update the JSON field
-                variant_relation.attribute_combination = attribute_combination
+                # Update the JSON field and its lookup hash
+                variant_relation.set_attribute_combination(attribute_combination)
                 
                 # Recreate variant attribute values
                 for attr_name, attr_value in attribute_combination.items():
@@ -580,6 +518,7 @@ class ShopVariantController:
                 variant_relation.updated_at = datetime.now(timezone.utc)
                 
                 db.session.commit()
+                VariantMatrixService.invalidate(variant_product.shop_id, variant_relation.parent_product_id)
                 
                 return success_response({
                     "variant": variant_relation.serialize(),
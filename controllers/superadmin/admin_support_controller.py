@@ -9,6 +9,8 @@ from sqlalchemy.orm import joinedload, selectinload
 import datetime
 import cloudinary
 import cloudinary.uploader 
+from services.signed_upload_service import SignedUploadService, SignedUploadError
+from services.support_inbox_service import SupportInboxService
 
 def _upload_to_cloudinary(file_to_upload, folder_name="support_attachments"):
     if not file_to_upload:
@@ -110,10 +112,10 @@ class AdminSupportTicketController:
                 sort_field = getattr(SupportTicket, sort_field_name)
                 query = query.order_by(sort_order_func(sort_field))
             else: 
-                current_app.logger.warning(f"Admin: Invalid sort_by field: {sort_field_name}, defaulting to -updated_at")
-                query = query.order_by(desc(SupportTicket.updated_at))
+                current_app.logger.warning(f"Admin: Invalid sort_by field: {sort_field_name}, defaulting to -last_activity_at")
+                query = query.order_by(desc(SupportTicket.last_activity_at))
         else: 
-            query = query.order_by(desc(SupportTicket.updated_at))
+            query = query.order_by(desc(SupportTicket.last_activity_at))
             
         paginated_tickets = query.paginate(page=page, per_page=per_page, error_out=False)
         return paginated_tickets
@@ -132,9 +134,17 @@ class AdminSupportTicketController:
         
         if not ticket:
             raise NotFound(f"Support ticket with UID '{ticket_uid}' not found.")
+        SupportInboxService.mark_read(ticket, 'admin')
         # Sender for messages will be handled during ticket.serialize()
         return ticket
 
+    @staticmethod
+    def get_ticket_messages_for_admin(ticket_uid, before_id=None, limit=None):
+        ticket = SupportTicket.query.filter_by(ticket_uid=ticket_uid).first()
+        if not ticket:
+            raise NotFound(f"Support ticket with UID '{ticket_uid}' not found.")
+        return SupportInboxService.paginate_messages(ticket, before_id=before_id, limit=limit)
+
     @staticmethod
     def assign_ticket_to_admin(ticket_uid, admin_user_id_to_assign, current_admin_id_performing_action):
         ticket = SupportTicket.query.filter_by(ticket_uid=ticket_uid).first_or_404(
@@ -150,7 +160,7 @@ class AdminSupportTicketController:
         if not admin_user_to_be_assigned:
             raise BadRequest(f"Admin user with ID '{admin_id_int}' to assign not found.")
             
-        admin_roles = ['ADMIN', 'SUPERADMIN', 'SUPPORT'] 
+        admin_roles = ['ADMIN', 'SUPERADMIN', 'SUPER_ADMIN', 'SUPPORT'] 
         user_role_name = ""
         # Ensure role attribute exists and is accessed correctly
         if hasattr(admin_user_to_be_assigned, 'role') and admin_user_to_be_assigned.role:
@@ -182,7 +192,7 @@ class AdminSupportTicketController:
         return ticket
 
     @staticmethod
-    def admin_reply_to_ticket(ticket_uid, admin_user_id, message_text, attachment_file=None):
+    def admin_reply_to_ticket(ticket_uid, admin_user_id, message_text, attachment_file=None, attachment_asset_token=None):
         ticket = SupportTicket.query.filter_by(ticket_uid=ticket_uid).first_or_404(
             description=f"Support ticket UID '{ticket_uid}' not found."
         )
@@ -190,11 +200,17 @@ class AdminSupportTicketController:
         if ticket.status == TicketStatus.CLOSED.value:
             raise BadRequest("Cannot reply to a closed ticket.")
             
-        if not (message_text and message_text.strip()) and not attachment_file:
+        if not (message_text and message_text.strip()) and not attachment_file and not attachment_asset_token:
             raise BadRequest("Message text or an attachment is required.")
 
         attachment_url = None
-        if attachment_file:
+        if attachment_asset_token:
+            # Uploaded directly through /api/upload/signed
+            try:
+                attachment_url = SignedUploadService.redeem(attachment_asset_token, 'support_attachment', admin_user_id)['secure_url']
+            except SignedUploadError as e:
+                raise BadRequest(str(e))
+        elif attachment_file:
             try:
                 attachment_url = _upload_to_cloudinary(attachment_file, "admin_support_attachments")
             except Exception as e:
@@ -1,6 +1,7 @@
 from models.brand import Brand
 from models.category import Category
 from common.database import db
+from services.product_detail_service import ProductDetailService
 from datetime import datetime, timezone 
 
 class BrandController:
@@ -48,6 +49,7 @@ class BrandController:
         
        
         db.session.commit()
+        ProductDetailService.invalidate_tags(f"brand:{brand.brand_id}")
         return brand
 
    
@@ -1,5 +1,6 @@
 from models.category import Category
 from common.database import db
+from services.product_detail_service import ProductDetailService
 from sqlalchemy.exc import IntegrityError
 
 class CategoryController:
@@ -37,6 +38,7 @@ class CategoryController:
         cat.parent_id = data.get('parent_id', cat.parent_id)
         cat.icon_url = data.get('icon_url', cat.icon_url)  
         db.session.commit()
+        ProductDetailService.invalidate_tags(f"category:{cat.category_id}")
         return cat
 
     @staticmethod
@@ -1,5 +1,7 @@
 from models.newsletter_subscription import NewsletterSubscription
 from common.database import db
+from common.pagination import keyset_paginate
+from services.newsletter_broadcast_service import NewsletterBroadcastService
 
 class NewsletterController:
     @staticmethod
@@ -17,3 +19,52 @@ class NewsletterController:
             print("[ERROR] Exception in NewsletterController.list_all:")
             print(traceback.format_exc())
             raise
+
+    @staticmethod
+    def list_page(keyset):
+        """
+        Get one keyset-paginated page of newsletter subscriptions, newest first.
+        Args:
+            keyset (dict): Cursor arguments from common.pagination.get_keyset_args
+        Returns:
+            dict: keyset_paginate result with NewsletterSubscription items
+        """
+        return keyset_paginate(
+            NewsletterSubscription.query, None, NewsletterSubscription.id, keyset['per_page'],
+            cursor=keyset['cursor'], total=keyset['total']
+        )
+
+    @staticmethod
+    def create_campaign(data, user_id):
+        """
+        Save a draft campaign.
+        Args:
+            data (dict): subject, body_html (Jinja template) and optional heading
+            user_id: The super admin creating it
+        Returns:
+            NewsletterCampaign: The draft
+        """
+        return NewsletterBroadcastService.create_campaign(
+            data.get('subject'), data.get('body_html'), heading=data.get('heading'), user_id=user_id
+        )
+
+    @staticmethod
+    def list_campaigns():
+        return NewsletterBroadcastService.list_campaigns()
+
+    @staticmethod
+    def get_campaign(campaign_id):
+        return NewsletterBroadcastService.get_campaign(campaign_id)
+
+    @staticmethod
+    def send_campaign(campaign_id):
+        """Start or resume sending a campaign in the background; None if it does not exist"""
+        return NewsletterBroadcastService.send_campaign(campaign_id)
+
+    @staticmethod
+    def pause_campaign(campaign_id):
+        return NewsletterBroadcastService.pause_campaign(campaign_id)
+
+    @staticmethod
+    def list_deliveries(campaign_id, status=None, after_id=0, limit=100):
+        return NewsletterBroadcastService.list_deliveries(campaign_id, status=status, after_id=after_id, limit=limit)
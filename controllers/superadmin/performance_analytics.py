@@ -8,11 +8,6 @@ from models.category import Category
 from common.database import db
 from models.review import Review
 from models.visit_tracking import VisitTracking
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
 
 class PerformanceAnalyticsController:
     @staticmethod
@@ -1,5 +1,6 @@
 from models.product import Product
 from common.database import db
+from common.pagination import keyset_paginate
 
 class ProductController:
     @staticmethod
@@ -9,4 +10,18 @@ class ProductController:
         Returns:
             List[Product]: List of all active products
         """
-        return Product.query.filter_by(deleted_at=None).all() 
\ No newline at end of file
+        return Product.query.filter_by(deleted_at=None).all()
+
+    @staticmethod
+    def list_page(keyset):
+        """
+        Get one keyset-paginated page of active products, newest first.
+        Args:
+            keyset (dict): Cursor arguments from common.pagination.get_keyset_args
+        Returns:
+            dict: keyset_paginate result with Product items
+        """
+        return keyset_paginate(
+            Product.query.filter_by(deleted_at=None), None, Product.product_id, keyset['per_page'],
+            cursor=keyset['cursor'], total=keyset['total']
+        )
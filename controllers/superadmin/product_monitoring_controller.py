@@ -7,6 +7,7 @@ from models.brand import Brand
 from models.category import Category
 from sqlalchemy.orm import joinedload
 from sqlalchemy import and_
+from services.product_detail_service import ProductDetailService
 
 class ProductMonitoringController:
     @staticmethod
@@ -84,6 +85,7 @@ class ProductMonitoringController:
             variant.rejection_reason = None
 
         db.session.commit()
+        ProductDetailService.invalidate_products(product.product_id, *(v.product_id for v in variants))
         return product
 
     @staticmethod
@@ -113,6 +115,7 @@ class ProductMonitoringController:
             variant.rejection_reason = reason.strip()
 
         db.session.commit()
+        ProductDetailService.invalidate_products(product.product_id, *(v.product_id for v in variants))
         return product
 
     @staticmethod
@@ -1,3 +1,5 @@
+from flask import current_app
+from common.connections import pool_metrics
 from common.database import db
 from models.system_monitoring import SystemMonitoring
 from datetime import datetime, timezone, timedelta
@@ -331,4 +333,21 @@ class SystemMonitoringController:
                 }
             }
         except Exception as e:
-            return {'status': 'error', 'message': str(e)} 
\ No newline at end of file
+            return {'status': 'error', 'message': str(e)} 
+
+    @staticmethod
+    def get_pool_metrics():
+        """Get database and Redis connection pool state for the worker serving the request"""
+        try:
+            metrics = pool_metrics()
+            engine_options = current_app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+            metrics['configured'] = {
+                'db_pool_size': engine_options.get('pool_size'),
+                'db_max_overflow': engine_options.get('max_overflow'),
+                'db_pool_timeout': engine_options.get('pool_timeout'),
+                'db_pool_recycle': engine_options.get('pool_recycle'),
+                'redis_max_connections': current_app.config.get('REDIS_MAX_CONNECTIONS')
+            }
+            return {'status': 'success', 'data': metrics}
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}
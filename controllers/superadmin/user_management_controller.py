@@ -4,6 +4,7 @@ from common.database import db
 from datetime import datetime
 from sqlalchemy import or_
 from sqlalchemy.exc import SQLAlchemyError
+from common.pagination import get_keyset_args, keyset_paginate, keyset_meta
 
 def get_all_users():
     try:
@@ -37,8 +38,22 @@ def get_all_users():
                     'message': 'Invalid role filter'
                 }), 400
         
-        # Execute query
-        users = query.all()
+        # Execute query; `cursor` switches to keyset pagination over users.id
+        try:
+            keyset = get_keyset_args(request.args)
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 400
+        
+        page = None
+        if keyset:
+            page = keyset_paginate(query, None, User.id, keyset['per_page'],
+                                   cursor=keyset['cursor'], total=keyset['total'])
+            users = page['items']
+        else:
+            users = query.all()
         
         # Format response
         user_list = []
@@ -59,10 +74,13 @@ def get_all_users():
             }
             user_list.append(user_data)
         
-        return jsonify({
+        response = {
             'status': 'success',
             'data': user_list
-        }), 200
+        }
+        if page:
+            response['pagination'] = keyset_meta(page)
+        return jsonify(response), 200
         
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -9,6 +9,8 @@ from sqlalchemy import desc, asc
 import datetime
 import cloudinary
 import cloudinary.uploader
+from services.signed_upload_service import SignedUploadService, SignedUploadError
+from services.support_inbox_service import SupportInboxService
 
 
 def _upload_to_cloudinary(file_to_upload, folder_name="support_attachments"):
@@ -57,8 +59,15 @@ class UserSupportTicketController:
         except ValueError:
             raise BadRequest(f"Invalid priority value. Choose from: {[p.value for p in TicketPriority]}")
 
+        image_asset_token = data.get('image_asset_token')
         image_url = None
-        if image_file:
+        if image_asset_token:
+            # Uploaded directly through /api/upload/signed
+            try:
+                image_url = SignedUploadService.redeem(image_asset_token, 'support_attachment', creator_user_id)['secure_url']
+            except SignedUploadError as e:
+                raise BadRequest(str(e))
+        elif image_file:
             try:
                 image_url = _upload_to_cloudinary(image_file, "user_support_tickets")
             except Exception as e:
@@ -131,9 +140,9 @@ class UserSupportTicketController:
                 sort_field = getattr(SupportTicket, sort_field_name)
                 query = query.order_by(sort_order_func(sort_field))
             else: # Default sort
-                query = query.order_by(desc(SupportTicket.updated_at))
+                query = query.order_by(desc(SupportTicket.last_activity_at))
         else: # Default sort if not specified
-            query = query.order_by(desc(SupportTicket.updated_at))
+            query = query.order_by(desc(SupportTicket.last_activity_at))
             
         paginated_tickets = query.paginate(page=page, per_page=per_page, error_out=False)
         return paginated_tickets
@@ -143,10 +152,18 @@ class UserSupportTicketController:
         ticket = SupportTicket.query.filter_by(ticket_uid=ticket_uid, creator_user_id=creator_user_id).first()
         if not ticket:
             raise NotFound("Support ticket not found or you do not have permission to view it.")
+        SupportInboxService.mark_read(ticket, 'requester')
         return ticket
 
     @staticmethod
-    def add_message_to_ticket_by_user(ticket_uid, creator_user_id, message_text, attachment_file=None):
+    def get_user_ticket_messages(ticket_uid, creator_user_id, before_id=None, limit=None):
+        ticket = SupportTicket.query.filter_by(ticket_uid=ticket_uid, creator_user_id=creator_user_id).first()
+        if not ticket:
+            raise NotFound("Support ticket not found or you do not have permission to view it.")
+        return SupportInboxService.paginate_messages(ticket, before_id=before_id, limit=limit)
+
+    @staticmethod
+    def add_message_to_ticket_by_user(ticket_uid, creator_user_id, message_text, attachment_file=None, attachment_asset_token=None):
         ticket = SupportTicket.query.filter_by(ticket_uid=ticket_uid, creator_user_id=creator_user_id).first()
         if not ticket:
             raise NotFound("Support ticket not found or you do not have permission to add a message.")
@@ -154,11 +171,17 @@ class UserSupportTicketController:
         if ticket.status == TicketStatus.CLOSED.value:
             raise BadRequest("Cannot add messages to a closed ticket.")
         
-        if not message_text and not attachment_file:
+        if not message_text and not attachment_file and not attachment_asset_token:
             raise BadRequest("Message text or an attachment is required.")
 
         attachment_url = None
-        if attachment_file:
+        if attachment_asset_token:
+            # Uploaded directly through /api/upload/signed
+            try:
+                attachment_url = SignedUploadService.redeem(attachment_asset_token, 'support_attachment', creator_user_id)['secure_url']
+            except SignedUploadError as e:
+                raise BadRequest(str(e))
+        elif attachment_file:
             try:
                 attachment_url = _upload_to_cloudinary(attachment_file, "user_support_attachments")
             except Exception as e:
@@ -4,6 +4,9 @@ from models.wishlist_item import WishlistItem
 from models.product import Product
 from models.product_stock import ProductStock
 from models.product_media import ProductMedia
+from models.wishlist_alert import WishlistNotification
+from services.wishlist_alert_service import WishlistAlertService
+from common.pagination import get_keyset_args, keyset_paginate, keyset_meta
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timezone
 
@@ -146,4 +149,62 @@ class WishlistController:
             return jsonify({
                 'status': 'error',
                 'message': 'Failed to clear wishlist'
-            }), 500 
\ No newline at end of file
+            }), 500
+
+    @staticmethod
+    def get_notifications(user_id: int):
+        """Price drop and back-in-stock alerts for the user's wishlisted products, newest first"""
+        # Always cursor paginated: no cursor argument means the first page
+        args = request.args.copy()
+        args.setdefault('cursor', '')
+        try:
+            keyset = get_keyset_args(args, default_per_page=20)
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 400
+
+        unread_only = request.args.get('unread', 'false').lower() == 'true'
+        page = keyset_paginate(
+            WishlistAlertService.notifications_query(user_id, unread_only=unread_only),
+            None, WishlistNotification.notification_id, keyset['per_page'],
+            cursor=keyset['cursor'], total=keyset['total']
+        )
+
+        return jsonify({
+            'status': 'success',
+            'data': [notification.serialize() for notification in page['items']],
+            'unread_count': WishlistAlertService.unread_count(user_id),
+            'pagination': keyset_meta(page)
+        })
+
+    @staticmethod
+    def mark_notifications_read(user_id: int):
+        """Mark the given notification_ids, or all of the user's notifications, as read"""
+        data = request.get_json(silent=True) or {}
+        notification_ids = data.get('notification_ids')
+
+        if notification_ids is not None and (
+            not isinstance(notification_ids, list) or not all(isinstance(i, int) for i in notification_ids)
+        ):
+            return jsonify({
+                'status': 'error',
+                'message': 'notification_ids must be a list of integers'
+            }), 400
+
+        try:
+            updated = WishlistAlertService.mark_read(user_id, notification_ids)
+            return jsonify({
+                'status': 'success',
+                'data': {
+                    'marked_read': updated,
+                    'unread_count': WishlistAlertService.unread_count(user_id)
+                }
+            })
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({
+                'status': 'error',
+                'message': 'Failed to update notifications'
+            }), 500
@@ -46,7 +46,7 @@ from models.subscription import SubscriptionPlan
 
 from models.gst_rule import GSTRule
 
-from models.merchant_transaction import MerchantTransaction
+from models.merchant_transaction import MerchantTransaction, MerchantPayableBalance
 
 # --- Merchant models ---
 from models.product import Product
@@ -58,9 +58,11 @@ from models.product_stock import ProductStock
 from models.review import Review
 from models.product_attribute import ProductAttribute
 from models.recently_viewed import RecentlyViewed
+from models.product_import_job import ProductImportJob
 
 # --- Shop models ---
 from models.shop.shop import Shop
+from models.shop.shop_product_variant import ShopProductVariant
 
 # --- Live Streaming models ---
 from models.live_stream import LiveStream, LiveStreamComment, LiveStreamViewer, StreamStatus
@@ -74,6 +76,15 @@ from models.system_monitoring import SystemMonitoring
 
 # --- Newsletter models ---
 from models.newsletter_subscription import NewsletterSubscription
+from models.newsletter_campaign import NewsletterCampaign, NewsletterDelivery
+
+# --- Support models ---
+from models.support_ticket_model import SupportTicket, SupportTicketMessage, SupportTicketCounter
+
+# --- Wishlist models ---
+from models.wishlist_item import WishlistItem
+from models.shop.shop_wishlist import ShopWishlistItem
+from models.wishlist_alert import WishlistPriceWatch, WishlistNotification
 
 
 # Load environment variables
@@ -476,6 +487,393 @@ def migrate_profile_img_column():
     else:
         print("✗ users table does not exist")
 
+def migrate_variant_combination_hash():
+    """Add the indexed combination_hash column to shop_product_variants and backfill it."""
+    print("\nMigrating variant combination_hash column:")
+    print("-------------------------------------------")
+    
+    inspector = db.inspect(db.engine)
+    
+    if 'shop_product_variants' not in inspector.get_table_names():
+        print("✗ shop_product_variants table does not exist")
+        return
+    
+    existing_columns = [col['name'] for col in inspector.get_columns('shop_product_variants')]
+    existing_indexes = [idx['name'] for idx in inspector.get_indexes('shop_product_variants')]
+    
+    try:
+        with db.engine.connect() as conn:
+            if 'combination_hash' not in existing_columns:
+                print("Adding combination_hash column to shop_product_variants table...")
+                conn.execute(text("ALTER TABLE shop_product_variants ADD COLUMN combination_hash VARCHAR(64) NULL"))
+            if 'idx_parent_combination_hash' not in existing_indexes:
+                conn.execute(text(
+                    "CREATE INDEX idx_parent_combination_hash ON shop_product_variants (parent_product_id, combination_hash)"
+                ))
+            if 'idx_attribute_combination' in existing_indexes:
+                conn.execute(text("DROP INDEX idx_attribute_combination ON shop_product_variants"))
+            conn.commit()
+        print("✓ combination_hash column and index in place")
+    except Exception as e:
+        print(f"✗ Failed to migrate combination_hash column: {str(e)}")
+        return
+    
+    variants = ShopProductVariant.query.filter(ShopProductVariant.combination_hash.is_(None)).all()
+    for variant in variants:
+        variant.combination_hash = ShopProductVariant.compute_combination_hash(variant.attribute_combination)
+    db.session.commit()
+    print(f"✓ Backfilled combination_hash for {len(variants)} variants")
+
+def migrate_merchant_transaction_indexes():
+    """Add settlement indexes to merchant_transactions and backfill merchant payable balances."""
+    print("\nMigrating merchant settlement indexes and balances:")
+    print("--------------------------------------------------")
+    
+    inspector = db.inspect(db.engine)
+    
+    if 'merchant_transactions' not in inspector.get_table_names():
+        print("✗ merchant_transactions table does not exist")
+        return
+    
+    existing_indexes = [idx['name'] for idx in inspector.get_indexes('merchant_transactions')]
+    indexes = {
+        'idx_merchant_txn_merchant_status_settlement': '(merchant_id, payment_status, settlement_date)',
+        'idx_merchant_txn_settlement_status': '(settlement_date, payment_status)',
+        'idx_merchant_txn_order_merchant': '(order_id, merchant_id)'
+    }
+    
+    try:
+        with db.engine.connect() as conn:
+            for name, columns in indexes.items():
+                if name not in existing_indexes:
+                    conn.execute(text(f"CREATE INDEX {name} ON merchant_transactions {columns}"))
+            conn.commit()
+        print("✓ merchant_transactions indexes in place")
+    except Exception as e:
+        print(f"✗ Failed to create merchant_transactions indexes: {str(e)}")
+        return
+    
+    if MerchantPayableBalance.query.first() is None:
+        from controllers.merchant_transaction_controller import rebuild_merchant_balances
+        count = rebuild_merchant_balances()
+        print(f"✓ Backfilled payable balances for {count} merchants")
+    else:
+        print("✓ Merchant payable balances already populated")
+
+def migrate_keyset_pagination_indexes():
+    """Add the (sort_key, primary key) indexes used by cursor-paginated listings."""
+    print("\nMigrating keyset pagination indexes:")
+    print("------------------------------------")
+    
+    inspector = db.inspect(db.engine)
+    table_names = inspector.get_table_names()
+    indexes = {
+        'orders': {'idx_orders_order_date_id': '(order_date, order_id)'},
+        'products': {'idx_products_merchant_created_id': '(merchant_id, created_at, product_id)'},
+        'reviews': {'idx_reviews_created_id': '(created_at, review_id)'}
+    }
+    
+    try:
+        with db.engine.connect() as conn:
+            for table, table_indexes in indexes.items():
+                if table not in table_names:
+                    print(f"✗ {table} table does not exist")
+                    continue
+                existing_indexes = [idx['name'] for idx in inspector.get_indexes(table)]
+                for name, columns in table_indexes.items():
+                    if name not in existing_indexes:
+                        conn.execute(text(f"CREATE INDEX {name} ON {table} {columns}"))
+                        print(f"✓ Created {name} on {table}")
+            conn.commit()
+    except Exception as e:
+        print(f"✗ Failed to create keyset pagination indexes: {str(e)}")
+
+def migrate_recently_viewed_indexes():
+    """Add the per-user indexes used by the recently viewed flusher and its fallback reads."""
+    print("\nMigrating recently viewed indexes:")
+    print("----------------------------------")
+    
+    inspector = db.inspect(db.engine)
+    if 'recently_viewed' not in inspector.get_table_names():
+        print("✗ recently_viewed table does not exist")
+        return
+    
+    indexes = {
+        'idx_recently_viewed_user_product': '(user_id, product_id)',
+        'idx_recently_viewed_user_viewed': '(user_id, viewed_at)'
+    }
+    existing_indexes = [idx['name'] for idx in inspector.get_indexes('recently_viewed')]
+    try:
+        with db.engine.connect() as conn:
+            for name, columns in indexes.items():
+                if name not in existing_indexes:
+                    conn.execute(text(f"CREATE INDEX {name} ON recently_viewed {columns}"))
+                    print(f"✓ Created {name}")
+            conn.commit()
+    except Exception as e:
+        print(f"✗ Failed to create recently viewed indexes: {str(e)}")
+
+def migrate_effective_price_columns():
+    """Add the materialized effective price columns and their indexes, then backfill them."""
+    print("\nMigrating effective price columns:")
+    print("----------------------------------")
+    
+    inspector = db.inspect(db.engine)
+    table_names = inspector.get_table_names()
+    indexes = {
+        'products': {
+            'idx_products_category_effective_price': '(category_id, effective_price)',
+            'idx_products_brand_effective_price': '(brand_id, effective_price)'
+        },
+        'shop_products': {
+            'idx_shop_products_shop_effective_price': '(shop_id, effective_price)',
+            'idx_shop_products_category_effective_price': '(shop_id, category_id, effective_price)',
+            'idx_shop_products_brand_effective_price': '(shop_id, brand_id, effective_price)'
+        }
+    }
+    
+    try:
+        with db.engine.connect() as conn:
+            for table, table_indexes in indexes.items():
+                if table not in table_names:
+                    print(f"✗ {table} table does not exist")
+                    continue
+                existing_columns = [col['name'] for col in inspector.get_columns(table)]
+                if 'effective_price' not in existing_columns:
+                    print(f"Adding effective_price column to {table} table...")
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN effective_price DECIMAL(10,2) NULL"))
+                if 'effective_discount_pct' not in existing_columns:
+                    print(f"Adding effective_discount_pct column to {table} table...")
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN effective_discount_pct DECIMAL(5,2) NULL"))
+                existing_indexes = [idx['name'] for idx in inspector.get_indexes(table)]
+                for name, columns in table_indexes.items():
+                    if name not in existing_indexes:
+                        conn.execute(text(f"CREATE INDEX {name} ON {table} {columns}"))
+                        print(f"✓ Created {name} on {table}")
+            conn.commit()
+    except Exception as e:
+        print(f"✗ Failed to migrate effective price columns: {str(e)}")
+        return
+    
+    from services.effective_price_service import EffectivePriceService
+    result = EffectivePriceService.refresh_all()
+    print(f"✓ Backfilled effective prices for {result['products']} products and {result['shop_products']} shop products")
+
+def migrate_hot_predicate_indexes():
+    """Add the composite indexes recommended by index_advisor.py for the hottest filters."""
+    print("\nMigrating hot predicate indexes:")
+    print("--------------------------------")
+    
+    inspector = db.inspect(db.engine)
+    table_names = inspector.get_table_names()
+    indexes = {
+        'products': {'idx_products_listing': '(approval_status, active_flag, deleted_at, parent_product_id, category_id)'},
+        'reviews': {'idx_reviews_product_deleted': '(product_id, deleted_at)'},
+        'product_media': {'idx_product_media_product_sort': '(product_id, deleted_at, sort_order)'},
+        'carts': {'idx_carts_user': '(user_id)'},
+        'cart_items': {'idx_cart_items_cart_deleted': '(cart_id, is_deleted)'},
+        'shop_products': {'idx_shop_products_listing': '(shop_id, is_published, active_flag, parent_product_id)'},
+        'orders': {'idx_orders_status_date': '(order_status, order_date)'},
+        'order_items': {'idx_order_items_product': '(product_id)'},
+        'users': {'idx_users_role_active_created': '(role, is_active, created_at)'}
+    }
+    
+    try:
+        with db.engine.connect() as conn:
+            for table, table_indexes in indexes.items():
+                if table not in table_names:
+                    print(f"✗ {table} table does not exist")
+                    continue
+                existing_indexes = [idx['name'] for idx in inspector.get_indexes(table)]
+                for name, columns in table_indexes.items():
+                    if name not in existing_indexes:
+                        conn.execute(text(f"CREATE INDEX {name} ON {table} {columns}"))
+                        print(f"✓ Created {name} on {table}")
+            conn.commit()
+    except Exception as e:
+        print(f"✗ Failed to create hot predicate indexes: {str(e)}")
+
+def migrate_order_item_thumbnails(batch_size=10000):
+    """Add the product_image_url column to order_items and backfill it from product media."""
+    print("\nMigrating order item thumbnails:")
+    print("--------------------------------")
+    
+    inspector = db.inspect(db.engine)
+    if 'order_items' not in inspector.get_table_names():
+        print("✗ order_items table does not exist")
+        return
+    
+    try:
+        with db.engine.connect() as conn:
+            existing_columns = [col['name'] for col in inspector.get_columns('order_items')]
+            if 'product_image_url' not in existing_columns:
+                print("Adding product_image_url column to order_items table...")
+                conn.execute(text("ALTER TABLE order_items ADD COLUMN product_image_url VARCHAR(255) NULL"))
+                conn.commit()
+            
+            # Backfill in primary key ranges so each UPDATE stays short on large tables
+            max_id = conn.execute(text("SELECT MAX(order_item_id) FROM order_items")).scalar() or 0
+            updated = 0
+            for start in range(0, max_id + 1, batch_size):
+                result = conn.execute(text("""
+                    UPDATE order_items SET product_image_url = (
+                        SELECT pm.url FROM product_media pm
+                        WHERE pm.product_id = order_items.product_id
+                          AND pm.type = 'IMAGE' AND pm.deleted_at IS NULL
+                        ORDER BY pm.sort_order, pm.media_id
+                        LIMIT 1
+                    )
+                    WHERE order_item_id >= :start AND order_item_id < :end
+                      AND product_image_url IS NULL AND product_id IS NOT NULL
+                """), {'start': start, 'end': start + batch_size})
+                conn.commit()
+                updated += result.rowcount or 0
+        print(f"✓ Backfilled thumbnails for {updated} order items")
+    except Exception as e:
+        print(f"✗ Failed to migrate order item thumbnails: {str(e)}")
+
+def migrate_media_manifests(batch_size=1000):
+    """Add the media_manifest columns to products and shop_products and build missing manifests."""
+    print("\nMigrating media manifests:")
+    print("--------------------------")
+    
+    from models.product import Product
+    from models.shop.shop_product import ShopProduct
+    from services.media_manifest_service import MediaManifestService
+    
+    inspector = db.inspect(db.engine)
+    table_names = inspector.get_table_names()
+    for model in (Product, ShopProduct):
+        table = model.__tablename__
+        if table not in table_names:
+            print(f"✗ {table} table does not exist")
+            continue
+        try:
+            existing_columns = [col['name'] for col in inspector.get_columns(table)]
+            if 'media_manifest' not in existing_columns:
+                print(f"Adding media_manifest column to {table} table...")
+                with db.engine.connect() as conn:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN media_manifest JSON NULL"))
+                    conn.commit()
+            
+            # Build in primary key order, one commit per batch
+            built = 0
+            last_id = 0
+            while True:
+                product_ids = [pid for (pid,) in db.session.query(model.product_id).filter(
+                    model.product_id > last_id,
+                    model.media_manifest.is_(None)
+                ).order_by(model.product_id).limit(batch_size).all()]
+                if not product_ids:
+                    break
+                built += MediaManifestService.refresh(model, product_ids)
+                db.session.commit()
+                last_id = product_ids[-1]
+            print(f"✓ Built media manifests for {built} {table}")
+        except Exception as e:
+            db.session.rollback()
+            print(f"✗ Failed to migrate media manifests for {table}: {str(e)}")
+
+def migrate_support_inbox():
+    """Add the support inbox columns and indexes, backfill them from messages and rebuild the counters."""
+    print("\nMigrating support inbox:")
+    print("------------------------")
+    
+    inspector = db.inspect(db.engine)
+    table_names = inspector.get_table_names()
+    if 'support_tickets' not in table_names or 'support_ticket_messages' not in table_names:
+        print("✗ support_tickets table does not exist")
+        return
+    columns = {
+        'last_activity_at': 'DATETIME NULL',
+        'message_count': 'INTEGER NOT NULL DEFAULT 0',
+        'last_message_at': 'DATETIME NULL',
+        'admin_unread_count': 'INTEGER NOT NULL DEFAULT 0',
+        'requester_unread_count': 'INTEGER NOT NULL DEFAULT 0'
+    }
+    indexes = {
+        'support_tickets': {
+            'ix_support_tickets_last_activity_at': '(last_activity_at)',
+            'idx_support_tickets_status_activity': '(status, last_activity_at)',
+            'idx_support_tickets_assignee_activity': '(assigned_to_admin_id, last_activity_at)',
+            'idx_support_tickets_creator_activity': '(creator_user_id, last_activity_at)',
+            'idx_support_tickets_merchant_activity': '(merchant_id, last_activity_at)'
+        },
+        'support_ticket_messages': {
+            'idx_support_ticket_messages_ticket_id_id': '(ticket_id, id)'
+        }
+    }
+    
+    try:
+        with db.engine.connect() as conn:
+            existing_columns = [col['name'] for col in inspector.get_columns('support_tickets')]
+            for name, definition in columns.items():
+                if name not in existing_columns:
+                    print(f"Adding {name} column to support_tickets table...")
+                    conn.execute(text(f"ALTER TABLE support_tickets ADD COLUMN {name} {definition}"))
+            for table, table_indexes in indexes.items():
+                existing_indexes = [idx['name'] for idx in inspector.get_indexes(table)]
+                for name, index_columns in table_indexes.items():
+                    if name not in existing_indexes:
+                        conn.execute(text(f"CREATE INDEX {name} ON {table} {index_columns}"))
+                        print(f"✓ Created {name} on {table}")
+            
+            # Thread size and last message from the messages; activity falls back to updated_at.
+            # Unread counts start at zero: existing threads are treated as read.
+            result = conn.execute(text("""
+                UPDATE support_tickets SET
+                    message_count = (SELECT COUNT(*) FROM support_ticket_messages m WHERE m.ticket_id = support_tickets.id),
+                    last_message_at = (SELECT MAX(m.created_at) FROM support_ticket_messages m WHERE m.ticket_id = support_tickets.id)
+                WHERE last_activity_at IS NULL
+            """))
+            conn.execute(text("""
+                UPDATE support_tickets SET last_activity_at = COALESCE(updated_at, last_message_at, created_at)
+                WHERE last_activity_at IS NULL
+            """))
+            conn.commit()
+        print(f"✓ Backfilled inbox fields for {result.rowcount or 0} support tickets")
+        
+        from services.support_inbox_service import SupportInboxService
+        buckets = SupportInboxService.rebuild_counters()
+        db.session.commit()
+        print(f"✓ Rebuilt {buckets} support inbox counters")
+    except Exception as e:
+        db.session.rollback()
+        print(f"✗ Failed to migrate support inbox: {str(e)}")
+
+def migrate_wishlist_alerts():
+    """Add the product -> wishlisting users indexes and start watching already wishlisted products."""
+    print("\nMigrating wishlist alerts:")
+    print("--------------------------")
+    
+    inspector = db.inspect(db.engine)
+    table_names = inspector.get_table_names()
+    indexes = {
+        'wishlist_items': {'idx_wishlist_items_product_user': '(product_id, is_deleted, user_id)'},
+        'shop_wishlist_items': {'idx_shop_wishlist_items_product_user': '(shop_product_id, is_deleted, user_id)'}
+    }
+    
+    try:
+        with db.engine.connect() as conn:
+            for table, table_indexes in indexes.items():
+                if table not in table_names:
+                    print(f"✗ {table} table does not exist")
+                    continue
+                existing_indexes = [idx['name'] for idx in inspector.get_indexes(table)]
+                for name, index_columns in table_indexes.items():
+                    if name not in existing_indexes:
+                        conn.execute(text(f"CREATE INDEX {name} ON {table} {index_columns}"))
+                        print(f"✓ Created {name} on {table}")
+            conn.commit()
+        
+        from services.wishlist_alert_service import WishlistAlertService
+        added = WishlistAlertService.seed_watches()
+        db.session.commit()
+        print(f"✓ Watching {added} more wishlisted products")
+    except Exception as e:
+        db.session.rollback()
+        print(f"✗ Failed to migrate wishlist alerts: {str(e)}")
+
 def init_database():
     """Initialize the database with all tables and initial data."""
     app = create_app()
@@ -493,6 +891,16 @@ def init_database():
         
         # Run migrations
         migrate_profile_img_column()
+        migrate_variant_combination_hash()
+        migrate_merchant_transaction_indexes()
+        migrate_keyset_pagination_indexes()
+        migrate_recently_viewed_indexes()
+        migrate_effective_price_columns()
+        migrate_order_item_thumbnails()
+        migrate_hot_predicate_indexes()
+        migrate_media_manifests()
+        migrate_support_inbox()
+        migrate_wishlist_alerts()
         
         # Initialize data
         init_country_configs()
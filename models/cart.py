@@ -4,12 +4,16 @@ from models.product import Product
 from models.product_stock import ProductStock
 from models.product_shipping import ProductShipping
 from models.product_media import ProductMedia
+from models.enums import MediaType
 from sqlalchemy.orm import foreign
 from decimal import Decimal
 import json
 
 class Cart(BaseModel):
     __tablename__ = 'carts'
+    __table_args__ = (
+        db.Index('idx_carts_user', 'user_id'),
+    )
 
     cart_id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -22,10 +26,12 @@ class Cart(BaseModel):
     user = db.relationship('User', back_populates='cart', overlaps="carts")
 
     def serialize(self):
+        live_items = [item for item in self.items if not item.is_deleted]
+        snapshots = CartItem.get_product_snapshots([item.product_id for item in live_items])
         return {
             'cart_id': self.cart_id,
             'user_id': self.user_id,
-            'items': [item.serialize() for item in self.items if not item.is_deleted],
+            'items': [item.serialize(snapshots.get(item.product_id)) for item in live_items],
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'is_deleted': self.is_deleted
@@ -33,6 +39,9 @@ class Cart(BaseModel):
 
 class CartItem(BaseModel):
     __tablename__ = 'cart_items'
+    __table_args__ = (
+        db.Index('idx_cart_items_cart_deleted', 'cart_id', 'is_deleted'),
+    )
 
     cart_item_id = db.Column(db.Integer, primary_key=True)
     cart_id = db.Column(db.Integer, db.ForeignKey('carts.cart_id'), nullable=False)
@@ -83,7 +92,12 @@ class CartItem(BaseModel):
     def create_from_product(cls, cart_id, product, quantity, selected_attributes=None):
         """Create a cart item from a product, storing all relevant details"""
         # Get the first product image
-        main_image = next((media.url for media in product.media if media.type.value == 'image'), None) if product.media else None
+        main_image = ProductMedia.query.with_entities(ProductMedia.url).filter(
+            ProductMedia.product_id == product.product_id,
+            ProductMedia.type == MediaType.IMAGE,
+            ProductMedia.deleted_at.is_(None)
+        ).order_by(ProductMedia.sort_order).first()
+        main_image = main_image.url if main_image else None
         
         # Get stock quantity
         stock = ProductStock.query.filter_by(product_id=product.product_id).first()
@@ -92,8 +106,8 @@ class CartItem(BaseModel):
         # Get shipping details
         shipping = ProductShipping.query.filter_by(product_id=product.product_id).first()
         
-        # Get the product data with proper price calculations (including special price logic)
-        product_data = product.serialize()
+        # Backend-calculated price (special price logic) without serializing the whole product graph
+        current_price, _ = product.get_current_listed_inclusive_price()
         
         return cls(
             cart_id=cart_id,
@@ -101,7 +115,7 @@ class CartItem(BaseModel):
             quantity=quantity,
             product_name=product.product_name,
             product_sku=product.sku,
-            product_price=product_data.get('price', product.selling_price),  # Use backend-calculated price
+            product_price=current_price,  # Use backend-calculated price
             product_discount_pct=product.discount_pct,
             product_special_price=product.special_price,
             product_image_url=main_image,
@@ -123,17 +137,64 @@ class CartItem(BaseModel):
                 return {}
         return {}
 
-    def serialize(self):
+    @staticmethod
+    def get_product_snapshots(product_ids):
+        """
+        Load a compact price/stock snapshot for the given products in a single query.
+        Returns a dict keyed by product_id; products that no longer exist are omitted.
+        """
+        product_ids = {pid for pid in product_ids if pid is not None}
+        if not product_ids:
+            return {}
+
+        rows = db.session.query(
+            Product.product_id,
+            Product.selling_price,
+            Product.special_price,
+            Product.special_start,
+            Product.special_end,
+            Product.active_flag,
+            Product.deleted_at,
+            ProductStock.stock_qty
+        ).outerjoin(
+            ProductStock, ProductStock.product_id == Product.product_id
+        ).filter(
+            Product.product_id.in_(product_ids)
+        ).all()
+
+        snapshots = {}
+        for row in rows:
+            price, is_on_special = Product.resolve_listed_price(
+                row.selling_price, row.special_price, row.special_start, row.special_end
+            )
+            snapshots[row.product_id] = {
+                'price': price,
+                'selling_price': row.selling_price,
+                'is_on_special': is_on_special,
+                'stock_qty': row.stock_qty or 0,
+                'is_deleted': row.deleted_at is not None,
+                'is_available': bool(row.active_flag) and row.deleted_at is None
+            }
+        return snapshots
+
+    def serialize(self, snapshot=None):
+        """
+        Serialize the cart item. `snapshot` is this item's entry from get_product_snapshots();
+        when omitted a snapshot is loaded for this item alone.
+        """
+        if snapshot is None:
+            snapshot = CartItem.get_product_snapshots([self.product_id]).get(self.product_id)
+
         # Calculate original price for savings calculation
-        # If there's a special price active, original price is the selling price
-        # Otherwise, use cost_price as fallback if available through product relationship
+        # While the special window is still open, the original price is the product's current selling price;
+        # an expired special falls back to the stored price so no strike-through is shown
         original_price = self.product_price  # Default fallback
-        if self.product_special_price and self.product_special_price < self.product_price:
-            # If we have special price and it's less than stored price, 
-            # it means stored price is already the special price, so get original from product
-            if self.product:
-                product_data = self.product.serialize()
-                original_price = product_data.get('originalPrice', self.product.selling_price)
+        if self.product_special_price and snapshot and snapshot['is_on_special']:
+            original_price = snapshot['selling_price']
+
+        # Price drift: the live listed price no longer matches the price stored when the item was added
+        current_price = snapshot['price'] if snapshot else self.product_price
+        price_changed = Decimal(str(current_price)) != Decimal(str(self.product_price))
         
         return {
             'cart_item_id': self.cart_item_id,
@@ -151,7 +212,11 @@ class CartItem(BaseModel):
                 'special_price': float(self.product_special_price) if self.product_special_price else None,
                 'image_url': self.product_image_url,
                 'stock': self.product_stock_qty,
-                'is_deleted': False,
+                'current_price': float(current_price),
+                'price_changed': price_changed,
+                'current_stock': snapshot['stock_qty'] if snapshot else 0,
+                'is_available': snapshot['is_available'] if snapshot else False,
+                'is_deleted': snapshot['is_deleted'] if snapshot else True,
                 'shipping': {
                     'weight_kg': str(self.shipping_weight_kg) if self.shipping_weight_kg else None,
                     'dimensions': {
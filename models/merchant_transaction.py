@@ -5,6 +5,11 @@ from auth.models.models import MerchantProfile
 
 class MerchantTransaction(BaseModel):
     __tablename__ = 'merchant_transactions'
+    __table_args__ = (
+        db.Index('idx_merchant_txn_merchant_status_settlement', 'merchant_id', 'payment_status', 'settlement_date'),
+        db.Index('idx_merchant_txn_settlement_status', 'settlement_date', 'payment_status'),
+        db.Index('idx_merchant_txn_order_merchant', 'order_id', 'merchant_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     
@@ -44,3 +49,31 @@ class MerchantTransaction(BaseModel):
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat()
         }
+
+
+class MerchantPayableBalance(BaseModel):
+    """
+    Materialized running totals of what each merchant is owed and has been paid.
+
+    Kept in step with merchant_transactions by the transaction controller whenever a
+    transaction is created or marked as paid, so balance lookups are a primary-key read.
+    """
+    __tablename__ = 'merchant_payable_balances'
+
+    merchant_id = db.Column(db.Integer, db.ForeignKey('merchant_profiles.id'), primary_key=True)
+    pending_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    paid_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    pending_count = db.Column(db.Integer, nullable=False, default=0)
+    paid_count = db.Column(db.Integer, nullable=False, default=0)
+
+    merchant = db.relationship('MerchantProfile', backref=db.backref('payable_balance', uselist=False))
+
+    def serialize(self):
+        return {
+            "merchant_id": self.merchant_id,
+            "pending_amount": float(self.pending_amount or 0),
+            "paid_amount": float(self.paid_amount or 0),
+            "pending_count": self.pending_count or 0,
+            "paid_count": self.paid_count or 0,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,100 @@
+from datetime import datetime, timezone
+from common.database import db, BaseModel
+
+
+class NewsletterCampaign(BaseModel):
+    """
+    One newsletter broadcast to the subscribers in newsletter_subscriptions
+    (services/newsletter_broadcast_service.py). Recipients are snapshotted into
+    newsletter_deliveries in subscriber id order; last_subscriber_id and the per-recipient
+    delivery status let an interrupted or paused campaign carry on where it stopped.
+    """
+    __tablename__ = 'newsletter_campaigns'
+
+    STATUS_DRAFT = 'draft'
+    STATUS_QUEUED = 'queued'
+    STATUS_SENDING = 'sending'
+    STATUS_PAUSED = 'paused'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+
+    campaign_id        = db.Column(db.Integer, primary_key=True)
+    subject            = db.Column(db.String(255), nullable=False)
+    heading            = db.Column(db.String(255), nullable=True)
+    body_html          = db.Column(db.Text, nullable=False)  # Jinja template, rendered once per campaign
+    status             = db.Column(db.String(20), default=STATUS_DRAFT, nullable=False, index=True)
+    created_by         = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    # Audience snapshot: subscribers up to audience_max_id, enqueued up to last_subscriber_id
+    audience_max_id    = db.Column(db.Integer, nullable=True)
+    last_subscriber_id = db.Column(db.Integer, default=0, nullable=False)
+    total_recipients   = db.Column(db.Integer, default=0, nullable=False)
+    sent_count         = db.Column(db.Integer, default=0, nullable=False)
+    failed_count       = db.Column(db.Integer, default=0, nullable=False)
+    # The worker holding run_token owns the campaign; it refreshes heartbeat_at after every chunk
+    run_token          = db.Column(db.String(32), nullable=True)
+    heartbeat_at       = db.Column(db.DateTime, nullable=True)
+    error_message      = db.Column(db.Text, nullable=True)
+    started_at         = db.Column(db.DateTime, nullable=True)
+    finished_at        = db.Column(db.DateTime, nullable=True)
+
+    deliveries = db.relationship('NewsletterDelivery', backref='campaign', lazy='dynamic', cascade='all, delete-orphan')
+
+    @property
+    def is_active(self):
+        return self.status in (self.STATUS_QUEUED, self.STATUS_SENDING)
+
+    def serialize(self, include_body=False):
+        data = {
+            "campaign_id": self.campaign_id,
+            "subject": self.subject,
+            "heading": self.heading,
+            "status": self.status,
+            "progress": {
+                "total": self.total_recipients,
+                "sent": self.sent_count,
+                "failed": self.failed_count,
+                "pending": max(self.total_recipients - self.sent_count - self.failed_count, 0)
+            },
+            "error_message": self.error_message,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "heartbeat_at": self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+        if include_body:
+            data["body_html"] = self.body_html
+        return data
+
+
+class NewsletterDelivery(db.Model):
+    """Delivery state of one campaign to one subscriber; written in bulk per chunk"""
+    __tablename__ = 'newsletter_deliveries'
+    __table_args__ = (
+        db.UniqueConstraint('campaign_id', 'subscription_id', name='uq_newsletter_delivery_campaign_subscription'),
+        # The sender walks a campaign's pending rows in delivery_id order
+        db.Index('idx_newsletter_deliveries_campaign_status', 'campaign_id', 'status', 'delivery_id'),
+    )
+
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+
+    delivery_id     = db.Column(db.Integer, primary_key=True)
+    campaign_id     = db.Column(db.Integer, db.ForeignKey('newsletter_campaigns.campaign_id', ondelete='CASCADE'), nullable=False)
+    subscription_id = db.Column(db.Integer, db.ForeignKey('newsletter_subscriptions.id', ondelete='SET NULL'), nullable=True)
+    email           = db.Column(db.String(255), nullable=False)
+    status          = db.Column(db.String(10), default=STATUS_PENDING, nullable=False)
+    attempts        = db.Column(db.Integer, default=0, nullable=False)
+    error           = db.Column(db.String(500), nullable=True)
+    created_at      = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    sent_at         = db.Column(db.DateTime, nullable=True)
+
+    def serialize(self):
+        return {
+            "delivery_id": self.delivery_id,
+            "email": self.email,
+            "status": self.status,
+            "attempts": self.attempts,
+            "error": self.error,
+            "sent_at": self.sent_at.isoformat() if self.sent_at else None
+        }
@@ -13,6 +13,12 @@ def generate_order_id_string():
 
 class Order(BaseModel):
     __tablename__ = 'orders'
+    __table_args__ = (
+        # Keyset pagination of admin order listings seeks on (order_date, order_id)
+        db.Index('idx_orders_order_date_id', 'order_date', 'order_id'),
+        # Status dashboards and analytics count orders per status over a date range
+        db.Index('idx_orders_status_date', 'order_status', 'order_date'),
+    )
 
     order_id = db.Column(db.String(50), primary_key=True, default=generate_order_id_string)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True, index=True)
@@ -42,12 +48,25 @@ class Order(BaseModel):
 
     user = db.relationship('User',back_populates='orders')
     
-    items = db.relationship('OrderItem', back_populates='order', cascade='all, delete-orphan', lazy='joined', order_by='OrderItem.order_item_id')
+    # Read paths pick their own loader strategy (see Order.list_load_options)
+    items = db.relationship('OrderItem', back_populates='order', cascade='all, delete-orphan', lazy='select', order_by='OrderItem.order_item_id')
     status_history = db.relationship('OrderStatusHistory', back_populates='order', cascade='all, delete-orphan', lazy='dynamic', order_by='OrderStatusHistory.changed_at.desc()')
     shipments = db.relationship('Shipment', back_populates='order', cascade='all, delete-orphan', lazy='dynamic')
     
-    shipping_address_obj = db.relationship('UserAddress', foreign_keys=[shipping_address_id], lazy='joined')
-    billing_address_obj = db.relationship('UserAddress', foreign_keys=[billing_address_id], lazy='joined')
+    shipping_address_obj = db.relationship('UserAddress', foreign_keys=[shipping_address_id], lazy='select')
+    billing_address_obj = db.relationship('UserAddress', foreign_keys=[billing_address_id], lazy='select')
+
+    @staticmethod
+    def list_load_options():
+        """
+        Loader options for serializing pages of orders: items and both addresses are
+        fetched with one IN query each instead of being joined into the paged query.
+        """
+        return (
+            db.selectinload(Order.items),
+            db.selectinload(Order.shipping_address_obj),
+            db.selectinload(Order.billing_address_obj)
+        )
 
     def __repr__(self):
         return f"<Order id={self.order_id} user_id={self.user_id} status='{self.order_status.value}'>"
@@ -84,6 +103,10 @@ class Order(BaseModel):
 
 class OrderItem(BaseModel): 
     __tablename__ = 'order_items'
+    __table_args__ = (
+        # Sales per product (trending, analytics) and review purchase checks
+        db.Index('idx_order_items_product', 'product_id'),
+    )
 
     order_item_id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.String(50), db.ForeignKey('orders.order_id', ondelete='CASCADE'), nullable=False, index=True)
@@ -106,6 +129,9 @@ class OrderItem(BaseModel):
     # NEW: Store selected attributes as JSON
     selected_attributes = db.Column(db.Text, nullable=True)  # JSON string of selected attributes
 
+    # Thumbnail captured at purchase time so order listings never load the product's media
+    product_image_url = db.Column(db.String(255), nullable=True)
+
     item_status = db.Column(db.Enum(OrderItemStatusEnum), nullable=False, default=OrderItemStatusEnum.PENDING_FULFILLMENT)
     # created_at, updated_at from BaseModel
 
@@ -135,15 +161,6 @@ class OrderItem(BaseModel):
     def serialize(self):
         total_gst_for_line_item = (self.gst_amount_per_unit or Decimal(0)) * self.quantity
         
-        # Get product image
-        product_image = None
-        if self.product and hasattr(self.product, 'media') and self.product.media:
-            # Find the first image media, ordered by sort_order
-            from models.enums import MediaType
-            image_media = sorted([m for m in self.product.media if m.type == MediaType.IMAGE], key=lambda m: m.sort_order)
-            if image_media:
-                product_image = image_media[0].url
-        
         return {
             "order_item_id": self.order_item_id,
             "order_id": self.order_id,
@@ -170,7 +187,7 @@ class OrderItem(BaseModel):
             "item_subtotal_amount": str(self.line_item_total_inclusive_gst),
             "final_price_for_item": str(self.line_item_total_inclusive_gst),
             "selected_attributes": self.get_selected_attributes(),
-            "product_image": product_image,  # Add product image
+            "product_image": self.product_image_url,
 
             "item_status": self.item_status.value,
             "created_at": self.created_at.isoformat() if hasattr(self, 'created_at') and self.created_at else None,
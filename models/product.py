@@ -6,12 +6,22 @@ from models.category import Category
 from models.brand import Brand
 
 from decimal import Decimal
+from sqlalchemy import event
 
 import json
 
 
 class Product(BaseModel):
     __tablename__ = 'products'
+    __table_args__ = (
+        # Keyset pagination of merchant inventory seeks on (created_at, product_id) per merchant
+        db.Index('idx_products_merchant_created_id', 'merchant_id', 'created_at', 'product_id'),
+        # Price filters and price sorting range-scan effective_price within a category or brand
+        db.Index('idx_products_category_effective_price', 'category_id', 'effective_price'),
+        db.Index('idx_products_brand_effective_price', 'brand_id', 'effective_price'),
+        # Every storefront listing filters on live, approved, top-level products, usually per category
+        db.Index('idx_products_listing', 'approval_status', 'active_flag', 'deleted_at', 'parent_product_id', 'category_id'),
+    )
 
     product_id    = db.Column(db.Integer, primary_key=True)
     merchant_id   = db.Column(db.Integer, db.ForeignKey('merchant_profiles.id'), nullable=False)
@@ -35,6 +45,16 @@ class Product(BaseModel):
     special_price = db.Column(db.Numeric(10,2), nullable=True) 
     special_start = db.Column(db.Date)
     special_end   = db.Column(db.Date)
+
+    # Materialized price the customer pays today (special_price inside its window, else selling_price)
+    # and the discount it represents. Kept in sync on every ORM write and, as special windows
+    # open and close, by EffectivePriceService. Listings filter and sort on these columns.
+    effective_price = db.Column(db.Numeric(10,2), nullable=True)
+    effective_discount_pct = db.Column(db.Numeric(5,2), nullable=True)
+
+    # Precomputed media manifest (primary image, ordered gallery, resized image URLs), rebuilt
+    # by MediaManifestService whenever the product's media change. Deferred: only media reads load it.
+    media_manifest = db.deferred(db.Column(db.JSON, nullable=True))
     
     active_flag   = db.Column(db.Boolean, default=True, nullable=False)
     
@@ -63,21 +83,84 @@ class Product(BaseModel):
     # REMOVED: update_base_price_and_gst_details() method
     # REMOVED: get_effective_inclusive_price_and_base() - this logic moves to checkout/invoice calculation
 
-    def get_current_listed_inclusive_price(self):
-        """Returns the current GST-inclusive price (special or regular) listed by the merchant."""
-        today = datetime.now(timezone.utc).date()
-        is_on_special = False
-        current_price = self.selling_price
+    @staticmethod
+    def _as_date(value):
+        """Special window bound as a date; request payloads assign ISO strings."""
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                return None
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).date()
+        if isinstance(value, datetime):
+            return value.date()
+        return value
 
-        if self.special_price is not None and \
-           (self.special_start is None or self.special_start <= today) and \
-           (self.special_end is None or self.special_end >= today):
-            current_price = self.special_price
-            is_on_special = True
-        return current_price, is_on_special
+    @staticmethod
+    def resolve_listed_price(selling_price, special_price, special_start, special_end, today=None):
+        """Resolve (price, is_on_special) from raw price columns without loading a Product instance."""
+        if today is None:
+            today = datetime.now(timezone.utc).date()
 
-    def serialize(self):
+        if special_price is not None and \
+           (special_start is None or special_start <= today) and \
+           (special_end is None or special_end >= today):
+            return special_price, True
+        return selling_price, False
+
+    @staticmethod
+    def resolve_discount_pct(selling_price, listed_price, is_on_special, discount_pct):
+        """Discount shown for the listed price: the special's saving off selling_price, else discount_pct."""
+        if is_on_special:
+            if selling_price and listed_price < selling_price:
+                return ((Decimal(selling_price) - Decimal(listed_price)) * 100 / Decimal(selling_price)).quantize(Decimal('0.01'))
+            return Decimal('0.00')
+        return Decimal(discount_pct or 0)
+
+    @classmethod
+    def effective_price_expressions(cls, today):
+        """SQL expressions for (effective_price, effective_discount_pct) as of today, for set-based refreshes."""
+        on_special = db.and_(
+            cls.special_price.isnot(None),
+            db.or_(cls.special_start.is_(None), cls.special_start <= today),
+            db.or_(cls.special_end.is_(None), cls.special_end >= today)
+        )
+        price = db.case((on_special, cls.special_price), else_=cls.selling_price)
+        discount = db.case(
+            (db.and_(on_special, cls.selling_price > 0, cls.special_price < cls.selling_price),
+             db.func.round((cls.selling_price - cls.special_price) * 100 / cls.selling_price, 2)),
+            (on_special, 0),
+            else_=db.func.coalesce(cls.discount_pct, 0)
+        )
+        return price, discount
+
+    # Listing sort_by values that mean "the price the customer pays"
+    PRICE_SORT_FIELDS = ('price', 'selling_price', 'special_price')
+
+    @classmethod
+    def sort_attribute(cls, sort_by):
+        """Map a listing sort_by argument to the attribute to order by; price sorts use effective_price."""
+        return 'effective_price' if sort_by in cls.PRICE_SORT_FIELDS else sort_by
+
+    def refresh_effective_price(self, today=None):
+        """Recompute effective_price and effective_discount_pct from the price columns."""
+        if self.selling_price is None:
+            return
+        listed_price, is_on_special = Product.resolve_listed_price(
+            self.selling_price, self.special_price, self.special_start, self.special_end, today
+        )
+        self.effective_price = listed_price
+        self.effective_discount_pct = Product.resolve_discount_pct(
+            self.selling_price, listed_price, is_on_special, self.discount_pct
+        )
+
+    def get_current_listed_inclusive_price(self):
+        """Returns the current GST-inclusive price (special or regular) listed by the merchant."""
+        return Product.resolve_listed_price(
+            self.selling_price, self.special_price, self.special_start, self.special_end
+        )
 
+    def get_display_prices(self):
+        """Returns (price, originalPrice, is_on_special) as shown to users before cart."""
         current_listed_inclusive_price, is_on_special = self.get_current_listed_inclusive_price()
 
         # The main price shown to users before cart.
@@ -85,40 +168,11 @@ class Product(BaseModel):
 
         # originalPrice is shown if there's a special offer active. It's the standard selling_price (inclusive).
         original_display_price = self.selling_price if is_on_special and self.selling_price != display_price else None
+        return display_price, original_display_price, is_on_special
 
-        # Process attributes to handle array format from variants
-        def process_attributes(attributes):
-            processed_attributes = []
-            
-            for attr in attributes:
-                # Check if the value is in array format (from variants)
-                if attr.value_text and attr.value_text.startswith('[') and attr.value_text.endswith(']'):
-                    try:
-                        # Parse the array string
-                        values = json.loads(attr.value_text)
-                        if isinstance(values, list):
-                            # Create individual attributes for each value
-                            for index, value in enumerate(values):
-                                processed_attributes.append({
-                                    "attribute_id": attr.attribute_id + index,  # Create unique IDs
-                                    "attribute_name": attr.attribute.name,
-                                    "value_code": attr.value_code,
-                                    "value_text": str(value),
-                                    "value_label": str(value),
-                                    "is_text_based": attr.value_code is None or attr.value_code.startswith('text_'),
-                                    "input_type": attr.attribute.input_type.value if attr.attribute.input_type else 'text'
-                                })
-                        else:
-                            # If not a list, treat as regular attribute
-                            processed_attributes.append(attr.serialize())
-                    except (json.JSONDecodeError, ValueError):
-                        # If parsing fails, treat as regular attribute
-                        processed_attributes.append(attr.serialize())
-                else:
-                    # Regular attribute, no processing needed
-                    processed_attributes.append(attr.serialize())
-            
-            return processed_attributes
+    def serialize_basic(self):
+        """Column data, pricing and category/brand names only; touches no other relationships."""
+        display_price, original_display_price, is_on_special = self.get_display_prices()
 
         return {
             "product_id": self.product_id,
@@ -155,10 +209,59 @@ class Product(BaseModel):
 
             # Frontend pricing display
             "price": float(display_price) if display_price is not None else 0.0,
-            "originalPrice": float(original_display_price) if original_display_price is not None else None,
+            "originalPrice": float(original_display_price) if original_display_price is not None else None
+        }
+
+    def serialize(self):
 
+        # Process attributes to handle array format from variants
+        def process_attributes(attributes):
+            processed_attributes = []
+            
+            for attr in attributes:
+                # Check if the value is in array format (from variants)
+                if attr.value_text and attr.value_text.startswith('[') and attr.value_text.endswith(']'):
+                    try:
+                        # Parse the array string
+                        values = json.loads(attr.value_text)
+                        if isinstance(values, list):
+                            # Create individual attributes for each value
+                            for index, value in enumerate(values):
+                                processed_attributes.append({
+                                    "attribute_id": attr.attribute_id + index,  # Create unique IDs
+                                    "attribute_name": attr.attribute.name,
+                                    "value_code": attr.value_code,
+                                    "value_text": str(value),
+                                    "value_label": str(value),
+                                    "is_text_based": attr.value_code is None or attr.value_code.startswith('text_'),
+                                    "input_type": attr.attribute.input_type.value if attr.attribute.input_type else 'text'
+                                })
+                        else:
+                            # If not a list, treat as regular attribute
+                            processed_attributes.append(attr.serialize())
+                    except (json.JSONDecodeError, ValueError):
+                        # If parsing fails, treat as regular attribute
+                        processed_attributes.append(attr.serialize())
+                else:
+                    # Regular attribute, no processing needed
+                    processed_attributes.append(attr.serialize())
+            
+            return processed_attributes
+
+        data = self.serialize_basic()
+        data.update({
             # Attributes, Variants, Stock
             "attributes": [attr.serialize() for attr in self.product_attributes] if self.product_attributes else [],
             "variants": [variant.serialize() for variant in self.variants] if self.variants else [],
             "stock": self.stock.serialize() if hasattr(self, 'stock') and self.stock else None
-        }
+        })
+        return data
+
+
+@event.listens_for(Product, 'before_insert')
+@event.listens_for(Product, 'before_update')
+def _sync_effective_price(mapper, connection, target):
+    # Every ORM write path (create, update, placements, variants) keeps the materialized price current
+    target.special_start = Product._as_date(target.special_start)
+    target.special_end = Product._as_date(target.special_end)
+    target.refresh_effective_price()
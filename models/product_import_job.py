@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+from common.database import db, BaseModel
+
+
+class ProductImportJob(BaseModel):
+    """
+    One bulk catalog import (services/product_import_service.py): the uploaded file is
+    processed in the background and progress and row errors are written here per chunk.
+    """
+    __tablename__ = 'product_import_jobs'
+    __table_args__ = (
+        db.Index('idx_product_import_jobs_merchant_created', 'merchant_id', 'created_at'),
+        db.Index('idx_product_import_jobs_shop_created', 'shop_id', 'created_at'),
+    )
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+
+    # Row errors kept on the job; the counters stay exact beyond this
+    MAX_STORED_ERRORS = 5000
+
+    job_id          = db.Column(db.Integer, primary_key=True)
+    target          = db.Column(db.String(20), nullable=False)  # 'merchant' or 'shop'
+    merchant_id     = db.Column(db.Integer, db.ForeignKey('merchant_profiles.id'), nullable=True)
+    shop_id         = db.Column(db.Integer, db.ForeignKey('shops.shop_id'), nullable=True)
+    created_by      = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    file_name       = db.Column(db.String(255), nullable=True)
+    file_format     = db.Column(db.String(10), nullable=False)
+    status          = db.Column(db.String(20), default=STATUS_QUEUED, nullable=False)
+    processed_rows  = db.Column(db.Integer, default=0, nullable=False)
+    succeeded_rows  = db.Column(db.Integer, default=0, nullable=False)
+    failed_rows     = db.Column(db.Integer, default=0, nullable=False)
+    errors          = db.Column(db.JSON, nullable=True)  # [{row, sku, message}]
+    error_message   = db.Column(db.Text, nullable=True)  # why the whole job failed
+    created_at      = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    started_at      = db.Column(db.DateTime, nullable=True)
+    finished_at     = db.Column(db.DateTime, nullable=True)
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_COMPLETED, self.STATUS_FAILED)
+
+    def serialize(self, include_errors=False):
+        data = {
+            "job_id": self.job_id,
+            "target": self.target,
+            "merchant_id": self.merchant_id,
+            "shop_id": self.shop_id,
+            "file_name": self.file_name,
+            "file_format": self.file_format,
+            "status": self.status,
+            "progress": {
+                "processed": self.processed_rows,
+                "succeeded": self.succeeded_rows,
+                "failed": self.failed_rows
+            },
+            "error_message": self.error_message,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+        if include_errors:
+            data["errors"] = self.errors or []
+        return data
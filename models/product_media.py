@@ -8,6 +8,10 @@ from models.enums import MediaType
 
 class ProductMedia(BaseModel):
     __tablename__ = 'product_media'
+    __table_args__ = (
+        # Gallery and thumbnail lookups read a product's live media in sort order
+        db.Index('idx_product_media_product_sort', 'product_id', 'deleted_at', 'sort_order'),
+    )
     media_id      = db.Column(db.Integer, primary_key=True)
     product_id    = db.Column(db.Integer, db.ForeignKey('products.product_id'), nullable=False)
     type          = db.Column(db.Enum(MediaType), nullable=False)
@@ -18,6 +22,27 @@ class ProductMedia(BaseModel):
     updated_at    = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     deleted_at    = db.Column(db.DateTime)
     product       = db.relationship('Product', backref='media')
+
+    @staticmethod
+    def get_thumbnail_urls(product_ids):
+        """
+        First image (lowest sort_order) of each product in a single query.
+        Returns a dict keyed by product_id; products without images are omitted.
+        """
+        product_ids = {pid for pid in product_ids if pid is not None}
+        if not product_ids:
+            return {}
+
+        rows = db.session.query(ProductMedia.product_id, ProductMedia.url).filter(
+            ProductMedia.product_id.in_(product_ids),
+            ProductMedia.type == MediaType.IMAGE,
+            ProductMedia.deleted_at.is_(None)
+        ).order_by(ProductMedia.product_id, ProductMedia.sort_order, ProductMedia.media_id).all()
+
+        thumbnails = {}
+        for row in rows:
+            thumbnails.setdefault(row.product_id, row.url)
+        return thumbnails
     
     def serialize(self):
         return {
@@ -3,6 +3,10 @@ from common.database import db
 
 class RecentlyViewed(db.Model):
     __tablename__ = 'recently_viewed'
+    __table_args__ = (
+        db.Index('idx_recently_viewed_user_product', 'user_id', 'product_id'),
+        db.Index('idx_recently_viewed_user_viewed', 'user_id', 'viewed_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
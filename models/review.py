@@ -33,6 +33,11 @@ class ReviewImage(BaseModel):
 
 class Review(BaseModel):
     __tablename__ = 'reviews'
+    __table_args__ = (
+        db.Index('idx_reviews_created_id', 'created_at', 'review_id'),
+        # Per-product review lists and rating aggregates
+        db.Index('idx_reviews_product_deleted', 'product_id', 'deleted_at'),
+    )
     
     review_id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('products.product_id'), nullable=False)
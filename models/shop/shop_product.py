@@ -1,15 +1,24 @@
 
 
 # models/shop/shop_product.py
-from datetime import datetime, timezone
+from datetime import date, datetime, time, timezone
 from common.database import db, BaseModel
 from auth.models.models import User  # Assuming superadmins are in the User table
 
 from decimal import Decimal
+from sqlalchemy import event
 import json
 
 class ShopProduct(BaseModel):
     __tablename__ = 'shop_products'
+    __table_args__ = (
+        # Price filters and price sorting range-scan effective_price within a shop, category or brand
+        db.Index('idx_shop_products_shop_effective_price', 'shop_id', 'effective_price'),
+        db.Index('idx_shop_products_category_effective_price', 'shop_id', 'category_id', 'effective_price'),
+        db.Index('idx_shop_products_brand_effective_price', 'shop_id', 'brand_id', 'effective_price'),
+        # Shop storefront listings filter on published, active, top-level products
+        db.Index('idx_shop_products_listing', 'shop_id', 'is_published', 'active_flag', 'parent_product_id'),
+    )
 
     product_id    = db.Column(db.Integer, primary_key=True)
     shop_id       = db.Column(db.Integer, db.ForeignKey('shops.shop_id'), nullable=False)
@@ -28,6 +37,14 @@ class ShopProduct(BaseModel):
     special_price = db.Column(db.Numeric(10,2), nullable=True) 
     special_start = db.Column(db.DateTime, nullable=True)
     special_end   = db.Column(db.DateTime, nullable=True)
+
+    # Materialized price the customer pays now and the discount it represents, maintained
+    # on every ORM write and by EffectivePriceService as special windows open and close
+    effective_price = db.Column(db.Numeric(10,2), nullable=True)
+    effective_discount_pct = db.Column(db.Numeric(5,2), nullable=True)
+
+    # Precomputed media manifest, rebuilt by MediaManifestService whenever the product's media change
+    media_manifest = db.deferred(db.Column(db.JSON, nullable=True))
     
     active_flag   = db.Column(db.Boolean, default=True, nullable=False)
     
@@ -51,18 +68,102 @@ class ShopProduct(BaseModel):
     # Relationship to get variant relationships for this product as parent
     variant_relations = db.relationship('ShopProductVariant', foreign_keys='ShopProductVariant.parent_product_id', back_populates='parent_product')
 
+    @staticmethod
+    def card_load_options():
+        """
+        Loader options for serializing batches of products (storefront cards): the
+        relationships serialize() walks are fetched with one IN query each.
+        """
+        return (
+            db.selectinload(ShopProduct.shop),
+            db.selectinload(ShopProduct.category),
+            db.selectinload(ShopProduct.brand),
+            db.selectinload(ShopProduct.product_attributes),
+            db.selectinload(ShopProduct.stock),
+            db.selectinload(ShopProduct.variants),
+            db.selectinload(ShopProduct.variant_relations),
+            db.undefer(ShopProduct.media_manifest)
+        )
+
+    @staticmethod
+    def _as_naive_utc(value):
+        """Special window bound as a naive UTC datetime; request payloads assign ISO strings."""
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                return None
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        elif isinstance(value, date) and not isinstance(value, datetime):
+            value = datetime.combine(value, time.min)
+        if value is not None and value.tzinfo is not None:
+            return value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    @staticmethod
+    def resolve_listed_price(selling_price, special_price, special_start, special_end, now=None):
+        """Resolve (price, is_on_special) from raw price columns; special windows are UTC datetimes."""
+        if now is None:
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+        special_start = ShopProduct._as_naive_utc(special_start)
+        special_end = ShopProduct._as_naive_utc(special_end)
+
+        if special_price is not None and \
+           (special_start is None or special_start <= now) and \
+           (special_end is None or special_end >= now):
+            return special_price, True
+        return selling_price, False
+
+    @staticmethod
+    def resolve_discount_pct(selling_price, listed_price, is_on_special, discount_pct):
+        """Discount shown for the listed price: the special's saving off selling_price, else discount_pct."""
+        if is_on_special:
+            if selling_price and listed_price < selling_price:
+                return ((Decimal(selling_price) - Decimal(listed_price)) * 100 / Decimal(selling_price)).quantize(Decimal('0.01'))
+            return Decimal('0.00')
+        return Decimal(discount_pct or 0)
+
+    @classmethod
+    def effective_price_expressions(cls, now):
+        """SQL expressions for (effective_price, effective_discount_pct) as of now, for set-based refreshes."""
+        on_special = db.and_(
+            cls.special_price.isnot(None),
+            db.or_(cls.special_start.is_(None), cls.special_start <= now),
+            db.or_(cls.special_end.is_(None), cls.special_end >= now)
+        )
+        price = db.case((on_special, cls.special_price), else_=cls.selling_price)
+        discount = db.case(
+            (db.and_(on_special, cls.selling_price > 0, cls.special_price < cls.selling_price),
+             db.func.round((cls.selling_price - cls.special_price) * 100 / cls.selling_price, 2)),
+            (on_special, 0),
+            else_=db.func.coalesce(cls.discount_pct, 0)
+        )
+        return price, discount
+
+    # Listing sort_by values that mean "the price the customer pays"
+    PRICE_SORT_FIELDS = ('price', 'selling_price', 'special_price')
+
+    @classmethod
+    def sort_attribute(cls, sort_by):
+        """Map a listing sort_by argument to the attribute to order by; price sorts use effective_price."""
+        return 'effective_price' if sort_by in cls.PRICE_SORT_FIELDS else sort_by
+
+    def refresh_effective_price(self, now=None):
+        """Recompute effective_price and effective_discount_pct from the price columns."""
+        if self.selling_price is None:
+            return
+        listed_price, is_on_special = ShopProduct.resolve_listed_price(
+            self.selling_price, self.special_price, self.special_start, self.special_end, now
+        )
+        self.effective_price = listed_price
+        self.effective_discount_pct = ShopProduct.resolve_discount_pct(
+            self.selling_price, listed_price, is_on_special, self.discount_pct
+        )
+
     def get_current_listed_inclusive_price(self):
         """Returns the current GST-inclusive price (special or regular)."""
-        today = datetime.now(timezone.utc).date()
-        is_on_special = False
-        current_price = self.selling_price
-
-        if self.special_price is not None and \
-           (self.special_start is None or self.special_start <= today) and \
-           (self.special_end is None or self.special_end >= today):
-            current_price = self.special_price
-            is_on_special = True
-        return current_price, is_on_special
+        return ShopProduct.resolve_listed_price(
+            self.selling_price, self.special_price, self.special_start, self.special_end
+        )
 
     def is_parent_product(self):
         """Check if this product is a parent (has variants)"""
@@ -332,3 +433,11 @@ class ShopProduct(BaseModel):
         
         return data
 
+
+@event.listens_for(ShopProduct, 'before_insert')
+@event.listens_for(ShopProduct, 'before_update')
+def _sync_effective_price(mapper, connection, target):
+    # Every ORM write path (create, update, variants) keeps the materialized price current
+    target.special_start = ShopProduct._as_naive_utc(target.special_start)
+    target.special_end = ShopProduct._as_naive_utc(target.special_end)
+    target.refresh_effective_price()
@@ -1,6 +1,7 @@
 # models/shop/shop_product_variant.py
 from datetime import datetime, timezone
 from common.database import db, BaseModel
+import hashlib
 import json
 
 class ShopProductVariant(BaseModel):
@@ -20,6 +21,8 @@ class ShopProductVariant(BaseModel):
     
     # Attribute combination (JSON for flexible storage)
     attribute_combination = db.Column(db.JSON, nullable=False)  # {"color": "red", "size": "L", "storage": "32GB"}
+    # Canonical hash of the sorted attribute combination; JSON columns can't be indexed for equality lookups
+    combination_hash = db.Column(db.String(64), nullable=True)
     
     # Variant-specific overrides (only if different from parent)
     price_override = db.Column(db.Numeric(10,2), nullable=True)
@@ -44,8 +47,27 @@ class ShopProductVariant(BaseModel):
         db.Index('idx_parent_product', 'parent_product_id'),
         db.Index('idx_variant_product', 'variant_product_id'),
         db.Index('idx_variant_sku', 'variant_sku'),
-        db.Index('idx_attribute_combination', 'attribute_combination'),
+        db.Index('idx_parent_combination_hash', 'parent_product_id', 'combination_hash'),
     )
+
+    @staticmethod
+    def compute_combination_hash(attributes):
+        """
+        Canonical SHA-256 of an attribute combination. Keys are sorted and values
+        stringified so {"size": "L", "color": "red"} and {"color": "red", "size": "L"}
+        resolve to the same variant.
+        """
+        canonical = json.dumps(
+            {str(key): str(value) for key, value in (attributes or {}).items()},
+            sort_keys=True,
+            separators=(',', ':')
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def set_attribute_combination(self, attributes):
+        """Set the attribute combination and keep its lookup hash in sync"""
+        self.attribute_combination = attributes
+        self.combination_hash = ShopProductVariant.compute_combination_hash(attributes)
     
     def generate_variant_sku(self, parent_sku, attributes):
         """
@@ -30,6 +30,8 @@ class ShopWishlistItem(BaseModel):
 
     __table_args__ = (
         db.UniqueConstraint('user_id', 'shop_id', 'shop_product_id', name='uq_user_shop_product_wishlist'),
+        # shop_product_id -> wishlisting users, for price drop / back-in-stock fan-out
+        db.Index('idx_shop_wishlist_items_product_user', 'shop_product_id', 'is_deleted', 'user_id'),
     )
 
     @classmethod
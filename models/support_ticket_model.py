@@ -1,7 +1,7 @@
 from common.database import db 
 from auth.models import User, MerchantProfile 
 from models.enums import TicketPriority, TicketStatus, TicketCreatorRole 
-from sqlalchemy.orm import validates, Mapped, mapped_column, relationship
+from sqlalchemy.orm import validates, Mapped, mapped_column, relationship, joinedload
 from sqlalchemy import ForeignKey, Integer, String, Text, DateTime, Enum as SAEnum 
 import datetime
 import secrets
@@ -12,6 +12,13 @@ def generate_ticket_uid():
 
 class SupportTicket(db.Model):
     __tablename__ = 'support_tickets'
+    __table_args__ = (
+        # Inbox views: newest activity first within a status, assignee or requester
+        db.Index('idx_support_tickets_status_activity', 'status', 'last_activity_at'),
+        db.Index('idx_support_tickets_assignee_activity', 'assigned_to_admin_id', 'last_activity_at'),
+        db.Index('idx_support_tickets_creator_activity', 'creator_user_id', 'last_activity_at'),
+        db.Index('idx_support_tickets_merchant_activity', 'merchant_id', 'last_activity_at'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     ticket_uid: Mapped[str] = mapped_column(String(10), unique=True, nullable=False, default=generate_ticket_uid, index=True)
@@ -42,6 +49,15 @@ class SupportTicket(db.Model):
     updated_at: Mapped[datetime.datetime] = mapped_column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
     resolved_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=True)
 
+    # Inbox read model, maintained by services/support_inbox_service.py on every flush:
+    # last new message or status/assignment/priority change, thread size, and messages
+    # the admin side / the requester (customer or merchant) has not opened yet
+    last_activity_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=True, index=True, default=datetime.datetime.utcnow)
+    message_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    last_message_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=True)
+    admin_unread_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    requester_unread_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+
     # Relationships
     creator = relationship('User', foreign_keys=[creator_user_id], backref=db.backref('created_support_tickets', lazy='dynamic'))
     merchant = relationship('MerchantProfile', foreign_keys=[merchant_id], backref=db.backref('support_tickets', lazy='dynamic'))
@@ -82,7 +98,7 @@ class SupportTicket(db.Model):
         except ValueError:
             raise ValueError(f"Invalid creator_role value: {value}. Must be one of {[item.value for item in TicketCreatorRole]}")
 
-    def serialize(self, include_messages=False, user_role='ANONYMOUS'):
+    def serialize(self, include_messages=False, user_role='ANONYMOUS', messages_limit=50):
         creator_name = "Unknown User"
         if self.creator:
             creator_name = f"{self.creator.first_name} {self.creator.last_name}".strip()
@@ -109,14 +125,27 @@ class SupportTicket(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None,
+            'last_activity_at': self.last_activity_at.isoformat() if self.last_activity_at else None,
+            'last_message_at': self.last_message_at.isoformat() if self.last_message_at else None,
+            'message_count': self.message_count or 0,
+            'unread_count': (self.admin_unread_count if user_role == 'ADMIN' else self.requester_unread_count) or 0,
         }
         
         # Only include messages if requested and user has permission
         # (e.g., admin, or the creator of the ticket)
         # This permission check would typically be done in the controller/route.
         # Here we assume if include_messages is true, permission is granted.
+        # Only the latest messages_limit messages are embedded; older ones are paged through
+        # GET .../tickets/<ticket_uid>/messages?before_id=<messages_before_id>
         if include_messages:
-            data['messages'] = [message.serialize() for message in self.messages.order_by(SupportTicketMessage.created_at.asc()).all()]
+            latest = self.messages.options(joinedload(SupportTicketMessage.sender)).order_by(None).order_by(
+                SupportTicketMessage.id.desc()
+            ).limit(messages_limit + 1).all()
+            has_more = len(latest) > messages_limit
+            latest = latest[:messages_limit]
+            data['messages'] = [message.serialize() for message in reversed(latest)]
+            data['messages_has_more'] = has_more
+            data['messages_before_id'] = latest[-1].id if has_more else None
         
         return data
 
@@ -125,6 +154,10 @@ class SupportTicket(db.Model):
 
 class SupportTicketMessage(db.Model):
     __tablename__ = 'support_ticket_messages'
+    __table_args__ = (
+        # Thread pages walk a ticket's messages by id
+        db.Index('idx_support_ticket_messages_ticket_id_id', 'ticket_id', 'id'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     ticket_id: Mapped[int] = mapped_column(ForeignKey('support_tickets.id', ondelete='CASCADE'), nullable=False, index=True)
@@ -167,4 +200,24 @@ class SupportTicketMessage(db.Model):
         }
 
     def __repr__(self):
-        return f"<SupportTicketMessage {self.id} (Ticket: {self.ticket_id} Sender: {self.sender_user_id})>"
\ No newline at end of file
+        return f"<SupportTicketMessage {self.id} (Ticket: {self.ticket_id} Sender: {self.sender_user_id})>"
+
+
+class SupportTicketCounter(db.Model):
+    """
+    Inbox counters per (assignee, status): how many tickets sit in the bucket and how many of
+    them have messages the admin side has not read. assignee_id 0 is the unassigned queue.
+    Kept in step with support_tickets inside the same transaction by
+    services/support_inbox_service.py; SupportInboxService.rebuild_counters() recomputes them.
+    """
+    __tablename__ = 'support_ticket_counters'
+
+    UNASSIGNED = 0
+
+    assignee_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    status: Mapped[str] = mapped_column(String(30), primary_key=True)
+    ticket_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    unread_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<SupportTicketCounter assignee={self.assignee_id} status={self.status} tickets={self.ticket_count}>"
@@ -0,0 +1,75 @@
+from datetime import datetime, timezone
+from common.database import db
+
+
+class WishlistPriceWatch(db.Model):
+    """
+    Last effective price and stock seen for a wishlisted product
+    (services/wishlist_alert_service.py). One row per product rather than per wishlist row,
+    so the alert sweep diffs each product once however many users wishlisted it.
+    """
+    __tablename__ = 'wishlist_price_watches'
+
+    CATALOG_PRODUCT = 'product'
+    CATALOG_SHOP_PRODUCT = 'shop_product'
+
+    catalog    = db.Column(db.String(20), primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    last_price = db.Column(db.Numeric(10, 2), nullable=True)
+    last_stock = db.Column(db.Integer, default=0, nullable=False)
+    # Bumped on every change the sweep records, which updates the row only at the revision it read
+    revision   = db.Column(db.Integer, default=0, nullable=False)
+    checked_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+
+class WishlistNotification(db.Model):
+    """
+    A price drop or back-in-stock alert for one user and one wishlisted product: shown in
+    the in-app list until read, and emailed in the user's next digest.
+    """
+    __tablename__ = 'wishlist_notifications'
+    __table_args__ = (
+        # In-app list and unread count, newest first
+        db.Index('idx_wishlist_notifications_user', 'user_id', 'notification_id'),
+        # The digest sender walks users with pending alerts
+        db.Index('idx_wishlist_notifications_digest', 'digest_status', 'user_id', 'notification_id'),
+    )
+
+    KIND_PRICE_DROP = 'price_drop'
+    KIND_BACK_IN_STOCK = 'back_in_stock'
+
+    DIGEST_PENDING = 'pending'
+    DIGEST_SENT = 'sent'
+    DIGEST_SKIPPED = 'skipped'
+    DIGEST_FAILED = 'failed'
+
+    notification_id = db.Column(db.Integer, primary_key=True)
+    user_id         = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    catalog         = db.Column(db.String(20), nullable=False)
+    product_id      = db.Column(db.Integer, nullable=False)
+    shop_id         = db.Column(db.Integer, nullable=True)
+    kind            = db.Column(db.String(20), nullable=False)
+    product_name    = db.Column(db.String(255), nullable=False)
+    old_price       = db.Column(db.Numeric(10, 2), nullable=True)
+    new_price       = db.Column(db.Numeric(10, 2), nullable=True)
+    stock_qty       = db.Column(db.Integer, nullable=True)
+    created_at      = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    read_at         = db.Column(db.DateTime, nullable=True)
+    digest_status   = db.Column(db.String(10), default=DIGEST_PENDING, nullable=False)
+    digested_at     = db.Column(db.DateTime, nullable=True)
+
+    def serialize(self):
+        return {
+            "notification_id": self.notification_id,
+            "kind": self.kind,
+            "catalog": self.catalog,
+            "product_id": self.product_id,
+            "shop_id": self.shop_id,
+            "product_name": self.product_name,
+            "old_price": float(self.old_price) if self.old_price is not None else None,
+            "new_price": float(self.new_price) if self.new_price is not None else None,
+            "stock_qty": self.stock_qty,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "read_at": self.read_at.isoformat() if self.read_at else None,
+            "is_read": self.read_at is not None
+        }
@@ -38,6 +38,8 @@ class WishlistItem(BaseModel):
 
     __table_args__ = (
         db.UniqueConstraint('user_id', 'product_id', name='uq_user_product_wishlist'),
+        # product_id -> wishlisting users, for price drop / back-in-stock fan-out
+        db.Index('idx_wishlist_items_product_user', 'product_id', 'is_deleted', 'user_id'),
     )
 
     @classmethod
@@ -1,5 +1,6 @@
 # routes/admin_support_routes.py 
 from flask import Blueprint, request, jsonify, current_app
+from datetime import datetime
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.exceptions import BadRequest, NotFound
 from marshmallow import Schema, fields, validate, ValidationError
@@ -7,6 +8,8 @@ from marshmallow import Schema, fields, validate, ValidationError
 
 from controllers.superadmin.admin_support_controller import AdminSupportTicketController 
 from auth.utils import admin_role_required 
+from services.support_inbox_service import SupportInboxService
+from common.pagination import InvalidCursorError, decode_cursor, encode_cursor
 from models.enums import TicketStatus, TicketPriority, TicketCreatorRole
 
 admin_support_bp = Blueprint('admin_support_bp', __name__, url_prefix='/api/superadmin/support')
@@ -14,6 +17,7 @@ admin_support_bp = Blueprint('admin_support_bp', __name__, url_prefix='/api/supe
 # --- Schemas for Admin Actions ---
 class AdminReplySchema(Schema):
     message_text = fields.Str(validate=validate.Length(min=1))
+    attachment_asset_token = fields.Str(required=False, allow_none=True)  # from /api/upload/signed/complete
     # attachment_file handled as form-data
 
 class AssignTicketSchema(Schema):
@@ -70,7 +74,7 @@ def list_all_tickets_route():
         in: query
         type: string
         required: false
-        description: Field to sort by (e.g., 'updated_at', '-priority', 'creator_name'). Default is '-updated_at'.
+        description: Field to sort by (e.g., 'updated_at', '-priority', 'creator_name'). Default is '-last_activity_at'.
       - name: page
         in: query
         type: integer
@@ -95,7 +99,7 @@ def list_all_tickets_route():
     priority_filter = request.args.get('priority')
     creator_role_filter = request.args.get('creator_role')
     assigned_to_filter = request.args.get('assigned_to')
-    sort_by = request.args.get('sort_by', '-updated_at')
+    sort_by = request.args.get('sort_by', '-last_activity_at')
     search_query = request.args.get('search')
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
@@ -163,6 +167,53 @@ def get_admin_ticket_route(ticket_uid):
         current_app.logger.error(f"Admin: Error getting ticket {ticket_uid}: {e}")
         return jsonify({"error": "Failed to retrieve ticket details"}), 500
 
+@admin_support_bp.route('/tickets/<string:ticket_uid>/messages', methods=['GET'])
+@admin_role_required
+def get_admin_ticket_messages_route(ticket_uid):
+    """
+    Page through a support ticket's messages, newest page first.
+    ---
+    tags:
+      - Admin Support
+    security:
+      - Bearer: []
+    parameters:
+      - name: ticket_uid
+        in: path
+        type: string
+        required: true
+        description: Unique identifier of the support ticket.
+      - name: before_id
+        in: query
+        type: integer
+        required: false
+        description: Return messages older than this message id (next_before_id of the previous page).
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        default: 50
+    responses:
+      200:
+        description: One page of messages, oldest to newest.
+      401:
+        description: Unauthorized.
+      404:
+        description: Ticket not found.
+      500:
+        description: Internal server error.
+    """
+    before_id = request.args.get('before_id', type=int)
+    limit = request.args.get('limit', type=int)
+    try:
+        page = AdminSupportTicketController.get_ticket_messages_for_admin(ticket_uid, before_id=before_id, limit=limit)
+        return jsonify(page), 200
+    except NotFound as e:
+        return jsonify({"error": e.description}), 404
+    except Exception as e:
+        current_app.logger.error(f"Admin: Error getting messages for ticket {ticket_uid}: {e}")
+        return jsonify({"error": "Failed to retrieve ticket messages"}), 500
+
 @admin_support_bp.route('/tickets/<string:ticket_uid>/assign', methods=['PUT'])
 @admin_role_required
 def assign_ticket_route(ticket_uid):
@@ -206,7 +257,7 @@ def assign_ticket_route(ticket_uid):
         data = schema.load(request.json)
         admin_id_to_assign = data['admin_id']
         
-        ticket = AdminSupportTicketController.assign_ticket_to_admin(ticket_uid, admin_id_to_assign)
+        ticket = AdminSupportTicketController.assign_ticket_to_admin(ticket_uid, admin_id_to_assign, admin_acting_id)
         # Log who assigned it if needed
         return jsonify(ticket.serialize(user_role='ADMIN')), 200
     except (ValidationError, BadRequest) as e:
@@ -246,6 +297,11 @@ def admin_reply_route(ticket_uid):
         type: file
         required: false
         description: Optional file attachment.
+      - name: attachment_asset_token
+        in: formData
+        type: string
+        required: false
+        description: asset_token of a support_attachment uploaded through /api/upload/signed, instead of attachment_file.
     responses:
       201:
         description: Reply added successfully.
@@ -270,7 +326,7 @@ def admin_reply_route(ticket_uid):
         return jsonify({"error": "Validation failed", "messages": err.messages}), 400
         
     message_text = validated_data.get('message_text')
-    if not message_text and not attachment_file:
+    if not message_text and not attachment_file and not validated_data.get('attachment_asset_token'):
         return jsonify({"error": "Message text or attachment is required."}), 400
 
     try:
@@ -278,7 +334,8 @@ def admin_reply_route(ticket_uid):
             ticket_uid=ticket_uid,
             admin_user_id=admin_user_id,
             message_text=message_text,
-            attachment_file=attachment_file
+            attachment_file=attachment_file,
+            attachment_asset_token=validated_data.get('attachment_asset_token')
         )
         return jsonify(message.serialize()), 201
     except (BadRequest, NotFound) as e:
@@ -397,4 +454,83 @@ def update_ticket_priority_route(ticket_uid):
         return jsonify({"error": e.description}), 404
     except Exception as e:
         current_app.logger.error(f"Admin: Error updating priority for ticket {ticket_uid}: {e}")
-        return jsonify({"error": "Failed to update ticket priority"}), 500
\ No newline at end of file
+        return jsonify({"error": "Failed to update ticket priority"}), 500
+
+
+# --- Inbox Read Model ---
+
+@admin_support_bp.route('/inbox/counters', methods=['GET'])
+@admin_role_required
+def inbox_counters_route():
+    """
+    Ticket and unread counts per status and per assigned admin, for the inbox badges.
+    ---
+    tags:
+      - Admin Support
+    security:
+      - Bearer: []
+    responses:
+      200:
+        description: Counters by status, by assignee ('unassigned' for the open queue) and in total.
+      401:
+        description: Unauthorized.
+      500:
+        description: Internal server error.
+    """
+    try:
+        return jsonify(SupportInboxService.counters()), 200
+    except Exception as e:
+        current_app.logger.error(f"Admin: Error reading support inbox counters: {e}")
+        return jsonify({"error": "Failed to retrieve inbox counters"}), 500
+
+@admin_support_bp.route('/inbox/changes', methods=['GET'])
+@admin_role_required
+def inbox_changes_route():
+    """
+    Long poll for ticket activity: waits until tickets have new messages or status, assignment
+    or priority changes after `since`, or until `timeout` seconds pass. Call without `since`
+    first to get the current cursor, then pass the returned cursor back each time.
+    ---
+    tags:
+      - Admin Support
+    security:
+      - Bearer: []
+    parameters:
+      - name: since
+        in: query
+        type: string
+        required: false
+        description: Opaque cursor from the previous response.
+      - name: timeout
+        in: query
+        type: integer
+        required: false
+        default: 25
+        description: Seconds to wait for changes, capped by SUPPORT_INBOX_POLL_TIMEOUT.
+    responses:
+      200:
+        description: Changed tickets (possibly none), the next cursor and the inbox counters.
+      400:
+        description: Invalid cursor.
+      401:
+        description: Unauthorized.
+      500:
+        description: Internal server error.
+    """
+    since = request.args.get('since') or None
+    timeout = request.args.get('timeout', current_app.config.get('SUPPORT_INBOX_POLL_TIMEOUT', 25), type=int)
+    try:
+        if since:
+            decode_cursor(since)
+    except InvalidCursorError:
+        try:
+            # Bare ISO timestamps handed out before cursors carried the ticket id
+            since = encode_cursor(datetime.fromisoformat(since), 0)
+        except ValueError:
+            return jsonify({"error": "Invalid since cursor; pass the cursor from the previous response."}), 400
+
+    try:
+        return jsonify(SupportInboxService.wait_for_changes(since, timeout)), 200
+    except Exception as e:
+        current_app.logger.error(f"Admin: Error polling support inbox changes: {e}")
+        return jsonify({"error": "Failed to retrieve inbox changes"}), 500
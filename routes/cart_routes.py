@@ -64,10 +64,9 @@ def get_cart():
     """
     try:
         user_id = get_jwt_identity()
-        cart = CartController.get_cart(user_id)
         return jsonify({
             'status': 'success',
-            'data': cart.serialize()
+            'data': CartController.get_cart_data(user_id)
         })
     except Exception as e:
         logger.error(f"Error getting cart: {str(e)}")
@@ -172,10 +171,10 @@ def add_to_cart():
         quantity = data['quantity']
         selected_attributes = data.get('selected_attributes', {})
         
-        cart = CartController.add_to_cart(user_id, product_id, quantity, selected_attributes)
+        CartController.add_to_cart(user_id, product_id, quantity, selected_attributes)
         return jsonify({
             'status': 'success',
-            'data': cart.serialize()
+            'data': CartController.get_cart_data(user_id)
         })
     except ValueError as e:
         return jsonify({
@@ -466,7 +465,7 @@ def get_cart_items():
     """
     try:
         user_id = get_jwt_identity()
-        cart_items = CartController.get_cart_items(user_id)
+        cart_items, snapshots = CartController.get_cart_items_with_snapshots(user_id)
         
         # Format the response to match frontend expectations
         formatted_items = [{
@@ -482,7 +481,9 @@ def get_cart_items():
                 'special_price': float(item.product_special_price) if item.product_special_price else None,
                 'image_url': item.product_image_url,
                 'stock': item.product_stock_qty,
-                'is_deleted': item.product.is_deleted if hasattr(item.product, 'is_deleted') else False
+                'current_price': float(snapshots[item.product_id]['price']) if item.product_id in snapshots else None,
+                'price_changed': item.product_id in snapshots and float(snapshots[item.product_id]['price']) != float(item.product_price),
+                'is_deleted': snapshots[item.product_id]['is_deleted'] if item.product_id in snapshots else True
             }
         } for item in cart_items]
 
@@ -6,9 +6,10 @@ from auth.utils import merchant_role_required, super_admin_role_required
 from common.database import db
 import cloudinary
 import cloudinary.uploader
-from werkzeug.exceptions import NotFound
+from werkzeug.exceptions import NotFound, HTTPException
 from models.product import Product
 from models.product_stock import ProductStock
+from models.enums import MediaType
 from controllers.merchant.brand_request_controller import MerchantBrandRequestController
 from controllers.merchant.brand_controller         import MerchantBrandController
 from controllers.merchant.category_controller      import MerchantCategoryController
@@ -22,11 +23,15 @@ from controllers.merchant.product_attribute_controller import MerchantProductAtt
 from controllers.merchant.product_placement_controller import MerchantProductPlacementController
 from controllers.merchant.tax_category_controller  import MerchantTaxCategoryController
 from controllers.merchant.product_stock_controller import MerchantProductStockController
+from services.inventory_import_service import InventoryImportService
+from services.product_import_service import ProductImportService
+from services.signed_upload_service import SignedUploadService, SignedUploadError
 from controllers.merchant.merchant_profile_controller import MerchantProfileController
 from flask_jwt_extended import get_jwt_identity, jwt_required
 from controllers.merchant.order_controller import MerchantOrderController
 from auth.models.models import MerchantProfile
 from datetime import datetime
+from common.pagination import get_keyset_args
 from controllers.merchant.dashboard_controller import MerchantDashboardController
 from controllers.merchant.report_controller import MerchantReportController
 from controllers.merchant.report_export_controller import MerchantReportExportController
@@ -739,6 +744,80 @@ def create_product_variant(pid):
         current_app.logger.error(f"Error creating variant for product {pid}: {e}")
         return jsonify({'message': 'Failed to create product variant'}), HTTPStatus.INTERNAL_SERVER_ERROR
 
+@merchant_dashboard_bp.route('/products/<int:pid>/variants/generate', methods=['POST'])
+@merchant_role_required
+def generate_product_variants(pid):
+    """
+    Create a parent product's variants from an attribute matrix in one transaction
+    ---
+    tags:
+      - Merchant - Products
+    security:
+      - Bearer: []
+    parameters:
+      - name: pid
+        in: path
+        type: integer
+        required: true
+        description: Parent product ID
+    requestBody:
+      required: true
+      content:
+        application/json:
+          schema:
+            type: object
+            properties:
+              attribute_values:
+                type: object
+                description: Attribute id -> list of values; one variant is created per combination
+                additionalProperties:
+                  type: array
+                  items:
+                    type: string
+              selling_price:
+                type: number
+                description: Price of every generated variant (defaults to the parent's)
+              cost_price:
+                type: number
+              stock_qty:
+                type: integer
+              price_adjustments:
+                type: object
+                description: Attribute id -> {value -> amount added to selling_price}
+              combinations:
+                type: array
+                description: Explicit variants ({attributes, sku, selling_price, cost_price, stock_qty}) instead of attribute_values
+                items:
+                  type: object
+    responses:
+      201:
+        description: Variants created; combinations that could not be created are listed in errors
+      400:
+        description: Invalid matrix or no variant could be created
+      404:
+        description: Parent product not found
+      500:
+        description: Internal server error
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'message': 'No data provided'}), HTTPStatus.BAD_REQUEST
+
+        variants, errors = MerchantProductController.generate_variants(pid, data)
+        return jsonify({
+            'variants': [variant.serialize_basic() for variant in variants],
+            'created_count': len(variants),
+            'errors': errors
+        }), HTTPStatus.CREATED
+    except ValueError as e:
+        return jsonify({'message': str(e)}), HTTPStatus.BAD_REQUEST
+    except HTTPException:
+        raise
+    except Exception as e:
+        current_app.logger.error(f"Error generating variants for product {pid}: {e}")
+        return jsonify({'message': 'Failed to generate product variants'}), HTTPStatus.INTERNAL_SERVER_ERROR
+
 @merchant_dashboard_bp.route('/products/<int:pid>', methods=['GET'])
 @merchant_role_required
 def get_product(pid):
@@ -1465,6 +1544,59 @@ def list_product_media(pid):
             return jsonify({'message': getattr(e, 'description', str(e))}), e.code
         return jsonify({'message': "Failed to retrieve product media."}), HTTPStatus.INTERNAL_SERVER_ERROR
 
+@merchant_dashboard_bp.route('/products/<int:pid>/media/manifest', methods=['GET'])
+@merchant_role_required
+def get_product_media_manifest(pid):
+    """
+    Get the precomputed media manifest of a product
+    ---
+    tags:
+      - Merchant - Products
+    security:
+      - Bearer: []
+    parameters:
+      - name: pid
+        in: path
+        type: integer
+        required: true
+        description: Product ID
+    responses:
+      200:
+        description: Media manifest retrieved successfully
+        schema:
+          type: object
+          properties:
+            primary_image:
+              type: string
+              format: uri
+            primary:
+              type: object
+              description: Gallery entry of the primary image
+            gallery:
+              type: array
+              description: Media in display order; images carry thumbnail/card/zoom sizes and a srcset
+              items:
+                type: object
+            total_media:
+              type: integer
+      404:
+        description: Product not found
+      500:
+        description: Internal server error
+        schema:
+          type: object
+          properties:
+            message:
+              type: string
+    """
+    try:
+        return jsonify(MerchantProductMediaController.manifest(pid)), HTTPStatus.OK
+    except Exception as e:
+        current_app.logger.error(f"Merchant: Error getting media manifest for product {pid}: {e}")
+        if hasattr(e, 'code') and isinstance(e.code, int):
+            return jsonify({'message': getattr(e, 'description', str(e))}), e.code
+        return jsonify({'message': "Failed to retrieve product media manifest."}), HTTPStatus.INTERNAL_SERVER_ERROR
+
 @merchant_dashboard_bp.route('/products/<int:pid>/media/stats', methods=['GET'])
 @merchant_role_required
 def get_product_media_stats(pid):
@@ -1513,13 +1645,13 @@ def get_product_media_stats(pid):
               type: string
     """
     try:
-        media_list = MerchantProductMediaController.list(pid)
+        gallery = MerchantProductMediaController.manifest(pid)['gallery']
         stats = {
-            'total_count': len(media_list),
-            'image_count': len([m for m in media_list if m.type == 'IMAGE']),
-            'video_count': len([m for m in media_list if m.type == 'VIDEO']),
+            'total_count': len(gallery),
+            'image_count': len([m for m in gallery if m['type'] == MediaType.IMAGE.value]),
+            'video_count': len([m for m in gallery if m['type'] == MediaType.VIDEO.value]),
             'max_allowed': 5,  # This should match the frontend maxFiles
-            'remaining_slots': 5 - len(media_list)
+            'remaining_slots': 5 - len(gallery)
         }
         return jsonify(stats), HTTPStatus.OK
     except Exception as e:
@@ -2487,6 +2619,16 @@ def get_merchant_orders():
         type: string
         format: date
         description: Filter orders until this date (YYYY-MM-DD)
+      - name: cursor
+        in: query
+        type: string
+        description: Opaque cursor for keyset pagination; send an empty value for the first page and then the returned next_cursor. Replaces page when present.
+      - name: total
+        in: query
+        type: string
+        enum: [none, approx, exact]
+        default: none
+        description: With cursor pagination, whether to include a total count (approx is cached for a few minutes)
     responses:
       200:
         description: List of orders retrieved successfully
@@ -2557,7 +2699,8 @@ def get_merchant_orders():
             per_page=per_page,
             status=status,
             start_date=start_date,
-            end_date=end_date
+            end_date=end_date,
+            keyset=get_keyset_args(request.args)
         )
         return jsonify(result), 200
     except ValueError as e:
@@ -2805,6 +2948,158 @@ def get_inventory_stats():
         current_app.logger.error(f"Error getting inventory stats: {str(e)}")
         return jsonify({'message': 'Failed to retrieve inventory statistics.'}), HTTPStatus.INTERNAL_SERVER_ERROR
 
+@merchant_dashboard_bp.route('/inventory/import', methods=['POST'])
+@merchant_role_required
+def import_inventory_stock():
+    """
+    Bulk import stock levels from a CSV, JSONL or JSON upload
+    ---
+    tags:
+      - Merchant - Inventory
+    security:
+      - Bearer: []
+    consumes:
+      - multipart/form-data
+      - text/csv
+      - application/x-ndjson
+      - application/json
+    parameters:
+      - name: file
+        in: formData
+        type: file
+        required: false
+        description: CSV (product_id, stock_qty, low_stock_threshold) or JSONL file; alternatively send the rows as the raw request body
+    responses:
+      200:
+        description: Per-row import results and a summary
+        schema:
+          type: object
+          properties:
+            results:
+              type: array
+              items:
+                type: object
+            summary:
+              type: object
+              properties:
+                total:
+                  type: integer
+                succeeded:
+                  type: integer
+                failed:
+                  type: integer
+      400:
+        description: Unsupported or malformed upload
+      401:
+        description: Unauthorized - Invalid or missing token
+      500:
+        description: Internal server error
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        upload = request.files.get('file')
+        if upload:
+            fmt = InventoryImportService.detect_format(upload.filename, upload.mimetype)
+            stream = upload.stream
+        else:
+            fmt = InventoryImportService.detect_format(content_type=request.content_type)
+            stream = request.stream
+        if not fmt:
+            return jsonify({'message': 'Upload must be CSV, JSONL or JSON'}), HTTPStatus.BAD_REQUEST
+
+        report = MerchantProductStockController.import_stock(current_user_id, stream, fmt)
+        return jsonify(report), HTTPStatus.OK
+    except ValueError as e:
+        return jsonify({'message': str(e)}), HTTPStatus.BAD_REQUEST
+    except Exception as e:
+        current_app.logger.error(f"Error importing inventory stock: {str(e)}")
+        return jsonify({'message': 'Failed to import inventory stock.'}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+@merchant_dashboard_bp.route('/products/import', methods=['POST'])
+@merchant_role_required
+def import_products():
+    """
+    Bulk import products and variants from a CSV, XLSX, JSONL or JSON upload
+    ---
+    tags:
+      - Merchant - Products
+    security:
+      - Bearer: []
+    consumes:
+      - multipart/form-data
+      - text/csv
+      - application/x-ndjson
+      - application/json
+    parameters:
+      - name: file
+        in: formData
+        type: file
+        required: false
+        description: |
+          One row per product or variant: sku, parent_sku (variants), product_name, product_description,
+          category_id, brand_id, cost_price, selling_price, special_price, special_start, special_end,
+          discount_pct, stock_qty, low_stock_threshold, short_desc, full_desc, meta_title, meta_desc,
+          meta_keywords, media_urls ('|' separated), attributes (JSON object keyed by attribute code) or
+          attr:<code> columns. Alternatively send the rows as the raw request body.
+    responses:
+      202:
+        description: Import job queued; poll GET /products/import/{job_id} for progress
+      400:
+        description: Unsupported or missing upload
+      401:
+        description: Unauthorized - Invalid or missing token
+      404:
+        description: Merchant profile not found
+      500:
+        description: Internal server error
+    """
+    try:
+        upload = request.files.get('file')
+        if upload:
+            fmt = ProductImportService.detect_format(upload.filename, upload.mimetype)
+            stream, file_name = upload.stream, upload.filename
+        else:
+            fmt = ProductImportService.detect_format(content_type=request.content_type)
+            stream, file_name = request.stream, None
+        if not fmt:
+            return jsonify({'message': 'Upload must be CSV, XLSX, JSONL or JSON'}), HTTPStatus.BAD_REQUEST
+
+        job = MerchantProductController.import_products(stream, file_name, fmt)
+        return jsonify(job.serialize()), HTTPStatus.ACCEPTED
+    except ValueError as e:
+        return jsonify({'message': str(e)}), HTTPStatus.BAD_REQUEST
+    except HTTPException:
+        raise
+    except Exception as e:
+        current_app.logger.error(f"Error importing products: {str(e)}")
+        return jsonify({'message': 'Failed to import products.'}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+@merchant_dashboard_bp.route('/products/import/<int:job_id>', methods=['GET'])
+@merchant_role_required
+def get_product_import_job(job_id):
+    """
+    Progress of a bulk product import, with its row errors
+    ---
+    tags:
+      - Merchant - Products
+    security:
+      - Bearer: []
+    parameters:
+      - name: job_id
+        in: path
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Job status, progress counters and per-row errors
+      401:
+        description: Unauthorized - Invalid or missing token
+      404:
+        description: Import job not found
+    """
+    job = MerchantProductController.get_import_job(job_id)
+    return jsonify(job.serialize(include_errors=True)), HTTPStatus.OK
+
 @merchant_dashboard_bp.route('/inventory/products', methods=['GET'])
 @merchant_role_required
 def list_inventory_products():
@@ -2843,6 +3138,16 @@ def list_inventory_products():
         type: string
         enum: [in_stock, low_stock, out_of_stock]
         description: Filter by stock status
+      - name: cursor
+        in: query
+        type: string
+        description: Opaque cursor for keyset pagination; send an empty value for the first page and then the returned next_cursor. Replaces page when present.
+      - name: total
+        in: query
+        type: string
+        enum: [none, approx, exact]
+        default: none
+        description: With cursor pagination, whether to include a total count (approx is cached for a few minutes)
     responses:
       200:
         description: List of inventory products retrieved successfully
@@ -2924,7 +3229,8 @@ def list_inventory_products():
             search=search,
             category=category,
             brand=brand,
-            stock_status=stock_status
+            stock_status=stock_status,
+            keyset=get_keyset_args(request.args)
         )
         
         return jsonify(result), HTTPStatus.OK
@@ -3655,6 +3961,16 @@ def get_merchant_product_reviews():
         in: query
         type: boolean
         description: Filter reviews with/without images
+      - name: cursor
+        in: query
+        type: string
+        description: Opaque cursor for keyset pagination; send an empty value for the first page and then the returned next_cursor. Replaces page when present.
+      - name: total
+        in: query
+        type: string
+        enum: [none, approx, exact]
+        default: none
+        description: With cursor pagination, whether to include a total count (approx is cached for a few minutes)
     responses:
       200:
         description: List of reviews with pagination and stats
@@ -3756,7 +4072,8 @@ def get_merchant_product_reviews():
             merchant_id=merchant.id,
             page=page,
             per_page=per_page,
-            filters=filters
+            filters=filters,
+            keyset=get_keyset_args(request.args, default_per_page=10)
         )
         
         return jsonify(result), HTTPStatus.OK
@@ -4420,6 +4737,7 @@ def schedule_live_stream():
             scheduled_time = request.form.get('scheduled_time')
             thumbnail_file = request.files.get('thumbnail')
             thumbnail_url = None
+            thumbnail_asset_token = request.form.get('thumbnail_asset_token')
         else:
             data = request.get_json()
             title = data.get('title')
@@ -4428,11 +4746,19 @@ def schedule_live_stream():
             scheduled_time = data.get('scheduled_time')
             thumbnail_file = None
             thumbnail_url = data.get('thumbnail_url')
+            thumbnail_asset_token = data.get('thumbnail_asset_token')
         if not all([title, description, product_id, scheduled_time]):
             return jsonify({"error": "Missing required fields."}), 400
+        thumbnail_asset = None
+        if thumbnail_asset_token:
+            # Thumbnail uploaded directly through /api/upload/signed
+            try:
+                thumbnail_asset = SignedUploadService.redeem(thumbnail_asset_token, 'live_stream_thumbnail', user_id)
+            except SignedUploadError as e:
+                return jsonify({"error": str(e)}), 400
         # Updated: get rtmp_info from controller
         stream, yt_event_id, yt_status, yt_thumbnails, rtmp_info = MerchantLiveStreamController.schedule_live_stream(
-            merchant.id, title, description, product_id, scheduled_time, thumbnail_file, thumbnail_url
+            merchant.id, title, description, product_id, scheduled_time, thumbnail_file, thumbnail_url, thumbnail_asset
         )
         return jsonify({
             "data": stream.serialize(),
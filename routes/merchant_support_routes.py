@@ -17,10 +17,12 @@ class CreateMerchantTicketSchema(Schema): # Renamed for clarity
     priority = fields.Str(validate=validate.OneOf([p.value for p in TicketPriority]), load_default=TicketPriority.MEDIUM.value)
     related_order_id = fields.Str(required=False, allow_none=True)
     related_product_id = fields.Int(required=False, allow_none=True)
+    image_asset_token = fields.Str(required=False, allow_none=True)  # from /api/upload/signed/complete
     # image_file will be handled as form-data
 
 class AddMerchantMessageSchema(Schema): # Renamed for clarity
     message_text = fields.Str(validate=validate.Length(min=1))
+    attachment_asset_token = fields.Str(required=False, allow_none=True)  # from /api/upload/signed/complete
     # attachment_file will be handled as form-data
 
 # --- Merchant Support Ticket Routes ---
@@ -68,6 +70,11 @@ def create_merchant_ticket_route():
         type: file
         required: false
         description: Optional image attachment.
+      - name: image_asset_token
+        in: formData
+        type: string
+        required: false
+        description: asset_token of a support_attachment uploaded through /api/upload/signed, instead of image_file.
     responses:
       201:
         description: Support ticket created successfully.
@@ -130,7 +137,7 @@ def list_merchant_tickets_route():
         in: query
         type: string
         required: false
-        description: "Sort order (default: -updated_at)."
+        description: "Sort order (default: -last_activity_at)."
       - name: page
         in: query
         type: integer
@@ -159,7 +166,7 @@ def list_merchant_tickets_route():
     )
 
     status_filter = request.args.get('status')
-    sort_by = request.args.get('sort_by', '-updated_at')
+    sort_by = request.args.get('sort_by', '-last_activity_at')
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
 
@@ -222,6 +229,56 @@ def get_merchant_ticket_route(ticket_uid):
         current_app.logger.error(f"Error getting merchant ticket {ticket_uid}: {e}")
         return jsonify({"error": "Failed to retrieve ticket details"}), 500
 
+@merchant_support_bp.route('/tickets/<string:ticket_uid>/messages', methods=['GET'])
+@merchant_role_required
+def get_merchant_ticket_messages_route(ticket_uid):
+    """
+    Page through a support ticket's messages, newest page first.
+    ---
+    tags:
+      - Merchant Support
+    security:
+      - Bearer: []
+    parameters:
+      - name: ticket_uid
+        in: path
+        type: string
+        required: true
+        description: "Unique identifier of the support ticket."
+      - name: before_id
+        in: query
+        type: integer
+        required: false
+        description: "Return messages older than this message id (next_before_id of the previous page)."
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        default: 50
+    responses:
+      200:
+        description: "One page of messages, oldest to newest."
+      401:
+        description: "Unauthorized."
+      404:
+        description: "Ticket not found."
+      500:
+        description: "Internal server error."
+    """
+    current_user_id = get_jwt_identity()
+    merchant = MerchantProfile.query.filter_by(user_id=current_user_id).first_or_404()
+
+    before_id = request.args.get('before_id', type=int)
+    limit = request.args.get('limit', type=int)
+    try:
+        page = MerchantSupportTicketController.get_merchant_ticket_messages(ticket_uid, merchant.id, before_id=before_id, limit=limit)
+        return jsonify(page), 200
+    except NotFound as e:
+        return jsonify({"error": e.description}), 404
+    except Exception as e:
+        current_app.logger.error(f"Error getting messages for merchant ticket {ticket_uid}: {e}")
+        return jsonify({"error": "Failed to retrieve ticket messages"}), 500
+
 @merchant_support_bp.route('/tickets/<string:ticket_uid>/messages', methods=['POST'])
 @merchant_role_required
 def add_merchant_message_route(ticket_uid):
@@ -250,6 +307,11 @@ def add_merchant_message_route(ticket_uid):
         type: file
         required: false
         description: Optional file attachment.
+      - name: attachment_asset_token
+        in: formData
+        type: string
+        required: false
+        description: asset_token of a support_attachment uploaded through /api/upload/signed, instead of attachment_file.
     responses:
       201:
         description: Message added successfully.
@@ -280,7 +342,7 @@ def add_merchant_message_route(ticket_uid):
 
     message_text = validated_data.get('message_text')
     
-    if not message_text and not attachment_file:
+    if not message_text and not attachment_file and not validated_data.get('attachment_asset_token'):
         return jsonify({"error": "Message text or attachment is required."}), 400
 
     try:
@@ -289,7 +351,8 @@ def add_merchant_message_route(ticket_uid):
             merchant_id=merchant_profile.id, # Pass merchant_id for ownership check
             sender_user_id=current_user_id_from_jwt, # The sender is the merchant's user
             message_text=message_text,
-            attachment_file=attachment_file
+            attachment_file=attachment_file,
+            attachment_asset_token=validated_data.get('attachment_asset_token')
         )
         return jsonify(message.serialize()), 201
     except (BadRequest, NotFound) as e:
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from controllers import merchant_transaction_controller as txn_ctrl
+from common.pagination import get_keyset_args
 
 merchant_transaction_bp = Blueprint('merchant_transaction', __name__)
 
@@ -23,6 +24,9 @@ def create_transaction_from_order():
         try:
             transactions = txn_ctrl.create_merchant_transaction_from_order(order_id)
             return jsonify({'status': 'success', 'transactions': [t.serialize() for t in transactions]}), 201
+        except ValueError as e:
+            # The order cannot be settled (unpaid, cancelled, refunded or returned)
+            return jsonify({'status': 'error', 'message': str(e)}), 400
         except Exception as e:
             return jsonify({'status': 'error', 'message': str(e)}), 500
     
@@ -57,6 +61,12 @@ def list_transactions():
             'from_date': request.args.get('from_date'),
             'to_date': request.args.get('to_date'),
         }
+        try:
+            keyset = get_keyset_args(request.args)
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        if keyset:
+            return jsonify({'status': 'success', **txn_ctrl.list_transactions_page(filters, keyset)})
         txns = txn_ctrl.list_all_transactions(filters)
         return jsonify({'status': 'success', 'transactions': [t.serialize() for t in txns]})
     
@@ -8,6 +8,7 @@ from models.order import Order, OrderItem
 from sqlalchemy import func, desc
 from datetime import datetime, timedelta
 from common.database import db
+from common.pagination import get_keyset_args
 from flask_cors import cross_origin
 import logging
 
@@ -256,6 +257,18 @@ def get_user_orders():
         type: string
         required: false
         description: Filter orders by status (PENDING, PROCESSING, SHIPPED, DELIVERED, CANCELLED)
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: Opaque keyset cursor; send an empty value for the first page and then the returned next_cursor. Replaces page when present.
+      - name: total
+        in: query
+        type: string
+        required: false
+        enum: [none, approx, exact]
+        default: none
+        description: With cursor pagination, whether to include a total count (approx is cached for a few minutes)
     responses:
       200:
         description: List of user's orders retrieved successfully
@@ -308,7 +321,15 @@ def get_user_orders():
         per_page = request.args.get('per_page', 10, type=int)
         status = request.args.get('status')
         
-        result = OrderController.get_user_orders(user_id, page, per_page, status)
+        try:
+            keyset = get_keyset_args(request.args, default_per_page=per_page)
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 400
+        
+        result = OrderController.get_user_orders(user_id, page, per_page, status, keyset=keyset)
         return jsonify({
             'status': 'success',
             'data': result
@@ -712,6 +733,18 @@ def get_all_orders():
         type: integer
         required: false
         description: Filter orders by merchant ID (admin only)
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: Opaque keyset cursor; send an empty value for the first page and then the returned next_cursor. Replaces page when present.
+      - name: total
+        in: query
+        type: string
+        required: false
+        enum: [none, approx, exact]
+        default: none
+        description: With cursor pagination, whether to include a total count (approx is cached for a few minutes)
     responses:
       200:
         description: List of orders retrieved successfully
@@ -777,7 +810,15 @@ def get_all_orders():
         if request.user.is_merchant:
             merchant_id = request.user.merchant_profile.id
         
-        result = OrderController.get_all_orders(page, per_page, status, merchant_id)
+        try:
+            keyset = get_keyset_args(request.args, default_per_page=per_page)
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 400
+        
+        result = OrderController.get_all_orders(page, per_page, status, merchant_id, keyset=keyset)
         return jsonify({
             'status': 'success',
             'data': result
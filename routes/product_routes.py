@@ -1,8 +1,8 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, make_response
 from controllers.product_controller import ProductController
 from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
 from flask_cors import cross_origin
-from models.recently_viewed import RecentlyViewed
+from services.recently_viewed_service import RecentlyViewedService
 from common.database import db
 from datetime import datetime
 from sqlalchemy import desc
@@ -241,40 +241,8 @@ def get_recently_viewed():
         if not user_id:
             return jsonify([]), 200
             
-        # Get the 6 most recently viewed products
-        recent_views = RecentlyViewed.query.filter_by(
-            user_id=user_id
-        ).order_by(
-            desc(RecentlyViewed.viewed_at)
-        ).limit(6).all()
-        
-        # Get the product details for each view
-        products = []
-        for view in recent_views:
-            if view.product and view.product.active_flag and not view.product.deleted_at:
-                product_dict = view.product.serialize()
-                # Add frontend-specific fields
-                product_dict.update({
-                    'id': str(view.product.product_id),
-                    'name': view.product.product_name,
-                    'price': float(view.product.selling_price),
-                    'originalPrice': float(view.product.cost_price),
-                    'currency': 'INR',
-                    'stock': 100,
-                    'isNew': True,
-                    'isBuiltIn': False,
-                    'rating': 0,
-                    'reviews': [],
-                    'sku': view.product.sku if hasattr(view.product, 'sku') else None
-                })
-                
-                # Get primary media
-                media = ProductController.get_product_media(view.product.product_id)
-                if media:
-                    product_dict['primary_image'] = media['url']
-                    product_dict['image'] = media['url']
-                
-                products.append(product_dict)
+        # Served from the per-user Redis list; cards are loaded in two queries
+        products = RecentlyViewedService.get_recent_products(user_id, limit=6)
         
         return jsonify(products), 200
         
@@ -434,6 +402,18 @@ def get_product_details(product_id):
                   type: integer
                 name:
                   type: string
+            rating:
+              type: number
+            review_count:
+              type: integer
+            stock_qty:
+              type: integer
+              description: Live stock, never served from cache
+            in_stock:
+              type: boolean
+            is_in_wishlist:
+              type: boolean
+              description: Whether the signed-in user has wishlisted the product (false when anonymous)
       404:
         description: Product not found
       500:
@@ -449,31 +429,15 @@ def get_product_details(product_id):
             # If JWT verification fails, continue without user tracking
             pass
         
-        # If user is authenticated, track the view
-        if user_id:
-            # Check if there's an existing view record
-            existing_view = RecentlyViewed.query.filter_by(
-                user_id=user_id,
-                product_id=product_id
-            ).first()
-            
-            if existing_view:
-                # Update the viewed_at timestamp
-                existing_view.viewed_at = datetime.utcnow()
-            else:
-                # Create a new view record
-                new_view = RecentlyViewed(
-                    user_id=user_id,
-                    product_id=product_id,
-                    viewed_at=datetime.utcnow()
-                )
-                db.session.add(new_view)
-            
-            # Commit the changes
-            db.session.commit()
-        
-        # Get and return the product details
-        return ProductController.get_product_details(product_id)
+        # Get the product details
+        response = make_response(ProductController.get_product_details(product_id, user_id))
+
+        # If user is authenticated, track the view (written to the database in the background).
+        # Only products that resolved are tracked, so unknown ids never reach the pending queue.
+        if user_id and response.status_code == 200:
+            RecentlyViewedService.record_view(user_id, product_id)
+
+        return response
         
     except Exception as e:
         print(f"Error in get_product_details route: {str(e)}")
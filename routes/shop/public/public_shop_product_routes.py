@@ -29,8 +29,8 @@ def get_products_by_shop(shop_id):
       - in: query
         name: sort_by
         type: string
-        enum: [created_at, product_name, selling_price, special_price]
-        description: Field to sort by (default: created_at)
+        enum: [created_at, product_name, price, selling_price, special_price]
+        description: Field to sort by (default: created_at). Price fields sort by the current price, special included.
       - in: query
         name: order
         type: string
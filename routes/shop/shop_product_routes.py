@@ -608,3 +608,80 @@ def create_product_step6():
         description: Product not found
     """
     return ShopProductController.create_product_step6()
+
+@shop_product_bp.route('/api/shop/<int:shop_id>/products/import', methods=['POST'])
+@cross_origin()
+@superadmin_required
+def import_products(shop_id):
+    """
+    Bulk import products and variants from a CSV, XLSX, JSONL or JSON upload
+    ---
+    tags:
+      - Shop Products
+    security:
+      - Bearer: []
+    consumes:
+      - multipart/form-data
+      - text/csv
+      - application/x-ndjson
+      - application/json
+    parameters:
+      - in: path
+        name: shop_id
+        type: integer
+        required: true
+      - in: formData
+        name: file
+        type: file
+        required: false
+        description: |
+          One row per product or variant: sku, parent_sku (variants), variant_name, is_default,
+          product_name, product_description, category_id, brand_id, cost_price, selling_price,
+          special_price, special_start, special_end, discount_pct, is_published, stock_qty,
+          low_stock_threshold, meta fields, media_urls ('|' separated), attributes (JSON object keyed
+          by shop attribute name) or attr:<name> columns. Alternatively send the rows as the raw body.
+    responses:
+      202:
+        description: Import job queued; poll GET /api/shop/{shop_id}/products/import/{job_id}
+      400:
+        description: Unsupported or missing upload
+      401:
+        description: Unauthorized
+      403:
+        description: Forbidden
+      404:
+        description: Shop not found
+    """
+    return ShopProductController.import_products(shop_id)
+
+@shop_product_bp.route('/api/shop/<int:shop_id>/products/import/<int:job_id>', methods=['GET'])
+@cross_origin()
+@superadmin_required
+def get_import_job(shop_id, job_id):
+    """
+    Progress of a shop catalog import, with its row errors
+    ---
+    tags:
+      - Shop Products
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: shop_id
+        type: integer
+        required: true
+      - in: path
+        name: job_id
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Job status, progress counters and per-row errors
+      401:
+        description: Unauthorized
+      403:
+        description: Forbidden
+      404:
+        description: Import job not found
+    """
+    return ShopProductController.get_import_job(shop_id, job_id)
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify, current_app
 from controllers.shop.shop_stock_controller import ShopStockController
+from services.inventory_import_service import InventoryImportService
 from flask_cors import cross_origin
 from common.decorators import superadmin_required
 from http import HTTPStatus
@@ -554,6 +555,92 @@ def batch_update_shop_stock(shop_id):
             return jsonify({'message': getattr(e, 'description', str(e))}), e.code
         return jsonify({'message': "Failed to batch update stock."}), HTTPStatus.INTERNAL_SERVER_ERROR
 
+@shop_stock_bp.route('/api/shop/<int:shop_id>/inventory/import', methods=['POST'])
+@cross_origin()
+@superadmin_required
+def import_shop_stock(shop_id):
+    """
+    Bulk import stock for a shop from a CSV, JSONL or JSON upload
+    ---
+    tags:
+      - Shop Inventory Management
+    security:
+      - Bearer: []
+    consumes:
+      - multipart/form-data
+      - text/csv
+      - application/x-ndjson
+      - application/json
+    parameters:
+      - name: shop_id
+        in: path
+        type: integer
+        required: true
+        description: Shop ID
+      - name: file
+        in: formData
+        type: file
+        required: false
+        description: CSV (product_id, stock_qty, low_stock_threshold) or JSONL file; alternatively send the rows as the raw request body
+    responses:
+      200:
+        description: Per-row import results and a summary
+        schema:
+          type: object
+          properties:
+            results:
+              type: array
+              items:
+                type: object
+                properties:
+                  row:
+                    type: integer
+                  product_id:
+                    type: integer
+                  status:
+                    type: string
+                    enum: [success, error]
+                  stock_qty:
+                    type: integer
+                  low_stock_threshold:
+                    type: integer
+                  message:
+                    type: string
+            summary:
+              type: object
+              properties:
+                total:
+                  type: integer
+                succeeded:
+                  type: integer
+                failed:
+                  type: integer
+      400:
+        description: Unsupported or malformed upload
+      500:
+        description: Internal server error
+    """
+    try:
+        upload = request.files.get('file')
+        if upload:
+            fmt = InventoryImportService.detect_format(upload.filename, upload.mimetype)
+            stream = upload.stream
+        else:
+            fmt = InventoryImportService.detect_format(content_type=request.content_type)
+            stream = request.stream
+        if not fmt:
+            return jsonify({'message': 'Upload must be CSV, JSONL or JSON'}), HTTPStatus.BAD_REQUEST
+        
+        report = ShopStockController.import_stock(shop_id, stream, fmt)
+        return jsonify(report), HTTPStatus.OK
+    except ValueError as e:
+        return jsonify({'message': str(e)}), HTTPStatus.BAD_REQUEST
+    except Exception as e:
+        logger.error(f"Error importing stock for shop {shop_id}: {e}")
+        if hasattr(e, 'code') and isinstance(e.code, int):
+            return jsonify({'message': getattr(e, 'description', str(e))}), e.code
+        return jsonify({'message': "Failed to import stock."}), HTTPStatus.INTERNAL_SERVER_ERROR
+
 # Global Stock Management (for superadmin)
 @shop_stock_bp.route('/api/shop/inventory/low-stock', methods=['GET'])
 @cross_origin()
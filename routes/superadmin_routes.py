@@ -4,6 +4,7 @@ from flask_jwt_extended import get_jwt_identity
 import cloudinary
 import cloudinary.uploader
 from common.database import db
+from common.pagination import get_keyset_args, keyset_meta
 from marshmallow import ValidationError
 from models.brand import Brand
 from models.category import Category
@@ -44,7 +45,8 @@ from controllers.superadmin.merchant_transaction_controller import (
     list_all_transactions, get_transaction_by_id, mark_as_paid,
     calculate_fee_preview, create_merchant_transaction_from_order,
     bulk_create_transactions_for_orders, get_merchant_transaction_summary,
-    get_merchant_pending_payments, bulk_mark_as_paid, get_transaction_statistics
+    get_merchant_pending_payments, bulk_mark_as_paid, get_transaction_statistics,
+    generate_settlements_for_day, get_merchant_payable_balance, list_transactions_page
 )
 
 from controllers.superadmin.profile_controller import (
@@ -3740,6 +3742,22 @@ def list_products():
     ---
     tags:
       - Product Monitoring
+    parameters:
+      - name: cursor
+        in: query
+        type: string
+        description: Opaque keyset cursor; send an empty value for the first page. When present the response is an object with products and pagination (next_cursor, has_next, total).
+      - name: per_page
+        in: query
+        type: integer
+        default: 20
+        description: Page size for cursor pagination
+      - name: total
+        in: query
+        type: string
+        enum: [none, approx, exact]
+        default: none
+        description: Whether to include a total count with cursor pagination
     responses:
       200:
         description: List of products retrieved successfully
@@ -3760,11 +3778,23 @@ def list_products():
         return '', HTTPStatus.OK
         
     try:
+        keyset = get_keyset_args(request.args)
+        if keyset:
+            page = ProductController.list_page(keyset)
+            return jsonify({
+                'products': [{
+                    'product_id': p.product_id,
+                    'product_name': p.product_name
+                } for p in page['items']],
+                'pagination': keyset_meta(page)
+            }), HTTPStatus.OK
         products = ProductController.list_all()
         return jsonify([{
             'product_id': p.product_id,
             'product_name': p.product_name
         } for p in products]), HTTPStatus.OK
+    except ValueError as e:
+        return jsonify({'message': str(e)}), HTTPStatus.BAD_REQUEST
     except Exception as e:
         current_app.logger.error(f"Error listing products: {e}")
         return jsonify({'message': 'Failed to retrieve products.'}), HTTPStatus.INTERNAL_SERVER_ERROR
@@ -4268,6 +4298,13 @@ def system_health_route():
     result = SystemMonitoringController.get_system_health(hours)
     return jsonify(result), 200 if result['status'] == 'success' else 500
 
+@superadmin_bp.route('/monitoring/system/pools', methods=['GET'])
+@super_admin_role_required
+def pool_metrics_route():
+    """Get connection pool usage (checked-out, overflow, checkout wait, queries per request) for this worker"""
+    result = SystemMonitoringController.get_pool_metrics()
+    return jsonify(result), 200 if result['status'] == 'success' else 500
+
 @superadmin_bp.route('/users', methods=['GET', 'OPTIONS'])
 @cross_origin()
 @super_admin_role_required
@@ -4751,9 +4788,23 @@ def subscribe_newsletter():
 @super_admin_role_required
 def get_newsletter_subscribers():
     """
-    Get a list of all newsletter subscribers
+    Get a list of all newsletter subscribers.
+    Pass `cursor` (empty for the first page) with `per_page` for keyset pagination.
     """
     try:
+        keyset = get_keyset_args(request.args)
+        if keyset:
+            page = NewsletterController.list_page(keyset)
+            return jsonify({
+                'subscribers': [
+                    {
+                        'id': s.id,
+                        'email': s.email,
+                        'created_at': s.created_at.isoformat() if s.created_at else None
+                    } for s in page['items']
+                ],
+                'pagination': keyset_meta(page)
+            }), 200
         subscribers = NewsletterController.list_all()
         return jsonify([
             {
@@ -4762,9 +4813,209 @@ def get_newsletter_subscribers():
                 'created_at': s.created_at.isoformat() if s.created_at else None
             } for s in subscribers
         ]), 200
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': f'Failed to retrieve newsletter subscribers: {str(e)}'}), 500
 
+
+@superadmin_bp.route('/newsletter/campaigns', methods=['POST'])
+@super_admin_role_required
+def create_newsletter_campaign():
+    """
+    Create a draft newsletter campaign
+    ---
+    tags:
+      - Newsletter
+    security:
+      - Bearer: []
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required: [subject, body_html]
+          properties:
+            subject:
+              type: string
+            heading:
+              type: string
+            body_html:
+              type: string
+              description: Jinja template for the email body, rendered once per campaign
+    responses:
+      201:
+        description: Draft campaign created
+      400:
+        description: Missing fields or invalid template
+    """
+    try:
+        campaign = NewsletterController.create_campaign(request.get_json() or {}, get_jwt_identity())
+        return jsonify(campaign.serialize(include_body=True)), HTTPStatus.CREATED
+    except ValueError as e:
+        return jsonify({'message': str(e)}), HTTPStatus.BAD_REQUEST
+    except Exception as e:
+        current_app.logger.error(f"Error creating newsletter campaign: {e}")
+        return jsonify({'message': 'Failed to create newsletter campaign.'}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@superadmin_bp.route('/newsletter/campaigns', methods=['GET'])
+@super_admin_role_required
+def list_newsletter_campaigns():
+    """
+    List the latest newsletter campaigns with their progress
+    ---
+    tags:
+      - Newsletter
+    security:
+      - Bearer: []
+    responses:
+      200:
+        description: Campaigns, newest first
+    """
+    campaigns = NewsletterController.list_campaigns()
+    return jsonify([campaign.serialize() for campaign in campaigns]), HTTPStatus.OK
+
+
+@superadmin_bp.route('/newsletter/campaigns/<int:campaign_id>', methods=['GET'])
+@super_admin_role_required
+def get_newsletter_campaign(campaign_id):
+    """
+    Get a newsletter campaign and its delivery progress
+    ---
+    tags:
+      - Newsletter
+    security:
+      - Bearer: []
+    parameters:
+      - name: campaign_id
+        in: path
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Campaign with progress counters
+      404:
+        description: Campaign not found
+    """
+    campaign = NewsletterController.get_campaign(campaign_id)
+    if not campaign:
+        return jsonify({'message': 'Campaign not found.'}), HTTPStatus.NOT_FOUND
+    return jsonify(campaign.serialize(include_body=True)), HTTPStatus.OK
+
+
+@superadmin_bp.route('/newsletter/campaigns/<int:campaign_id>/send', methods=['POST'])
+@super_admin_role_required
+def send_newsletter_campaign(campaign_id):
+    """
+    Start sending a draft campaign, or resume a paused, failed or interrupted one
+    ---
+    tags:
+      - Newsletter
+    security:
+      - Bearer: []
+    parameters:
+      - name: campaign_id
+        in: path
+        type: integer
+        required: true
+    responses:
+      202:
+        description: Campaign queued; poll GET /newsletter/campaigns/{campaign_id} for progress
+      400:
+        description: Campaign already sent or currently sending
+      404:
+        description: Campaign not found
+    """
+    try:
+        campaign = NewsletterController.send_campaign(campaign_id)
+        if not campaign:
+            return jsonify({'message': 'Campaign not found.'}), HTTPStatus.NOT_FOUND
+        return jsonify(campaign.serialize()), HTTPStatus.ACCEPTED
+    except ValueError as e:
+        return jsonify({'message': str(e)}), HTTPStatus.BAD_REQUEST
+    except Exception as e:
+        current_app.logger.error(f"Error sending newsletter campaign {campaign_id}: {e}")
+        return jsonify({'message': 'Failed to send newsletter campaign.'}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@superadmin_bp.route('/newsletter/campaigns/<int:campaign_id>/pause', methods=['POST'])
+@super_admin_role_required
+def pause_newsletter_campaign(campaign_id):
+    """
+    Pause a sending campaign after its current chunk
+    ---
+    tags:
+      - Newsletter
+    security:
+      - Bearer: []
+    parameters:
+      - name: campaign_id
+        in: path
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Campaign paused; POST .../send resumes it
+      400:
+        description: Campaign is not queued or sending
+      404:
+        description: Campaign not found
+    """
+    try:
+        campaign = NewsletterController.pause_campaign(campaign_id)
+        if not campaign:
+            return jsonify({'message': 'Campaign not found.'}), HTTPStatus.NOT_FOUND
+        return jsonify(campaign.serialize()), HTTPStatus.OK
+    except ValueError as e:
+        return jsonify({'message': str(e)}), HTTPStatus.BAD_REQUEST
+
+
+@superadmin_bp.route('/newsletter/campaigns/<int:campaign_id>/deliveries', methods=['GET'])
+@super_admin_role_required
+def list_newsletter_deliveries(campaign_id):
+    """
+    Page through a campaign's per-recipient delivery state
+    ---
+    tags:
+      - Newsletter
+    security:
+      - Bearer: []
+    parameters:
+      - name: campaign_id
+        in: path
+        type: integer
+        required: true
+      - name: status
+        in: query
+        type: string
+        enum: [pending, sent, failed]
+      - name: after_id
+        in: query
+        type: integer
+        description: delivery_id of the last row of the previous page
+      - name: per_page
+        in: query
+        type: integer
+        default: 100
+    responses:
+      200:
+        description: Deliveries in delivery_id order with the cursor for the next page
+      404:
+        description: Campaign not found
+    """
+    if not NewsletterController.get_campaign(campaign_id):
+        return jsonify({'message': 'Campaign not found.'}), HTTPStatus.NOT_FOUND
+    per_page = max(1, min(request.args.get('per_page', 100, type=int), 500))
+    deliveries = NewsletterController.list_deliveries(
+        campaign_id, status=request.args.get('status'), after_id=request.args.get('after_id', 0, type=int), limit=per_page
+    )
+    return jsonify({
+        'deliveries': [delivery.serialize() for delivery in deliveries],
+        'next_after_id': deliveries[-1].delivery_id if len(deliveries) == per_page else None
+    }), HTTPStatus.OK
+
 #--- Merchant Transaction Related ----
 @superadmin_bp.route('/merchant-transactions', methods=['GET'])
 @super_admin_role_required
@@ -4796,6 +5047,21 @@ def get_all_merchant_transactions():
         type: string
         format: date
         description: Filter to date (YYYY-MM-DD)
+      - name: cursor
+        in: query
+        type: string
+        description: Opaque keyset cursor; send an empty value for the first page. When present the response is an object with transactions and pagination (next_cursor, has_next, total).
+      - name: per_page
+        in: query
+        type: integer
+        default: 20
+        description: Page size for cursor pagination
+      - name: total
+        in: query
+        type: string
+        enum: [none, approx, exact]
+        default: none
+        description: Whether to include a total count with cursor pagination
     responses:
       200:
         description: List of merchant transactions retrieved successfully
@@ -4841,6 +5107,12 @@ def get_all_merchant_transactions():
         "from_date": request.args.get("from"),
         "to_date": request.args.get("to")
     }
+    try:
+        keyset = get_keyset_args(request.args)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    if keyset:
+        return jsonify(list_transactions_page(filters, keyset)), 200
     txns = list_all_transactions(filters)
     return jsonify([txn.serialize() for txn in txns]), 200
 
@@ -5054,7 +5326,7 @@ def create_transaction_from_order():
                 type: string
                 format: date
       400:
-        description: Bad request - Invalid order ID
+        description: Bad request - Invalid order ID or settlement date, or the order is not settleable
       404:
         description: Order not found
       500:
@@ -5072,6 +5344,9 @@ def create_transaction_from_order():
         
         transactions = create_merchant_transaction_from_order(data['order_id'], settlement_date)
         return jsonify([txn.serialize() for txn in transactions]), 201
+    except ValueError as e:
+        # Malformed settlement_date, or an order that cannot be settled
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Error creating transactions from order: {e}")
         return jsonify({'message': f'Failed to create transactions: {str(e)}'}), 500
@@ -5260,6 +5535,110 @@ def get_merchant_pending_transactions(merchant_id):
         current_app.logger.error(f"Error getting pending transactions for merchant {merchant_id}: {e}")
         return jsonify({'message': 'Failed to get pending transactions'}), 500
 
+@superadmin_bp.route('/merchant-transactions/merchant/<int:merchant_id>/balance', methods=['GET'])
+@super_admin_role_required
+def get_merchant_balance(merchant_id):
+    """
+    Get the materialized payable balance for a merchant
+    ---
+    tags:
+      - Merchant Transactions
+    security:
+      - Bearer: []
+    parameters:
+      - name: merchant_id
+        in: path
+        type: integer
+        required: true
+        description: ID of the merchant
+    responses:
+      200:
+        description: Balance retrieved successfully
+        schema:
+          type: object
+          properties:
+            merchant_id:
+              type: integer
+            pending_amount:
+              type: number
+            paid_amount:
+              type: number
+            pending_count:
+              type: integer
+            paid_count:
+              type: integer
+            updated_at:
+              type: string
+              format: date-time
+      500:
+        description: Internal server error
+    """
+    try:
+        return jsonify(get_merchant_payable_balance(merchant_id)), 200
+    except Exception as e:
+        current_app.logger.error(f"Error getting payable balance for merchant {merchant_id}: {e}")
+        return jsonify({'message': 'Failed to get merchant balance'}), 500
+
+@superadmin_bp.route('/merchant-transactions/generate-daily', methods=['POST'])
+@super_admin_role_required
+def generate_daily_settlements():
+    """
+    Create merchant transactions for all settleable orders placed on a given day
+    ---
+    tags:
+      - Merchant Transactions
+    security:
+      - Bearer: []
+    parameters:
+      - in: body
+        name: body
+        required: false
+        schema:
+          type: object
+          properties:
+            order_date:
+              type: string
+              format: date
+              description: Day whose orders are settled (defaults to yesterday)
+            settlement_date:
+              type: string
+              format: date
+              description: Settlement date for created transactions (defaults to today)
+    responses:
+      201:
+        description: Settlements generated
+        schema:
+          type: object
+          properties:
+            order_day:
+              type: string
+              format: date
+            orders_considered:
+              type: integer
+            transactions_created:
+              type: integer
+            total_payable:
+              type: number
+      400:
+        description: Bad request - Invalid date
+      500:
+        description: Internal server error
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        from datetime import date
+        order_day = date.fromisoformat(data['order_date']) if data.get('order_date') else None
+        settlement_date = date.fromisoformat(data['settlement_date']) if data.get('settlement_date') else None
+    except ValueError:
+        return jsonify({'message': 'Dates must be in YYYY-MM-DD format'}), 400
+
+    try:
+        result = generate_settlements_for_day(order_day, settlement_date)
+        return jsonify(result), 201
+    except Exception as e:
+        current_app.logger.error(f"Error generating daily settlements: {e}")
+        return jsonify({'message': f'Failed to generate settlements: {str(e)}'}), 500
+
 @superadmin_bp.route('/merchant-transactions/bulk-mark-paid', methods=['POST'])
 @super_admin_role_required
 def bulk_mark_transactions_paid():
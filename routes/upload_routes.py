@@ -1,10 +1,11 @@
-from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required
+from flask import Blueprint, request, jsonify, current_app, send_file
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.utils import secure_filename
 import cloudinary
 import cloudinary.uploader
 from http import HTTPStatus
 import os
+from services.signed_upload_service import SignedUploadService, SignedUploadError
 
 upload_bp = Blueprint('upload', __name__)
 
@@ -234,3 +235,192 @@ def delete_media():
     except Exception as e:
         current_app.logger.error(f"Media deletion failed: {str(e)}")
         return jsonify({'error': f'Deletion failed: {str(e)}'}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+@upload_bp.route('/signed', methods=['POST'])
+@jwt_required()
+def issue_signed_upload():
+    """
+    Issue signed parameters for uploading one file directly to storage
+    ---
+    tags:
+      - Upload
+    security:
+      - Bearer: []
+    consumes:
+      - application/json
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - purpose
+            - content_type
+          properties:
+            purpose:
+              type: string
+              enum: [product_image, product_video, merchant_document, support_attachment, live_stream_thumbnail]
+            content_type:
+              type: string
+              description: MIME type of the file
+            file_name:
+              type: string
+            file_size:
+              type: integer
+              description: Size in bytes; files over UPLOAD_CHUNK_SIZE are uploaded in chunks
+    responses:
+      200:
+        description: >
+          Upload parameters. POST the file as file_field together with fields to upload_url.
+          When chunked, send chunk_size pieces with headers X-Unique-Upload-Id (unique_upload_id)
+          and Content-Range (bytes start-end/total). Then call /signed/complete.
+        schema:
+          type: object
+          properties:
+            upload_url:
+              type: string
+            resource_type:
+              type: string
+            file_field:
+              type: string
+            fields:
+              type: object
+            max_bytes:
+              type: integer
+            expires_at:
+              type: string
+            upload_token:
+              type: string
+            chunked:
+              type: boolean
+            chunk_size:
+              type: integer
+            unique_upload_id:
+              type: string
+      400:
+        description: Invalid purpose, file type or size
+    """
+    data = request.get_json() or {}
+    if not data.get('purpose') or not data.get('content_type'):
+        return jsonify({'error': 'purpose and content_type are required'}), HTTPStatus.BAD_REQUEST
+    try:
+        file_size = int(data['file_size']) if data.get('file_size') is not None else None
+        upload = SignedUploadService.issue(
+            data['purpose'], get_jwt_identity(), data['content_type'],
+            file_name=data.get('file_name'), file_size=file_size
+        )
+        return jsonify(upload), HTTPStatus.OK
+    except (SignedUploadError, ValueError) as e:
+        return jsonify({'error': str(e)}), HTTPStatus.BAD_REQUEST
+
+@upload_bp.route('/signed/complete', methods=['POST'])
+@jwt_required()
+def complete_signed_upload():
+    """
+    Verify a direct upload and get the asset_token that attaches it
+    ---
+    tags:
+      - Upload
+    security:
+      - Bearer: []
+    consumes:
+      - application/json
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - upload_token
+          properties:
+            upload_token:
+              type: string
+            result:
+              type: object
+              description: >
+                The upload response (public_id, version, signature, secure_url, bytes, format,
+                resource_type). Omit it to use the upload notification Cloudinary sent instead.
+    responses:
+      200:
+        description: Asset verified; same fields as /image plus asset_token
+      400:
+        description: Invalid or expired token, or an upload result that does not verify
+    """
+    data = request.get_json() or {}
+    if not data.get('upload_token'):
+        return jsonify({'error': 'upload_token is required'}), HTTPStatus.BAD_REQUEST
+    try:
+        asset = SignedUploadService.complete(data['upload_token'], get_jwt_identity(), data.get('result'))
+        return jsonify(asset), HTTPStatus.OK
+    except SignedUploadError as e:
+        return jsonify({'error': str(e)}), HTTPStatus.BAD_REQUEST
+
+@upload_bp.route('/signed/notify', methods=['POST'])
+def signed_upload_notification():
+    """
+    Cloudinary upload notification callback (notification_url of signed uploads)
+    ---
+    tags:
+      - Upload
+    responses:
+      200:
+        description: Notification recorded
+      401:
+        description: Invalid notification signature
+    """
+    try:
+        public_id = SignedUploadService.record_notification(
+            request.get_data(as_text=True),
+            request.headers.get('X-Cld-Timestamp'),
+            request.headers.get('X-Cld-Signature')
+        )
+        return jsonify({'public_id': public_id}), HTTPStatus.OK
+    except SignedUploadError as e:
+        return jsonify({'error': str(e)}), HTTPStatus.UNAUTHORIZED
+
+@upload_bp.route('/signed/local/<resource_type>/upload', methods=['POST'])
+def local_signed_upload(resource_type):
+    """
+    Local stand-in for Cloudinary's upload API (UPLOAD_BACKEND=local only)
+    ---
+    tags:
+      - Upload
+    consumes:
+      - multipart/form-data
+    responses:
+      200:
+        description: Cloudinary-shaped upload response ({done false} for intermediate chunks)
+      400:
+        description: Invalid signature or file
+    """
+    if not SignedUploadService.is_local():
+        return jsonify({'error': 'Not found'}), HTTPStatus.NOT_FOUND
+    try:
+        result = SignedUploadService.local_upload(
+            resource_type, request.form, request.files.get('file'),
+            content_range=request.headers.get('Content-Range'),
+            upload_id=request.headers.get('X-Unique-Upload-Id')
+        )
+        return jsonify(result), HTTPStatus.OK
+    except SignedUploadError as e:
+        return jsonify({'error': {'message': str(e)}}), HTTPStatus.BAD_REQUEST
+
+@upload_bp.route('/signed/local/files/<path:public_id>', methods=['GET'])
+def local_signed_file(public_id):
+    """
+    Serve a file uploaded to the local stub (UPLOAD_BACKEND=local only)
+    ---
+    tags:
+      - Upload
+    responses:
+      200:
+        description: File contents
+      404:
+        description: Not found
+    """
+    path = SignedUploadService.local_path(public_id) if SignedUploadService.is_local() else None
+    if not path or not os.path.isfile(path):
+        return jsonify({'error': 'Not found'}), HTTPStatus.NOT_FOUND
+    return send_file(path)
@@ -21,10 +21,12 @@ class CreateUserTicketSchema(Schema):
     )
     related_order_id = fields.Str(required=False, allow_none=True, validate=validate.Length(max=50))
     related_product_id = fields.Int(required=False, allow_none=True)
+    image_asset_token = fields.Str(required=False, allow_none=True)  # from /api/upload/signed/complete
     # image_file will be handled as form-data, not in JSON schema
 
 class AddUserMessageSchema(Schema):
     message_text = fields.Str(validate=validate.Length(min=1))
+    attachment_asset_token = fields.Str(required=False, allow_none=True)  # from /api/upload/signed/complete
     # attachment_file will be handled as form-data
 
 # --- User Support Ticket Routes ---
@@ -68,6 +70,11 @@ def create_user_ticket_route():
         in: formData
         type: file
         required: false
+      - name: image_asset_token
+        in: formData
+        type: string
+        required: false
+        description: asset_token of a support_attachment uploaded through /api/upload/signed, instead of image_file.
     responses:
       201:
         description: Support ticket created successfully.
@@ -126,7 +133,7 @@ def list_user_tickets_route():
         in: query
         type: string
         required: false
-        description: "Sort order (default: -updated_at)."
+        description: "Sort order (default: -last_activity_at)."
       - name: page
         in: query
         type: integer
@@ -150,7 +157,7 @@ def list_user_tickets_route():
     current_user_id = get_jwt_identity()
 
     status_filter = request.args.get('status')
-    sort_by = request.args.get('sort_by', '-updated_at') # Default sort by most recently updated
+    sort_by = request.args.get('sort_by', '-last_activity_at') # Default sort by most recent activity
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
 
@@ -215,6 +222,54 @@ def get_user_ticket_route(ticket_uid):
         current_app.logger.error(f"Error getting user ticket {ticket_uid} for user {current_user_id}: {e}")
         return jsonify({"error": "Failed to retrieve ticket details"}), 500
 
+@user_support_bp.route('/tickets/<string:ticket_uid>/messages', methods=['GET'])
+@jwt_required()
+def get_user_ticket_messages_route(ticket_uid):
+    """
+    Page through a support ticket's messages, newest page first.
+    ---
+    tags:
+      - User Support
+    security:
+      - Bearer: []
+    parameters:
+      - name: ticket_uid
+        in: path
+        type: string
+        required: true
+        description: "Unique identifier of the support ticket."
+      - name: before_id
+        in: query
+        type: integer
+        required: false
+        description: "Return messages older than this message id (next_before_id of the previous page)."
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        default: 50
+    responses:
+      200:
+        description: "One page of messages, oldest to newest."
+      401:
+        description: "Unauthorized."
+      404:
+        description: "Ticket not found."
+      500:
+        description: "Internal server error."
+    """
+    current_user_id = get_jwt_identity()
+    before_id = request.args.get('before_id', type=int)
+    limit = request.args.get('limit', type=int)
+    try:
+        page = UserSupportTicketController.get_user_ticket_messages(ticket_uid, current_user_id, before_id=before_id, limit=limit)
+        return jsonify(page), 200
+    except NotFound as e:
+        return jsonify({"error": e.description}), 404
+    except Exception as e:
+        current_app.logger.error(f"Error getting messages for user ticket {ticket_uid} for user {current_user_id}: {e}")
+        return jsonify({"error": "Failed to retrieve ticket messages"}), 500
+
 @user_support_bp.route('/tickets/<string:ticket_uid>/messages', methods=['POST'])
 @jwt_required()
 def add_user_message_route(ticket_uid):
@@ -243,6 +298,11 @@ def add_user_message_route(ticket_uid):
         type: file
         required: false
         description: "Optional file attachment."
+      - name: attachment_asset_token
+        in: formData
+        type: string
+        required: false
+        description: asset_token of a support_attachment uploaded through /api/upload/signed, instead of attachment_file.
     responses:
       201:
         description: "Message added successfully."
@@ -268,7 +328,7 @@ def add_user_message_route(ticket_uid):
 
     message_text = validated_data.get('message_text')
 
-    if not message_text and not attachment_file: # Check if at least one is present
+    if not message_text and not attachment_file and not validated_data.get('attachment_asset_token'): # Check if at least one is present
         return jsonify({"error": "Message text or an attachment is required."}), 400
         
     try:
@@ -276,7 +336,8 @@ def add_user_message_route(ticket_uid):
             ticket_uid=ticket_uid,
             creator_user_id=current_user_id, 
             message_text=message_text,
-            attachment_file=attachment_file
+            attachment_file=attachment_file,
+            attachment_asset_token=validated_data.get('attachment_asset_token')
         )
         return jsonify(message.serialize()), 201
     except (BadRequest, NotFound) as e:
@@ -252,4 +252,94 @@ def clear_wishlist():
         return jsonify({
             'status': 'error',
             'message': str(e)
-        }), 400 
\ No newline at end of file
+        }), 400
+
+# Price drop / back-in-stock notifications
+@wishlist_bp.route('/notifications', methods=['GET'])
+@jwt_required()
+def get_wishlist_notifications():
+    """
+    Get the authenticated user's price drop and back-in-stock notifications, covering both
+    the marketplace wishlist and shop wishlists, newest first
+    ---
+    tags:
+      - Wishlist
+    security:
+      - Bearer: []
+    parameters:
+      - name: unread
+        in: query
+        type: boolean
+        required: false
+        description: Only unread notifications
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: next_cursor of the previous page (empty or omitted for the first page)
+      - name: per_page
+        in: query
+        type: integer
+        required: false
+        default: 20
+    responses:
+      200:
+        description: One page of notifications with the unread count
+      400:
+        description: Invalid pagination cursor
+      401:
+        description: Unauthorized - Invalid or missing token
+      500:
+        description: Internal server error
+    """
+    try:
+        user_id = get_jwt_identity()
+        return WishlistController.get_notifications(user_id)
+    except Exception as e:
+        logger.error(f"Error getting wishlist notifications: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+@wishlist_bp.route('/notifications/read', methods=['POST'])
+@jwt_required()
+def mark_wishlist_notifications_read():
+    """
+    Mark wishlist notifications as read
+    ---
+    tags:
+      - Wishlist
+    security:
+      - Bearer: []
+    requestBody:
+      required: false
+      content:
+        application/json:
+          schema:
+            type: object
+            properties:
+              notification_ids:
+                type: array
+                items:
+                  type: integer
+                description: Notifications to mark read; omit to mark all read
+    responses:
+      200:
+        description: Notifications marked read
+      400:
+        description: Invalid notification_ids
+      401:
+        description: Unauthorized - Invalid or missing token
+      500:
+        description: Internal server error
+    """
+    try:
+        user_id = get_jwt_identity()
+        return WishlistController.mark_notifications_read(user_id)
+    except Exception as e:
+        logger.error(f"Error marking wishlist notifications read: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
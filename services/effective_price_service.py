@@ -0,0 +1,102 @@
+import logging
+import threading
+from datetime import datetime, timezone
+from apscheduler.schedulers.background import BackgroundScheduler
+from common.database import db
+from models.product import Product
+from models.shop.shop_product import ShopProduct
+from services.storefront_cache_service import StorefrontCacheService
+
+logger = logging.getLogger(__name__)
+
+
+class EffectivePriceService:
+    """
+    Keeps products.effective_price and shop_products.effective_price current as special
+    windows open and close.
+
+    ORM writes already recompute the columns (see the before_insert/before_update hooks on
+    the models); the only other way the value can go stale is the clock crossing a
+    special_start/special_end boundary. The refresh is a single set-based UPDATE per table
+    that only touches rows whose stored value no longer matches, so running it often is cheap.
+    """
+    REFRESH_INTERVAL_MINUTES = 15
+
+    @staticmethod
+    def _refresh(model, as_of):
+        price, discount = model.effective_price_expressions(as_of)
+        updated = model.query.filter(
+            db.or_(
+                model.effective_price.is_(None),
+                model.effective_discount_pct.is_(None),
+                # Only rows with a special can change without being written
+                db.and_(model.special_price.isnot(None), db.or_(
+                    model.effective_price != price,
+                    model.effective_discount_pct != discount
+                ))
+            )
+        ).update(
+            {model.effective_price: price, model.effective_discount_pct: discount},
+            synchronize_session=False
+        )
+        return updated
+
+    @staticmethod
+    def refresh_products(today=None):
+        """Re-derive marketplace product prices for today (special windows are dates)"""
+        return EffectivePriceService._refresh(Product, today or datetime.now(timezone.utc).date())
+
+    @staticmethod
+    def refresh_shop_products(now=None):
+        """Re-derive shop product prices as of now (special windows are UTC datetimes)"""
+        return EffectivePriceService._refresh(ShopProduct, now or datetime.now(timezone.utc).replace(tzinfo=None))
+
+    @staticmethod
+    def refresh_all():
+        """Refresh both catalogs and commit. Returns {'products': n, 'shop_products': n}"""
+        try:
+            result = {
+                'products': EffectivePriceService.refresh_products(),
+                'shop_products': EffectivePriceService.refresh_shop_products()
+            }
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        if result['shop_products']:
+            # Set-based update: the session listeners never see which storefronts changed
+            StorefrontCacheService.invalidate_all()
+        return result
+
+
+# Scheduler instance (started from app.py)
+scheduler = BackgroundScheduler(timezone='UTC')
+
+
+def start_effective_price_scheduler(app):
+    """
+    Refresh effective prices right after UTC midnight, when product special windows
+    (dates) turn over, and every EFFECTIVE_PRICE_REFRESH_MINUTES for shop product windows,
+    which can start or end at any time. Call once at app startup.
+    """
+    interval = app.config.get('EFFECTIVE_PRICE_REFRESH_MINUTES', EffectivePriceService.REFRESH_INTERVAL_MINUTES)
+    if not interval or scheduler.running:
+        return
+
+    def refresh():
+        with app.app_context():
+            try:
+                result = EffectivePriceService.refresh_all()
+                if any(result.values()):
+                    logger.info(f"Refreshed effective prices: {result}")
+            except Exception as e:
+                logger.warning(f"Effective price refresh failed: {str(e)}")
+            finally:
+                db.session.remove()
+
+    scheduler.add_job(refresh, 'cron', hour=0, minute=0, second=5, id='effective_price_midnight',
+                      max_instances=1, coalesce=True)
+    scheduler.add_job(refresh, 'interval', minutes=interval, id='effective_price_refresh',
+                      max_instances=1, coalesce=True)
+    # Use a thread to avoid blocking the main app
+    threading.Thread(target=scheduler.start, daemon=True).start()
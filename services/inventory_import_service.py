@@ -0,0 +1,198 @@
+import csv
+import io
+import json
+import logging
+from datetime import datetime, timezone
+from common.bulk import bulk_upsert
+from common.database import db
+
+logger = logging.getLogger(__name__)
+
+
+class InventoryImportService:
+    """
+    Set-based stock import shared by merchant and shop inventory.
+
+    Rows are validated in a streaming pass, ownership is checked with one IN query per
+    chunk and stock rows are written with one multi-row upsert per chunk, so a warehouse
+    sync of thousands of SKUs costs a handful of statements instead of two SELECTs per row.
+    """
+    CHUNK_SIZE = 1000
+    SUPPORTED_FORMATS = ('json', 'csv', 'jsonl')
+
+    @staticmethod
+    def detect_format(filename=None, content_type=None):
+        """Work out the upload format from a filename or content type"""
+        name = (filename or '').lower()
+        ctype = (content_type or '').lower()
+        if name.endswith('.csv') or 'csv' in ctype:
+            return 'csv'
+        if name.endswith(('.jsonl', '.ndjson')) or 'ndjson' in ctype or 'jsonl' in ctype:
+            return 'jsonl'
+        if name.endswith('.json') or 'json' in ctype:
+            return 'json'
+        return None
+
+    @staticmethod
+    def iter_rows(stream, fmt):
+        """Yield raw row dicts from a binary stream without reading the whole upload into memory"""
+        if fmt == 'json':
+            data = json.load(io.TextIOWrapper(stream, encoding='utf-8'))
+            if not isinstance(data, list):
+                raise ValueError("JSON upload must be a list of stock updates")
+            yield from data
+        elif fmt == 'csv':
+            yield from csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+        elif fmt == 'jsonl':
+            for line in io.TextIOWrapper(stream, encoding='utf-8'):
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            raise ValueError(f"Unsupported format. Use one of: {', '.join(InventoryImportService.SUPPORTED_FORMATS)}")
+
+    @staticmethod
+    def _to_int(value, field):
+        if value is None or value == '':
+            return None
+        try:
+            number = int(str(value).strip())
+        except (TypeError, ValueError):
+            raise ValueError(f"{field} must be an integer")
+        if number < 0:
+            raise ValueError(f"{field} must not be negative")
+        return number
+
+    @staticmethod
+    def parse_row(raw, id_field='product_id', default_threshold=None):
+        """Normalize one raw row into {product_id, stock_qty, low_stock_threshold}; raises ValueError"""
+        if not isinstance(raw, dict):
+            raise ValueError("Row must be an object")
+
+        product_id = InventoryImportService._to_int(raw.get(id_field), id_field)
+        if product_id is None:
+            raise ValueError(f"Missing {id_field}")
+
+        # Accept the documented `stock_quantity` alias as well as `stock_qty`
+        stock_value = raw.get('stock_qty', raw.get('stock_quantity'))
+        stock_qty = InventoryImportService._to_int(stock_value, 'stock_qty')
+        if stock_qty is None:
+            raise ValueError("Missing stock_qty")
+
+        threshold = InventoryImportService._to_int(raw.get('low_stock_threshold'), 'low_stock_threshold')
+        if threshold is None:
+            threshold = default_threshold
+
+        return {
+            'product_id': product_id,
+            'stock_qty': stock_qty,
+            'low_stock_threshold': threshold
+        }
+
+    @staticmethod
+    def _row_result(row):
+        threshold = row['low_stock_threshold']
+        return {
+            'row': row['row'],
+            'product_id': row['product_id'],
+            'status': 'success',
+            'stock_qty': row['stock_qty'],
+            'low_stock_threshold': threshold,
+            'available': row['stock_qty'] > 0,
+            'low_stock': threshold is not None and row['stock_qty'] <= threshold
+        }
+
+    @staticmethod
+    def _apply_chunk(stock_model, owned_ids_query, chunk, timestamped):
+        """Validate ownership and upsert one chunk of parsed rows; returns per-row results"""
+        requested_ids = {row['product_id'] for row in chunk}
+        owned_ids = {pid for (pid,) in owned_ids_query(requested_ids)}
+
+        results = []
+        # Later rows for the same product win, as they would with sequential updates
+        latest = {}
+        for row in chunk:
+            if row['product_id'] not in owned_ids:
+                results.append({
+                    'row': row['row'],
+                    'product_id': row['product_id'],
+                    'status': 'error',
+                    'message': 'Product not found or not owned by this account'
+                })
+                continue
+            latest[row['product_id']] = row
+            results.append(InventoryImportService._row_result(row))
+
+        now = datetime.now(timezone.utc)
+        with_threshold, without_threshold = [], []
+        for row in latest.values():
+            values = {'product_id': row['product_id'], 'stock_qty': row['stock_qty']}
+            if timestamped:
+                values['updated_at'] = now
+            if row['low_stock_threshold'] is None:
+                without_threshold.append(values)
+            else:
+                values['low_stock_threshold'] = row['low_stock_threshold']
+                with_threshold.append(values)
+
+        extra = ['updated_at'] if timestamped else []
+        # Rows that omit a threshold keep the stored one, so they are written separately
+        bulk_upsert(stock_model, with_threshold, ['stock_qty', 'low_stock_threshold'] + extra)
+        bulk_upsert(stock_model, without_threshold, ['stock_qty'] + extra)
+        return results
+
+    @staticmethod
+    def import_rows(stock_model, owned_ids_query, raw_rows, id_field='product_id',
+                    default_threshold=None, timestamped=False):
+        """
+        Apply stock updates from any iterable of raw rows.
+
+        owned_ids_query(ids) must return (product_id,) tuples for the ids the caller may
+        update. Returns per-row results in input order plus a summary.
+        """
+        results = []
+        chunk = []
+        chunk_results = []
+
+        def flush():
+            applied = iter(
+                InventoryImportService._apply_chunk(stock_model, owned_ids_query, chunk, timestamped)
+                if chunk else []
+            )
+            for entry in chunk_results:
+                results.append(next(applied) if entry is None else entry)
+            chunk.clear()
+            chunk_results.clear()
+
+        try:
+            for index, raw in enumerate(raw_rows, start=1):
+                try:
+                    row = InventoryImportService.parse_row(raw, id_field, default_threshold)
+                    row['row'] = index
+                    chunk.append(row)
+                    chunk_results.append(None)
+                except ValueError as e:
+                    product_id = raw.get(id_field) if isinstance(raw, dict) else None
+                    chunk_results.append({
+                        'row': index,
+                        'product_id': product_id,
+                        'status': 'error',
+                        'message': str(e)
+                    })
+                if len(chunk) >= InventoryImportService.CHUNK_SIZE:
+                    flush()
+            flush()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        succeeded = sum(1 for result in results if result['status'] == 'success')
+        return {
+            'results': results,
+            'summary': {
+                'total': len(results),
+                'succeeded': succeeded,
+                'failed': len(results) - succeeded
+            }
+        }
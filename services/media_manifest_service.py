@@ -0,0 +1,212 @@
+import logging
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from common.database import db
+from models.enums import MediaType
+from models.product import Product
+from models.product_media import ProductMedia
+from models.shop.shop_product import ShopProduct
+from models.shop.shop_product_media import ShopProductMedia
+
+logger = logging.getLogger(__name__)
+
+# Product model -> its media model
+MEDIA_MODELS = {Product: ProductMedia, ShopProduct: ShopProductMedia}
+
+
+class MediaManifestService:
+    """
+    Per-product media manifests, stored in products.media_manifest and
+    shop_products.media_manifest.
+
+    A manifest holds the primary image and the ordered gallery, with thumbnail, card and
+    zoom renditions (Cloudinary transformation URLs with their dimensions, plus a srcset)
+    for every image, so reads never re-sort media or re-derive the primary image. Manifests
+    are rebuilt inside the transaction that changes a product's media: the session
+    listeners below cover every ORM write, and bulk deletes call schedule() themselves.
+    """
+    VERSION = 1
+
+    # name -> (width, height, Cloudinary crop mode); zoom only ever scales down
+    SIZES = {
+        'thumbnail': (150, 150, 'fill'),
+        'card': (400, 400, 'fill'),
+        'zoom': (1200, 1200, 'limit')
+    }
+
+    @staticmethod
+    def transform_url(url, width, height, crop):
+        """
+        Cloudinary delivery URL for a resized rendition, or None when the URL is not a
+        Cloudinary image upload (those are served as stored).
+        """
+        marker = '/image/upload/'
+        if not url or 'res.cloudinary.com' not in url or marker not in url:
+            return None
+        base, path = url.split(marker, 1)
+        return f"{base}{marker}c_{crop},w_{width},h_{height},q_auto,f_auto/{path}"
+
+    @staticmethod
+    def image_renditions(url):
+        """({size name: {url, width, height}}, srcset) for an image URL; (None, None) if it can't be resized"""
+        sizes = {}
+        for name, (width, height, crop) in MediaManifestService.SIZES.items():
+            resized = MediaManifestService.transform_url(url, width, height, crop)
+            if resized is None:
+                return None, None
+            sizes[name] = {'url': resized, 'width': width, 'height': height}
+        srcset = ', '.join(f"{size['url']} {size['width']}w"
+                           for size in sorted(sizes.values(), key=lambda size: size['width']))
+        return sizes, srcset
+
+    @staticmethod
+    def build(media_list):
+        """
+        Manifest for one product's live media, given in (sort_order, media_id) order. The
+        primary image is the first image in that order.
+        """
+        gallery = []
+        primary = None
+        for media in media_list:
+            media_type = media.type.value if hasattr(media.type, 'value') else str(media.type)
+            entry = {
+                'media_id': media.media_id,
+                'type': media_type,
+                'url': media.url,
+                'sort_order': media.sort_order,
+                'is_primary': False
+            }
+            if media_type == MediaType.IMAGE.value:
+                entry['sizes'], entry['srcset'] = MediaManifestService.image_renditions(media.url)
+                if primary is None:
+                    entry['is_primary'] = True
+                    primary = entry
+            gallery.append(entry)
+
+        return {
+            'version': MediaManifestService.VERSION,
+            'primary_image': primary['url'] if primary else None,
+            'primary': primary,
+            'gallery': gallery,
+            'total_media': len(gallery)
+        }
+
+    @staticmethod
+    def _live_media(media_model, product_ids, connection=None):
+        """{product_id: [media rows]} for live media in gallery order"""
+        statement = select(
+            media_model.product_id, media_model.media_id, media_model.type, media_model.url, media_model.sort_order
+        ).where(
+            media_model.product_id.in_(product_ids),
+            media_model.deleted_at.is_(None)
+        ).order_by(media_model.product_id, media_model.sort_order, media_model.media_id)
+        rows = (connection or db.session).execute(statement).all()
+        media_by_product = {product_id: [] for product_id in product_ids}
+        for row in rows:
+            media_by_product[row.product_id].append(row)
+        return media_by_product
+
+    @staticmethod
+    def refresh(model, product_ids, connection=None):
+        """
+        Rebuild and store the manifests of product_ids (Product or ShopProduct). Does not
+        commit. Returns the number of products updated.
+        """
+        product_ids = sorted({pid for pid in product_ids if pid is not None})
+        if not product_ids:
+            return 0
+
+        media_model = MEDIA_MODELS[model]
+        executor = connection or db.session
+        media_by_product = MediaManifestService._live_media(media_model, product_ids, connection)
+        for product_id, media_list in media_by_product.items():
+            # updated_at is written back unchanged: a media edit is not a product edit
+            executor.execute(
+                update(model.__table__).where(
+                    model.__table__.c.product_id == product_id
+                ).values(
+                    media_manifest=MediaManifestService.build(media_list),
+                    updated_at=model.__table__.c.updated_at
+                )
+            )
+        return len(product_ids)
+
+    @staticmethod
+    def get(model, product):
+        """A loaded product's manifest; built on the fly if it has not been stored yet"""
+        if product.media_manifest is not None:
+            return product.media_manifest
+        media_by_product = MediaManifestService._live_media(MEDIA_MODELS[model], [product.product_id])
+        return MediaManifestService.build(media_by_product[product.product_id])
+
+    @staticmethod
+    def get_by_id(model, product_id):
+        """Manifest for a product id (one column read), or None if the product does not exist"""
+        row = db.session.query(model.media_manifest).filter(model.product_id == product_id).first()
+        if row is None:
+            return None
+        if row.media_manifest is not None:
+            return row.media_manifest
+        media_by_product = MediaManifestService._live_media(MEDIA_MODELS[model], [product_id])
+        return MediaManifestService.build(media_by_product[product_id])
+
+    @staticmethod
+    def media_item(entry):
+        """Essential fields of one gallery entry for API responses"""
+        item = {'url': entry['url'], 'type': entry['type'], 'is_primary': entry['is_primary']}
+        if entry.get('sizes'):
+            item['sizes'] = entry['sizes']
+            item['srcset'] = entry['srcset']
+        return item
+
+    @staticmethod
+    def optimized(manifest):
+        """The storefront media payload (images, videos, primary_image, total_media) from a manifest"""
+        manifest = manifest or MediaManifestService.build([])
+        gallery = manifest['gallery']
+        return {
+            'images': [MediaManifestService.media_item(e) for e in gallery if e['type'] == MediaType.IMAGE.value],
+            'videos': [MediaManifestService.media_item(e) for e in gallery if e['type'] == MediaType.VIDEO.value],
+            'primary_image': manifest['primary_image'],
+            'total_media': manifest['total_media']
+        }
+
+    @staticmethod
+    def schedule(model, *product_ids):
+        """Rebuild these products' manifests when the current transaction commits (for bulk writes)"""
+        _pending(db.session()).setdefault(model, set()).update(product_ids)
+
+
+def _pending(session):
+    return session.info.setdefault('media_manifest_products', {})
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_media_writes(session, flush_context):
+    for instance in [*session.new, *session.dirty, *session.deleted]:
+        for model, media_model in MEDIA_MODELS.items():
+            if isinstance(instance, media_model):
+                _pending(session).setdefault(model, set()).add(instance.product_id)
+
+
+@event.listens_for(Session, 'before_commit')
+def _rebuild_manifests(session):
+    # Write out pending changes first (commit would flush next anyway) so media edits are
+    # collected and the manifests see them
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    pending = session.info.pop('media_manifest_products', None)
+    if not pending:
+        return
+    connection = session.connection()
+    for model, product_ids in pending.items():
+        MediaManifestService.refresh(model, product_ids, connection)
+        for product_id in product_ids:
+            product = session.identity_map.get(session.identity_key(model, product_id))
+            if product is not None:
+                session.expire(product, ['media_manifest'])
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_media_writes(session):
+    session.info.pop('media_manifest_products', None)
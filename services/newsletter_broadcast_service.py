@@ -0,0 +1,507 @@
+import logging
+import smtplib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email import policy
+from email.message import EmailMessage
+from email.utils import formataddr, formatdate, make_msgid, parseaddr
+from flask import current_app
+from jinja2 import StrictUndefined, TemplateError, TemplateSyntaxError
+from jinja2.sandbox import SandboxedEnvironment
+from sqlalchemy import bindparam, func, insert, update
+from auth.email_utils import wrap_email_html
+from common.database import db
+from models.newsletter_campaign import NewsletterCampaign, NewsletterDelivery
+from models.newsletter_subscription import NewsletterSubscription
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Campaign bodies are written by admins but mailed to every subscriber, so they render in a
+# sandbox without Flask's globals (config, request, session, url_for), with only CAMPAIGN_CONTEXT
+_campaign_env = SandboxedEnvironment(autoescape=True, undefined=StrictUndefined)
+CAMPAIGN_CONTEXT = ('heading', 'frontend_url', 'year')
+
+
+class DomainThrottle:
+    """Spaces messages to each recipient domain at most `rate` per second, across all sender threads"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, domain):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(domain, now))
+            self._next_slot[domain] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class SmtpConnectionPool:
+    """
+    One SMTP connection per sender thread, opened on first use and reused for up to
+    max_messages messages (many relays cap messages per session). A connection the server
+    dropped is reopened once before the send is reported as failed.
+    """
+
+    def __init__(self, settings, max_messages):
+        self.settings = settings
+        self.max_messages = max_messages
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        settings = self.settings
+        connection = smtplib.SMTP(settings['host'], settings['port'], timeout=settings['timeout'])
+        if settings['use_tls']:
+            connection.starttls()
+        if settings['username'] and settings['password']:
+            connection.login(settings['username'], settings['password'])
+        with self._lock:
+            self._connections.append(connection)
+        self._local.connection = connection
+        self._local.sent = 0
+        return connection
+
+    def _discard(self, connection):
+        self._local.connection = None
+        with self._lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
+        try:
+            connection.quit()
+        except Exception:
+            connection.close()
+
+    def send(self, sender, recipient, message):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.sent >= self.max_messages:
+            self._discard(connection)
+            connection = None
+        if connection is None:
+            connection = self._connect()
+        try:
+            connection.sendmail(sender, [recipient], message)
+        except (smtplib.SMTPServerDisconnected, ConnectionResetError, BrokenPipeError):
+            self._discard(connection)
+            self._connect().sendmail(sender, [recipient], message)
+        self._local.sent += 1
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            try:
+                connection.quit()
+            except Exception:
+                connection.close()
+
+
+class NewsletterBroadcastService:
+    """
+    Sends newsletter campaigns to every subscriber.
+
+    Starting a campaign snapshots the audience (subscribers up to the current highest id)
+    and hands the campaign to a background worker, which:
+
+    1. enqueues recipients into newsletter_deliveries by walking newsletter_subscriptions
+       in id order, one multi-row INSERT and commit per chunk, advancing last_subscriber_id;
+    2. renders the subject and template once, then walks the pending deliveries by
+       delivery_id and sends each chunk from NEWSLETTER_SEND_WORKERS threads, each holding
+       a pooled SMTP connection, with recipients interleaved across domains and each domain
+       throttled to NEWSLETTER_DOMAIN_RATE messages per second;
+    3. records the chunk's outcomes with two UPDATE statements and bumps the campaign
+       counters in the same commit.
+
+    Temporary SMTP failures (4xx, dropped connections) stay pending and are retried in a
+    later pass, up to MAX_ATTEMPTS; permanent ones (5xx) fail right away. Pausing, a crash
+    or a restart leave last_subscriber_id and the pending rows in place, so sending the
+    campaign again resumes it. A chunk that was in flight when the process died is sent
+    again, so a recipient may rarely get a duplicate but never goes missing.
+    """
+    CHUNK_SIZE = 500
+    MAX_ATTEMPTS = 3
+    RETRY_DELAY = 30
+    MAX_MESSAGES_PER_CONNECTION = 100
+    # A queued/sending campaign whose worker has not reported for this long was interrupted
+    STALE_AFTER = timedelta(minutes=5)
+
+    # Campaigns
+
+    @staticmethod
+    def create_campaign(subject, body_html, heading=None, user_id=None):
+        """Validate and save a draft campaign; body_html is a Jinja template"""
+        subject = (subject or '').strip()
+        if not subject or not (body_html or '').strip():
+            raise ValueError("subject and body_html are required")
+        if len(subject) > 255 or len(heading or '') > 255:
+            raise ValueError("subject and heading must be at most 255 characters")
+        try:
+            # A trial render also rejects unknown variables and unsafe attribute access
+            NewsletterBroadcastService.render_body(body_html, heading or subject)
+        except TemplateSyntaxError as e:
+            raise ValueError(f"Invalid template at line {e.lineno}: {e.message}")
+        except TemplateError as e:
+            raise ValueError(f"Invalid template: {e.message}; available variables: {', '.join(CAMPAIGN_CONTEXT)}")
+
+        campaign = NewsletterCampaign(
+            subject=subject,
+            heading=(heading or '').strip() or None,
+            body_html=body_html,
+            created_by=user_id,
+            status=NewsletterCampaign.STATUS_DRAFT
+        )
+        db.session.add(campaign)
+        db.session.commit()
+        return campaign
+
+    @staticmethod
+    def _is_stale(campaign):
+        heartbeat = campaign.heartbeat_at
+        if heartbeat is None:
+            return True
+        if heartbeat.tzinfo is None:
+            heartbeat = heartbeat.replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc) - heartbeat > NewsletterBroadcastService.STALE_AFTER
+
+    @staticmethod
+    def send_campaign(campaign_id):
+        """
+        Start a draft campaign, or resume a paused, failed or interrupted one, in the
+        background (inline when NEWSLETTER_CAMPAIGN_WORKERS is 0). Returns the campaign,
+        or None if it does not exist.
+        """
+        campaign = db.session.get(NewsletterCampaign, campaign_id)
+        if campaign is None:
+            return None
+        if campaign.status == NewsletterCampaign.STATUS_COMPLETED:
+            raise ValueError("Campaign has already been sent")
+        if campaign.is_active and not NewsletterBroadcastService._is_stale(campaign):
+            raise ValueError("Campaign is already sending")
+
+        if campaign.audience_max_id is None:
+            campaign.audience_max_id = db.session.query(func.max(NewsletterSubscription.id)).scalar() or 0
+        token = uuid.uuid4().hex
+        campaign.status = NewsletterCampaign.STATUS_QUEUED
+        campaign.run_token = token
+        campaign.heartbeat_at = datetime.now(timezone.utc)
+        campaign.error_message = None
+        campaign.finished_at = None
+        db.session.commit()
+
+        app = current_app._get_current_object()
+        workers = app.config.get('NEWSLETTER_CAMPAIGN_WORKERS', 1)
+        if workers <= 0:
+            NewsletterBroadcastService.run_campaign(app, campaign.campaign_id, token)
+            db.session.refresh(campaign)
+        else:
+            _get_executor(workers).submit(NewsletterBroadcastService.run_campaign, app, campaign.campaign_id, token)
+        return campaign
+
+    @staticmethod
+    def pause_campaign(campaign_id):
+        """Stop a queued or sending campaign after its current chunk; send_campaign resumes it"""
+        campaign = db.session.get(NewsletterCampaign, campaign_id)
+        if campaign is None:
+            return None
+        if not campaign.is_active:
+            raise ValueError(f"Only queued or sending campaigns can be paused (status: {campaign.status})")
+        campaign.status = NewsletterCampaign.STATUS_PAUSED
+        campaign.run_token = None
+        db.session.commit()
+        return campaign
+
+    @staticmethod
+    def get_campaign(campaign_id):
+        return db.session.get(NewsletterCampaign, campaign_id)
+
+    @staticmethod
+    def list_campaigns(limit=50):
+        return NewsletterCampaign.query.order_by(NewsletterCampaign.campaign_id.desc()).limit(limit).all()
+
+    @staticmethod
+    def list_deliveries(campaign_id, status=None, after_id=0, limit=100):
+        """One page of a campaign's deliveries in delivery_id order"""
+        query = NewsletterDelivery.query.filter(
+            NewsletterDelivery.campaign_id == campaign_id,
+            NewsletterDelivery.delivery_id > (after_id or 0)
+        )
+        if status:
+            query = query.filter(NewsletterDelivery.status == status)
+        return query.order_by(NewsletterDelivery.delivery_id).limit(limit).all()
+
+    # Sending
+
+    @staticmethod
+    def smtp_settings(app):
+        """SMTP relay for campaigns: NEWSLETTER_SMTP_* when set, else the transactional MAIL_* settings"""
+        config = app.config
+        host = config.get('NEWSLETTER_SMTP_HOST')
+        if host:
+            return {
+                'host': host,
+                'port': config.get('NEWSLETTER_SMTP_PORT', 25),
+                'use_tls': config.get('NEWSLETTER_SMTP_USE_TLS', False),
+                'username': config.get('NEWSLETTER_SMTP_USERNAME'),
+                'password': config.get('NEWSLETTER_SMTP_PASSWORD'),
+                'timeout': config.get('NEWSLETTER_SMTP_TIMEOUT', 30)
+            }
+        return {
+            'host': config['MAIL_SERVER'],
+            'port': config['MAIL_PORT'],
+            'use_tls': config.get('MAIL_USE_TLS', False),
+            'username': config.get('MAIL_USERNAME'),
+            'password': config.get('MAIL_PASSWORD'),
+            'timeout': config.get('NEWSLETTER_SMTP_TIMEOUT', 30)
+        }
+
+    @staticmethod
+    def sender():
+        """(envelope sender address, From header) for bulk mail: NEWSLETTER_SENDER, else MAIL_DEFAULT_SENDER"""
+        sender = current_app.config.get('NEWSLETTER_SENDER') or current_app.config['MAIL_DEFAULT_SENDER']
+        sender_name, sender_address = sender if isinstance(sender, tuple) else parseaddr(sender or '')
+        if not sender_address:
+            raise ValueError("No sender address configured; set NEWSLETTER_SENDER or MAIL_USERNAME")
+        return sender_address, formataddr((sender_name, sender_address)) if sender_name else sender_address
+
+    @staticmethod
+    def render_body(body_html, heading):
+        """Render a campaign body template in the sandbox with the whitelisted context only"""
+        return _campaign_env.from_string(body_html).render(
+            heading=heading,
+            frontend_url=current_app.config.get('FRONTEND_URL', '#'),
+            year=datetime.now().year
+        )
+
+    @staticmethod
+    def render_message(campaign):
+        """
+        Render the campaign once. Returns (envelope sender, message bytes without the
+        per-recipient To and Message-ID headers, Message-ID domain).
+        """
+        heading = campaign.heading or campaign.subject
+        html = wrap_email_html(campaign.subject, NewsletterBroadcastService.render_body(campaign.body_html, heading), heading)
+        sender_address, from_header = NewsletterBroadcastService.sender()
+
+        message = EmailMessage(policy=policy.SMTP)
+        message['Subject'] = campaign.subject
+        message['From'] = from_header
+        message['Date'] = formatdate(usegmt=True)
+        message.set_content(html, subtype='html', charset='utf-8')
+        domain = sender_address.rpartition('@')[2] or 'localhost'
+        return sender_address, message.as_bytes(), domain
+
+    @staticmethod
+    def _interleave_domains(rows):
+        """Round-robin rows across recipient domains so throttled domains do not hold up the rest"""
+        by_domain = OrderedDict()
+        for row in rows:
+            by_domain.setdefault(row.email.rpartition('@')[2].lower(), []).append(row)
+        queues = [list(reversed(domain_rows)) for domain_rows in by_domain.values()]
+        interleaved = []
+        while queues:
+            for queue in queues:
+                interleaved.append(queue.pop())
+            queues = [queue for queue in queues if queue]
+        return interleaved
+
+    @staticmethod
+    def _is_permanent(error):
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            codes = [code for code, _ in error.recipients.values()]
+            return bool(codes) and all(code >= 500 for code in codes)
+        if isinstance(error, smtplib.SMTPResponseException):
+            return error.smtp_code >= 500
+        return isinstance(error, (UnicodeError, ValueError))
+
+    @staticmethod
+    def _deliver(pool, throttle, sender, payload, msgid_domain, row):
+        """Send one message; returns (delivery_id, status, error)"""
+        try:
+            email = row.email
+            if '@' not in email or any(c in email for c in '\r\n<>'):
+                raise ValueError(f"Invalid email address: {email!r}")
+            throttle.wait(email.rpartition('@')[2].lower())
+            headers = f"To: {email}\r\nMessage-ID: {make_msgid(domain=msgid_domain)}\r\n".encode('ascii')
+            pool.send(sender, email, headers + payload)
+            return row.delivery_id, NewsletterDelivery.STATUS_SENT, None
+        except Exception as e:
+            final = NewsletterBroadcastService._is_permanent(e) or row.attempts + 1 >= NewsletterBroadcastService.MAX_ATTEMPTS
+            status = NewsletterDelivery.STATUS_FAILED if final else NewsletterDelivery.STATUS_PENDING
+            return row.delivery_id, status, (str(e) or e.__class__.__name__)[:500]
+
+    @staticmethod
+    def _owns(campaign_id, token):
+        return db.session.query(NewsletterCampaign.run_token).filter(
+            NewsletterCampaign.campaign_id == campaign_id
+        ).scalar() == token
+
+    @staticmethod
+    def _enqueue(campaign_id, token):
+        """Snapshot the remaining audience into pending deliveries; False if the run lost the campaign"""
+        campaign = db.session.get(NewsletterCampaign, campaign_id)
+        last_id, max_id = campaign.last_subscriber_id, campaign.audience_max_id
+        campaigns = NewsletterCampaign.__table__
+        while True:
+            rows = db.session.query(NewsletterSubscription.id, NewsletterSubscription.email).filter(
+                NewsletterSubscription.id > last_id,
+                NewsletterSubscription.id <= max_id
+            ).order_by(NewsletterSubscription.id).limit(NewsletterBroadcastService.CHUNK_SIZE).all()
+            if not rows:
+                return True
+
+            now = datetime.now(timezone.utc)
+            db.session.execute(insert(NewsletterDelivery), [{
+                'campaign_id': campaign_id,
+                'subscription_id': row.id,
+                'email': row.email.strip(),
+                'status': NewsletterDelivery.STATUS_PENDING,
+                'attempts': 0,
+                'created_at': now
+            } for row in rows])
+            last_id = rows[-1].id
+            claimed = db.session.execute(update(campaigns).where(
+                campaigns.c.campaign_id == campaign_id,
+                campaigns.c.run_token == token
+            ).values(
+                last_subscriber_id=last_id,
+                total_recipients=campaigns.c.total_recipients + len(rows),
+                heartbeat_at=now
+            )).rowcount
+            if not claimed:
+                db.session.rollback()
+                return False
+            db.session.commit()
+
+    @staticmethod
+    def _record(campaign_id, token, results):
+        """Write one chunk's outcomes and counters in one commit; False if the run lost the campaign"""
+        now = datetime.now(timezone.utc)
+        deliveries = NewsletterDelivery.__table__
+        campaigns = NewsletterCampaign.__table__
+
+        sent_ids = [delivery_id for delivery_id, status, _ in results if status == NewsletterDelivery.STATUS_SENT]
+        unsent = [{'b_id': delivery_id, 'b_status': status, 'b_error': error}
+                  for delivery_id, status, error in results if status != NewsletterDelivery.STATUS_SENT]
+        if sent_ids:
+            db.session.execute(update(deliveries).where(deliveries.c.delivery_id.in_(sent_ids)).values(
+                status=NewsletterDelivery.STATUS_SENT, sent_at=now, error=None, attempts=deliveries.c.attempts + 1
+            ))
+        if unsent:
+            db.session.execute(update(deliveries).where(deliveries.c.delivery_id == bindparam('b_id')).values(
+                status=bindparam('b_status'), error=bindparam('b_error'), attempts=deliveries.c.attempts + 1
+            ), unsent)
+
+        failed = sum(1 for row in unsent if row['b_status'] == NewsletterDelivery.STATUS_FAILED)
+        # Counted even if the campaign was paused meanwhile: these messages did go out
+        db.session.execute(update(campaigns).where(campaigns.c.campaign_id == campaign_id).values(
+            sent_count=campaigns.c.sent_count + len(sent_ids),
+            failed_count=campaigns.c.failed_count + failed,
+            heartbeat_at=now
+        ))
+        db.session.commit()
+        return NewsletterBroadcastService._owns(campaign_id, token)
+
+    @staticmethod
+    def _pending_chunk(campaign_id, after_id):
+        return db.session.query(
+            NewsletterDelivery.delivery_id, NewsletterDelivery.email, NewsletterDelivery.attempts
+        ).filter(
+            NewsletterDelivery.campaign_id == campaign_id,
+            NewsletterDelivery.status == NewsletterDelivery.STATUS_PENDING,
+            NewsletterDelivery.delivery_id > after_id
+        ).order_by(NewsletterDelivery.delivery_id).limit(NewsletterBroadcastService.CHUNK_SIZE).all()
+
+    @staticmethod
+    def run_campaign(app, campaign_id, token):
+        """Send a campaign for the run holding token; leaves it completed, failed or as paused by an admin"""
+        with app.app_context():
+            campaigns = NewsletterCampaign.__table__
+            pool = None
+            try:
+                now = datetime.now(timezone.utc)
+                claimed = db.session.execute(update(campaigns).where(
+                    campaigns.c.campaign_id == campaign_id,
+                    campaigns.c.run_token == token
+                ).values(
+                    status=NewsletterCampaign.STATUS_SENDING,
+                    started_at=func.coalesce(campaigns.c.started_at, now),
+                    heartbeat_at=now
+                )).rowcount
+                db.session.commit()
+                if not claimed or not NewsletterBroadcastService._enqueue(campaign_id, token):
+                    return
+
+                campaign = db.session.get(NewsletterCampaign, campaign_id)
+                sender, payload, msgid_domain = NewsletterBroadcastService.render_message(campaign)
+                pool = SmtpConnectionPool(NewsletterBroadcastService.smtp_settings(app),
+                                          NewsletterBroadcastService.MAX_MESSAGES_PER_CONNECTION)
+                throttle = DomainThrottle(app.config.get('NEWSLETTER_DOMAIN_RATE', 5))
+                workers = max(1, app.config.get('NEWSLETTER_SEND_WORKERS', 4))
+
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='newsletter-send') as senders:
+                    for attempt in range(NewsletterBroadcastService.MAX_ATTEMPTS):
+                        if attempt and NewsletterBroadcastService._pending_chunk(campaign_id, 0):
+                            time.sleep(NewsletterBroadcastService.RETRY_DELAY)
+                        after_id = 0
+                        while True:
+                            rows = NewsletterBroadcastService._pending_chunk(campaign_id, after_id)
+                            if not rows:
+                                break
+                            after_id = rows[-1].delivery_id
+                            results = list(senders.map(
+                                lambda row: NewsletterBroadcastService._deliver(pool, throttle, sender, payload, msgid_domain, row),
+                                NewsletterBroadcastService._interleave_domains(rows)
+                            ))
+                            if not NewsletterBroadcastService._record(campaign_id, token, results):
+                                logger.info(f"Newsletter campaign {campaign_id} paused")
+                                return
+                            if all(status == NewsletterDelivery.STATUS_PENDING for _, status, _ in results):
+                                # Nothing got through: the relay is down, stop and let an admin resume
+                                raise RuntimeError(f"SMTP relay unavailable: {results[0][2]}")
+
+                db.session.execute(update(campaigns).where(
+                    campaigns.c.campaign_id == campaign_id,
+                    campaigns.c.run_token == token
+                ).values(
+                    status=NewsletterCampaign.STATUS_COMPLETED,
+                    run_token=None,
+                    finished_at=datetime.now(timezone.utc)
+                ))
+                db.session.commit()
+            except Exception as e:
+                logger.error(f"Newsletter campaign {campaign_id} failed: {str(e)}")
+                db.session.rollback()
+                db.session.execute(update(campaigns).where(
+                    campaigns.c.campaign_id == campaign_id,
+                    campaigns.c.run_token == token
+                ).values(
+                    status=NewsletterCampaign.STATUS_FAILED,
+                    run_token=None,
+                    error_message=str(e)[:2000],
+                    finished_at=datetime.now(timezone.utc)
+                ))
+                db.session.commit()
+            finally:
+                if pool:
+                    pool.close()
+
+
+def _get_executor(workers):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='newsletter-campaign')
+        return _executor
@@ -0,0 +1,351 @@
+import json
+import logging
+import threading
+from datetime import datetime, date, timezone
+from apscheduler.schedulers.background import BackgroundScheduler
+from flask import current_app
+from common.cache import get_redis_client
+from common.database import db
+from models.enums import MediaType, PlacementTypeEnum
+from models.product import Product
+from models.product_attribute import ProductAttribute
+from models.product_media import ProductMedia
+from models.product_placement import ProductPlacement
+from services.product_detail_service import ProductDetailService
+
+logger = logging.getLogger(__name__)
+
+
+class PlacementCacheService:
+    """
+    Serves the featured and promoted product listings from Redis.
+
+    Each placement type keeps one cached list of its active placements, already in display
+    order (sort_order, newest first) and carrying the few product columns the listing filters
+    on. A page request filters and slices that list in memory, then fetches the product cards
+    for the page with a single MGET; only missing cards are built, in one batch of queries.
+
+    Expiry is checked against the cached expires_at on every read, and a scheduler
+    deactivates expired placements in the database. The list and the cards are tagged with
+    their products, so the product write hooks that drop product detail payloads
+    (ProductDetailService.invalidate_products) drop these too. Placement writes call
+    invalidate() directly.
+    """
+    CACHE_TIMEOUT = 60 * 5
+
+    @staticmethod
+    def _list_key(placement_type):
+        return f"placement_list:{placement_type.value}"
+
+    @staticmethod
+    def _card_key(placement_type, product_id):
+        return f"placement_card:{placement_type.value}:{product_id}"
+
+    @staticmethod
+    def _now():
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+
+    @staticmethod
+    def _as_naive_utc(value):
+        if value is not None and value.tzinfo is not None:
+            return value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    @staticmethod
+    def _isoformat(value):
+        return value.isoformat() if value else None
+
+    @staticmethod
+    def build_entries(placement_type):
+        """Active placements of a type with their live products, in display order (one query)"""
+        rows = db.session.query(
+            ProductPlacement.placement_id, ProductPlacement.expires_at,
+            Product.product_id, Product.category_id, Product.brand_id, Product.effective_price,
+            Product.product_name, Product.product_description,
+            Product.special_price, Product.special_start, Product.special_end
+        ).join(
+            Product, Product.product_id == ProductPlacement.product_id
+        ).filter(
+            ProductPlacement.placement_type == placement_type,
+            ProductPlacement.is_active.is_(True),
+            (ProductPlacement.expires_at.is_(None)) | (ProductPlacement.expires_at > PlacementCacheService._now()),
+            Product.deleted_at.is_(None),
+            Product.active_flag.is_(True),
+            Product.approval_status == 'approved'
+        ).order_by(
+            ProductPlacement.sort_order.asc(),
+            ProductPlacement.added_at.desc()
+        ).all()
+
+        return [{
+            'placement_id': row.placement_id,
+            'expires_at': PlacementCacheService._isoformat(PlacementCacheService._as_naive_utc(row.expires_at)),
+            'product_id': row.product_id,
+            'category_id': row.category_id,
+            'brand_id': row.brand_id,
+            'effective_price': float(row.effective_price) if row.effective_price is not None else None,
+            'search_text': f"{row.product_name or ''}\n{row.product_description or ''}".lower(),
+            'has_special': row.special_price is not None,
+            'special_start': PlacementCacheService._isoformat(row.special_start),
+            'special_end': PlacementCacheService._isoformat(row.special_end)
+        } for row in rows]
+
+    @staticmethod
+    def get_entries(placement_type):
+        """The cached placement list for a type, rebuilt from the database on a miss"""
+        cache_key = PlacementCacheService._list_key(placement_type)
+        redis_client = None
+        try:
+            redis_client = get_redis_client(current_app)
+            cached_entries = redis_client.get(cache_key)
+            if cached_entries:
+                return json.loads(cached_entries)
+        except Exception as e:
+            logger.warning(f"Placement cache unavailable for {placement_type.value}: {str(e)}")
+            redis_client = None
+
+        entries = PlacementCacheService.build_entries(placement_type)
+        if redis_client:
+            try:
+                pipe = redis_client.pipeline()
+                pipe.setex(cache_key, PlacementCacheService.CACHE_TIMEOUT, json.dumps(entries))
+                ProductDetailService.add_tags(
+                    pipe, cache_key, {f"product:{entry['product_id']}" for entry in entries},
+                    PlacementCacheService.CACHE_TIMEOUT
+                )
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"Failed to cache {placement_type.value} placements: {str(e)}")
+        return entries
+
+    @staticmethod
+    def _is_live(entry, placement_type, now, today):
+        if entry['expires_at'] and datetime.fromisoformat(entry['expires_at']) <= now:
+            return False
+        if placement_type == PlacementTypeEnum.PROMOTED:
+            # Promoted products are only listed while their special price is running
+            if not entry['has_special']:
+                return False
+            if entry['special_start'] and date.fromisoformat(entry['special_start']) > today:
+                return False
+            if entry['special_end'] and date.fromisoformat(entry['special_end']) < today:
+                return False
+        return True
+
+    @staticmethod
+    def _matches(entry, category_id=None, brand_id=None, min_price=None, max_price=None, search=None):
+        if category_id and entry['category_id'] != category_id:
+            return False
+        if brand_id and entry['brand_id'] != brand_id:
+            return False
+        if min_price is not None and (entry['effective_price'] is None or entry['effective_price'] < min_price):
+            return False
+        if max_price is not None and (entry['effective_price'] is None or entry['effective_price'] > max_price):
+            return False
+        if search and search.lower() not in entry['search_text']:
+            return False
+        return True
+
+    @staticmethod
+    def apply_featured_prices(product_data, product):
+        """Price fields the featured listing has always returned for frontend compatibility"""
+        selling_price = getattr(product, 'selling_price', 0)
+        special_price = getattr(product, 'special_price', None)
+        discount_pct = getattr(product, 'discount_pct', None)
+
+        # Use special_price as current price if available, otherwise selling_price
+        current_price = special_price if special_price is not None else selling_price
+
+        # Calculate originalPrice for discount calculation
+        if special_price is not None and selling_price > special_price:
+            # If we have a special price, the original price is the selling price
+            original_price = selling_price
+        elif discount_pct and discount_pct > 0 and current_price:
+            # If we have a discount percentage, calculate original price
+            original_price = current_price / (1 - (discount_pct / 100))
+        else:
+            # No discount, original price is same as current price
+            original_price = current_price
+
+        product_data['price'] = current_price
+        product_data['originalPrice'] = original_price
+        product_data['selling_price'] = selling_price
+        product_data['special_price'] = special_price
+        product_data['discount_pct'] = discount_pct
+        return product_data
+
+    @staticmethod
+    def build_cards(placement_type, product_ids):
+        """Listing cards for the given products, loaded in a fixed number of queries"""
+        if not product_ids:
+            return {}
+
+        products = Product.query.options(
+            db.joinedload(Product.category),
+            db.joinedload(Product.brand),
+            db.joinedload(Product.stock),
+            db.selectinload(Product.product_attributes).joinedload(ProductAttribute.attribute),
+            db.selectinload(Product.product_attributes).joinedload(ProductAttribute.attribute_value),
+            db.selectinload(Product.variants)
+        ).filter(Product.product_id.in_(product_ids)).all()
+
+        placements = {
+            placement.product_id: placement
+            for placement in ProductPlacement.query.filter(
+                ProductPlacement.product_id.in_(product_ids),
+                ProductPlacement.placement_type == placement_type,
+                ProductPlacement.is_active.is_(True)
+            )
+        }
+
+        images = {}
+        for media in ProductMedia.query.filter(
+            ProductMedia.product_id.in_(product_ids),
+            ProductMedia.deleted_at.is_(None)
+        ).order_by(ProductMedia.product_id, ProductMedia.sort_order.asc()):
+            if media.type == MediaType.IMAGE:
+                images.setdefault(media.product_id, []).append(media.url)
+
+        cards = {}
+        for product in products:
+            product_data = product.serialize()
+            placement = placements.get(product.product_id)
+            if placement:
+                product_data['placement'] = {
+                    'placement_id': placement.placement_id,
+                    'sort_order': placement.sort_order,
+                    'added_at': placement.added_at.isoformat() if placement.added_at else None,
+                    'expires_at': placement.expires_at.isoformat() if placement.expires_at else None
+                }
+            product_data['images'] = images.get(product.product_id, [])
+            if placement_type == PlacementTypeEnum.FEATURED:
+                PlacementCacheService.apply_featured_prices(product_data, product)
+            cards[product.product_id] = product_data
+        return cards
+
+    @staticmethod
+    def get_cards(placement_type, product_ids):
+        """Cards for product_ids in order: one MGET, then a single batch build for the misses"""
+        cards = {}
+        redis_client = None
+        keys = [PlacementCacheService._card_key(placement_type, product_id) for product_id in product_ids]
+        if keys:
+            try:
+                redis_client = get_redis_client(current_app)
+                for product_id, cached_card in zip(product_ids, redis_client.mget(keys)):
+                    if cached_card:
+                        cards[product_id] = json.loads(cached_card)
+            except Exception as e:
+                logger.warning(f"Placement card cache unavailable: {str(e)}")
+                redis_client = None
+
+        missing = [product_id for product_id in product_ids if product_id not in cards]
+        if missing:
+            built = PlacementCacheService.build_cards(placement_type, missing)
+            pipe = redis_client.pipeline() if redis_client else None
+            for product_id, card in built.items():
+                # Round-trip through the app's JSON provider so fresh and cached cards render identically
+                encoded = current_app.json.dumps(card)
+                cards[product_id] = json.loads(encoded)
+                if pipe is not None:
+                    card_key = PlacementCacheService._card_key(placement_type, product_id)
+                    pipe.setex(card_key, PlacementCacheService.CACHE_TIMEOUT, encoded)
+                    ProductDetailService.add_tags(pipe, card_key, {f"product:{product_id}"}, PlacementCacheService.CACHE_TIMEOUT)
+            if pipe is not None:
+                try:
+                    pipe.execute()
+                except Exception as e:
+                    logger.warning(f"Failed to cache placement cards: {str(e)}")
+
+        return [cards[product_id] for product_id in product_ids if product_id in cards]
+
+    @staticmethod
+    def get_page(placement_type, page=1, per_page=12, category_id=None, brand_id=None,
+                 min_price=None, max_price=None, search=None):
+        """One page of a placement listing in the shape the featured/promo endpoints return"""
+        now = PlacementCacheService._now()
+        today = now.date()
+        entries = [
+            entry for entry in PlacementCacheService.get_entries(placement_type)
+            if PlacementCacheService._is_live(entry, placement_type, now, today)
+            and PlacementCacheService._matches(entry, category_id, brand_id, min_price, max_price, search)
+        ]
+
+        total = len(entries)
+        page_entries = entries[(page - 1) * per_page:page * per_page]
+        products = PlacementCacheService.get_cards(placement_type, [entry['product_id'] for entry in page_entries])
+
+        return {
+            'products': products,
+            'pagination': {
+                'total': total,
+                'pages': (total + per_page - 1) // per_page,
+                'current_page': page,
+                'per_page': per_page
+            }
+        }
+
+    @staticmethod
+    def invalidate(*product_ids):
+        """
+        Drop the cached placement lists and the cards of the given products; call after placement
+        writes. Promotions also rewrite the product's special price, so the products' detail
+        payloads are dropped as well.
+        """
+        keys = [PlacementCacheService._list_key(placement_type) for placement_type in PlacementTypeEnum]
+        for product_id in product_ids:
+            keys.extend(PlacementCacheService._card_key(placement_type, product_id) for placement_type in PlacementTypeEnum)
+        try:
+            redis_client = get_redis_client(current_app)
+            redis_client.delete(*keys)
+        except Exception as e:
+            logger.warning(f"Failed to invalidate placement cache: {str(e)}")
+        ProductDetailService.invalidate_products(*product_ids)
+
+    @staticmethod
+    def deactivate_expired_placements():
+        """Mark placements past their expires_at inactive in one UPDATE; returns the number deactivated"""
+        expired = ProductPlacement.query.filter(
+            ProductPlacement.is_active.is_(True),
+            ProductPlacement.expires_at.isnot(None),
+            ProductPlacement.expires_at <= PlacementCacheService._now()
+        )
+        product_ids = [row.product_id for row in expired.with_entities(ProductPlacement.product_id)]
+        if not product_ids:
+            return 0
+
+        updated = expired.update({ProductPlacement.is_active: False}, synchronize_session=False)
+        db.session.commit()
+        PlacementCacheService.invalidate(*product_ids)
+        return updated
+
+
+# Scheduler instance (started from app.py)
+scheduler = BackgroundScheduler()
+
+
+def start_placement_expiry_scheduler(app):
+    """
+    Deactivate expired placements every PLACEMENT_EXPIRY_CHECK_MINUTES. Reads already skip
+    expired entries; this keeps the table and the cached lists tidy. Call once at app startup.
+    """
+    interval = app.config.get('PLACEMENT_EXPIRY_CHECK_MINUTES', 5)
+    if not interval or scheduler.running:
+        return
+
+    def deactivate():
+        with app.app_context():
+            try:
+                deactivated = PlacementCacheService.deactivate_expired_placements()
+                if deactivated:
+                    logger.info(f"Deactivated {deactivated} expired product placements")
+            except Exception as e:
+                db.session.rollback()
+                logger.warning(f"Placement expiry check failed: {str(e)}")
+            finally:
+                db.session.remove()
+
+    scheduler.add_job(deactivate, 'interval', minutes=interval, id='placement_expiry',
+                      max_instances=1, coalesce=True)
+    # Use a thread to avoid blocking the main app
+    threading.Thread(target=scheduler.start, daemon=True).start()
@@ -0,0 +1,308 @@
+import json
+import logging
+from flask import current_app
+from sqlalchemy import or_
+from common.cache import get_redis_client
+from common.database import db
+from models.product import Product
+from models.product_attribute import ProductAttribute
+from models.product_media import ProductMedia
+from models.product_meta import ProductMeta
+from models.product_stock import ProductStock
+from models.review import Review
+from models.wishlist_item import WishlistItem
+from services.media_manifest_service import MediaManifestService
+
+logger = logging.getLogger(__name__)
+
+
+class ProductDetailService:
+    """
+    Assembles the public product detail payload from a fixed number of batched queries.
+
+    The anonymous part of the payload (product, family variants, media, attributes, meta,
+    rating summary and top reviews) is cached per product in Redis and tagged with every
+    product, brand and category it embeds, so a write to any of them can drop exactly the
+    payloads that show it. Volatile and per-user fields (stock, wishlist state) are
+    overlaid on each request and never cached.
+    """
+    CACHE_TIMEOUT = 60 * 5
+    REVIEW_LIMIT = 10
+
+    @staticmethod
+    def _cache_key(product_id):
+        return f"product_detail:{product_id}"
+
+    @staticmethod
+    def _tag_key(tag):
+        return f"product_detail_tag:{tag}"
+
+    @staticmethod
+    def _live_products():
+        return Product.query.filter(
+            Product.deleted_at.is_(None),
+            Product.active_flag.is_(True),
+            Product.approval_status == 'approved'  # Only show approved products
+        )
+
+    @staticmethod
+    def _attribute_entry(attr, value_text=None, value_label=None, offset=0):
+        return {
+            "attribute_id": attr.attribute_id + offset,
+            "attribute_name": attr.attribute.name,
+            "value_code": attr.value_code,
+            "value_text": attr.value_text if value_text is None else value_text,
+            "value_label": value_label if value_text is not None else (
+                attr.attribute_value.value_label if attr.attribute_value else None
+            ),
+            "is_text_based": attr.value_code is None or attr.value_code.startswith('text_'),
+            "input_type": attr.attribute.input_type.value if attr.attribute.input_type else 'text'
+        }
+
+    @staticmethod
+    def process_attributes(attributes):
+        """Expand array-valued attributes (as stored by variants) into one entry per value"""
+        processed_attributes = []
+
+        for attr in attributes:
+            text = attr.value_text
+            if not (text and text.startswith('[') and text.endswith(']')):
+                # Regular attribute, no processing needed
+                processed_attributes.append(ProductDetailService._attribute_entry(attr))
+                continue
+
+            try:
+                # First try to parse as JSON
+                values = json.loads(text)
+                if not isinstance(values, list):
+                    processed_attributes.append(ProductDetailService._attribute_entry(attr))
+                    continue
+                values = [str(value) for value in values]
+            except (json.JSONDecodeError, ValueError):
+                # Fall back to a Python list string such as "['Red', 'Blue']"
+                clean_text = text.strip()
+                if clean_text.startswith("['") and clean_text.endswith("']"):
+                    values = [v.strip().strip("'\"") for v in clean_text[2:-2].split("', '")]
+                else:
+                    values = [v.strip().strip("'\"") for v in clean_text[1:-1].split(',')]
+                values = [value for value in values if value]
+
+            # Create individual attributes for each value, with unique IDs
+            for index, value in enumerate(values):
+                processed_attributes.append(
+                    ProductDetailService._attribute_entry(attr, value_text=value, value_label=value, offset=index)
+                )
+
+        return processed_attributes
+
+    @staticmethod
+    def _serialize_review(review):
+        return {
+            "id": review.review_id,
+            "user": {
+                "id": review.user.id,
+                "first_name": review.user.first_name if hasattr(review.user, 'first_name') else 'Anonymous',
+                "last_name": review.user.last_name if hasattr(review.user, 'last_name') else '',
+                "email": review.user.email if hasattr(review.user, 'email') else None,
+                "avatar": review.user.avatar_url if hasattr(review.user, 'avatar_url') else None
+            },
+            "rating": review.rating,
+            "title": review.title,
+            "body": review.body,
+            "created_at": review.created_at.isoformat(),
+            "images": [img.serialize() for img in review.images] if review.images else []
+        }
+
+    @staticmethod
+    def build_payload(product_id):
+        """
+        Load the product graph and build the anonymous payload.
+        Returns (payload, tags), or (None, None) when the product is not publicly visible.
+        """
+        # 1: product with category and brand (the brand's dynamic categories list is one more query)
+        product = ProductDetailService._live_products().options(
+            db.joinedload(Product.category),
+            db.joinedload(Product.brand),
+            db.undefer(Product.media_manifest)
+        ).filter(Product.product_id == product_id).first()
+        if not product:
+            return None, None
+
+        # 2: the whole variant family in one query - own variants for a parent,
+        # parent plus siblings for a variant
+        family_root = product.parent_product_id or product.product_id
+        family = ProductDetailService._live_products().filter(
+            Product.product_id != product.product_id,
+            or_(Product.product_id == family_root, Product.parent_product_id == family_root)
+        ).all()
+        if product.parent_product_id is None:
+            variants = [v for v in family if v.parent_product_id == product.product_id]
+        else:
+            parent = [v for v in family if v.product_id == family_root]
+            variants = parent + [v for v in family if v.product_id != family_root]
+
+        # 3: media for the product and every variant
+        media_by_product = {}
+        for media in ProductMedia.query.filter(
+            ProductMedia.product_id.in_([product.product_id] + [v.product_id for v in variants]),
+            ProductMedia.deleted_at.is_(None)
+        ).order_by(ProductMedia.product_id, ProductMedia.sort_order):
+            media_by_product.setdefault(media.product_id, []).append(media.serialize())
+
+        # 4: meta
+        product_meta = ProductMeta.query.filter_by(product_id=product.product_id).first()
+
+        # 5: attributes with their definitions and selected values
+        product_attributes = ProductAttribute.query.options(
+            db.joinedload(ProductAttribute.attribute),
+            db.joinedload(ProductAttribute.attribute_value)
+        ).filter_by(product_id=product.product_id).all()
+
+        # 6: rating summary
+        avg_rating, review_count = db.session.query(
+            db.func.avg(Review.rating), db.func.count(Review.review_id)
+        ).filter(Review.product_id == product.product_id, Review.deleted_at.is_(None)).one()
+
+        # 7-8: top reviews with their authors and images
+        reviews = Review.query.options(
+            db.joinedload(Review.user),
+            db.selectinload(Review.images)
+        ).filter_by(
+            product_id=product.product_id,
+            deleted_at=None
+        ).order_by(Review.created_at.desc()).limit(ProductDetailService.REVIEW_LIMIT).all()
+
+        payload = product.serialize_basic()
+        payload.update({
+            "media": media_by_product.get(product.product_id, []),
+            "media_manifest": MediaManifestService.get(Product, product),
+            "meta": {
+                "short_desc": product_meta.short_desc if product_meta else None,
+                "full_desc": product_meta.full_desc if product_meta else None,
+                "meta_title": product_meta.meta_title if product_meta else None,
+                "meta_desc": product_meta.meta_desc if product_meta else None,
+                "meta_keywords": product_meta.meta_keywords if product_meta else None
+            },
+            "attributes": ProductDetailService.process_attributes(product_attributes),
+            "category": product.category.serialize() if product.category else None,
+            "brand": product.brand.serialize() if product.brand else None,
+            # Add frontend-specific fields
+            "id": str(product.product_id),
+            "name": product.product_name,
+            "currency": "INR",
+            "stock": 100,
+            "isNew": True,
+            "isBuiltIn": False,
+            "rating": round(float(avg_rating or 0), 1),
+            "review_count": review_count,
+            "reviews": [ProductDetailService._serialize_review(review) for review in reviews],
+            "sku": product.sku,
+            "parent_product_id": product.parent_product_id,
+            "is_variant": product.parent_product_id is not None,
+            "variants": []
+        })
+
+        for v in variants:
+            price, original_price, _ = v.get_display_prices()
+            payload["variants"].append({
+                "id": str(v.product_id),
+                "name": v.product_name,
+                "price": float(price) if price is not None else 0.0,
+                "originalPrice": float(original_price) if original_price is not None else None,
+                "sku": v.sku,
+                "isVariant": v.product_id != product.parent_product_id,
+                "isParent": v.product_id == product.parent_product_id,
+                "parentProductId": str(v.parent_product_id) if v.parent_product_id else None,
+                "media": media_by_product.get(v.product_id, [])
+            })
+
+        tags = {f"product:{product.product_id}", f"brand:{product.brand_id}", f"category:{product.category_id}"}
+        tags.update(f"product:{v.product_id}" for v in variants)
+        return payload, tags
+
+    @staticmethod
+    def get_payload(product_id):
+        """Get the anonymous product detail payload, served from Redis when available"""
+        cache_key = ProductDetailService._cache_key(product_id)
+        redis_client = None
+        try:
+            redis_client = get_redis_client(current_app)
+            cached_payload = redis_client.get(cache_key)
+            if cached_payload:
+                return json.loads(cached_payload)
+        except Exception as e:
+            logger.warning(f"Product detail cache unavailable for product {product_id}: {str(e)}")
+            redis_client = None
+
+        payload, tags = ProductDetailService.build_payload(product_id)
+        if payload is None:
+            return None
+
+        # Serialize with the app's JSON provider so cached and fresh responses render identically
+        encoded = current_app.json.dumps(payload)
+        if redis_client:
+            try:
+                pipe = redis_client.pipeline()
+                pipe.setex(cache_key, ProductDetailService.CACHE_TIMEOUT, encoded)
+                ProductDetailService.add_tags(pipe, cache_key, tags)
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"Failed to cache product detail for product {product_id}: {str(e)}")
+        return json.loads(encoded)
+
+    @staticmethod
+    def overlay_request_data(payload, product_id, user_id=None):
+        """Add the uncached fields: live stock and, for signed-in users, wishlist state"""
+        stock = db.session.query(ProductStock.stock_qty, ProductStock.low_stock_threshold).filter(
+            ProductStock.product_id == product_id
+        ).first()
+        stock_qty = stock.stock_qty if stock else 0
+        payload["stock_qty"] = stock_qty
+        payload["in_stock"] = stock_qty > 0
+        payload["low_stock"] = bool(stock) and 0 < stock_qty <= stock.low_stock_threshold
+
+        payload["is_in_wishlist"] = False
+        if user_id:
+            payload["is_in_wishlist"] = db.session.query(WishlistItem.wishlist_item_id).filter(
+                WishlistItem.user_id == user_id,
+                WishlistItem.product_id == product_id,
+                WishlistItem.is_deleted.is_(False)
+            ).first() is not None
+        return payload
+
+    @staticmethod
+    def get_product_detail(product_id, user_id=None):
+        """Full product detail response data, or None if the product is not publicly visible"""
+        payload = ProductDetailService.get_payload(product_id)
+        if payload is None:
+            return None
+        return ProductDetailService.overlay_request_data(payload, product_id, user_id)
+
+    @staticmethod
+    def add_tags(pipe, cache_key, tags, timeout=CACHE_TIMEOUT):
+        """
+        Queue commands on a Redis pipeline that file cache_key under each tag, so any cache
+        entry built from product/brand/category data is dropped by the same invalidation hooks.
+        """
+        for tag in tags:
+            tag_key = ProductDetailService._tag_key(tag)
+            pipe.sadd(tag_key, cache_key)
+            pipe.expire(tag_key, timeout * 2)
+
+    @staticmethod
+    def invalidate_tags(*tags):
+        """Drop every cached payload carrying any of the given tags"""
+        tag_keys = [ProductDetailService._tag_key(tag) for tag in tags if tag]
+        if not tag_keys:
+            return
+        try:
+            redis_client = get_redis_client(current_app)
+            cache_keys = redis_client.sunion(tag_keys)
+            redis_client.delete(*tag_keys, *cache_keys)
+        except Exception as e:
+            logger.warning(f"Failed to invalidate product detail cache: {str(e)}")
+
+    @staticmethod
+    def invalidate_products(*product_ids):
+        """Drop cached payloads showing any of these products; call after writes to product data"""
+        ProductDetailService.invalidate_tags(*(f"product:{pid}" for pid in product_ids if pid))
@@ -0,0 +1,844 @@
+import io
+import json
+import logging
+import os
+import random
+import shutil
+import string
+import threading
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from decimal import Decimal, InvalidOperation
+from flask import current_app
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from common.database import db
+from models.attribute import Attribute
+from models.brand import Brand
+from models.category import Category
+from models.enums import AttributeInputType, MediaType
+from models.product import Product
+from models.product_attribute import ProductAttribute
+from models.product_import_job import ProductImportJob
+from models.product_media import ProductMedia
+from models.product_meta import ProductMeta
+from models.product_stock import ProductStock
+from models.shop.shop_attribute import ShopAttribute, ShopAttributeValue
+from models.shop.shop_brand import ShopBrand
+from models.shop.shop_category import ShopCategory
+from models.shop.shop_product import ShopProduct
+from models.shop.shop_product_attribute import ShopProductAttribute
+from models.shop.shop_product_media import ShopProductMedia
+from models.shop.shop_product_meta import ShopProductMeta
+from models.shop.shop_product_stock import ShopProductStock
+from models.shop.shop_product_variant import ShopProductVariant, ShopVariantAttributeValue
+from services.inventory_import_service import InventoryImportService
+from services.media_manifest_service import MediaManifestService
+from services.product_detail_service import ProductDetailService
+from services.storefront_cache_service import StorefrontCacheService
+from services.variant_matrix_service import VariantMatrixService
+
+logger = logging.getLogger(__name__)
+
+# Tables a catalog import writes, per target
+CATALOGS = {
+    'merchant': {
+        'product': Product, 'meta': ProductMeta, 'stock': ProductStock, 'media': ProductMedia,
+        'attribute': ProductAttribute, 'scope': 'merchant_id', 'sku_prefix': 'MR'
+    },
+    'shop': {
+        'product': ShopProduct, 'meta': ShopProductMeta, 'stock': ShopProductStock, 'media': ShopProductMedia,
+        'attribute': ShopProductAttribute, 'scope': 'shop_id', 'sku_prefix': 'SH'
+    }
+}
+
+META_FIELDS = {'short_desc': 255, 'full_desc': None, 'meta_title': 100, 'meta_desc': 255, 'meta_keywords': 255}
+# Fields a variant row takes from its parent when it leaves them empty
+INHERITED_FIELDS = ('category_id', 'brand_id', 'product_name', 'product_description', 'cost_price',
+                    'discount_pct', 'special_price', 'special_start', 'special_end', 'is_published')
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv', '.webm')
+SKU_ATTEMPTS = 10
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class ProductImportService:
+    """
+    Bulk catalog import for merchant products and shop products.
+
+    An upload (CSV, XLSX, JSONL or a JSON list) holds one row per product or variant with
+    its stock, meta, media URLs and attributes; variant rows name their parent with
+    parent_sku and come after it. The file is spooled to disk and imported by a background
+    worker: rows are validated in a streaming pass, and every chunk resolves its
+    categories, brands, attributes, parents and SKUs with one IN query each and writes each
+    table with one multi-row INSERT, then commits together with the job's progress. Rows
+    that fail validation are reported on the job and do not stop the import.
+    """
+    CHUNK_SIZE = 500
+    SUPPORTED_FORMATS = ('csv', 'xlsx', 'jsonl', 'json')
+
+    # Upload handling
+
+    @staticmethod
+    def detect_format(filename=None, content_type=None):
+        """Work out the upload format from a filename or content type"""
+        name = (filename or '').lower()
+        ctype = (content_type or '').lower()
+        if name.endswith('.xlsx') or 'spreadsheetml' in ctype:
+            return 'xlsx'
+        return InventoryImportService.detect_format(filename, content_type)
+
+    @staticmethod
+    def iter_rows(stream, fmt):
+        """
+        Yield raw row dicts from a binary stream; XLSX sheets are read row by row. A JSONL
+        line that is not valid JSON is yielded as its text so it fails as one row.
+        """
+        if fmt == 'jsonl':
+            for line in io.TextIOWrapper(stream, encoding='utf-8'):
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        yield line
+            return
+        if fmt != 'xlsx':
+            yield from InventoryImportService.iter_rows(stream, fmt)
+            return
+
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if not header:
+                return
+            columns = [str(name).strip() if name is not None else None for name in header]
+            for values in rows:
+                if all(value is None or value == '' for value in values):
+                    continue
+                yield {column: value for column, value in zip(columns, values) if column}
+        finally:
+            workbook.close()
+
+    # Row parsing
+
+    @staticmethod
+    def _text(value, field, max_length=None):
+        if value is None:
+            return None
+        text = str(value).strip()
+        if not text:
+            return None
+        if max_length and len(text) > max_length:
+            raise ValueError(f"{field} must be at most {max_length} characters")
+        return text
+
+    @staticmethod
+    def _decimal(value, field):
+        if value is None or str(value).strip() == '':
+            return None
+        try:
+            number = Decimal(str(value).strip())
+        except InvalidOperation:
+            raise ValueError(f"{field} must be a number")
+        if number < 0:
+            raise ValueError(f"{field} must not be negative")
+        return number.quantize(Decimal('0.01'))
+
+    @staticmethod
+    def _bool(value, field):
+        if value is None or str(value).strip() == '':
+            return None
+        if isinstance(value, bool):
+            return value
+        text = str(value).strip().lower()
+        if text in ('1', 'true', 'yes', 'y'):
+            return True
+        if text in ('0', 'false', 'no', 'n'):
+            return False
+        raise ValueError(f"{field} must be true or false")
+
+    @staticmethod
+    def _when(value, field, with_time):
+        """Date (merchant products) or naive UTC datetime (shop products) from ISO text or a spreadsheet cell"""
+        if value is None or str(value).strip() == '':
+            return None
+        if isinstance(value, datetime):
+            parsed = value
+        elif isinstance(value, date):
+            parsed = datetime(value.year, value.month, value.day)
+        else:
+            try:
+                parsed = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+            except ValueError:
+                raise ValueError(f"{field} must be an ISO date")
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed if with_time else parsed.date()
+
+    @staticmethod
+    def _media_urls(value):
+        """A list, or '|' / newline separated text as written in CSV and XLSX cells"""
+        if value is None:
+            return []
+        urls = value if isinstance(value, list) else str(value).replace('\n', '|').split('|')
+        urls = [str(url).strip() for url in urls if url is not None and str(url).strip()]
+        for url in urls:
+            if not url.startswith(('http://', 'https://')):
+                raise ValueError(f"media_urls must be http(s) URLs: {url}")
+            if len(url) > 255:
+                raise ValueError("media_urls entries must be at most 255 characters")
+        return urls
+
+    @staticmethod
+    def _attributes(raw):
+        """{attribute key: value} from an `attributes` object (or JSON text) plus `attr:<key>` columns"""
+        attributes = raw.get('attributes')
+        if isinstance(attributes, str):
+            attributes = attributes.strip()
+            try:
+                attributes = json.loads(attributes) if attributes else {}
+            except ValueError:
+                raise ValueError("attributes must be a JSON object")
+        attributes = dict(attributes or {})
+        if not isinstance(attributes, dict):
+            raise ValueError("attributes must be an object")
+        for column, value in raw.items():
+            if isinstance(column, str) and column.startswith('attr:') and value not in (None, ''):
+                attributes[column[len('attr:'):].strip()] = value
+        return {str(key): value for key, value in attributes.items() if value not in (None, '')}
+
+    @staticmethod
+    def parse_row(raw, target):
+        """Normalize one raw row for a 'merchant' or 'shop' catalog; raises ValueError"""
+        if isinstance(raw, str):
+            raise ValueError("Invalid JSON line")
+        if not isinstance(raw, dict):
+            raise ValueError("Row must be an object")
+
+        p = ProductImportService
+        with_time = target == 'shop'
+        row = {
+            'sku': p._text(raw.get('sku'), 'sku', 50),
+            'parent_sku': p._text(raw.get('parent_sku'), 'parent_sku', 50),
+            'product_name': p._text(raw.get('product_name'), 'product_name', 255),
+            'product_description': p._text(raw.get('product_description', raw.get('description')), 'product_description'),
+            'category_id': InventoryImportService._to_int(raw.get('category_id'), 'category_id'),
+            'brand_id': InventoryImportService._to_int(raw.get('brand_id'), 'brand_id'),
+            'cost_price': p._decimal(raw.get('cost_price'), 'cost_price'),
+            'selling_price': p._decimal(raw.get('selling_price'), 'selling_price'),
+            'discount_pct': p._decimal(raw.get('discount_pct'), 'discount_pct'),
+            'special_price': p._decimal(raw.get('special_price'), 'special_price'),
+            'special_start': p._when(raw.get('special_start'), 'special_start', with_time),
+            'special_end': p._when(raw.get('special_end'), 'special_end', with_time),
+            'stock_qty': InventoryImportService._to_int(raw.get('stock_qty', raw.get('stock_quantity')), 'stock_qty'),
+            'low_stock_threshold': InventoryImportService._to_int(raw.get('low_stock_threshold'), 'low_stock_threshold'),
+            'meta': {field: p._text(raw.get(field), field, max_length) for field, max_length in META_FIELDS.items()},
+            'media_urls': p._media_urls(raw.get('media_urls')),
+            'attributes': p._attributes(raw),
+            'active_flag': p._bool(raw.get('active_flag'), 'active_flag'),
+            'is_published': p._bool(raw.get('is_published'), 'is_published') if target == 'shop' else None,
+            'variant_name': p._text(raw.get('variant_name'), 'variant_name', 255),
+            'is_default': p._bool(raw.get('is_default'), 'is_default')
+        }
+
+        if row['parent_sku']:
+            if row['parent_sku'] == row['sku']:
+                raise ValueError("parent_sku must differ from sku")
+            if row['selling_price'] is None:
+                raise ValueError("Missing selling_price")
+            if target == 'shop' and not row['attributes']:
+                raise ValueError("Variant rows need the attributes that distinguish them")
+        else:
+            required = ['product_name', 'category_id', 'cost_price', 'selling_price']
+            if target == 'merchant':
+                required.append('brand_id')
+            missing = [field for field in required if row[field] is None]
+            if missing:
+                raise ValueError(f"Missing {', '.join(missing)}")
+        if row['discount_pct'] is not None and row['discount_pct'] > 100:
+            raise ValueError("discount_pct must be at most 100")
+        if row['special_start'] and row['special_end'] and row['special_end'] < row['special_start']:
+            raise ValueError("special_end must not be before special_start")
+        return row
+
+    # SKU allocation
+
+    @staticmethod
+    def allocate_skus(model, bases, reserved=()):
+        """
+        One unique SKU per base SKU, checked against model's table with one IN query per
+        round. Each base is tried as-is, then with -01, -02, ... suffixes (enough for every
+        repeat of the base in the batch, plus slack); bases whose candidates are all taken
+        get the next range of suffixes in another round. Reserved SKUs (taken earlier in
+        the same batch) are skipped.
+        """
+        if not bases:
+            return []
+        # Suffixed candidates are trimmed so they still fit the column
+        max_length = model.__table__.c.sku.type.length
+        counts = Counter(bases)
+        taken = set(reserved)
+        allocated = [None] * len(bases)
+        pending = list(range(len(bases)))
+        first = 0
+        while pending:
+            candidates = {}
+            for index in pending:
+                base = bases[index]
+                if base not in candidates:
+                    last = first + counts[base] + SKU_ATTEMPTS
+                    suffixes = [f"-{n:02d}" for n in range(max(first, 1), last)]
+                    candidates[base] = ([base] if first == 0 else []) + [
+                        f"{base[:max_length - len(suffix)]}{suffix}" for suffix in suffixes]
+            taken.update(db.session.execute(
+                select(model.sku).where(model.sku.in_({sku for skus in candidates.values() for sku in skus}))
+            ).scalars())
+
+            unallocated = []
+            for index in pending:
+                sku = next((candidate for candidate in candidates[bases[index]] if candidate not in taken), None)
+                if sku is None:
+                    unallocated.append(index)
+                    continue
+                taken.add(sku)
+                allocated[index] = sku
+            first = max(first + counts[bases[index]] + SKU_ATTEMPTS for index in unallocated) if unallocated else first
+            pending = unallocated
+        return allocated
+
+    @staticmethod
+    def sku_base(prefix, scope_id, category_name):
+        """Generated SKU stem: PREFIX+scope-CAT-YYYYMMDDHH-XXXX"""
+        category_code = category_name[:3].upper() if category_name else "GEN"
+        timestamp = datetime.now().strftime("%Y%m%d%H")
+        random_suffix = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
+        return f"{prefix}{scope_id:02d}-{category_code}-{timestamp}-{random_suffix}"
+
+    # Chunk processing
+
+    @staticmethod
+    def _load_parents(ctx, skus):
+        """Existing top-level products of this catalog, by SKU, with the fields variants inherit"""
+        model = ctx['catalog']['product']
+        columns = [model.product_id, model.sku] + [getattr(model, field) for field in INHERITED_FIELDS
+                                                   if hasattr(model, field)]
+        rows = db.session.execute(
+            select(*columns).where(
+                model.sku.in_(skus),
+                getattr(model, ctx['catalog']['scope']) == ctx['scope_id'],
+                model.parent_product_id.is_(None),
+                model.deleted_at.is_(None)
+            )
+        ).mappings().all()
+        return {row['sku']: dict(row) for row in rows}
+
+    @staticmethod
+    def _valid_categories(ctx, category_ids):
+        """{category_id: name} for the ids this catalog may use"""
+        if not category_ids:
+            return {}
+        if ctx['target'] == 'merchant':
+            query = select(Category.category_id, Category.name).where(
+                Category.category_id.in_(category_ids), Category.deleted_at.is_(None))
+        else:
+            query = select(ShopCategory.category_id, ShopCategory.name).where(
+                ShopCategory.category_id.in_(category_ids),
+                ShopCategory.shop_id == ctx['scope_id'],
+                ShopCategory.deleted_at.is_(None),
+                ShopCategory.is_active.is_(True))
+        return dict(db.session.execute(query).all())
+
+    @staticmethod
+    def _valid_brands(ctx, brand_ids):
+        """{brand_id: category_id or None} for the ids this catalog may use"""
+        if not brand_ids:
+            return {}
+        if ctx['target'] == 'merchant':
+            rows = db.session.execute(select(Brand.brand_id).where(
+                Brand.brand_id.in_(brand_ids), Brand.deleted_at.is_(None))).scalars()
+            return {brand_id: None for brand_id in rows}
+        return dict(db.session.execute(select(ShopBrand.brand_id, ShopBrand.category_id).where(
+            ShopBrand.brand_id.in_(brand_ids),
+            ShopBrand.shop_id == ctx['scope_id'],
+            ShopBrand.deleted_at.is_(None),
+            ShopBrand.is_active.is_(True))).all())
+
+    @staticmethod
+    def _attribute_lookup(ctx, keys):
+        """
+        Resolve attribute keys (attribute codes for merchants, attribute names for shops) to
+        {key or (category_id, name): (attribute_id, input type)}, plus shop attribute values
+        as {(attribute_id, value): value_id}.
+        """
+        if not keys:
+            return {}, {}
+        if ctx['target'] == 'merchant':
+            rows = db.session.execute(select(Attribute.code, Attribute.attribute_id, Attribute.input_type)
+                                      .where(Attribute.code.in_(keys))).all()
+            return {code: (attribute_id, input_type) for code, attribute_id, input_type in rows}, {}
+
+        rows = db.session.execute(select(
+            ShopAttribute.category_id, ShopAttribute.name, ShopAttribute.attribute_id, ShopAttribute.attribute_type
+        ).where(
+            ShopAttribute.shop_id == ctx['scope_id'],
+            ShopAttribute.name.in_(keys),
+            ShopAttribute.is_active.is_(True),
+            ShopAttribute.deleted_at.is_(None)
+        )).all()
+        attributes = {(category_id, name): (attribute_id, attribute_type)
+                      for category_id, name, attribute_id, attribute_type in rows}
+        values = {}
+        if attributes:
+            values = {(attribute_id, value): value_id for attribute_id, value, value_id in db.session.execute(
+                select(ShopAttributeValue.attribute_id, ShopAttributeValue.value, ShopAttributeValue.value_id).where(
+                    ShopAttributeValue.attribute_id.in_([attribute_id for attribute_id, _ in attributes.values()]),
+                    ShopAttributeValue.is_active.is_(True),
+                    ShopAttributeValue.deleted_at.is_(None)
+                )
+            ).all()}
+        return attributes, values
+
+    @staticmethod
+    def _attribute_rows(ctx, row, attributes, values):
+        """Attribute rows (without product_id) for one product; raises ValueError"""
+        prepared = []
+        for key, value in row['attributes'].items():
+            lookup = key if ctx['target'] == 'merchant' else (row['category_id'], key)
+            if lookup not in attributes:
+                raise ValueError(f"Unknown attribute '{key}'")
+            attribute_id, input_type = attributes[lookup]
+            entry = {'attribute_id': attribute_id, 'value_code': None, 'value_text': None, 'value_number': None}
+            if ctx['target'] == 'shop':
+                entry['value_id'] = None
+
+            if input_type == AttributeInputType.NUMBER:
+                try:
+                    entry['value_number'] = float(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"Attribute '{key}' must be a number")
+                prepared.append(entry)
+            elif input_type in (AttributeInputType.SELECT, AttributeInputType.MULTISELECT):
+                options = value if isinstance(value, list) else [value]
+                if ctx['target'] == 'merchant':
+                    # One row per selected code (unique per product, attribute and code)
+                    prepared.extend(dict(entry, value_code=str(option)) for option in dict.fromkeys(options))
+                else:
+                    value_id = values.get((attribute_id, str(options[0])))
+                    if value_id is None:
+                        raise ValueError(f"Unknown value '{options[0]}' for attribute '{key}'")
+                    prepared.append(dict(entry, value_id=value_id, value_code=str(options[0])))
+            elif input_type == AttributeInputType.BOOLEAN:
+                prepared.append(dict(entry, value_text=str(ProductImportService._bool(value, key))))
+            else:
+                prepared.append(dict(entry, value_text=str(value)[:255]))
+        return prepared
+
+    @staticmethod
+    def _product_values(ctx, row):
+        """Column values of the products row, including the materialized effective price"""
+        model = ctx['catalog']['product']
+        listed_price, is_on_special = model.resolve_listed_price(
+            row['selling_price'], row['special_price'], row['special_start'], row['special_end'])
+        values = {
+            ctx['catalog']['scope']: ctx['scope_id'],
+            'category_id': row['category_id'],
+            'brand_id': row['brand_id'],
+            'parent_product_id': row.get('parent_product_id'),
+            'sku': row['sku'],
+            'product_name': row['product_name'],
+            'product_description': row['product_description'] or '',
+            'cost_price': row['cost_price'],
+            'selling_price': row['selling_price'],
+            'discount_pct': row['discount_pct'] or Decimal('0.00'),
+            'special_price': row['special_price'],
+            'special_start': row['special_start'],
+            'special_end': row['special_end'],
+            'effective_price': listed_price,
+            'effective_discount_pct': model.resolve_discount_pct(
+                row['selling_price'], listed_price, is_on_special, row['discount_pct']),
+            'active_flag': True if row['active_flag'] is None else row['active_flag']
+        }
+        if ctx['target'] == 'merchant':
+            # Imported products go through approval like products created one at a time
+            values['approval_status'] = 'pending'
+        else:
+            values['is_published'] = bool(row['is_published'])
+        return values
+
+    @staticmethod
+    def insert_products(model, values):
+        """
+        Insert product rows with one multi-row statement; returns {sku: product_id}. MySQL
+        has no INSERT .. RETURNING, so the ids are read back by SKU with one IN query.
+        """
+        if not values:
+            return {}
+        db.session.execute(insert(model), values)
+        skus = [entry['sku'] for entry in values]
+        return dict(db.session.execute(select(model.sku, model.product_id).where(model.sku.in_(skus))).all())
+
+    @staticmethod
+    def _apply_chunk(ctx, chunk):
+        """
+        Validate one chunk of parsed rows against the database and insert the valid ones.
+        Returns (created, errors): created rows as {row, sku, product_id} and per-row errors.
+        Does not commit.
+        """
+        catalog = ctx['catalog']
+        model = catalog['product']
+        errors = {}
+
+        def fail(row, message):
+            errors.setdefault(row['row'], {'row': row['row'], 'sku': row['sku'], 'message': message})
+
+        # Parents: earlier in this chunk, created by earlier chunks, or already in the catalog
+        chunk_parents = {}
+        for row in chunk:
+            if row['sku'] and not row['parent_sku']:
+                chunk_parents.setdefault(row['sku'], row)
+        wanted = {row['parent_sku'] for row in chunk if row['parent_sku']} - chunk_parents.keys() - ctx['parents'].keys()
+        if wanted:
+            ctx['parents'].update(ProductImportService._load_parents(ctx, wanted))
+        for row in chunk:
+            if not row['parent_sku']:
+                continue
+            parent = chunk_parents.get(row['parent_sku'])
+            if parent is not None and parent['row'] > row['row']:
+                parent = None
+            parent = parent or ctx['parents'].get(row['parent_sku'])
+            if parent is None:
+                fail(row, f"Parent SKU '{row['parent_sku']}' not found (variant rows must come after their parent)")
+                continue
+            for field in INHERITED_FIELDS:
+                if row.get(field) is None and parent.get(field) is not None:
+                    row[field] = parent[field]
+
+        # Categories, brands and attributes: one query each for the whole chunk
+        live = [row for row in chunk if row['row'] not in errors]
+        categories = ProductImportService._valid_categories(ctx, {row['category_id'] for row in live})
+        brands = ProductImportService._valid_brands(ctx, {row['brand_id'] for row in live if row['brand_id']})
+        attributes, attribute_values = ProductImportService._attribute_lookup(
+            ctx, {key for row in live for key in row['attributes']})
+        for row in live:
+            if row['category_id'] not in categories:
+                fail(row, f"Invalid category_id {row['category_id']}")
+            elif row['brand_id'] and (row['brand_id'] not in brands or
+                                      brands[row['brand_id']] not in (None, row['category_id'])):
+                fail(row, f"Invalid brand_id {row['brand_id']} for category {row['category_id']}")
+            elif ctx['target'] == 'merchant' and not row['brand_id']:
+                fail(row, "Missing brand_id")
+            elif row['cost_price'] is None or not row['product_name']:
+                fail(row, "Missing product_name or cost_price")
+            elif not (ctx['target'] == 'shop' and row['parent_sku']):
+                # Shop variants keep their combination on the variant relation instead
+                try:
+                    row['attribute_rows'] = ProductImportService._attribute_rows(ctx, row, attributes, attribute_values)
+                except ValueError as e:
+                    fail(row, str(e))
+
+        # SKUs: given ones must be unused, missing ones are allocated in one query
+        live = [row for row in chunk if row['row'] not in errors]
+        given = [row for row in live if row['sku']]
+        existing = set(db.session.execute(
+            select(model.sku).where(model.sku.in_({row['sku'] for row in given}))
+        ).scalars()) if given else set()
+        seen = set()
+        for row in given:
+            if row['sku'] in existing or row['sku'] in ctx['skus'] or row['sku'] in seen:
+                fail(row, f"SKU '{row['sku']}' already exists")
+            seen.add(row['sku'])
+        unnamed = [row for row in live if not row['sku']]
+        allocated = ProductImportService.allocate_skus(
+            model,
+            [ProductImportService.sku_base(catalog['sku_prefix'], ctx['scope_id'], categories[row['category_id']])
+             for row in unnamed],
+            reserved=ctx['skus'] | seen
+        )
+        for row, sku in zip(unnamed, allocated):
+            row['sku'] = sku
+
+        # Variants of a parent row that failed fail with it
+        for row in chunk:
+            parent = chunk_parents.get(row['parent_sku']) if row['parent_sku'] else None
+            if parent is not None and parent['row'] in errors and row['row'] not in errors:
+                fail(row, f"Parent row {parent['row']} failed")
+
+        # Shop variants: one variant per attribute combination and parent
+        if ctx['target'] == 'shop':
+            variant_rows = [row for row in chunk if row['parent_sku'] and row['row'] not in errors]
+            parent_ids = {ctx['parents'][row['parent_sku']]['product_id'] for row in variant_rows
+                          if row['parent_sku'] in ctx['parents']}
+            taken = set(ctx['combinations'])
+            if parent_ids:
+                sku_by_parent = {info['product_id']: sku for sku, info in ctx['parents'].items()}
+                taken.update((sku_by_parent[parent_id], combination_hash) for parent_id, combination_hash in db.session.execute(
+                    select(ShopProductVariant.parent_product_id, ShopProductVariant.combination_hash)
+                    .where(ShopProductVariant.parent_product_id.in_(parent_ids))
+                ).all())
+            for row in variant_rows:
+                row['combination_hash'] = ShopProductVariant.compute_combination_hash(row['attributes'])
+                key = (row['parent_sku'], row['combination_hash'])
+                if key in taken:
+                    fail(row, "A variant with these attributes already exists for the parent")
+                taken.add(key)
+
+        # Insert parents and simple products first so variants in the same chunk can point at them
+        live = [row for row in chunk if row['row'] not in errors]
+        product_ids = ProductImportService.insert_products(
+            model, [ProductImportService._product_values(ctx, row) for row in live if not row['parent_sku']])
+        variants = [row for row in live if row['parent_sku']]
+        for row in variants:
+            parent = ctx['parents'].get(row['parent_sku'])
+            row['parent_product_id'] = parent['product_id'] if parent else product_ids[row['parent_sku']]
+        product_ids.update(ProductImportService.insert_products(
+            model, [ProductImportService._product_values(ctx, row) for row in variants]))
+
+        # Stock, meta, media and attributes: one multi-row INSERT per table
+        stock_rows, meta_rows, media_rows, attribute_rows = [], [], [], []
+        for row in live:
+            product_id = product_ids[row['sku']]
+            stock_rows.append({
+                'product_id': product_id,
+                'stock_qty': row['stock_qty'] or 0,
+                'low_stock_threshold': row['low_stock_threshold'] or 0
+            })
+            if any(row['meta'].values()):
+                meta_rows.append(dict(row['meta'], product_id=product_id))
+            images = 0
+            for sort_order, url in enumerate(row['media_urls']):
+                media_type = MediaType.VIDEO if url.lower().split('?')[0].endswith(VIDEO_EXTENSIONS) else MediaType.IMAGE
+                media = {'product_id': product_id, 'type': media_type, 'url': url, 'sort_order': sort_order}
+                if ctx['target'] == 'shop':
+                    media['is_primary'] = media_type == MediaType.IMAGE and images == 0
+                images += media_type == MediaType.IMAGE
+                media_rows.append(media)
+            attribute_rows.extend(dict(entry, product_id=product_id) for entry in row.get('attribute_rows', []))
+
+        for table, rows in ((catalog['stock'], stock_rows), (catalog['meta'], meta_rows),
+                            (catalog['media'], media_rows), (catalog['attribute'], attribute_rows)):
+            if rows:
+                db.session.execute(insert(table), rows)
+
+        if ctx['target'] == 'shop' and variants:
+            ProductImportService._insert_shop_variants(ctx, variants, product_ids)
+        if media_rows:
+            MediaManifestService.refresh(model, {media['product_id'] for media in media_rows})
+
+        created = [{'row': row['row'], 'sku': row['sku'], 'product_id': product_ids[row['sku']]} for row in live]
+        ctx['pending'] = {
+            'parents': {row['sku']: dict(ProductImportService._product_values(ctx, row), product_id=product_ids[row['sku']])
+                        for row in live if not row['parent_sku']},
+            'skus': {row['sku'] for row in live},
+            'combinations': {(row['parent_sku'], row['combination_hash']) for row in variants if 'combination_hash' in row},
+            'variant_parents': {row['parent_product_id'] for row in variants}
+        }
+        return created, sorted(errors.values(), key=lambda error: error['row'])
+
+    @staticmethod
+    def _insert_shop_variants(ctx, variants, product_ids):
+        """Variant relations and their attribute values for imported shop variant products"""
+        defaults = {row['parent_product_id'] for row in variants if row['is_default']}
+        if defaults:
+            db.session.execute(update(ShopProductVariant).where(
+                ShopProductVariant.parent_product_id.in_(defaults)).values(is_default=False))
+
+        db.session.execute(insert(ShopProductVariant), [{
+            'parent_product_id': row['parent_product_id'],
+            'variant_product_id': product_ids[row['sku']],
+            'variant_sku': row['sku'],
+            'variant_name': row['variant_name'],
+            'attribute_combination': row['attributes'],
+            'combination_hash': row['combination_hash'],
+            'sort_order': 0,
+            'is_active': True,
+            'is_default': bool(row['is_default'])
+        } for row in variants])
+
+        # Attribute values for the combination keys that name shop attributes of the category
+        variant_ids = dict(db.session.execute(select(ShopProductVariant.variant_sku, ShopProductVariant.variant_id).where(
+            ShopProductVariant.variant_sku.in_([row['sku'] for row in variants]))).all())
+        attributes, values = ProductImportService._attribute_lookup(
+            ctx, {key for row in variants for key in row['attributes']})
+        value_rows = []
+        for row in variants:
+            for name, value in row['attributes'].items():
+                attribute = attributes.get((row['category_id'], name))
+                if attribute is None:
+                    continue
+                value_id = values.get((attribute[0], str(value)))
+                value_rows.append({
+                    'variant_id': variant_ids[row['sku']],
+                    'attribute_id': attribute[0],
+                    'value_id': value_id,
+                    'value_text': None if value_id else str(value)[:255]
+                })
+        if value_rows:
+            db.session.execute(insert(ShopVariantAttributeValue), value_rows)
+
+    @staticmethod
+    def import_rows(job, raw_rows):
+        """
+        Import raw rows into the job's catalog, committing each chunk together with the
+        job's progress and row errors.
+        """
+        ctx = {
+            'target': job.target,
+            'catalog': CATALOGS[job.target],
+            'scope_id': job.merchant_id if job.target == 'merchant' else job.shop_id,
+            'parents': {},
+            'skus': set(),
+            'combinations': set(),
+            'variant_parents': set()
+        }
+        chunk = []
+        parse_errors = []
+
+        def flush():
+            created, errors = [], list(parse_errors)
+            if chunk:
+                try:
+                    created, chunk_errors = ProductImportService._apply_chunk(ctx, chunk)
+                    errors.extend(chunk_errors)
+                except (SQLAlchemyError, ValueError) as e:
+                    db.session.rollback()
+                    logger.warning(f"Product import job {job.job_id}: chunk failed: {str(e)}")
+                    ctx.pop('pending', None)
+                    errors.extend({'row': row['row'], 'sku': row['sku'], 'message': f"Could not be saved: {str(e)[:200]}"}
+                                  for row in chunk if row['row'] not in {error['row'] for error in errors})
+
+            job.processed_rows += len(chunk) + len(parse_errors)
+            job.succeeded_rows += len(created)
+            job.failed_rows += len(errors)
+            stored = job.errors or []
+            room = ProductImportJob.MAX_STORED_ERRORS - len(stored)
+            if errors and room > 0:
+                job.errors = stored + sorted(errors, key=lambda error: error['row'])[:room]
+            db.session.commit()
+
+            pending = ctx.pop('pending', None)
+            if pending:
+                ctx['parents'].update(pending['parents'])
+                ctx['skus'].update(pending['skus'])
+                ctx['combinations'].update(pending['combinations'])
+                ctx['variant_parents'].update(pending['variant_parents'])
+            chunk.clear()
+            parse_errors.clear()
+
+        for index, raw in enumerate(raw_rows, start=1):
+            try:
+                row = ProductImportService.parse_row(raw, job.target)
+                row['row'] = index
+                chunk.append(row)
+            except ValueError as e:
+                parse_errors.append({
+                    'row': index,
+                    'sku': raw.get('sku') if isinstance(raw, dict) else None,
+                    'message': str(e)
+                })
+            if len(chunk) + len(parse_errors) >= ProductImportService.CHUNK_SIZE:
+                flush()
+        flush()
+
+        if job.succeeded_rows:
+            if job.target == 'shop':
+                StorefrontCacheService.invalidate(job.shop_id)
+                VariantMatrixService.invalidate(job.shop_id, *ctx['variant_parents'])
+            else:
+                ProductDetailService.invalidate_products(*ctx['variant_parents'])
+
+    # Jobs
+
+    @staticmethod
+    def create_job(target, scope_id, user_id, stream, file_name, fmt):
+        """
+        Spool an upload to disk, record a queued job and hand it to the background worker
+        (or run it inline when PRODUCT_IMPORT_WORKERS is 0). Returns the job.
+        """
+        if fmt not in ProductImportService.SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported format. Use one of: {', '.join(ProductImportService.SUPPORTED_FORMATS)}")
+
+        spool_dir = current_app.config.get('PRODUCT_IMPORT_DIR') or os.path.join(current_app.instance_path, 'product_imports')
+        os.makedirs(spool_dir, exist_ok=True)
+        path = os.path.join(spool_dir, f"{uuid.uuid4().hex}.{fmt}")
+        with open(path, 'wb') as spool:
+            shutil.copyfileobj(stream, spool, 1024 * 1024)
+
+        job = ProductImportJob(
+            target=target,
+            merchant_id=scope_id if target == 'merchant' else None,
+            shop_id=scope_id if target == 'shop' else None,
+            created_by=user_id,
+            file_name=(file_name or '')[:255] or None,
+            file_format=fmt,
+            status=ProductImportJob.STATUS_QUEUED
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        app = current_app._get_current_object()
+        workers = app.config.get('PRODUCT_IMPORT_WORKERS', 2)
+        if workers <= 0:
+            ProductImportService.run_job(app, job.job_id, path)
+            db.session.refresh(job)
+        else:
+            _get_executor(workers).submit(ProductImportService.run_job, app, job.job_id, path)
+        return job
+
+    @staticmethod
+    def run_job(app, job_id, path):
+        """Process one spooled upload; always leaves the job completed or failed"""
+        with app.app_context():
+            try:
+                job = db.session.get(ProductImportJob, job_id)
+                job.status = ProductImportJob.STATUS_RUNNING
+                job.started_at = datetime.now(timezone.utc)
+                db.session.commit()
+
+                with open(path, 'rb') as stream:
+                    ProductImportService.import_rows(job, ProductImportService.iter_rows(stream, job.file_format))
+                job.status = ProductImportJob.STATUS_COMPLETED
+            except Exception as e:
+                logger.error(f"Product import job {job_id} failed: {str(e)}")
+                db.session.rollback()
+                job = db.session.get(ProductImportJob, job_id)
+                job.status = ProductImportJob.STATUS_FAILED
+                job.error_message = str(e)[:2000]
+            finally:
+                if os.path.exists(path):
+                    os.remove(path)
+            job.finished_at = datetime.now(timezone.utc)
+            db.session.commit()
+
+    @staticmethod
+    def get_job(job_id, merchant_id=None, shop_id=None):
+        """A job visible to the given merchant or shop, or None"""
+        query = ProductImportJob.query.filter_by(job_id=job_id)
+        if merchant_id is not None:
+            query = query.filter_by(target='merchant', merchant_id=merchant_id)
+        if shop_id is not None:
+            query = query.filter_by(target='shop', shop_id=shop_id)
+        return query.first()
+
+    @staticmethod
+    def list_jobs(merchant_id=None, shop_id=None, limit=20):
+        query = ProductImportJob.query
+        if merchant_id is not None:
+            query = query.filter_by(target='merchant', merchant_id=merchant_id)
+        if shop_id is not None:
+            query = query.filter_by(target='shop', shop_id=shop_id)
+        return query.order_by(ProductImportJob.created_at.desc(), ProductImportJob.job_id.desc()).limit(limit).all()
+
+
+def _get_executor(workers):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='product-import')
+        return _executor
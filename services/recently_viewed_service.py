@@ -0,0 +1,270 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from apscheduler.schedulers.background import BackgroundScheduler
+from flask import current_app
+from common.cache import get_redis_client
+from common.database import db
+from auth.models.models import User
+from models.enums import MediaType
+from models.product import Product
+from models.product_media import ProductMedia
+from models.recently_viewed import RecentlyViewed
+
+logger = logging.getLogger(__name__)
+
+
+class RecentlyViewedService:
+    """
+    Write-behind recently-viewed tracking.
+
+    A view is recorded in a per-user Redis sorted set (product_id scored by view time,
+    so re-viewing a product just moves it to the front) trimmed to MAX_ITEMS, and in a
+    pending hash keyed "user_id:product_id". The background flusher drains the pending
+    hash into the recently_viewed table in batches, so product pages never write to the
+    database. Reads are served from the sorted set, which is rebuilt from the table when
+    it has expired; if Redis is unreachable both paths fall back to the table directly.
+    """
+    MAX_ITEMS = 20
+    LIST_TIMEOUT = 60 * 60 * 24 * 30
+    FLUSH_BATCH_SIZE = 500
+    PENDING_KEY = "recently_viewed:pending"
+
+    @staticmethod
+    def _list_key(user_id):
+        return f"recently_viewed:{user_id}"
+
+    @staticmethod
+    def _db_recent(user_id, limit):
+        return db.session.query(RecentlyViewed.product_id, RecentlyViewed.viewed_at).filter(
+            RecentlyViewed.user_id == user_id
+        ).order_by(RecentlyViewed.viewed_at.desc()).limit(limit).all()
+
+    @staticmethod
+    def _ensure_list(redis_client, user_id):
+        """Rebuild an expired per-user list from the table so a new view does not hide older history"""
+        key = RecentlyViewedService._list_key(user_id)
+        if redis_client.exists(key):
+            return
+        rows = RecentlyViewedService._db_recent(user_id, RecentlyViewedService.MAX_ITEMS)
+        if not rows:
+            return
+        pipe = redis_client.pipeline()
+        # nx: never overwrite a fresher score recorded concurrently
+        pipe.zadd(key, {str(row.product_id): row.viewed_at.timestamp() for row in rows if row.viewed_at}, nx=True)
+        pipe.expire(key, RecentlyViewedService.LIST_TIMEOUT)
+        pipe.execute()
+
+    @staticmethod
+    def record_view(user_id, product_id):
+        """Record that user_id viewed product_id; cheap enough to call inside any GET request"""
+        viewed_at = time.time()
+        try:
+            redis_client = get_redis_client(current_app)
+            RecentlyViewedService._ensure_list(redis_client, user_id)
+            key = RecentlyViewedService._list_key(user_id)
+            pipe = redis_client.pipeline()
+            pipe.zadd(key, {str(product_id): viewed_at})
+            pipe.zremrangebyrank(key, 0, -(RecentlyViewedService.MAX_ITEMS + 1))
+            pipe.expire(key, RecentlyViewedService.LIST_TIMEOUT)
+            pipe.hset(RecentlyViewedService.PENDING_KEY, f"{user_id}:{product_id}", viewed_at)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Recently viewed cache unavailable, writing view directly: {str(e)}")
+            try:
+                RecentlyViewedService._write_views([(user_id, product_id, viewed_at)])
+                db.session.commit()
+            except Exception as db_error:
+                db.session.rollback()
+                logger.error(f"Failed to record view of product {product_id} by user {user_id}: {str(db_error)}")
+
+    @staticmethod
+    def _write_views(views):
+        """
+        Upsert (user_id, product_id, timestamp) views into recently_viewed with one lookup,
+        one bulk UPDATE and one bulk INSERT. Older timestamps never overwrite newer ones.
+        Views of users or products that no longer exist are dropped. Commit is left to the caller.
+        """
+        latest = {}
+        for user_id, product_id, viewed_at in views:
+            pair = (int(user_id), int(product_id))
+            latest[pair] = max(float(viewed_at), latest.get(pair, 0))
+        if not latest:
+            return 0
+
+        # One dangling foreign key would fail the whole bulk INSERT, so filter them out first
+        user_ids = {row.id for row in db.session.query(User.id).filter(
+            User.id.in_({user_id for user_id, _ in latest}))}
+        product_ids = {row.product_id for row in db.session.query(Product.product_id).filter(
+            Product.product_id.in_({product_id for _, product_id in latest}))}
+        latest = {
+            (user_id, product_id): viewed_at for (user_id, product_id), viewed_at in latest.items()
+            if user_id in user_ids and product_id in product_ids
+        }
+        if not latest:
+            return 0
+
+        existing = db.session.query(
+            RecentlyViewed.id, RecentlyViewed.user_id, RecentlyViewed.product_id, RecentlyViewed.viewed_at
+        ).filter(
+            RecentlyViewed.user_id.in_({user_id for user_id, _ in latest}),
+            RecentlyViewed.product_id.in_({product_id for _, product_id in latest})
+        ).all()
+
+        updates = []
+        seen = set()
+        for row in existing:
+            pair = (row.user_id, row.product_id)
+            if pair not in latest:
+                continue
+            seen.add(pair)
+            viewed_at = datetime.utcfromtimestamp(latest[pair])
+            if row.viewed_at is None or row.viewed_at < viewed_at:
+                updates.append({'id': row.id, 'viewed_at': viewed_at})
+
+        inserts = [
+            {'user_id': user_id, 'product_id': product_id, 'viewed_at': datetime.utcfromtimestamp(viewed_at)}
+            for (user_id, product_id), viewed_at in latest.items() if (user_id, product_id) not in seen
+        ]
+
+        if updates:
+            db.session.bulk_update_mappings(RecentlyViewed, updates)
+        if inserts:
+            db.session.bulk_insert_mappings(RecentlyViewed, inserts)
+        return len(updates) + len(inserts)
+
+    @staticmethod
+    def flush_pending(batch_size=FLUSH_BATCH_SIZE):
+        """
+        Drain the pending views from Redis into recently_viewed, batch_size views per
+        transaction. Malformed entries and views of users or products that no longer exist
+        are dropped; a batch that still fails to commit (e.g. the database is unreachable)
+        is put back for the next run without clobbering views recorded since. Returns the
+        number of rows written.
+        """
+        redis_client = get_redis_client(current_app)
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.hgetall(RecentlyViewedService.PENDING_KEY)
+        pipe.delete(RecentlyViewedService.PENDING_KEY)
+        pending, _ = pipe.execute()
+        if not pending:
+            return 0
+
+        views = []
+        for field, viewed_at in pending.items():
+            field = field.decode() if isinstance(field, bytes) else field
+            user_id, _, product_id = field.partition(':')
+            try:
+                views.append((int(user_id), int(product_id), float(viewed_at)))
+            except ValueError:
+                logger.warning(f"Dropping malformed recently viewed entry {field!r}")
+
+        written = 0
+        for start in range(0, len(views), batch_size):
+            batch = views[start:start + batch_size]
+            try:
+                written += RecentlyViewedService._write_views(batch)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Failed to flush {len(batch)} recently viewed entries, requeueing: {str(e)}")
+                requeue = redis_client.pipeline()
+                for user_id, product_id, viewed_at in batch:
+                    requeue.hsetnx(RecentlyViewedService.PENDING_KEY, f"{user_id}:{product_id}", viewed_at)
+                requeue.execute()
+        return written
+
+    @staticmethod
+    def get_recent_product_ids(user_id):
+        """Product ids the user viewed, most recent first (at most MAX_ITEMS)"""
+        try:
+            redis_client = get_redis_client(current_app)
+            RecentlyViewedService._ensure_list(redis_client, user_id)
+            product_ids = redis_client.zrevrange(RecentlyViewedService._list_key(user_id), 0, -1)
+            return [int(product_id) for product_id in product_ids]
+        except Exception as e:
+            logger.warning(f"Recently viewed cache unavailable for user {user_id}: {str(e)}")
+            return [row.product_id for row in RecentlyViewedService._db_recent(user_id, RecentlyViewedService.MAX_ITEMS)]
+
+    @staticmethod
+    def get_recent_products(user_id, limit=6):
+        """Product cards for the user's most recently viewed live products, loaded in two queries"""
+        product_ids = RecentlyViewedService.get_recent_product_ids(user_id)
+        if not product_ids:
+            return []
+
+        products = Product.query.options(
+            db.joinedload(Product.category),
+            db.joinedload(Product.brand)
+        ).filter(
+            Product.product_id.in_(product_ids),
+            Product.deleted_at.is_(None),
+            Product.active_flag.is_(True),
+            Product.approval_status == 'approved'
+        ).all()
+        products_by_id = {product.product_id: product for product in products}
+        visible_ids = [product_id for product_id in product_ids if product_id in products_by_id][:limit]
+
+        primary_media = {}
+        for media in ProductMedia.query.filter(
+            ProductMedia.product_id.in_(visible_ids),
+            ProductMedia.deleted_at.is_(None),
+            ProductMedia.type == MediaType.IMAGE
+        ).order_by(ProductMedia.product_id, ProductMedia.sort_order):
+            primary_media.setdefault(media.product_id, media)
+
+        cards = []
+        for product_id in visible_ids:
+            product = products_by_id[product_id]
+            card = product.serialize_basic()
+            # Add frontend-specific fields
+            card.update({
+                'id': str(product.product_id),
+                'name': product.product_name,
+                'price': float(product.selling_price),
+                'originalPrice': float(product.cost_price),
+                'currency': 'INR',
+                'stock': 100,
+                'isNew': True,
+                'isBuiltIn': False,
+                'rating': 0,
+                'reviews': [],
+                'sku': product.sku
+            })
+            media = primary_media.get(product_id)
+            if media:
+                card['primary_image'] = media.url
+                card['image'] = media.url
+            cards.append(card)
+        return cards
+
+
+# Scheduler instance (started from app.py)
+scheduler = BackgroundScheduler()
+
+
+def start_recently_viewed_flusher(app):
+    """
+    Start the background job that flushes pending views every
+    RECENTLY_VIEWED_FLUSH_INTERVAL seconds. Call once at app startup.
+    """
+    interval = app.config.get('RECENTLY_VIEWED_FLUSH_INTERVAL', 10)
+    if not interval or scheduler.running:
+        return
+
+    def flush():
+        with app.app_context():
+            try:
+                written = RecentlyViewedService.flush_pending()
+                if written:
+                    logger.info(f"Flushed {written} recently viewed entries")
+            except Exception as e:
+                logger.warning(f"Recently viewed flush failed: {str(e)}")
+            finally:
+                db.session.remove()
+
+    scheduler.add_job(flush, 'interval', seconds=interval, id='recently_viewed_flush',
+                      max_instances=1, coalesce=True)
+    # Use a thread to avoid blocking the main app
+    threading.Thread(target=scheduler.start, daemon=True).start()
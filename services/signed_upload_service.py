@@ -0,0 +1,367 @@
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+import cloudinary
+import cloudinary.api
+import cloudinary.exceptions
+import cloudinary.uploader
+import cloudinary.utils
+from flask import current_app, url_for
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from werkzeug.utils import safe_join, secure_filename
+from common.cache import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# MIME type -> (Cloudinary resource type, format)
+IMAGE_TYPES = {
+    'image/jpeg': ('image', 'jpg'),
+    'image/png': ('image', 'png'),
+    'image/gif': ('image', 'gif'),
+    'image/webp': ('image', 'webp'),
+    'image/svg+xml': ('image', 'svg')
+}
+VIDEO_TYPES = {
+    'video/mp4': ('video', 'mp4'),
+    'video/quicktime': ('video', 'mov'),
+    'video/x-msvideo': ('video', 'avi'),
+    'video/x-matroska': ('video', 'mkv')
+}
+# Same types and resource types as auth/document_route.py
+DOCUMENT_TYPES = {
+    'application/pdf': ('raw', 'pdf'),
+    'image/jpeg': ('image', 'jpg'),
+    'image/png': ('image', 'png'),
+    'application/vnd.ms-excel': ('raw', 'xls'),
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': ('raw', 'xlsx'),
+    'text/csv': ('raw', 'csv')
+}
+SUPPORT_ATTACHMENT_TYPES = {
+    **IMAGE_TYPES,
+    'application/pdf': ('raw', 'pdf'),
+    'application/msword': ('raw', 'doc'),
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': ('raw', 'docx')
+}
+
+# What each kind of upload may contain and where it is stored
+PURPOSES = {
+    'product_image': {'folder': 'products', 'content_types': IMAGE_TYPES, 'max_bytes': 10 * MB},
+    'product_video': {'folder': 'products', 'content_types': VIDEO_TYPES, 'max_bytes': 500 * MB},
+    'merchant_document': {'folder': 'merchant_documents', 'content_types': DOCUMENT_TYPES, 'max_bytes': 10 * MB},
+    'support_attachment': {'folder': 'shopeasy/support_attachments', 'content_types': SUPPORT_ATTACHMENT_TYPES, 'max_bytes': 10 * MB},
+    'live_stream_thumbnail': {'folder': 'live_stream_thumbnails', 'content_types': IMAGE_TYPES, 'max_bytes': 5 * MB}
+}
+
+_CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class SignedUploadError(ValueError):
+    """An upload request, upload result or token that cannot be accepted"""
+
+
+class SignedUploadService:
+    """
+    Direct-to-storage uploads. The API never receives the file:
+
+    1. issue() returns signed upload parameters for one file and an upload_token.
+    2. The client posts the file straight to upload_url (in chunks for large files, with
+       X-Unique-Upload-Id and Content-Range headers, as Cloudinary expects).
+    3. complete() checks Cloudinary's signed upload response (or the upload notification it
+       sent to /api/upload/signed/notify) against the upload_token and returns the asset
+       with an asset_token.
+    4. Endpoints that attach files (documents, support attachments, live stream thumbnails)
+       take the asset_token and call redeem().
+
+    Tokens are signed with SECRET_KEY and carry their own claims, so nothing is stored per
+    upload. With UPLOAD_BACKEND='local' uploads go to an in-app stub that signs its
+    responses the way Cloudinary does.
+    """
+    UPLOAD_SALT = 'signed-upload'
+    ASSET_SALT = 'signed-upload-asset'
+    NOTIFICATION_KEY = 'signed_upload:{public_id}'
+
+    @staticmethod
+    def is_local():
+        return current_app.config.get('UPLOAD_BACKEND') == 'local'
+
+    @staticmethod
+    def _credentials():
+        """(cloud name, api key, api secret) of the configured backend"""
+        if SignedUploadService.is_local():
+            return 'local', 'local', current_app.config['SECRET_KEY']
+        config = cloudinary.config()
+        if not (config.cloud_name and config.api_key and config.api_secret):
+            raise SignedUploadError("Cloudinary service is not configured.")
+        return config.cloud_name, config.api_key, config.api_secret
+
+    @staticmethod
+    def _serializer():
+        return URLSafeTimedSerializer(current_app.config['SECRET_KEY'])
+
+    @staticmethod
+    def _load(token, salt, max_age):
+        try:
+            return SignedUploadService._serializer().loads(token, salt=salt, max_age=max_age)
+        except SignatureExpired:
+            raise SignedUploadError("Upload token has expired.")
+        except BadSignature:
+            raise SignedUploadError("Invalid upload token.")
+
+    @staticmethod
+    def _response_signature(public_id, version, api_secret):
+        # Cloudinary signs upload responses as sha1("public_id=...&version=..." + api_secret)
+        return cloudinary.utils.api_sign_request({'public_id': public_id, 'version': version}, api_secret)
+
+    @staticmethod
+    def _upload_url(resource_type):
+        if SignedUploadService.is_local():
+            return url_for('upload.local_signed_upload', resource_type=resource_type, _external=True)
+        cloud_name = SignedUploadService._credentials()[0]
+        return f"https://api.cloudinary.com/v1_1/{cloud_name}/{resource_type}/upload"
+
+    @staticmethod
+    def issue(purpose, user_id, content_type, file_name=None, file_size=None):
+        """Signed upload parameters for one file of the given purpose"""
+        spec = PURPOSES.get(purpose)
+        if spec is None:
+            raise SignedUploadError(f"Invalid purpose. Choose from: {list(PURPOSES)}")
+        if content_type not in spec['content_types']:
+            raise SignedUploadError(f"Invalid file type. Allowed types: {', '.join(spec['content_types'])}")
+        if file_size is not None and file_size > spec['max_bytes']:
+            raise SignedUploadError(f"File too large. Maximum size is {spec['max_bytes'] / MB}MB")
+
+        resource_type, file_format = spec['content_types'][content_type]
+        cloud_name, api_key, api_secret = SignedUploadService._credentials()
+        public_id = f"{spec['folder']}/{uuid.uuid4().hex}"
+        if resource_type == 'raw':
+            # Raw files are delivered under their public_id, so it carries the extension
+            public_id = f"{public_id}.{file_format}"
+
+        timestamp = int(time.time())
+        fields = {'public_id': public_id, 'timestamp': timestamp}
+        if resource_type != 'raw':
+            fields['allowed_formats'] = ','.join(sorted({fmt for rtype, fmt in spec['content_types'].values()
+                                                         if rtype == resource_type}))
+        notification_url = current_app.config.get('CLOUDINARY_NOTIFICATION_URL')
+        if notification_url and not SignedUploadService.is_local():
+            fields['notification_url'] = notification_url
+        fields['signature'] = cloudinary.utils.api_sign_request(fields, api_secret)
+        fields['api_key'] = api_key
+
+        ttl = current_app.config.get('SIGNED_UPLOAD_TTL', 900)
+        upload_token = SignedUploadService._serializer().dumps({
+            'purpose': purpose,
+            'user_id': str(user_id),
+            'public_id': public_id,
+            'resource_type': resource_type,
+            'content_type': content_type,
+            'file_name': file_name
+        }, salt=SignedUploadService.UPLOAD_SALT)
+
+        chunk_size = current_app.config.get('UPLOAD_CHUNK_SIZE', 20 * MB)
+        chunked = file_size is not None and file_size > chunk_size
+        return {
+            'upload_url': SignedUploadService._upload_url(resource_type),
+            'resource_type': resource_type,
+            'file_field': 'file',
+            'fields': fields,
+            'max_bytes': spec['max_bytes'],
+            'expires_at': datetime.fromtimestamp(timestamp + ttl, timezone.utc).isoformat(),
+            'upload_token': upload_token,
+            'chunked': chunked,
+            'chunk_size': chunk_size if chunked else None,
+            'unique_upload_id': uuid.uuid4().hex if chunked else None
+        }
+
+    @staticmethod
+    def complete(upload_token, user_id, result=None):
+        """
+        Verify a finished upload and return the asset with its asset_token. result is the
+        upload response the client got from the backend; without it the upload notification
+        recorded by record_notification() is used.
+        """
+        claims = SignedUploadService._load(upload_token, SignedUploadService.UPLOAD_SALT,
+                                           current_app.config.get('SIGNED_UPLOAD_TTL', 900))
+        if claims['user_id'] != str(user_id):
+            raise SignedUploadError("Upload token was issued to another user.")
+
+        if result is None:
+            result = SignedUploadService._recorded_notification(claims['public_id'])
+            if result is None:
+                raise SignedUploadError("Upload has not been received yet.")
+        else:
+            api_secret = SignedUploadService._credentials()[2]
+            if not result.get('public_id') or not result.get('version') or \
+               result.get('signature') != SignedUploadService._response_signature(result['public_id'], result['version'], api_secret):
+                raise SignedUploadError("Upload result signature is invalid.")
+            if result['public_id'] != claims['public_id']:
+                raise SignedUploadError("Upload result does not match the upload token.")
+            # Only public_id and version are signed: size, format and URL come from storage
+            result = SignedUploadService._stored_resource(claims['resource_type'], claims['public_id'])
+
+        if result['public_id'] != claims['public_id'] or result.get('resource_type') != claims['resource_type']:
+            raise SignedUploadError("Upload result does not match the upload token.")
+
+        spec = PURPOSES[claims['purpose']]
+        if (result.get('bytes') or 0) > spec['max_bytes']:
+            SignedUploadService.discard(claims['resource_type'], claims['public_id'])
+            raise SignedUploadError(f"File too large. Maximum size is {spec['max_bytes'] / MB}MB")
+
+        asset = {
+            'purpose': claims['purpose'],
+            'public_id': result['public_id'],
+            'version': result['version'],
+            'secure_url': result.get('secure_url'),
+            'resource_type': claims['resource_type'],
+            'format': result.get('format') or spec['content_types'][claims['content_type']][1],
+            'bytes': result.get('bytes'),
+            'content_type': claims['content_type'],
+            'file_name': claims['file_name']
+        }
+        asset_token = SignedUploadService._serializer().dumps(
+            dict(asset, user_id=claims['user_id']), salt=SignedUploadService.ASSET_SALT
+        )
+        return dict(asset, asset_token=asset_token)
+
+    @staticmethod
+    def redeem(asset_token, purpose, user_id):
+        """The asset behind an asset_token, checked against the purpose and user attaching it"""
+        asset = SignedUploadService._load(asset_token, SignedUploadService.ASSET_SALT,
+                                          current_app.config.get('SIGNED_UPLOAD_ASSET_TTL', 86400))
+        if asset['purpose'] != purpose:
+            raise SignedUploadError(f"Upload was not made for {purpose.replace('_', ' ')}.")
+        if asset.pop('user_id') != str(user_id):
+            raise SignedUploadError("Upload belongs to another user.")
+        return asset
+
+    @staticmethod
+    def record_notification(body, timestamp, signature):
+        """
+        Record a Cloudinary upload notification (raw body, X-Cld-Timestamp, X-Cld-Signature)
+        so complete() can finish the upload without the client's copy of the response.
+        Returns the public_id, or None for other notification types.
+        """
+        if not timestamp or not signature or \
+           not cloudinary.utils.verify_notification_signature(body, timestamp, signature):
+            raise SignedUploadError("Invalid notification signature.")
+        notification = json.loads(body)
+        if notification.get('notification_type') != 'upload' or not notification.get('public_id'):
+            return None
+
+        result = {key: notification.get(key)
+                  for key in ('public_id', 'version', 'secure_url', 'resource_type', 'format', 'bytes')}
+        try:
+            get_redis_client(current_app).setex(
+                SignedUploadService.NOTIFICATION_KEY.format(public_id=result['public_id']),
+                current_app.config.get('SIGNED_UPLOAD_TTL', 900),
+                json.dumps(result)
+            )
+        except Exception as e:
+            logger.warning(f"Could not record upload notification: {str(e)}")
+        return result['public_id']
+
+    @staticmethod
+    def _recorded_notification(public_id):
+        try:
+            recorded = get_redis_client(current_app).get(SignedUploadService.NOTIFICATION_KEY.format(public_id=public_id))
+        except Exception as e:
+            logger.warning(f"Could not read upload notification: {str(e)}")
+            return None
+        return json.loads(recorded) if recorded else None
+
+    @staticmethod
+    def _stored_resource(resource_type, public_id):
+        """public_id, version, secure_url, resource_type, format and bytes of a stored upload"""
+        if SignedUploadService.is_local():
+            path = SignedUploadService.local_path(public_id)
+            if not path or not os.path.isfile(path):
+                raise SignedUploadError("Upload has not been received yet.")
+            with open(f"{path}.json") as f:
+                return json.load(f)
+        try:
+            resource = cloudinary.api.resource(public_id, resource_type=resource_type)
+        except cloudinary.exceptions.NotFound:
+            raise SignedUploadError("Upload has not been received yet.")
+        return {key: resource.get(key)
+                for key in ('public_id', 'version', 'secure_url', 'resource_type', 'format', 'bytes')}
+
+    @staticmethod
+    def discard(resource_type, public_id):
+        """Delete an uploaded file that was rejected"""
+        try:
+            if SignedUploadService.is_local():
+                path = SignedUploadService.local_path(public_id)
+                for stored in (path, f"{path}.json") if path else ():
+                    if os.path.exists(stored):
+                        os.remove(stored)
+            else:
+                cloudinary.uploader.destroy(public_id, resource_type=resource_type)
+        except Exception as e:
+            logger.warning(f"Could not delete rejected upload {public_id}: {str(e)}")
+
+    # Local stub backend
+
+    @staticmethod
+    def local_path(public_id):
+        root = current_app.config.get('UPLOAD_LOCAL_DIR') or os.path.join(current_app.instance_path, 'signed_uploads')
+        return safe_join(root, public_id)
+
+    @staticmethod
+    def local_upload(resource_type, form, file, content_range=None, upload_id=None):
+        """
+        Accept an upload (or one chunk of it) the way Cloudinary's upload API does: the form
+        fields must carry a valid, unexpired signature. Returns the Cloudinary-shaped response.
+        """
+        api_secret = SignedUploadService._credentials()[2]
+        params = {key: value for key, value in form.items() if key not in ('api_key', 'signature', 'file')}
+        if form.get('signature') != cloudinary.utils.api_sign_request(params, api_secret):
+            raise SignedUploadError("Invalid Signature")
+        if int(params.get('timestamp') or 0) < time.time() - current_app.config.get('SIGNED_UPLOAD_TTL', 900):
+            raise SignedUploadError("Stale request")
+        if file is None:
+            raise SignedUploadError("Missing required parameter - file")
+
+        public_id = params['public_id']
+        file_format = public_id.rsplit('.', 1)[1] if resource_type == 'raw' else \
+            os.path.splitext(file.filename or '')[1].lstrip('.').lower().replace('jpeg', 'jpg')
+        allowed_formats = params.get('allowed_formats')
+        if allowed_formats and file_format not in allowed_formats.split(','):
+            raise SignedUploadError(f"{resource_type.capitalize()} format {file_format} not allowed")
+
+        path = SignedUploadService.local_path(public_id)
+        if path is None:
+            raise SignedUploadError("Invalid public_id")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if content_range:
+            match = _CONTENT_RANGE.match(content_range)
+            if not match or not upload_id:
+                raise SignedUploadError("Chunks need X-Unique-Upload-Id and a Content-Range of bytes start-end/total")
+            start, end, total = (int(value) for value in match.groups())
+            part_path = f"{path}.{secure_filename(upload_id)}.part"
+            with open(part_path, 'r+b' if os.path.exists(part_path) else 'wb') as part:
+                part.seek(start)
+                file.save(part)
+            if end + 1 < total:
+                return {'done': False, 'public_id': public_id, 'bytes': end + 1}
+            os.replace(part_path, path)
+        else:
+            file.save(path)
+
+        stored = {
+            'public_id': public_id,
+            'version': int(time.time()),
+            'secure_url': url_for('upload.local_signed_file', public_id=public_id, _external=True),
+            'resource_type': resource_type,
+            'format': file_format,
+            'bytes': os.path.getsize(path)
+        }
+        # What Cloudinary's Admin API would report for the resource
+        with open(f"{path}.json", 'w') as f:
+            json.dump(stored, f)
+        return dict(stored, signature=SignedUploadService._response_signature(public_id, stored['version'], api_secret))
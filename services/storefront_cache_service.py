@@ -0,0 +1,333 @@
+import json
+import logging
+from flask import current_app, g, has_app_context
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from common.cache import get_redis_client
+from common.database import db
+from models.shop.shop import Shop
+from models.shop.shop_brand import ShopBrand
+from models.shop.shop_category import ShopCategory
+from models.shop.shop_product import ShopProduct
+from models.shop.shop_product_attribute import ShopProductAttribute
+from models.shop.shop_product_media import ShopProductMedia
+from models.shop.shop_product_meta import ShopProductMeta
+from models.shop.shop_product_stock import ShopProductStock
+from models.shop.shop_product_variant import ShopProductVariant
+from services.media_manifest_service import MediaManifestService
+
+logger = logging.getLogger(__name__)
+
+# Models whose rows carry shop_id, and product-level models whose shop is found via product_id
+SHOP_SCOPED_MODELS = (Shop, ShopCategory, ShopBrand, ShopProduct)
+PRODUCT_SCOPED_MODELS = (ShopProductMedia, ShopProductMeta, ShopProductStock, ShopProductAttribute)
+
+
+class StorefrontCacheService:
+    """
+    Read cache for the public shop storefront: shop metadata, category and brand lists with
+    product counts, product cards, listing pages and product detail payloads.
+
+    Every key embeds its shop's version number (storefront:{shop_id}:v{n}:...). Any committed
+    ORM write to a shop's rows increments the version (see the session listeners below), so
+    all of the shop's entries go stale at once and simply age out; nothing is deleted by key.
+    The shop list and slug lookups live under the shared "shops" scope, bumped by Shop writes.
+    Set-based writes that bypass the session (stock imports, price refresh) call
+    invalidate()/invalidate_all() themselves.
+    """
+    CACHE_TIMEOUT = 60 * 10
+    SHOPS_SCOPE = 'shops'
+
+    @staticmethod
+    def _version_key(scope):
+        return f"storefront:{scope}:version"
+
+    @staticmethod
+    def _cache_key(scope, version, name):
+        return f"storefront:{scope}:v{version}:{name}"
+
+    @staticmethod
+    def _version(redis_client, scope):
+        """Current version of a scope, read once per request"""
+        versions = g.setdefault('storefront_versions', {})
+        if scope not in versions:
+            versions[scope] = int(redis_client.get(StorefrontCacheService._version_key(scope)) or 0)
+        return versions[scope]
+
+    @staticmethod
+    def get_or_build(scope, name, builder):
+        """
+        Return the cached value of name in scope, or build, cache and return it. None is a
+        valid (cached) result, so lookups of missing shops and products are cached too.
+        """
+        redis_client = None
+        try:
+            redis_client = get_redis_client(current_app)
+            version = StorefrontCacheService._version(redis_client, scope)
+            cache_key = StorefrontCacheService._cache_key(scope, version, name)
+            cached = redis_client.get(cache_key)
+            if cached is not None:
+                return json.loads(cached)
+        except Exception as e:
+            logger.warning(f"Storefront cache unavailable for {scope}:{name}: {str(e)}")
+            redis_client = None
+
+        value = builder()
+
+        if redis_client:
+            try:
+                redis_client.setex(cache_key, StorefrontCacheService.CACHE_TIMEOUT, json.dumps(value, default=str))
+            except Exception as e:
+                logger.warning(f"Failed to cache storefront {scope}:{name}: {str(e)}")
+        return value
+
+    @staticmethod
+    def invalidate(*shop_ids, shop_list=False):
+        """Bump the version of each shop (and of the shop list); their cached entries stop being read"""
+        scopes = [shop_id for shop_id in set(shop_ids) if shop_id]
+        if shop_list:
+            scopes.append(StorefrontCacheService.SHOPS_SCOPE)
+        if not scopes:
+            return
+        try:
+            pipe = get_redis_client(current_app).pipeline()
+            for scope in scopes:
+                pipe.incr(StorefrontCacheService._version_key(scope))
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to invalidate storefront cache: {str(e)}")
+        versions = g.get('storefront_versions')
+        if versions:
+            for scope in scopes:
+                versions.pop(scope, None)
+
+    @staticmethod
+    def invalidate_all():
+        """Bump every shop's version; for set-based writes that may touch any shop"""
+        shop_ids = [shop_id for (shop_id,) in db.session.query(Shop.shop_id).all()]
+        StorefrontCacheService.invalidate(*shop_ids, shop_list=True)
+
+    @staticmethod
+    def get_shops():
+        """Serialized active shops, by name"""
+        def build():
+            shops = Shop.query.filter(
+                Shop.deleted_at.is_(None),
+                Shop.is_active.is_(True)
+            ).order_by(Shop.name).all()
+            return [shop.serialize() for shop in shops]
+
+        return StorefrontCacheService.get_or_build(StorefrontCacheService.SHOPS_SCOPE, 'list', build)
+
+    @staticmethod
+    def get_shop(shop_id):
+        """Serialized shop if it exists and is active, else None"""
+        def build():
+            shop = Shop.query.filter(
+                Shop.shop_id == shop_id,
+                Shop.deleted_at.is_(None),
+                Shop.is_active.is_(True)
+            ).first()
+            return shop.serialize() if shop else None
+
+        return StorefrontCacheService.get_or_build(shop_id, 'shop', build)
+
+    @staticmethod
+    def get_shop_by_slug(slug):
+        """Serialized active shop for a slug, else None"""
+        def build():
+            row = db.session.query(Shop.shop_id).filter(
+                Shop.slug == slug,
+                Shop.deleted_at.is_(None),
+                Shop.is_active.is_(True)
+            ).first()
+            return row.shop_id if row else None
+
+        shop_id = StorefrontCacheService.get_or_build(StorefrontCacheService.SHOPS_SCOPE, f"slug:{slug}", build)
+        return StorefrontCacheService.get_shop(shop_id) if shop_id else None
+
+    @staticmethod
+    def _listed_product_counts(shop_id, column):
+        """{category_id or brand_id: live product count} for a shop in one grouped query"""
+        rows = db.session.query(column, func.count(ShopProduct.product_id)).filter(
+            ShopProduct.shop_id == shop_id,
+            ShopProduct.deleted_at.is_(None),
+            ShopProduct.active_flag.is_(True),
+            ShopProduct.is_published.is_(True)
+        ).group_by(column).all()
+        return dict(rows)
+
+    @staticmethod
+    def get_categories(shop_id):
+        """Active categories of a shop, by name, each with its product_count"""
+        def build():
+            counts = StorefrontCacheService._listed_product_counts(shop_id, ShopProduct.category_id)
+            categories = ShopCategory.query.filter(
+                ShopCategory.shop_id == shop_id,
+                ShopCategory.deleted_at.is_(None),
+                ShopCategory.is_active.is_(True)
+            ).order_by(ShopCategory.name).all()
+            return [dict(category.serialize(), product_count=counts.get(category.category_id, 0))
+                    for category in categories]
+
+        return StorefrontCacheService.get_or_build(shop_id, 'categories', build)
+
+    @staticmethod
+    def get_brands(shop_id):
+        """Active brands of a shop, by name, each with its product_count"""
+        def build():
+            counts = StorefrontCacheService._listed_product_counts(shop_id, ShopProduct.brand_id)
+            brands = ShopBrand.query.filter(
+                ShopBrand.shop_id == shop_id,
+                ShopBrand.deleted_at.is_(None),
+                ShopBrand.is_active.is_(True)
+            ).order_by(ShopBrand.name).all()
+            return [dict(brand.serialize(), product_count=counts.get(brand.brand_id, 0))
+                    for brand in brands]
+
+        return StorefrontCacheService.get_or_build(shop_id, 'brands', build)
+
+    @staticmethod
+    def apply_meta(product_dict, meta):
+        """Copy a product's meta (or fallbacks when it has none) onto its serialized dict"""
+        if meta:
+            # Override product_description with short_desc for better UX
+            product_dict['product_description'] = meta.short_desc or product_dict.get('product_description', '')
+            product_dict['short_description'] = meta.short_desc
+            product_dict['full_description'] = meta.full_desc
+            product_dict['meta_title'] = meta.meta_title
+            product_dict['meta_description'] = meta.meta_desc
+            product_dict['meta_keywords'] = meta.meta_keywords
+        else:
+            # Fallback if meta doesn't exist (though it should always exist)
+            product_dict['short_description'] = product_dict.get('product_description', '')
+            product_dict['full_description'] = product_dict.get('product_description', '')
+            product_dict['meta_title'] = None
+            product_dict['meta_description'] = None
+            product_dict['meta_keywords'] = None
+        return product_dict
+
+    @staticmethod
+    def build_product_cards(products):
+        """
+        Serialized cards for loaded products: product data, meta, primary image (with its
+        resized renditions, from the product's media manifest) and stock. Meta for the whole
+        batch comes from one query; load the products with ShopProduct.card_load_options()
+        so serialize() does not query per product. Returns {product_id: card}.
+        """
+        product_ids = [product.product_id for product in products]
+        if not product_ids:
+            return {}
+
+        metas = {meta.product_id: meta for meta in ShopProductMeta.query.filter(
+            ShopProductMeta.product_id.in_(product_ids)
+        ).all()}
+
+        cards = {}
+        for product in products:
+            card = StorefrontCacheService.apply_meta(product.serialize(), metas.get(product.product_id))
+            primary = MediaManifestService.get(ShopProduct, product)['primary']
+            if primary:
+                card['primary_image'] = primary['url']
+                card['primary_image_sizes'] = primary['sizes']
+                card['primary_image_srcset'] = primary['srcset']
+            stock = product.stock
+            if stock:
+                card['stock'] = stock.serialize()
+                card['is_in_stock'] = stock.stock_qty > 0
+            else:
+                card['is_in_stock'] = False
+            cards[product.product_id] = card
+        return cards
+
+    @staticmethod
+    def get_product_cards(shop_id, product_ids):
+        """
+        Cards for product_ids in the given order, read with one MGET; misses are built in
+        one batch and cached. Ids that are not products of the shop are skipped.
+        """
+        if not product_ids:
+            return []
+
+        cards = {}
+        redis_client = None
+        keys = []
+        try:
+            redis_client = get_redis_client(current_app)
+            version = StorefrontCacheService._version(redis_client, shop_id)
+            keys = [StorefrontCacheService._cache_key(shop_id, version, f"card:{pid}") for pid in product_ids]
+            for pid, cached in zip(product_ids, redis_client.mget(keys)):
+                if cached is not None:
+                    cards[pid] = json.loads(cached)
+        except Exception as e:
+            logger.warning(f"Storefront card cache unavailable for shop {shop_id}: {str(e)}")
+            redis_client = None
+
+        missing = [pid for pid in product_ids if pid not in cards]
+        if missing:
+            products = ShopProduct.query.options(*ShopProduct.card_load_options()).filter(
+                ShopProduct.shop_id == shop_id,
+                ShopProduct.product_id.in_(missing)
+            ).all()
+            built = StorefrontCacheService.build_product_cards(products)
+            cards.update(built)
+
+            if redis_client and built:
+                try:
+                    key_for = dict(zip(product_ids, keys))
+                    pipe = redis_client.pipeline()
+                    for pid, card in built.items():
+                        pipe.setex(key_for[pid], StorefrontCacheService.CACHE_TIMEOUT, json.dumps(card, default=str))
+                    pipe.execute()
+                except Exception as e:
+                    logger.warning(f"Failed to cache storefront cards for shop {shop_id}: {str(e)}")
+
+        return [cards[pid] for pid in product_ids if pid in cards]
+
+
+# Invalidation for ORM writes: collect the shops touched by each flush, bump them on commit
+
+def _touched_shops(session, instances):
+    shop_ids = set()
+    product_ids = set()
+    shop_list = False
+    for instance in instances:
+        if isinstance(instance, SHOP_SCOPED_MODELS):
+            shop_ids.add(instance.shop_id)
+            shop_list = shop_list or isinstance(instance, Shop)
+        elif isinstance(instance, PRODUCT_SCOPED_MODELS):
+            product_ids.add(instance.product_id)
+        elif isinstance(instance, ShopProductVariant):
+            product_ids.update((instance.parent_product_id, instance.variant_product_id))
+
+    product_ids.discard(None)
+    if product_ids:
+        # Core statement on the flush's connection: no autoflush, sees the rows just written
+        shop_ids.update(session.connection().execute(
+            select(ShopProduct.shop_id).where(ShopProduct.product_id.in_(product_ids)).distinct()
+        ).scalars())
+    shop_ids.discard(None)
+    return shop_ids, shop_list
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_storefront_writes(session, flush_context):
+    instances = [*session.new, *session.dirty, *session.deleted]
+    if not any(isinstance(i, SHOP_SCOPED_MODELS + PRODUCT_SCOPED_MODELS + (ShopProductVariant,)) for i in instances):
+        return
+    shop_ids, shop_list = _touched_shops(session, instances)
+    pending = session.info.setdefault('storefront_invalidations', {'shop_ids': set(), 'shop_list': False})
+    pending['shop_ids'] |= shop_ids
+    pending['shop_list'] = pending['shop_list'] or shop_list
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_storefronts(session):
+    pending = session.info.pop('storefront_invalidations', None)
+    if pending and has_app_context():
+        StorefrontCacheService.invalidate(*pending['shop_ids'], shop_list=pending['shop_list'])
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_storefront_writes(session):
+    session.info.pop('storefront_invalidations', None)
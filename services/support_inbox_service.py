@@ -0,0 +1,275 @@
+import datetime
+import logging
+import time
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, inspect, update, insert
+from sqlalchemy.orm import Session, joinedload
+from common.cache import get_redis_client
+from common.database import db
+from common.pagination import encode_cursor, keyset_paginate
+from models.enums import TicketStatus
+from models.support_ticket_model import SupportTicket, SupportTicketMessage, SupportTicketCounter
+
+logger = logging.getLogger(__name__)
+
+
+class SupportInboxService:
+    """
+    Read model for the support ticket inbox.
+
+    Each ticket carries last_activity_at, message_count and per-side unread counts, and
+    support_ticket_counters holds ticket and unread totals per (assignee, status). Both are
+    updated by the session listeners below in the same flush as the ticket or message that
+    changed them, so list views sort on an index and the admin badges are a single small
+    table read. Committed changes bump the Redis key support_inbox:version, which
+    wait_for_changes() watches so long-polling admin clients only hit the database when
+    something actually changed.
+    """
+    VERSION_KEY = 'support_inbox:version'
+    MESSAGES_PAGE_SIZE = 50
+    MAX_MESSAGES_PAGE_SIZE = 100
+    MAX_CHANGES = 100
+    POLL_INTERVAL = 1.0
+    # Ticket fields whose change counts as activity on the ticket
+    ACTIVITY_FIELDS = ('status', 'assigned_to_admin_id', 'priority')
+
+    @staticmethod
+    def _bucket(assignee_id, status, admin_unread_count):
+        return (assignee_id or SupportTicketCounter.UNASSIGNED, status, 1 if admin_unread_count else 0)
+
+    @staticmethod
+    def _committed_value(state, key):
+        """Value of key as of the last flush (the current value if it has not changed)"""
+        history = state.attrs[key].history
+        if history.deleted:
+            return history.deleted[0]
+        if history.unchanged:
+            return history.unchanged[0]
+        return history.added[0] if history.added else None
+
+    @staticmethod
+    def counters():
+        """Ticket and admin-unread totals per status, per assignee and overall"""
+        by_status = {}
+        by_assignee = {}
+        totals = {'tickets': 0, 'unread': 0}
+        for row in SupportTicketCounter.query.filter(SupportTicketCounter.ticket_count > 0).all():
+            assignee = 'unassigned' if row.assignee_id == SupportTicketCounter.UNASSIGNED else str(row.assignee_id)
+            for bucket in (by_status.setdefault(row.status, {'tickets': 0, 'unread': 0}),
+                           by_assignee.setdefault(assignee, {'tickets': 0, 'unread': 0}),
+                           totals):
+                bucket['tickets'] += row.ticket_count
+                bucket['unread'] += row.unread_count
+        return {'by_status': by_status, 'by_assignee': by_assignee, 'totals': totals}
+
+    @staticmethod
+    def rebuild_counters():
+        """Recompute support_ticket_counters from support_tickets; returns the number of buckets"""
+        assignee = func.coalesce(SupportTicket.assigned_to_admin_id, SupportTicketCounter.UNASSIGNED)
+        rows = db.session.query(
+            assignee,
+            SupportTicket.status,
+            func.count(SupportTicket.id),
+            func.sum(db.case((SupportTicket.admin_unread_count > 0, 1), else_=0))
+        ).group_by(assignee, SupportTicket.status).all()
+
+        db.session.query(SupportTicketCounter).delete(synchronize_session=False)
+        if rows:
+            db.session.execute(insert(SupportTicketCounter), [
+                {'assignee_id': assignee_id, 'status': status, 'ticket_count': count, 'unread_count': unread or 0}
+                for assignee_id, status, count, unread in rows
+            ])
+        return len(rows)
+
+    @staticmethod
+    def paginate_messages(ticket, before_id=None, limit=None):
+        """
+        One page of a ticket's thread, newest page first: the limit messages before before_id
+        (or the latest ones), returned oldest to newest with the cursor for the next page.
+        """
+        limit = min(max(limit or SupportInboxService.MESSAGES_PAGE_SIZE, 1), SupportInboxService.MAX_MESSAGES_PAGE_SIZE)
+        query = SupportTicketMessage.query.options(
+            joinedload(SupportTicketMessage.sender)
+        ).filter(SupportTicketMessage.ticket_id == ticket.id)
+        if before_id:
+            query = query.filter(SupportTicketMessage.id < before_id)
+        messages = query.order_by(SupportTicketMessage.id.desc()).limit(limit + 1).all()
+
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        return {
+            'ticket_uid': ticket.ticket_uid,
+            'messages': [message.serialize() for message in reversed(messages)],
+            'has_more': has_more,
+            'next_before_id': messages[-1].id if has_more else None,
+            'message_count': ticket.message_count or 0
+        }
+
+    @staticmethod
+    def mark_read(ticket, side):
+        """Clear the unread count of one side ('admin' or 'requester') and commit if it changed"""
+        attribute = 'admin_unread_count' if side == 'admin' else 'requester_unread_count'
+        if getattr(ticket, attribute):
+            setattr(ticket, attribute, 0)
+            db.session.commit()
+
+    @staticmethod
+    def _version():
+        try:
+            return int(get_redis_client(current_app).get(SupportInboxService.VERSION_KEY) or 0)
+        except Exception as e:
+            logger.warning(f"Support inbox version unavailable: {str(e)}")
+            return None
+
+    @staticmethod
+    def changes_since(since, limit=None):
+        """
+        Tickets with activity after the since cursor, oldest first, with the cursor to pass next
+        time. Cursors are keyset tokens over (last_activity_at, id), so tickets that share a
+        timestamp (e.g. several touched in one flush) are not skipped when a page is cut short.
+        """
+        limit = limit or SupportInboxService.MAX_CHANGES
+        query = SupportTicket.query.options(
+            joinedload(SupportTicket.creator),
+            joinedload(SupportTicket.merchant),
+            joinedload(SupportTicket.assigned_admin)
+        )
+        page = keyset_paginate(query, SupportTicket.last_activity_at, SupportTicket.id, limit,
+                               cursor=since, descending=False)
+        tickets = page['items']
+        cursor = encode_cursor(tickets[-1].last_activity_at, tickets[-1].id) if tickets else since
+        return {
+            'tickets': [ticket.serialize(user_role='ADMIN') for ticket in tickets],
+            'cursor': cursor,
+            'has_more': page['has_next']
+        }
+
+    @staticmethod
+    def wait_for_changes(since, timeout):
+        """
+        Long poll for the admin inbox: return as soon as tickets have activity after since, or
+        with an empty list once timeout seconds pass. Between database checks it only reads the
+        Redis version, so idle clients cost one GET per POLL_INTERVAL and hold no database
+        connection; without Redis it falls back to querying every interval.
+        """
+        if since is None:
+            # First call: nothing to wait for, just hand out the current cursor and counters
+            latest = db.session.query(SupportTicket.last_activity_at, SupportTicket.id).filter(
+                SupportTicket.last_activity_at.isnot(None)
+            ).order_by(SupportTicket.last_activity_at.desc(), SupportTicket.id.desc()).first()
+            cursor = encode_cursor(*latest) if latest else encode_cursor(datetime.datetime.utcnow(), 0)
+            return {'tickets': [], 'cursor': cursor, 'has_more': False,
+                    'counters': SupportInboxService.counters()}
+
+        timeout = max(0, min(timeout, current_app.config.get('SUPPORT_INBOX_POLL_TIMEOUT', 25)))
+        deadline = time.monotonic() + timeout
+        version = SupportInboxService._version()
+        while True:
+            result = SupportInboxService.changes_since(since)
+            # End the read transaction right away: it returns the pooled connection while this
+            # request waits, and lets the next query see newly committed tickets
+            db.session.rollback()
+            if result['tickets'] or time.monotonic() >= deadline:
+                break
+            while time.monotonic() < deadline:
+                time.sleep(min(SupportInboxService.POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
+                current = SupportInboxService._version()
+                if current is None or current != version:
+                    version = current
+                    break
+        result['counters'] = SupportInboxService.counters()
+        return result
+
+
+def _apply_counter_deltas(session, deltas):
+    connection = session.connection()
+    table = SupportTicketCounter.__table__
+    for (assignee_id, status), (tickets, unread) in deltas.items():
+        if not tickets and not unread:
+            continue
+        result = connection.execute(
+            update(table).where(
+                table.c.assignee_id == assignee_id,
+                table.c.status == status
+            ).values(
+                ticket_count=table.c.ticket_count + tickets,
+                unread_count=table.c.unread_count + unread
+            )
+        )
+        if not result.rowcount:
+            connection.execute(insert(table).values(
+                assignee_id=assignee_id, status=status, ticket_count=tickets, unread_count=unread
+            ))
+
+
+@event.listens_for(Session, 'before_flush')
+def _maintain_support_inbox(session, flush_context, instances):
+    new_messages = [obj for obj in session.new if isinstance(obj, SupportTicketMessage)]
+    tickets = [obj for obj in (*session.new, *session.dirty, *session.deleted) if isinstance(obj, SupportTicket)]
+    if not new_messages and not tickets:
+        return
+
+    now = datetime.datetime.utcnow()
+    # New messages move their ticket's activity, thread size and the other side's unread count
+    for message in new_messages:
+        ticket = message.ticket or (session.get(SupportTicket, message.ticket_id) if message.ticket_id else None)
+        if ticket is None:
+            continue
+        sent_at = message.created_at or now
+        ticket.last_activity_at = max(ticket.last_activity_at or sent_at, sent_at)
+        ticket.last_message_at = ticket.last_activity_at
+        ticket.message_count = (ticket.message_count or 0) + 1
+        # sender ids may still be the JWT identity string until the flush
+        if message.sender_user_id is not None and str(message.sender_user_id) == str(ticket.creator_user_id):
+            ticket.admin_unread_count = (ticket.admin_unread_count or 0) + 1
+        else:
+            ticket.requester_unread_count = (ticket.requester_unread_count or 0) + 1
+        if ticket not in tickets:
+            tickets.append(ticket)
+
+    deltas = {}
+
+    def add(bucket, sign):
+        assignee_id, status, unread = bucket
+        tickets_delta, unread_delta = deltas.get((assignee_id, status), (0, 0))
+        deltas[(assignee_id, status)] = (tickets_delta + sign, unread_delta + sign * unread)
+
+    for ticket in tickets:
+        state = inspect(ticket)
+        current = SupportInboxService._bucket(ticket.assigned_to_admin_id, ticket.status, ticket.admin_unread_count)
+        if state.deleted or ticket in session.deleted:
+            committed = SupportInboxService._bucket(*(SupportInboxService._committed_value(state, key)
+                                                      for key in ('assigned_to_admin_id', 'status', 'admin_unread_count')))
+            add(committed, -1)
+            continue
+        if state.pending or ticket in session.new:
+            ticket.last_activity_at = ticket.last_activity_at or now
+            # The status column default is only applied by the INSERT, after this listener
+            ticket.status = ticket.status or TicketStatus.OPEN.value
+            add(SupportInboxService._bucket(ticket.assigned_to_admin_id, ticket.status, ticket.admin_unread_count), 1)
+            continue
+        if any(state.attrs[key].history.has_changes() for key in SupportInboxService.ACTIVITY_FIELDS):
+            ticket.last_activity_at = max(ticket.last_activity_at or now, now)
+        committed = SupportInboxService._bucket(*(SupportInboxService._committed_value(state, key)
+                                                  for key in ('assigned_to_admin_id', 'status', 'admin_unread_count')))
+        if committed != current:
+            add(committed, -1)
+            add(current, 1)
+
+    if tickets:
+        _apply_counter_deltas(session, deltas)
+        session.info['support_inbox_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_support_inbox_version(session):
+    if session.info.pop('support_inbox_changed', None) and has_app_context():
+        try:
+            get_redis_client(current_app).incr(SupportInboxService.VERSION_KEY)
+        except Exception as e:
+            logger.warning(f"Failed to bump support inbox version: {str(e)}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_support_inbox_changes(session):
+    session.info.pop('support_inbox_changed', None)
@@ -1,15 +1,98 @@
 import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from typing import List, Dict, Tuple
+from apscheduler.schedulers.background import BackgroundScheduler
 from flask import current_app
 from common.cache import get_redis_client
-import boto3
+from common.database import db
+from models.product import Product
+
+logger = logging.getLogger(__name__)
+
+
+class StubTranslateClient:
+    """
+    Stand-in for the boto3 Translate client (TRANSLATE_STUB=true): returns the text tagged
+    with the target language after an optional delay, and records every call, so the
+    pipeline can be exercised without AWS credentials.
+    """
+
+    def __init__(self, latency_seconds=0.0):
+        self.latency_seconds = latency_seconds
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def translate_text(self, Text, SourceLanguageCode, TargetLanguageCode, **kwargs):
+        with self._lock:
+            self.calls.append((Text, SourceLanguageCode, TargetLanguageCode))
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return {'TranslatedText': f"[{TargetLanguageCode}] {Text}"}
+
+
+class _LocalCache:
+    """Small thread-safe LRU kept in front of Redis for hot translations"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
 
 
 class AmazonTranslateService:
-    def __init__(self):
-        region = current_app.config.get('AWS_REGION')
-        self.client = boto3.client('translate', region_name=region)
-        self.redis = get_redis_client(current_app)
+    """
+    Cached, batched Amazon Translate.
+
+    Lookups go through an in-process LRU, then one Redis MGET for everything the LRU
+    missed; the remaining texts are split into chunks within Translate's request size
+    limit and translated concurrently on a bounded thread pool, and the results are
+    written back with one pipelined SETEX.
+    """
+    CACHE_TTL = 60 * 60 * 24 * 30
+    # TranslateText accepts at most 10,000 bytes of UTF-8 per request
+    MAX_REQUEST_BYTES = 10000
+    MAX_WORKERS = 8
+    LOCAL_CACHE_SIZE = 4096
+
+    _local_cache = _LocalCache(LOCAL_CACHE_SIZE)
+
+    def __init__(self, client=None, redis_client=None):
+        if client is None:
+            if current_app.config.get('TRANSLATE_STUB'):
+                client = StubTranslateClient()
+            else:
+                # boto3 is slow to import; only load it once translation is actually used
+                import boto3
+
+                region = current_app.config.get('AWS_REGION')
+                client = boto3.client('translate', region_name=region)
+        self.client = client
+        self.redis = redis_client or get_redis_client(current_app)
+        self.max_workers = current_app.config.get('TRANSLATE_MAX_WORKERS', self.MAX_WORKERS)
 
     @staticmethod
     def _cache_key(text: str, src: str, tgt: str, content_type: str) -> str:
@@ -18,16 +101,54 @@ class AmazonTranslateService:
         key_hash = h.hexdigest()
         return f"translate:{src}:{tgt}:{content_type}:{key_hash}"
 
-    def translate_text(self, text: str, target_lang: str, source_lang: str = 'en', content_type: str = 'text/plain', ttl_seconds: int = 60*60*24*30) -> str:
-        if not text:
-            return ''
-        key = self._cache_key(text, source_lang, target_lang, content_type)
-        cached = self.redis.get(key)
-        if cached:
-            return cached.decode('utf-8')
+    @staticmethod
+    def _split_to_limit(text: str, separator_pattern: str, limit: int) -> List[str]:
+        """Split text after each separator match, packing pieces into chunks of at most limit bytes"""
+        chunks = []
+        current = ''
+        for piece in re.split(f'(?<={separator_pattern})', text):
+            if current and len((current + piece).encode('utf-8')) > limit:
+                chunks.append(current)
+                current = ''
+            current += piece
+        if current:
+            chunks.append(current)
+        return chunks
+
+    @classmethod
+    def chunk_text(cls, text: str, limit: int = MAX_REQUEST_BYTES) -> List[str]:
+        """
+        Split text into chunks of at most limit UTF-8 bytes, preferring line breaks, then
+        sentence ends, then a hard split. Concatenating the chunks gives back the text.
+        """
+        if len(text.encode('utf-8')) <= limit:
+            return [text]
+
+        chunks = []
+        for line_chunk in cls._split_to_limit(text, r'\n', limit):
+            if len(line_chunk.encode('utf-8')) <= limit:
+                chunks.append(line_chunk)
+                continue
+            for sentence_chunk in cls._split_to_limit(line_chunk, r'[.!?]\s', limit):
+                while len(sentence_chunk.encode('utf-8')) > limit:
+                    # No usable boundary: cut at the limit without splitting a character
+                    cut = sentence_chunk.encode('utf-8')[:limit].decode('utf-8', 'ignore')
+                    chunks.append(cut)
+                    sentence_chunk = sentence_chunk[len(cut):]
+                if sentence_chunk:
+                    chunks.append(sentence_chunk)
+        return chunks
+
+    def _request(self, text: str, target_lang: str, source_lang: str, content_type: str) -> str:
+        """One TranslateText call. Surrounding whitespace is kept so chunks rejoin cleanly."""
+        core = text.strip()
+        if not core:
+            return text
+        leading = text[:len(text) - len(text.lstrip())]
+        trailing = text[len(text.rstrip()):]
 
         resp = self.client.translate_text(
-            Text=text,
+            Text=core,
             SourceLanguageCode=source_lang,
             TargetLanguageCode=target_lang,
             Settings={
@@ -35,20 +156,37 @@ class AmazonTranslateService:
             },
             TerminologyNames=[],
         ) if content_type == 'text/plain' else self.client.translate_text(
-            Text=text,
+            Text=core,
             SourceLanguageCode=source_lang,
             TargetLanguageCode=target_lang,
             Settings={
                 'Formality': 'INFORMAL'
             },
         )
+        return leading + resp.get('TranslatedText', '') + trailing
+
+    def _translate_uncached(self, texts: List[str], target_lang: str, source_lang: str, content_type: str) -> Dict[str, str]:
+        """Translate texts concurrently, chunk by chunk, and reassemble them"""
+        jobs = [(text, chunk) for text in texts for chunk in self.chunk_text(text)]
+        if len(jobs) == 1:
+            translated_chunks = [self._request(jobs[0][1], target_lang, source_lang, content_type)]
+        else:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(jobs)))) as pool:
+                translated_chunks = list(pool.map(
+                    lambda job: self._request(job[1], target_lang, source_lang, content_type), jobs
+                ))
 
-        translated = resp.get('TranslatedText', '')
-        if translated:
-            self.redis.setex(key, ttl_seconds, translated)
+        translated: Dict[str, str] = {}
+        for (text, _), chunk in zip(jobs, translated_chunks):
+            translated[text] = translated.get(text, '') + chunk
         return translated
 
-    def translate_batch(self, items: List[Tuple[str, str]], target_lang: str, source_lang: str = 'en', content_type: str = 'text/plain') -> Dict[str, str]:
+    def translate_text(self, text: str, target_lang: str, source_lang: str = 'en', content_type: str = 'text/plain', ttl_seconds: int = CACHE_TTL) -> str:
+        if not text:
+            return ''
+        return self.translate_batch([('text', text)], target_lang, source_lang, content_type, ttl_seconds)['text']
+
+    def translate_batch(self, items: List[Tuple[str, str]], target_lang: str, source_lang: str = 'en', content_type: str = 'text/plain', ttl_seconds: int = CACHE_TTL) -> Dict[str, str]:
         # items is list of (id, text)
         result: Dict[str, str] = {}
         # dedupe identical texts
@@ -59,25 +197,128 @@ class AmazonTranslateService:
                 continue
             unique_map.setdefault(text, []).append(id_)
 
-        # first fetch from cache
-        missing_texts: List[str] = []
-        cached_pairs: Dict[str, str] = {}
-        for text, ids in unique_map.items():
-            key = self._cache_key(text, source_lang, target_lang, content_type)
-            cached = self.redis.get(key)
-            if cached:
-                translated = cached.decode('utf-8')
-                cached_pairs[text] = translated
-            else:
-                missing_texts.append(text)
+        keys = {text: self._cache_key(text, source_lang, target_lang, content_type) for text in unique_map}
+
+        # 1. in-process LRU
+        translations: Dict[str, str] = {}
+        for text, key in keys.items():
+            cached = self._local_cache.get(key)
+            if cached is not None:
+                translations[text] = cached
 
-        # translate missing one by one
-        for text in missing_texts:
-            translated = self.translate_text(text, target_lang, source_lang, content_type)
-            cached_pairs[text] = translated
+        # 2. one MGET for the rest
+        pending = [text for text in unique_map if text not in translations]
+        if pending:
+            try:
+                for text, cached in zip(pending, self.redis.mget([keys[text] for text in pending])):
+                    if cached:
+                        translations[text] = cached.decode('utf-8')
+                        self._local_cache.set(keys[text], translations[text])
+            except Exception as e:
+                logger.warning(f"Translation cache unavailable: {str(e)}")
+
+        # 3. translate the misses concurrently and write them back in one pipeline
+        missing = [text for text in unique_map if text not in translations]
+        if missing:
+            fresh = self._translate_uncached(missing, target_lang, source_lang, content_type)
+            translations.update(fresh)
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                for text, translated in fresh.items():
+                    if translated:
+                        pipe.setex(keys[text], ttl_seconds, translated)
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"Failed to cache translations: {str(e)}")
+            for text, translated in fresh.items():
+                if translated:
+                    self._local_cache.set(keys[text], translated)
 
         # map back
         for text, ids in unique_map.items():
             for id_ in ids:
-                result[id_] = cached_pairs.get(text, '')
+                result[id_] = translations.get(text, '')
         return result
+
+
+class TranslationWarmer:
+    """
+    Pre-translates newly approved products into TRANSLATE_PREWARM_LANGUAGES so their first
+    visitors in those languages hit the cache. Products approved since the previous run
+    are found through approved_at; the watermark is kept in Redis.
+    """
+    WATERMARK_KEY = "translate:prewarm:watermark"
+    BATCH_SIZE = 200
+
+    @staticmethod
+    def _product_items(products):
+        items = []
+        for product in products:
+            items.append((f"product:{product.product_id}:name", product.product_name))
+            items.append((f"product:{product.product_id}:description", product.product_description))
+        return items
+
+    @staticmethod
+    def warm_products(product_ids, languages, service=None):
+        """Translate the name and description of the given products into each language"""
+        service = service or AmazonTranslateService()
+        translated = 0
+        for start in range(0, len(product_ids), TranslationWarmer.BATCH_SIZE):
+            products = Product.query.filter(
+                Product.product_id.in_(product_ids[start:start + TranslationWarmer.BATCH_SIZE])
+            ).all()
+            items = TranslationWarmer._product_items(products)
+            for language in languages:
+                translated += len(service.translate_batch(items, language))
+        return translated
+
+    @staticmethod
+    def warm_recently_approved(languages, lookback_minutes=60, service=None):
+        """Warm every product approved since the last run (or within lookback_minutes on the first run)"""
+        service = service or AmazonTranslateService()
+        now = datetime.utcnow()
+        watermark = service.redis.get(TranslationWarmer.WATERMARK_KEY)
+        since = datetime.fromisoformat(watermark.decode('utf-8')) if watermark else now - timedelta(minutes=lookback_minutes)
+
+        product_ids = [row.product_id for row in Product.query.with_entities(Product.product_id).filter(
+            Product.approval_status == 'approved',
+            Product.approved_at > since,
+            Product.approved_at <= now,
+            Product.deleted_at.is_(None)
+        ).all()]
+        translated = TranslationWarmer.warm_products(product_ids, languages, service) if product_ids else 0
+        # Only advance once everything up to now has been translated
+        service.redis.set(TranslationWarmer.WATERMARK_KEY, now.isoformat())
+        return translated
+
+
+# Scheduler instance (started from app.py)
+scheduler = BackgroundScheduler()
+
+
+def start_translation_warmer(app):
+    """
+    Every TRANSLATE_PREWARM_MINUTES, pre-translate products approved since the previous
+    run into TRANSLATE_PREWARM_LANGUAGES. Only runs with FEATURE_TRANSLATION enabled and
+    at least one language configured. Call once at app startup.
+    """
+    interval = app.config.get('TRANSLATE_PREWARM_MINUTES', 10)
+    languages = app.config.get('TRANSLATE_PREWARM_LANGUAGES') or []
+    if not app.config.get('FEATURE_TRANSLATION') or not languages or not interval or scheduler.running:
+        return
+
+    def warm():
+        with app.app_context():
+            try:
+                translated = TranslationWarmer.warm_recently_approved(languages, lookback_minutes=interval)
+                if translated:
+                    logger.info(f"Pre-translated {translated} product texts into {', '.join(languages)}")
+            except Exception as e:
+                logger.warning(f"Translation pre-warm failed: {str(e)}")
+            finally:
+                db.session.remove()
+
+    scheduler.add_job(warm, 'interval', minutes=interval, id='translation_prewarm',
+                      max_instances=1, coalesce=True)
+    # Use a thread to avoid blocking the main app
+    threading.Thread(target=scheduler.start, daemon=True).start()
@@ -0,0 +1,409 @@
+import itertools
+import logging
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import insert, select, update
+from common.database import db
+from models.attribute import Attribute
+from models.enums import AttributeInputType, MediaType
+from models.product import Product
+from models.product_attribute import ProductAttribute
+from models.product_meta import ProductMeta
+from models.product_shipping import ProductShipping
+from models.product_stock import ProductStock
+from models.shop.shop_attribute import ShopAttribute, ShopAttributeValue
+from models.shop.shop_product import ShopProduct
+from models.shop.shop_product_media import ShopProductMedia
+from models.shop.shop_product_stock import ShopProductStock
+from models.shop.shop_product_variant import ShopProductVariant, ShopVariantAttributeValue
+from services.inventory_import_service import InventoryImportService
+from services.media_manifest_service import MediaManifestService
+from services.product_import_service import ProductImportService
+
+logger = logging.getLogger(__name__)
+
+
+class VariantGeneratorService:
+    """
+    Creates a parent product's variants from an attribute matrix in one transaction.
+
+    The matrix ({attribute: [values]}) is expanded into its cartesian product, SKUs are
+    generated with variant_sku() and allocated with one IN query, and the variant
+    products, stock rows, variant relations and attribute rows are each written with one
+    multi-row INSERT, so the number of statements does not grow with the number of
+    variants. Callers commit and invalidate caches.
+    """
+    # Upper bound on variants created by one request
+    MAX_VARIANTS = 1000
+
+    # Common attribute abbreviations used in variant SKUs
+    ATTRIBUTE_ABBREVIATIONS = {
+        'color': 'CLR',
+        'size': 'SZ',
+        'storage': 'STG',
+        'memory': 'MEM',
+        'material': 'MAT',
+        'style': 'STY',
+        'weight': 'WGT',
+        'capacity': 'CAP'
+    }
+
+    @staticmethod
+    def variant_sku(parent_sku, attributes):
+        """
+        Generate variant SKU following industry standards
+        Format: PARENT-SKU-ATTR1-ATTR2-ATTR3
+        """
+        attr_codes = []
+        for key, value in attributes.items():
+            if isinstance(value, str):
+                # Use predefined abbreviation or create one
+                attr_key = VariantGeneratorService.ATTRIBUTE_ABBREVIATIONS.get(str(key).lower(), str(key).upper()[:3])
+                value_code = value.upper().replace(' ', '').replace('-', '')[:3]
+                attr_codes.append(f"{attr_key}{value_code}")
+
+        variant_suffix = '-'.join(attr_codes)
+
+        # Ensure total SKU length doesn't exceed 50 characters
+        max_suffix_length = 50 - len(parent_sku) - 1  # -1 for the dash
+        if len(variant_suffix) > max_suffix_length:
+            variant_suffix = variant_suffix[:max_suffix_length]
+
+        return f"{parent_sku}-{variant_suffix}"
+
+    @staticmethod
+    def cartesian(attribute_values):
+        """
+        Every combination of {attribute: [values]} as a list of {attribute: value} dicts,
+        in the order the attributes and values were given. Raises ValueError.
+        """
+        if not isinstance(attribute_values, dict) or not attribute_values:
+            raise ValueError("attribute_values must be a non-empty object of value lists")
+        names = list(attribute_values)
+        value_lists = []
+        for name in names:
+            values = attribute_values[name]
+            if not isinstance(values, list) or not values:
+                raise ValueError(f"attribute_values['{name}'] must be a non-empty list")
+            value_lists.append(list(dict.fromkeys(str(value) for value in values)))
+
+        total = 1
+        for values in value_lists:
+            total *= len(values)
+        if total > VariantGeneratorService.MAX_VARIANTS:
+            raise ValueError(f"{total} combinations exceed the limit of {VariantGeneratorService.MAX_VARIANTS} variants")
+        return [dict(zip(names, combination)) for combination in itertools.product(*value_lists)]
+
+    @staticmethod
+    def expand(data):
+        """
+        Combinations to create from a request body: explicit `combinations`, or the cartesian
+        product of `attribute_values` with the shared selling_price, cost_price and stock_qty
+        and optional per-value `price_adjustments` ({attribute: {value: amount}}).
+        """
+        if data.get('combinations'):
+            combinations = data['combinations']
+            if not isinstance(combinations, list):
+                raise ValueError("combinations must be a list")
+            if len(combinations) > VariantGeneratorService.MAX_VARIANTS:
+                raise ValueError(f"At most {VariantGeneratorService.MAX_VARIANTS} variants can be created at once")
+            return combinations
+
+        adjustments = data.get('price_adjustments') or {}
+        combinations = []
+        for attributes in VariantGeneratorService.cartesian(data.get('attribute_values')):
+            combination = {'attributes': attributes}
+            for field in ('selling_price', 'cost_price', 'stock_qty', 'low_stock_threshold'):
+                if data.get(field) is not None:
+                    combination[field] = data[field]
+            try:
+                extra = sum(Decimal(str((adjustments.get(name) or {}).get(value, 0))) for name, value in attributes.items())
+                if extra and combination.get('selling_price') is not None:
+                    combination['selling_price'] = Decimal(str(combination['selling_price'])) + extra
+            except (InvalidOperation, AttributeError):
+                raise ValueError("price_adjustments must map attribute values to amounts")
+            combinations.append(combination)
+        return combinations
+
+    @staticmethod
+    def _price(value, default, field):
+        if value is None or value == '':
+            return default
+        try:
+            price = Decimal(str(value)).quantize(Decimal('0.01'))
+        except InvalidOperation:
+            raise ValueError(f"{field} must be a number")
+        if price < 0:
+            raise ValueError(f"{field} must not be negative")
+        return price
+
+    @staticmethod
+    def _count(value, default, field):
+        count = InventoryImportService._to_int(value, field)
+        return default if count is None else count
+
+    @staticmethod
+    def _prepare(parent, combinations, attribute_key):
+        """
+        Validate combinations and fill in prices, stock and SKU bases. Returns (rows, errors)
+        where errors are "Combination N: message" strings as the bulk endpoints report them.
+        """
+        rows, errors = [], []
+        for index, combination in enumerate(combinations):
+            try:
+                if not isinstance(combination, dict):
+                    raise ValueError("must be an object")
+                attributes = combination.get('attributes') or {}
+                if not isinstance(attributes, dict) or not attributes:
+                    raise ValueError("attributes must be a non-empty object")
+                attributes = {attribute_key(key): value for key, value in attributes.items()}
+                rows.append({
+                    'index': index,
+                    'attributes': attributes,
+                    'sku_base': combination.get('sku') or VariantGeneratorService.variant_sku(
+                        parent.sku, {name: str(value) for name, value in attributes.items()}),
+                    'name': combination.get('name') or combination.get('variant_name'),
+                    'selling_price': VariantGeneratorService._price(
+                        combination.get('selling_price'), parent.selling_price, 'selling_price'),
+                    'cost_price': VariantGeneratorService._price(
+                        combination.get('cost_price'), parent.cost_price, 'cost_price'),
+                    'stock_qty': VariantGeneratorService._count(combination.get('stock_qty'), 0, 'stock_qty'),
+                    'low_stock_threshold': VariantGeneratorService._count(
+                        combination.get('low_stock_threshold'), None, 'low_stock_threshold'),
+                    'media': combination.get('media') or [],
+                    'is_default': bool(combination.get('is_default'))
+                })
+            except (ValueError, TypeError) as e:
+                errors.append(f"Combination {index + 1}: {str(e)}")
+        return rows, errors
+
+    @staticmethod
+    def _variant_values(model, parent, row, scope):
+        """Column values of one variant product row, priced like the ORM listeners would"""
+        special_price = parent.special_price if model is Product else None
+        special_start = parent.special_start if model is Product else None
+        special_end = parent.special_end if model is Product else None
+        listed_price, is_on_special = model.resolve_listed_price(
+            row['selling_price'], special_price, special_start, special_end)
+        return dict(scope, **{
+            'category_id': parent.category_id,
+            'brand_id': parent.brand_id,
+            'parent_product_id': parent.product_id,
+            'sku': row['sku'],
+            'product_name': parent.product_name,
+            'product_description': parent.product_description,
+            'cost_price': row['cost_price'],
+            'selling_price': row['selling_price'],
+            'discount_pct': parent.discount_pct,
+            'special_price': special_price,
+            'special_start': special_start,
+            'special_end': special_end,
+            'effective_price': listed_price,
+            'effective_discount_pct': model.resolve_discount_pct(
+                row['selling_price'], listed_price, is_on_special, parent.discount_pct)
+        })
+
+    @staticmethod
+    def create_shop_variants(parent, combinations):
+        """
+        Create shop variants of parent for each combination ({attributes, sku?, name?,
+        selling_price?, cost_price?, stock_qty?, low_stock_threshold?, media?, is_default?}).
+        Combinations that repeat an existing or earlier attribute set are reported as errors.
+        Returns (variant_ids, errors). Does not commit.
+        """
+        rows, errors = VariantGeneratorService._prepare(parent, combinations, str)
+
+        # Attribute sets the parent already has, and repeats within the request
+        taken = set(db.session.execute(
+            select(ShopProductVariant.combination_hash).where(ShopProductVariant.parent_product_id == parent.product_id)
+        ).scalars())
+        unique_rows = []
+        for row in rows:
+            row['combination_hash'] = ShopProductVariant.compute_combination_hash(row['attributes'])
+            if row['combination_hash'] in taken:
+                errors.append(f"Combination {row['index'] + 1}: a variant with these attributes already exists")
+                continue
+            taken.add(row['combination_hash'])
+            unique_rows.append(row)
+        rows = unique_rows
+        if not rows:
+            return [], errors
+
+        next_sort_order = db.session.execute(
+            select(db.func.coalesce(db.func.max(ShopProductVariant.sort_order), -1))
+            .where(ShopProductVariant.parent_product_id == parent.product_id)
+        ).scalar() + 1
+        for row, sku in zip(rows, ProductImportService.allocate_skus(ShopProduct, [row['sku_base'] for row in rows])):
+            row['sku'] = sku
+
+        scope = {'shop_id': parent.shop_id, 'active_flag': True, 'is_published': parent.is_published}
+        product_ids = ProductImportService.insert_products(
+            ShopProduct, [VariantGeneratorService._variant_values(ShopProduct, parent, row, scope) for row in rows])
+        db.session.execute(insert(ShopProductStock), [{
+            'product_id': product_ids[row['sku']],
+            'stock_qty': row['stock_qty'],
+            'low_stock_threshold': row['low_stock_threshold'] or 0
+        } for row in rows])
+
+        if any(row['is_default'] for row in rows):
+            db.session.execute(update(ShopProductVariant).where(
+                ShopProductVariant.parent_product_id == parent.product_id).values(is_default=False))
+            default_index = next(row['index'] for row in rows if row['is_default'])
+        else:
+            default_index = None
+        db.session.execute(insert(ShopProductVariant), [{
+            'parent_product_id': parent.product_id,
+            'variant_product_id': product_ids[row['sku']],
+            'variant_sku': row['sku'],
+            'variant_name': row['name'],
+            'attribute_combination': row['attributes'],
+            'combination_hash': row['combination_hash'],
+            'sort_order': next_sort_order + position,
+            'is_active': True,
+            'is_default': row['index'] == default_index
+        } for position, row in enumerate(rows)])
+        variant_ids = dict(db.session.execute(
+            select(ShopProductVariant.variant_sku, ShopProductVariant.variant_id)
+            .where(ShopProductVariant.variant_sku.in_([row['sku'] for row in rows]))
+        ).all())
+
+        # Attribute values for combination keys that name attributes of the parent's category
+        names = {name for row in rows for name in row['attributes']}
+        attributes = dict(db.session.execute(select(ShopAttribute.name, ShopAttribute.attribute_id).where(
+            ShopAttribute.shop_id == parent.shop_id,
+            ShopAttribute.category_id == parent.category_id,
+            ShopAttribute.name.in_(names),
+            ShopAttribute.deleted_at.is_(None)
+        )).all())
+        values = {}
+        if attributes:
+            values = {(attribute_id, value): value_id for attribute_id, value, value_id in db.session.execute(
+                select(ShopAttributeValue.attribute_id, ShopAttributeValue.value, ShopAttributeValue.value_id).where(
+                    ShopAttributeValue.attribute_id.in_(attributes.values()),
+                    ShopAttributeValue.deleted_at.is_(None)
+                )
+            ).all()}
+        value_rows = []
+        for row in rows:
+            for name, value in row['attributes'].items():
+                if name not in attributes:
+                    continue
+                value_id = values.get((attributes[name], str(value)))
+                value_rows.append({
+                    'variant_id': variant_ids[row['sku']],
+                    'attribute_id': attributes[name],
+                    'value_id': value_id,
+                    'value_text': None if value_id else str(value)
+                })
+        if value_rows:
+            db.session.execute(insert(ShopVariantAttributeValue), value_rows)
+
+        media_rows = []
+        for row in rows:
+            for media_item in row['media']:
+                if not media_item.get('url'):
+                    continue
+                media_type = MediaType.VIDEO if str(media_item.get('type', 'IMAGE')).lower() == 'video' else MediaType.IMAGE
+                media_rows.append({
+                    'product_id': product_ids[row['sku']],
+                    'type': media_type,
+                    'url': media_item['url'],
+                    'public_id': media_item.get('public_id'),
+                    'sort_order': media_item.get('sort_order', 0),
+                    'is_primary': media_item.get('is_primary', False),
+                    'file_name': media_item.get('file_name'),
+                    'file_size': media_item.get('file_size')
+                })
+        if media_rows:
+            db.session.execute(insert(ShopProductMedia), media_rows)
+            MediaManifestService.refresh(ShopProduct, {media['product_id'] for media in media_rows})
+
+        return [variant_ids[row['sku']] for row in rows], errors
+
+    @staticmethod
+    def create_merchant_variants(parent, combinations):
+        """
+        Create merchant variants of parent, keyed by attribute id like create_variant, with
+        the parent's meta, shipping and low stock threshold copied. Variants go through
+        approval. Returns (product_ids, errors). Does not commit.
+        """
+        def attribute_key(key):
+            try:
+                return int(key)
+            except (TypeError, ValueError):
+                raise ValueError(f"Attribute keys must be attribute ids, got '{key}'")
+
+        attribute_ids = {attribute_key(key) for combination in combinations if isinstance(combination, dict)
+                         for key in (combination.get('attributes') or {}) if str(key).isdigit()}
+        attributes = {attribute.attribute_id: attribute for attribute in
+                      Attribute.query.filter(Attribute.attribute_id.in_(attribute_ids)).all()} if attribute_ids else {}
+
+        rows, errors = VariantGeneratorService._prepare(parent, combinations, attribute_key)
+        valid_rows = []
+        for row in rows:
+            unknown = [key for key in row['attributes'] if key not in attributes]
+            if unknown:
+                errors.append(f"Combination {row['index'] + 1}: unknown attribute id {unknown[0]}")
+                continue
+            try:
+                for key, value in row['attributes'].items():
+                    if attributes[key].input_type == AttributeInputType.NUMBER:
+                        float(value)
+            except (TypeError, ValueError):
+                errors.append(f"Combination {row['index'] + 1}: attribute {key} must be a number")
+                continue
+            # SKUs read better with attribute codes than ids
+            if not combinations[row['index']].get('sku'):
+                row['sku_base'] = VariantGeneratorService.variant_sku(
+                    parent.sku, {attributes[key].code: str(value) for key, value in row['attributes'].items()})
+            valid_rows.append(row)
+        rows = valid_rows
+        if not rows:
+            return [], errors
+
+        for row, sku in zip(rows, ProductImportService.allocate_skus(Product, [row['sku_base'] for row in rows])):
+            row['sku'] = sku
+
+        scope = {'merchant_id': parent.merchant_id, 'active_flag': parent.active_flag, 'approval_status': 'pending'}
+        product_ids = ProductImportService.insert_products(
+            Product, [VariantGeneratorService._variant_values(Product, parent, row, scope) for row in rows])
+
+        parent_threshold = parent.stock.low_stock_threshold if parent.stock else 0
+        db.session.execute(insert(ProductStock), [{
+            'product_id': product_ids[row['sku']],
+            'stock_qty': row['stock_qty'],
+            'low_stock_threshold': parent_threshold if row['low_stock_threshold'] is None else row['low_stock_threshold']
+        } for row in rows])
+        if parent.meta:
+            db.session.execute(insert(ProductMeta), [{
+                'product_id': product_ids[row['sku']],
+                'short_desc': parent.meta.short_desc,
+                'full_desc': parent.meta.full_desc,
+                'meta_title': parent.meta.meta_title,
+                'meta_desc': parent.meta.meta_desc,
+                'meta_keywords': parent.meta.meta_keywords
+            } for row in rows])
+        if parent.shipping:
+            db.session.execute(insert(ProductShipping), [{
+                'product_id': product_ids[row['sku']],
+                'length_cm': parent.shipping.length_cm,
+                'width_cm': parent.shipping.width_cm,
+                'height_cm': parent.shipping.height_cm,
+                'weight_kg': parent.shipping.weight_kg
+            } for row in rows])
+
+        attribute_rows = []
+        for row in rows:
+            for attribute_id, value in row['attributes'].items():
+                entry = {'product_id': product_ids[row['sku']], 'attribute_id': attribute_id,
+                         'value_code': None, 'value_text': None, 'value_number': None}
+                input_type = attributes[attribute_id].input_type
+                if input_type in (AttributeInputType.SELECT, AttributeInputType.MULTISELECT):
+                    entry['value_code'] = str(value)
+                elif input_type == AttributeInputType.NUMBER:
+                    entry['value_number'] = float(value)
+                else:
+                    entry['value_text'] = str(value)
+                attribute_rows.append(entry)
+        db.session.execute(insert(ProductAttribute), attribute_rows)
+
+        return [product_ids[row['sku']] for row in rows], errors
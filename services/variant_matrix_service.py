@@ -0,0 +1,113 @@
+import json
+import logging
+from flask import current_app
+from common.cache import get_redis_client
+from common.database import db
+from models.shop.shop_product import ShopProduct
+from models.shop.shop_product_variant import ShopProductVariant
+
+logger = logging.getLogger(__name__)
+
+
+class VariantMatrixService:
+    """
+    Precomputed per-parent "attribute matrix" for shop product variants.
+
+    The matrix holds the selectable attribute values and a combination_hash -> variant
+    map for the parent's live (active, published, not deleted) variants, so attribute
+    pickers and variant resolution don't have to load and scan every variant row.
+    """
+    CACHE_TIMEOUT = 60 * 10
+
+    @staticmethod
+    def _cache_key(shop_id, parent_id):
+        # build_matrix filters variants by shop, so the shop is part of the key
+        return f"shop_variant_matrix:{shop_id}:{parent_id}"
+
+    @staticmethod
+    def build_matrix(shop_id, parent_id):
+        """Build the attribute matrix for a parent product from a single column-only query"""
+        rows = db.session.query(
+            ShopProductVariant.variant_id,
+            ShopProductVariant.variant_product_id,
+            ShopProductVariant.attribute_combination,
+            ShopProductVariant.combination_hash
+        ).join(
+            ShopProduct, ShopProductVariant.variant_product_id == ShopProduct.product_id
+        ).filter(
+            ShopProductVariant.parent_product_id == parent_id,
+            ShopProductVariant.is_active.is_(True),
+            ShopProduct.shop_id == shop_id,
+            ShopProduct.deleted_at.is_(None),
+            ShopProduct.active_flag.is_(True),
+            ShopProduct.is_published.is_(True)
+        ).order_by(ShopProductVariant.sort_order, ShopProductVariant.created_at).all()
+
+        attributes_map = {}
+        variants = {}
+        for row in rows:
+            combination = row.attribute_combination or {}
+            for attr_name, attr_value in combination.items():
+                values = attributes_map.setdefault(attr_name, [])
+                if attr_value not in values:
+                    values.append(attr_value)
+
+            combination_hash = row.combination_hash or ShopProductVariant.compute_combination_hash(combination)
+            variants.setdefault(combination_hash, {
+                'variant_id': row.variant_id,
+                'variant_product_id': row.variant_product_id,
+                'attribute_combination': combination
+            })
+
+        return {
+            'parent_product_id': parent_id,
+            'attributes': [
+                # Compare as strings: attribute_combination is free-form JSON, so one
+                # attribute can hold both numbers and strings
+                {'name': attr_name, 'values': sorted(values, key=str)}
+                for attr_name, values in attributes_map.items()
+            ],
+            'variants': variants,
+            'total_variants': len(rows)
+        }
+
+    @staticmethod
+    def get_matrix(shop_id, parent_id):
+        """Get the attribute matrix for a parent product, served from Redis when available"""
+        cache_key = VariantMatrixService._cache_key(shop_id, parent_id)
+        redis_client = None
+        try:
+            redis_client = get_redis_client(current_app)
+            cached_matrix = redis_client.get(cache_key)
+            if cached_matrix:
+                return json.loads(cached_matrix)
+        except Exception as e:
+            logger.warning(f"Variant matrix cache unavailable for product {parent_id}: {str(e)}")
+            redis_client = None
+
+        matrix = VariantMatrixService.build_matrix(shop_id, parent_id)
+
+        if redis_client:
+            try:
+                redis_client.setex(cache_key, VariantMatrixService.CACHE_TIMEOUT, json.dumps(matrix))
+            except Exception as e:
+                logger.warning(f"Failed to cache variant matrix for product {parent_id}: {str(e)}")
+        return matrix
+
+    @staticmethod
+    def resolve_variant(shop_id, parent_id, attributes):
+        """Resolve an attribute combination to its matrix entry, or None if no live variant matches"""
+        matrix = VariantMatrixService.get_matrix(shop_id, parent_id)
+        combination_hash = ShopProductVariant.compute_combination_hash(attributes)
+        return matrix['variants'].get(combination_hash)
+
+    @staticmethod
+    def invalidate(shop_id, *parent_ids):
+        """Drop a shop's cached matrices; call after any write to a parent's variants"""
+        keys = [VariantMatrixService._cache_key(shop_id, pid) for pid in parent_ids if pid]
+        if not keys:
+            return
+        try:
+            get_redis_client(current_app).delete(*keys)
+        except Exception as e:
+            logger.warning(f"Failed to invalidate variant matrix cache: {str(e)}")
@@ -0,0 +1,508 @@
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from decimal import Decimal
+from email import policy
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+from apscheduler.schedulers.background import BackgroundScheduler
+from flask import current_app, has_app_context
+from sqlalchemy import and_, delete, event, exists, func, insert, inspect, literal, null, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from auth.email_utils import render_email_html
+from auth.models.models import User
+from common.cache import get_redis_client
+from common.database import db
+from models.product import Product
+from models.product_stock import ProductStock
+from models.shop.shop_product import ShopProduct
+from models.shop.shop_product_stock import ShopProductStock
+from models.shop.shop_wishlist import ShopWishlistItem
+from models.wishlist_alert import WishlistNotification, WishlistPriceWatch
+from models.wishlist_item import WishlistItem
+from services.newsletter_broadcast_service import DomainThrottle, NewsletterBroadcastService, SmtpConnectionPool
+
+logger = logging.getLogger(__name__)
+
+DIGEST_TEMPLATE = """
+<p>Hello {{ name }},</p>
+<p>Some products on your wishlist have changed:</p>
+<ul>
+{% for item in items %}
+  <li>
+    <strong>{{ item.product_name }}</strong>
+    {% if item.kind == 'price_drop' %}
+      dropped from {{ '%.2f'|format(item.old_price) }} to {{ '%.2f'|format(item.new_price) }}
+    {% else %}
+      is back in stock
+    {% endif %}
+  </li>
+{% endfor %}
+</ul>
+{% if more %}<p>...and {{ more }} more.</p>{% endif %}
+<div class="button-wrapper">
+    <a href="{{ frontend_url }}/wishlist" class="button" target="_blank">View your wishlist</a>
+</div>
+<p>Best regards,<br>The Team</p>
+"""
+
+
+class WishlistAlertService:
+    """
+    Price drop and back-in-stock alerts for wishlisted products.
+
+    wishlist_price_watches holds one row per wishlisted product with the effective price
+    and stock last seen; a product is watched as soon as someone wishlists it. Instead of
+    reacting to every write (prices also change through set-based refreshes, bulk imports
+    and special windows opening), a scheduled sweep diffs the watches against products and
+    stock in keyset batches, with the comparison done in SQL so only changed products come
+    back. For each change it:
+
+    1. moves the watch to the new values with a compare-and-set on its revision, so
+       overlapping sweeps never record the same change twice;
+    2. for a drop of at least WISHLIST_PRICE_DROP_MIN_PCT, or stock coming back from zero,
+       inserts one notification per wishlisting user with a single INSERT ... SELECT through
+       the (product_id, is_deleted, user_id) wishlist index, however popular the product.
+
+    Notifications are the in-app channel as they are. The digest job emails each user one
+    message covering all their pending notifications, through the pooled newsletter relay.
+    """
+    BATCH_SIZE = 500
+    DIGEST_CHUNK_SIZE = 200
+    DIGEST_MAX_ITEMS = 20
+    DIGEST_LOCK_KEY = "wishlist_alerts:digest_lock"
+    DIGEST_LOCK_TIMEOUT = 60 * 30
+    CATALOGS = (WishlistPriceWatch.CATALOG_PRODUCT, WishlistPriceWatch.CATALOG_SHOP_PRODUCT)
+
+    @staticmethod
+    def _catalog(catalog):
+        """(product model, stock model, wishlist model, wishlist product column) for a catalog"""
+        if catalog == WishlistPriceWatch.CATALOG_PRODUCT:
+            return Product, ProductStock, WishlistItem, WishlistItem.product_id
+        return ShopProduct, ShopProductStock, ShopWishlistItem, ShopWishlistItem.shop_product_id
+
+    # Watches
+
+    @staticmethod
+    def _watch_insert(catalog, product_filter):
+        """INSERT ... SELECT of watch rows, at current price and stock, for unwatched products matching product_filter"""
+        product, stock, _, _ = WishlistAlertService._catalog(catalog)
+        watches = WishlistPriceWatch.__table__
+        now = datetime.now(timezone.utc)
+        rows = select(
+            literal(catalog, watches.c.catalog.type), product.product_id, product.effective_price,
+            func.coalesce(stock.stock_qty, 0), literal(0, watches.c.revision.type), literal(now, watches.c.checked_at.type)
+        ).select_from(product).outerjoin(stock, stock.product_id == product.product_id).where(
+            product_filter,
+            ~exists().where(watches.c.catalog == catalog, watches.c.product_id == product.product_id)
+        )
+        return insert(watches).from_select(
+            ['catalog', 'product_id', 'last_price', 'last_stock', 'revision', 'checked_at'], rows
+        )
+
+    @staticmethod
+    def watch_products(catalog, product_ids):
+        """Start watching products that were just wishlisted; already watched ones keep their baseline"""
+        product = WishlistAlertService._catalog(catalog)[0]
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(WishlistAlertService._watch_insert(catalog, product.product_id.in_(list(product_ids))))
+        except IntegrityError:
+            # Watched concurrently by another request
+            pass
+
+    @staticmethod
+    def seed_watches():
+        """Watch every currently wishlisted product that is not watched yet (migration/backfill). Returns rows added"""
+        added = 0
+        for catalog in WishlistAlertService.CATALOGS:
+            product, _, wishlist, product_column = WishlistAlertService._catalog(catalog)
+            wishlisted = select(product_column).where(wishlist.is_deleted == False)
+            added += db.session.execute(WishlistAlertService._watch_insert(catalog, product.product_id.in_(wishlisted))).rowcount or 0
+        return added
+
+    # Detection
+
+    @staticmethod
+    def _changed_batch(catalog, after_id, limit):
+        """Next watches after after_id whose product's effective price or stock differs from the last seen values"""
+        product, stock, _, _ = WishlistAlertService._catalog(catalog)
+        watch = WishlistPriceWatch
+        current_stock = func.coalesce(stock.stock_qty, 0)
+        shop_id = product.shop_id if catalog == WishlistPriceWatch.CATALOG_SHOP_PRODUCT else null()
+        return db.session.query(
+            watch.product_id, watch.last_price, watch.last_stock, watch.revision,
+            product.effective_price.label('price'), current_stock.label('stock'),
+            product.product_name, shop_id.label('shop_id'),
+            product.active_flag, product.deleted_at
+        ).join(
+            product, product.product_id == watch.product_id
+        ).outerjoin(
+            stock, stock.product_id == watch.product_id
+        ).filter(
+            watch.catalog == catalog,
+            watch.product_id > after_id,
+            or_(
+                current_stock != watch.last_stock,
+                product.effective_price != watch.last_price,
+                and_(product.effective_price.is_(None), watch.last_price.isnot(None)),
+                and_(product.effective_price.isnot(None), watch.last_price.is_(None))
+            )
+        ).order_by(watch.product_id).limit(limit).all()
+
+    @staticmethod
+    def _is_price_drop(old_price, new_price, min_drop_pct):
+        if old_price is None or new_price is None or old_price <= 0 or new_price >= old_price:
+            return False
+        return (old_price - new_price) * 100 / old_price >= Decimal(str(min_drop_pct))
+
+    @staticmethod
+    def _fan_out(catalog, row, kind, now):
+        """One notification per user wishlisting the product, in a single INSERT ... SELECT. Returns rows inserted"""
+        _, _, wishlist, product_column = WishlistAlertService._catalog(catalog)
+        notifications = WishlistNotification.__table__
+        values = {
+            'catalog': catalog,
+            'product_id': row.product_id,
+            'shop_id': row.shop_id,
+            'kind': kind,
+            'product_name': row.product_name,
+            'old_price': row.last_price,
+            'new_price': row.price,
+            'stock_qty': row.stock,
+            'created_at': now,
+            'digest_status': WishlistNotification.DIGEST_PENDING
+        }
+        recipients = select(
+            wishlist.user_id, *(literal(value, notifications.c[name].type) for name, value in values.items())
+        ).where(product_column == row.product_id, wishlist.is_deleted == False)
+        return db.session.execute(
+            insert(notifications).from_select(['user_id', *values], recipients)
+        ).rowcount or 0
+
+    @staticmethod
+    def _apply_batch(catalog, rows, min_drop_pct):
+        """Record one batch of changes and fan out their alerts; returns notifications created"""
+        now = datetime.now(timezone.utc)
+        watches = WishlistPriceWatch.__table__
+        created = 0
+        for row in rows:
+            claimed = db.session.execute(update(watches).where(
+                watches.c.catalog == catalog,
+                watches.c.product_id == row.product_id,
+                watches.c.revision == row.revision
+            ).values(
+                last_price=row.price, last_stock=row.stock, revision=watches.c.revision + 1, checked_at=now
+            )).rowcount
+            if not claimed or not row.active_flag or row.deleted_at is not None:
+                # Recorded by another sweep, or the product is no longer on sale
+                continue
+
+            kinds = []
+            if WishlistAlertService._is_price_drop(row.last_price, row.price, min_drop_pct):
+                kinds.append(WishlistNotification.KIND_PRICE_DROP)
+            if row.last_stock <= 0 < row.stock:
+                kinds.append(WishlistNotification.KIND_BACK_IN_STOCK)
+            for kind in kinds:
+                inserted = WishlistAlertService._fan_out(catalog, row, kind, now)
+                if not inserted:
+                    # Nobody wishlists it any more; the next add starts a fresh watch
+                    db.session.execute(delete(watches).where(
+                        watches.c.catalog == catalog, watches.c.product_id == row.product_id
+                    ))
+                    break
+                created += inserted
+        return created
+
+    @staticmethod
+    def detect_changes(min_drop_pct=None, batch_size=None):
+        """
+        Diff every watched product against its current effective price and stock and fan
+        out alerts, committing per batch. Returns {'changed': n, 'notifications': n}.
+        """
+        if min_drop_pct is None:
+            min_drop_pct = current_app.config.get('WISHLIST_PRICE_DROP_MIN_PCT', 1)
+        batch_size = batch_size or WishlistAlertService.BATCH_SIZE
+        result = {'changed': 0, 'notifications': 0}
+        for catalog in WishlistAlertService.CATALOGS:
+            after_id = 0
+            while True:
+                rows = WishlistAlertService._changed_batch(catalog, after_id, batch_size)
+                if not rows:
+                    break
+                after_id = rows[-1].product_id
+                try:
+                    result['notifications'] += WishlistAlertService._apply_batch(catalog, rows, min_drop_pct)
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    raise
+                result['changed'] += len(rows)
+        return result
+
+    # In-app channel
+
+    @staticmethod
+    def notifications_query(user_id, unread_only=False):
+        query = WishlistNotification.query.filter(WishlistNotification.user_id == user_id)
+        if unread_only:
+            query = query.filter(WishlistNotification.read_at.is_(None))
+        return query
+
+    @staticmethod
+    def unread_count(user_id):
+        return WishlistAlertService.notifications_query(user_id, unread_only=True).order_by(None).count()
+
+    @staticmethod
+    def mark_read(user_id, notification_ids=None):
+        """Mark the user's notifications (all, or just notification_ids) read; returns how many changed"""
+        notifications = WishlistNotification.__table__
+        statement = update(notifications).where(
+            notifications.c.user_id == user_id,
+            notifications.c.read_at.is_(None)
+        )
+        if notification_ids is not None:
+            statement = statement.where(notifications.c.notification_id.in_(notification_ids))
+        updated = db.session.execute(statement.values(read_at=datetime.now(timezone.utc))).rowcount
+        db.session.commit()
+        return updated
+
+    # Email digests
+
+    @staticmethod
+    def _acquire_digest_lock():
+        """Token if this process may send digests now, None if another one is; sends anyway when Redis is down"""
+        token = uuid.uuid4().hex
+        try:
+            redis_client = get_redis_client(current_app)
+            if not redis_client.set(WishlistAlertService.DIGEST_LOCK_KEY, token, nx=True,
+                                    ex=WishlistAlertService.DIGEST_LOCK_TIMEOUT):
+                return None
+        except Exception as e:
+            logger.warning(f"Wishlist digest lock unavailable: {str(e)}")
+        return token
+
+    @staticmethod
+    def _release_digest_lock(token):
+        try:
+            redis_client = get_redis_client(current_app)
+            if redis_client.get(WishlistAlertService.DIGEST_LOCK_KEY) in (token, token.encode('ascii')):
+                redis_client.delete(WishlistAlertService.DIGEST_LOCK_KEY)
+        except Exception as e:
+            logger.warning(f"Failed to release wishlist digest lock: {str(e)}")
+
+    @staticmethod
+    def _digest_subject(items):
+        kinds = {item.kind for item in items}
+        if kinds == {WishlistNotification.KIND_PRICE_DROP}:
+            return "Price drops on your wishlist"
+        if kinds == {WishlistNotification.KIND_BACK_IN_STOCK}:
+            return "Back in stock on your wishlist"
+        return "Updates on your wishlist"
+
+    @staticmethod
+    def _render_digest(user, items, from_header, msgid_domain):
+        """The digest for one user as message bytes; items are the user's pending notifications, newest first"""
+        subject = WishlistAlertService._digest_subject(items)
+        shown = items[:WishlistAlertService.DIGEST_MAX_ITEMS]
+        html = render_email_html(subject, DIGEST_TEMPLATE, {
+            'name': user.first_name,
+            'items': shown,
+            'more': len(items) - len(shown),
+            'heading': subject
+        })
+        message = EmailMessage(policy=policy.SMTP)
+        message['Subject'] = subject
+        message['From'] = from_header
+        message['To'] = user.email
+        message['Date'] = formatdate(usegmt=True)
+        message['Message-ID'] = make_msgid(domain=msgid_domain)
+        message.set_content(html, subtype='html', charset='utf-8')
+        return message.as_bytes()
+
+    @staticmethod
+    def _send_digest(pool, throttle, sender, email, payload, notification_ids):
+        """Send one digest; returns (notification_ids, digest status)"""
+        try:
+            throttle.wait(email.rpartition('@')[2].lower())
+            pool.send(sender, email, payload)
+            return notification_ids, WishlistNotification.DIGEST_SENT
+        except Exception as e:
+            logger.warning(f"Wishlist digest to {email} failed: {str(e)}")
+            if NewsletterBroadcastService._is_permanent(e):
+                return notification_ids, WishlistNotification.DIGEST_FAILED
+            return notification_ids, WishlistNotification.DIGEST_PENDING
+
+    @staticmethod
+    def _record_digests(results):
+        notifications = WishlistNotification.__table__
+        now = datetime.now(timezone.utc)
+        by_status = {}
+        for notification_ids, status in results:
+            by_status.setdefault(status, []).extend(notification_ids)
+        by_status.pop(WishlistNotification.DIGEST_PENDING, None)
+        for status, notification_ids in by_status.items():
+            db.session.execute(update(notifications).where(
+                notifications.c.notification_id.in_(notification_ids)
+            ).values(digest_status=status, digested_at=now))
+        db.session.commit()
+
+    @staticmethod
+    def send_digests():
+        """
+        Email every user with pending notifications one digest of them. Temporary SMTP
+        failures stay pending for the next run. Returns {'sent', 'failed', 'skipped'} in users.
+        """
+        app = current_app._get_current_object()
+        result = {'sent': 0, 'failed': 0, 'skipped': 0}
+        token = WishlistAlertService._acquire_digest_lock()
+        if not token:
+            return result
+
+        pool = None
+        try:
+            sender, from_header = NewsletterBroadcastService.sender()
+            msgid_domain = sender.rpartition('@')[2] or 'localhost'
+            pool = SmtpConnectionPool(NewsletterBroadcastService.smtp_settings(app),
+                                      NewsletterBroadcastService.MAX_MESSAGES_PER_CONNECTION)
+            throttle = DomainThrottle(app.config.get('NEWSLETTER_DOMAIN_RATE', 5))
+            workers = max(1, app.config.get('NEWSLETTER_SEND_WORKERS', 4))
+            # Alerts created while the digests go out wait for the next run
+            max_id = db.session.query(func.max(WishlistNotification.notification_id)).scalar() or 0
+
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='wishlist-digest') as senders:
+                after_user_id = 0
+                while True:
+                    user_ids = [row.user_id for row in db.session.query(WishlistNotification.user_id).filter(
+                        WishlistNotification.digest_status == WishlistNotification.DIGEST_PENDING,
+                        WishlistNotification.user_id > after_user_id,
+                        WishlistNotification.notification_id <= max_id
+                    ).distinct().order_by(WishlistNotification.user_id).limit(WishlistAlertService.DIGEST_CHUNK_SIZE)]
+                    if not user_ids:
+                        break
+                    after_user_id = user_ids[-1]
+
+                    pending = {}
+                    for item in WishlistNotification.query.filter(
+                        WishlistNotification.digest_status == WishlistNotification.DIGEST_PENDING,
+                        WishlistNotification.user_id.in_(user_ids),
+                        WishlistNotification.notification_id <= max_id
+                    ).order_by(WishlistNotification.notification_id.desc()):
+                        pending.setdefault(item.user_id, []).append(item)
+                    users = {user.id: user for user in db.session.query(
+                        User.id, User.email, User.first_name, User.is_active
+                    ).filter(User.id.in_(user_ids))}
+
+                    results, digests = [], []
+                    for user_id, items in pending.items():
+                        user = users.get(user_id)
+                        notification_ids = [item.notification_id for item in items]
+                        email = user.email if user else ''
+                        if not user or not user.is_active or '@' not in email or any(c in email for c in '\r\n<>'):
+                            results.append((notification_ids, WishlistNotification.DIGEST_SKIPPED))
+                            continue
+                        payload = WishlistAlertService._render_digest(user, items, from_header, msgid_domain)
+                        digests.append((email, payload, notification_ids))
+
+                    sent = list(senders.map(
+                        lambda digest: WishlistAlertService._send_digest(pool, throttle, sender, *digest), digests
+                    ))
+                    results.extend(sent)
+                    WishlistAlertService._record_digests(results)
+                    for _, status in results:
+                        if status != WishlistNotification.DIGEST_PENDING:
+                            result[status] += 1
+                    if sent and all(status == WishlistNotification.DIGEST_PENDING for _, status in sent):
+                        # Nothing got through: the relay is down, leave the rest for the next run
+                        logger.warning("Wishlist digests stopped: SMTP relay unavailable")
+                        break
+        finally:
+            if pool:
+                pool.close()
+            WishlistAlertService._release_digest_lock(token)
+        return result
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_wishlisted_products(session, flush_context, instances):
+    for obj in (*session.new, *session.dirty):
+        if isinstance(obj, WishlistItem):
+            catalog, product_id = WishlistPriceWatch.CATALOG_PRODUCT, obj.product_id
+        elif isinstance(obj, ShopWishlistItem):
+            catalog, product_id = WishlistPriceWatch.CATALOG_SHOP_PRODUCT, obj.shop_product_id
+        else:
+            continue
+        # New wishlist rows, and soft-deleted ones being added back
+        if obj.is_deleted or product_id is None:
+            continue
+        if obj not in session.new and not inspect(obj).attrs.is_deleted.history.has_changes():
+            continue
+        session.info.setdefault('wishlist_watch', set()).add((catalog, product_id))
+
+
+@event.listens_for(Session, 'after_commit')
+def _watch_wishlisted_products(session):
+    products = session.info.pop('wishlist_watch', None)
+    if not products or not has_app_context():
+        return
+    for catalog in WishlistAlertService.CATALOGS:
+        product_ids = {product_id for product_catalog, product_id in products if product_catalog == catalog}
+        if not product_ids:
+            continue
+        try:
+            WishlistAlertService.watch_products(catalog, product_ids)
+        except Exception as e:
+            logger.warning(f"Failed to watch wishlisted {catalog}s {sorted(product_ids)}: {str(e)}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_wishlisted_products(session):
+    session.info.pop('wishlist_watch', None)
+
+
+# Scheduler instance (started from app.py)
+scheduler = BackgroundScheduler(timezone='UTC')
+
+
+def start_wishlist_alert_scheduler(app):
+    """
+    Sweep for price drops and restocks every WISHLIST_ALERT_INTERVAL_MINUTES and email
+    digests every WISHLIST_DIGEST_INTERVAL_MINUTES (0 disables either). Call once at app startup.
+    """
+    interval = app.config.get('WISHLIST_ALERT_INTERVAL_MINUTES', 10)
+    digest_interval = app.config.get('WISHLIST_DIGEST_INTERVAL_MINUTES', 60)
+    if not interval or scheduler.running:
+        return
+
+    def detect():
+        with app.app_context():
+            try:
+                result = WishlistAlertService.detect_changes()
+                if result['notifications']:
+                    logger.info(f"Wishlist alerts: {result}")
+            except Exception as e:
+                logger.warning(f"Wishlist alert sweep failed: {str(e)}")
+            finally:
+                db.session.remove()
+
+    def digest():
+        with app.app_context():
+            try:
+                result = WishlistAlertService.send_digests()
+                if any(result.values()):
+                    logger.info(f"Wishlist digests: {result}")
+            except Exception as e:
+                logger.warning(f"Wishlist digest run failed: {str(e)}")
+            finally:
+                db.session.remove()
+
+    scheduler.add_job(detect, 'interval', minutes=interval, id='wishlist_alert_sweep',
+                      max_instances=1, coalesce=True)
+    if digest_interval:
+        scheduler.add_job(digest, 'interval', minutes=digest_interval, id='wishlist_alert_digest',
+                          max_instances=1, coalesce=True)
+    # Use a thread to avoid blocking the main app
+    threading.Thread(target=scheduler.start, daemon=True).start()